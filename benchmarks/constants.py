@@ -0,0 +1,24 @@
+"""
+Data volumes of the benchmarks, sized after busy production sites.
+"""
+
+# Lines of the multi-line baskets offers are applied to.
+BASKET_LINE_COUNT = 10
+
+# Site offers competing for the lines of a basket, each with its own range.
+SITE_OFFER_COUNT = 50
+
+# Offers of the enterprise customer a learner is linked to.
+ENTERPRISE_OFFER_COUNT = 10
+
+# Codes of the multi-use coupons reported on and created.
+COUPON_CODE_COUNT = 10000
+
+# Lines of an order fulfilled at once, e.g. when purchasing a program.
+FULFILLMENT_LINE_COUNT = 10
+
+# Records of the SDN fallback list for a single country.
+SDN_FALLBACK_RECORD_COUNT = 5000
+
+# Paid orders in the time window verified by verify_transactions.
+ORDER_COUNT = 500
@@ -0,0 +1,111 @@
+"""
+Helpers creating the volumes of data the benchmarks run on.
+"""
+
+
+from decimal import Decimal
+
+from oscar.core.loading import get_class, get_model
+from oscar.test import factories
+
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.payment.core.sdn import process_text
+from ecommerce.extensions.test.factories import (
+    EnterpriseCustomerConditionFactory,
+    EnterpriseOfferFactory,
+    EnterprisePercentageDiscountBenefitFactory,
+    SDNFallbackDataFactory,
+    SDNFallbackMetadataFactory
+)
+
+Benefit = get_model('offer', 'Benefit')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Order = get_model('order', 'Order')
+PaymentEvent = get_model('order', 'PaymentEvent')
+PaymentEventType = get_model('order', 'PaymentEventType')
+PaymentEventTypeName = get_class('order.constants', 'PaymentEventTypeName')
+SDNFallbackData = get_model('payment', 'SDNFallbackData')
+
+
+def create_seats(partner, count, seat_type='verified'):
+    """ Returns seats of the given type for the given number of course runs. """
+    return [
+        CourseFactory(partner=partner).create_or_update_seat(seat_type, True, Decimal(100))
+        for __ in range(count)
+    ]
+
+
+def create_basket(owner, site, products):
+    """ Returns a basket of the given owner, with a line for each of the given products. """
+    basket = factories.BasketFactory(owner=owner, site=site)
+    for product in products:
+        basket.add_product(product)
+    return basket
+
+
+def create_site_offers(products, count):
+    """
+    Returns site offers on overlapping ranges of the given products, so that every product is in the range of
+    several offers, with a mix of condition and benefit types.
+    """
+    offers = []
+    for index in range(count):
+        product_range = factories.RangeFactory()
+        for offset in range(3):
+            product_range.add_product(products[(index + offset) % len(products)])
+
+        condition_type = Condition.COUNT if index % 2 else Condition.COVERAGE
+        benefit_type = Benefit.PERCENTAGE if index % 3 else Benefit.FIXED
+        offers.append(factories.ConditionalOfferFactory(
+            offer_type=ConditionalOffer.SITE,
+            priority=index % 5,
+            condition=factories.ConditionFactory(range=product_range, type=condition_type, value=1),
+            benefit=factories.BenefitFactory(range=product_range, type=benefit_type, value=1 + index % 10),
+        ))
+    return offers
+
+
+def create_enterprise_offers(partner, enterprise_customer_uuid, count):
+    """ Returns offers of the given enterprise customer, each on its own enterprise catalog. """
+    return [
+        EnterpriseOfferFactory(
+            partner=partner,
+            condition=EnterpriseCustomerConditionFactory(enterprise_customer_uuid=enterprise_customer_uuid),
+            benefit=EnterprisePercentageDiscountBenefitFactory(value=1 + index % 10),
+        )
+        for index in range(count)
+    ]
+
+
+def create_paid_orders(count, date_placed):
+    """ Returns orders placed at the given time, each with a line and a payment of its total. """
+    paid, __ = PaymentEventType.objects.get_or_create(name=PaymentEventTypeName.PAID)
+    PaymentEventType.objects.get_or_create(name=PaymentEventTypeName.REFUNDED)
+    product = factories.ProductFactory(categories=None)
+
+    orders = []
+    for __ in range(count):
+        order = factories.OrderFactory(total_incl_tax=Decimal(90))
+        factories.OrderLineFactory(order=order, product=product)
+        orders.append(order)
+    # Orders are always placed now when created.
+    Order.objects.filter(id__in=[order.id for order in orders]).update(date_placed=date_placed)
+    PaymentEvent.objects.bulk_create(
+        PaymentEvent(order=order, amount=order.total_incl_tax, event_type=paid) for order in orders
+    )
+    return orders
+
+
+def create_sdn_fallback_records(count, country):
+    """
+    Returns the given number of current SDN fallback records of individuals from the given country, with their names
+    and addresses processed as on import.
+    """
+    metadata = SDNFallbackMetadataFactory(import_state='Current')
+    records = []
+    for record in SDNFallbackDataFactory.build_batch(count, sdn_fallback_metadata=metadata, countries=country):
+        record.names = ' '.join(process_text(record.names))
+        record.addresses = ' '.join(process_text(record.addresses))
+        records.append(record)
+    return SDNFallbackData.objects.bulk_create(records)
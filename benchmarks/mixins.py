@@ -0,0 +1,61 @@
+import json
+import re
+
+import httpretty
+
+from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url
+from ecommerce.enterprise.tests.mixins import EnterpriseServiceMockMixin
+from ecommerce.programs.tests.mixins import ProgramTestMixin
+
+CONTENT_TYPE = 'application/json'
+SDN_API_URL = 'http://sdn.benchmark.fake/'
+
+
+class ServiceStubsMixin(ProgramTestMixin, EnterpriseServiceMockMixin):
+    """
+    Local stand-ins for the Discovery, Enterprise, LMS and SDN services.
+
+    The stand-ins answer in process, so benchmarks measure this service rather than the network. Requests no
+    stand-in answers fail, instead of leaving the machine.
+    """
+
+    enterprise_customer_uuid = 'cf246b88-d5f6-4908-a522-fc307e0b0c59'
+
+    def setUp(self):
+        super(ServiceStubsMixin, self).setUp()
+        httpretty.enable(allow_net_connect=False)
+        self.addCleanup(httpretty.reset)
+        self.addCleanup(httpretty.disable)
+        self.mock_access_token_response()
+
+    def stub_enterprise_service(self, linked=True, contains_content=True):
+        """ Stubs the Enterprise learner and catalog APIs, optionally linking every learner to an enterprise. """
+        if linked:
+            self.mock_enterprise_learner_api(enterprise_customer_uuid=self.enterprise_customer_uuid)
+        else:
+            self.mock_enterprise_learner_api_for_learner_with_no_enterprise()
+
+        body = json.dumps({'contains_content_items': contains_content})
+        for api_url in (self.ENTERPRISE_CATALOG_URL, self.ENTERPRISE_CATALOG_URL_CUSTOMER_RESOURCE):
+            httpretty.register_uri(
+                httpretty.GET,
+                re.compile(re.escape(api_url) + r'[\w-]+/contains_content_items/'),
+                body=body,
+                content_type=CONTENT_TYPE
+            )
+
+    def stub_lms_api(self):
+        """ Stubs the LMS enrollment and entitlement APIs, which enroll every learner and list nothing owned. """
+        httpretty.register_uri(httpretty.POST, get_lms_enrollment_api_url(), body='{}', content_type=CONTENT_TYPE)
+        httpretty.register_uri(httpretty.GET, get_lms_enrollment_api_url(), body='[]', content_type=CONTENT_TYPE)
+        httpretty.register_uri(
+            httpretty.GET,
+            get_lms_entitlement_api_url() + 'entitlements/',
+            body=json.dumps({'results': []}),
+            content_type=CONTENT_TYPE
+        )
+
+    def stub_sdn_api(self, hits=0):
+        """ Stubs the SDN API, which finds the given number of hits for every search. """
+        body = json.dumps({'total': hits, 'results': [{'score': 100}] * hits})
+        httpretty.register_uri(httpretty.GET, re.compile(re.escape(SDN_API_URL)), body=body, content_type=CONTENT_TYPE)
@@ -0,0 +1,31 @@
+from oscar.core.loading import get_model
+from oscar.test.factories import create_order
+
+from benchmarks.constants import FULFILLMENT_LINE_COUNT
+from benchmarks.factories import create_basket, create_seats
+from benchmarks.mixins import ServiceStubsMixin
+from benchmarks.testcases import BenchmarkTestCase
+from ecommerce.extensions.fulfillment.modules import EnrollmentFulfillmentModule
+from ecommerce.extensions.fulfillment.status import LINE
+
+Line = get_model('order', 'Line')
+
+
+class EnrollmentFulfillmentModuleBenchmarks(ServiceStubsMixin, BenchmarkTestCase):
+    def setUp(self):
+        super(EnrollmentFulfillmentModuleBenchmarks, self).setUp()
+        user = self.create_user()
+        basket = create_basket(user, self.site, create_seats(self.partner, FULFILLMENT_LINE_COUNT))
+        self.order = create_order(basket=basket, user=user)
+        self.stub_lms_api()
+
+    def test_fulfill_product(self):
+        """ Benchmark enrolling a learner in the courses of every line of an order. """
+        def setup():
+            # Every round fulfills the same open lines.
+            self.order.lines.update(status=LINE.OPEN)
+            return (self.order, list(self.order.lines.all())), {}
+
+        __, lines = self.benchmark.pedantic(EnrollmentFulfillmentModule().fulfill_product, setup=setup, rounds=20)
+
+        self.assertEqual({line.status for line in lines}, {LINE.COMPLETE})
@@ -0,0 +1,87 @@
+from urllib.parse import urlencode
+
+from django.urls import reverse
+from oscar.core.loading import get_class, get_model
+
+from benchmarks.constants import BASKET_LINE_COUNT, ENTERPRISE_OFFER_COUNT, SITE_OFFER_COUNT
+from benchmarks.factories import create_basket, create_enterprise_offers, create_seats, create_site_offers
+from benchmarks.mixins import ServiceStubsMixin
+from benchmarks.testcases import BenchmarkTestCase
+from ecommerce.extensions.test.factories import PercentageDiscountBenefitWithoutRangeFactory, ProgramOfferFactory
+
+Applicator = get_class('offer.applicator', 'Applicator')
+Product = get_model('catalogue', 'Product')
+
+
+class ApplicatorBenchmarks(ServiceStubsMixin, BenchmarkTestCase):
+    def setUp(self):
+        super(ApplicatorBenchmarks, self).setUp()
+        self.user = self.create_user()
+        self.stub_lms_api()
+
+    def apply_offers(self, basket, bundle_id=None):
+        basket.reset_offer_applications()
+        Applicator().apply(basket, self.user, bundle_id=bundle_id)
+
+    def test_site_offers(self):
+        """ Benchmark applying overlapping site offers to a multi-line basket. """
+        seats = create_seats(self.partner, BASKET_LINE_COUNT)
+        create_site_offers(seats, SITE_OFFER_COUNT)
+        basket = create_basket(self.user, self.site, seats)
+        self.stub_enterprise_service(linked=False)
+
+        self.benchmark(self.apply_offers, basket)
+
+        self.assertTrue(basket.offer_discounts)
+
+    def test_enterprise_offers(self):
+        """ Benchmark applying the offers of an enterprise to a multi-line basket of one of its learners. """
+        seats = create_seats(self.partner, BASKET_LINE_COUNT)
+        create_enterprise_offers(self.partner, self.enterprise_customer_uuid, ENTERPRISE_OFFER_COUNT)
+        basket = create_basket(self.user, self.site, seats)
+        self.stub_enterprise_service()
+
+        self.benchmark(self.apply_offers, basket)
+
+        self.assertTrue(basket.offer_discounts)
+
+    def test_program_offer(self):
+        """ Benchmark applying a program offer to a basket holding a seat of every course of the program. """
+        offer = ProgramOfferFactory(
+            partner=self.partner, site=self.site, benefit=PercentageDiscountBenefitWithoutRangeFactory(value=20)
+        )
+        program = self.mock_program_detail_endpoint(
+            offer.condition.program_uuid, self.site_configuration.discovery_api_url
+        )
+        skus = [
+            seat['sku']
+            for course in program['courses']
+            for seat in course['course_runs'][0]['seats'] if seat['type'] == 'verified'
+        ]
+        basket = create_basket(self.user, self.site, Product.objects.filter(stockrecords__partner_sku__in=skus))
+        self.stub_enterprise_service(linked=False)
+
+        self.benchmark(self.apply_offers, basket, bundle_id=program['uuid'])
+
+        self.assertTrue(basket.offer_discounts)
+
+
+class BasketCalculateViewBenchmarks(ServiceStubsMixin, BenchmarkTestCase):
+    def setUp(self):
+        super(BasketCalculateViewBenchmarks, self).setUp()
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+        self.seats = create_seats(self.partner, BASKET_LINE_COUNT)
+        create_site_offers(self.seats, SITE_OFFER_COUNT)
+        self.stub_enterprise_service(linked=False)
+
+    def test_calculate(self):
+        """ Benchmark calculating the total of a multi-line basket of a learner, with site offers applied. """
+        params = [('sku', seat.stockrecords.first().partner_sku) for seat in self.seats]
+        params.append(('username', self.user.username))
+        url = '{path}?{params}'.format(path=reverse('api:v2:baskets:calculate'), params=urlencode(params))
+
+        response = self.benchmark(self.client.get, url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(response.data['total_incl_tax'], response.data['total_incl_tax_excl_discounts'])
@@ -0,0 +1,30 @@
+from benchmarks.constants import SDN_FALLBACK_RECORD_COUNT
+from benchmarks.factories import create_sdn_fallback_records
+from benchmarks.mixins import SDN_API_URL, ServiceStubsMixin
+from benchmarks.testcases import BenchmarkTestCase
+from ecommerce.extensions.payment.core.sdn import SDNClient, checkSDNFallback, invalidate_sdn_check_cache
+
+
+class SDNBenchmarks(ServiceStubsMixin, BenchmarkTestCase):
+    name = 'Jane Doe'
+    city = 'Springfield'
+    country = 'US'
+
+    def test_check_sdn_fallback(self):
+        """ Benchmark checking an individual against the SDN fallback records of their country. """
+        create_sdn_fallback_records(SDN_FALLBACK_RECORD_COUNT, self.country)
+
+        hit_count = self.benchmark(checkSDNFallback, self.name, self.city, self.country)
+
+        self.assertEqual(hit_count, 0)
+
+    def test_search(self):
+        """ Benchmark checking an individual against the SDN API, with the results of earlier checks expired. """
+        self.stub_sdn_api()
+        client = SDNClient(SDN_API_URL, 'fake-key', 'SDN,TEST')
+
+        response = self.benchmark.pedantic(
+            client.search, args=(self.name, self.city, self.country), setup=invalidate_sdn_check_cache, rounds=100
+        )
+
+        self.assertEqual(response['total'], 0)
@@ -0,0 +1,25 @@
+import datetime
+
+import pytz
+from django.core.management import call_command
+from testfixtures import LogCapture
+
+from benchmarks.constants import ORDER_COUNT
+from benchmarks.factories import create_paid_orders
+from benchmarks.testcases import BenchmarkTestCase
+from ecommerce.core.management.commands.verify_transactions import DEFAULT_END_DELTA_TIME, DEFAULT_START_DELTA_TIME
+
+LOGGER_NAME = 'ecommerce.core.management.commands.verify_transactions'
+
+
+class VerifyTransactionsBenchmarks(BenchmarkTestCase):
+    def test_verify_transactions(self):
+        """ Benchmark verifying the payments of the orders placed in the default time window. """
+        time_delta = (DEFAULT_START_DELTA_TIME + DEFAULT_END_DELTA_TIME) / 2
+        create_paid_orders(ORDER_COUNT, datetime.datetime.now(pytz.utc) - datetime.timedelta(minutes=time_delta))
+
+        # The command raises a CommandError if any order is not paid for in full.
+        with LogCapture(LOGGER_NAME) as logger:
+            self.benchmark.pedantic(call_command, args=('verify_transactions',), rounds=5)
+
+        logger.check_present((LOGGER_NAME, 'INFO', 'Number of orders to verify: {}'.format(ORDER_COUNT)))
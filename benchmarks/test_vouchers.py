@@ -0,0 +1,61 @@
+import datetime
+
+from oscar.core.loading import get_model
+
+from benchmarks.constants import COUPON_CODE_COUNT
+from benchmarks.testcases import BenchmarkTestCase
+from ecommerce.coupons.tests.mixins import CouponMixin
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.voucher.utils import create_vouchers, generate_coupon_report
+
+Benefit = get_model('offer', 'Benefit')
+Catalog = get_model('catalogue', 'Catalog')
+CouponVouchers = get_model('voucher', 'CouponVouchers')
+Voucher = get_model('voucher', 'Voucher')
+
+
+class VoucherBenchmarks(CouponMixin, BenchmarkTestCase):
+    # Creating and reporting on thousands of codes takes seconds, so fewer rounds are timed.
+    rounds = 3
+
+    def setUp(self):
+        super(VoucherBenchmarks, self).setUp()
+        seat = CourseFactory(partner=self.partner).create_or_update_seat('verified', True, 100)
+        self.catalog = Catalog.objects.create(partner=self.partner)
+        self.catalog.stock_records.add(seat.stockrecords.first())
+
+    def test_generate_coupon_report(self):
+        """ Benchmark generating the report of a coupon with thousands of codes. """
+        coupon = self.create_coupon(catalog=self.catalog, partner=self.partner, quantity=COUPON_CODE_COUNT)
+        coupon_vouchers = CouponVouchers.objects.filter(coupon=coupon)
+
+        __, rows = self.benchmark.pedantic(generate_coupon_report, args=(coupon_vouchers,), rounds=self.rounds)
+
+        # The report has a row for the coupon, followed by a row for each of its codes.
+        self.assertEqual(len(rows), COUPON_CODE_COUNT + 1)
+
+    def test_create_vouchers(self):
+        """ Benchmark creating thousands of codes for a coupon. """
+        data = {
+            'benefit_type': Benefit.PERCENTAGE,
+            'benefit_value': 100,
+            'catalog': self.catalog,
+            'end_datetime': datetime.datetime.now() + datetime.timedelta(days=1),
+            'enterprise_customer': None,
+            'enterprise_customer_catalog': None,
+            'name': 'Benchmark voucher',
+            'quantity': COUPON_CODE_COUNT,
+            'start_datetime': datetime.datetime.now() - datetime.timedelta(days=1),
+            'voucher_type': Voucher.SINGLE_USE,
+        }
+        existing_voucher_ids = list(Voucher.objects.values_list('id', flat=True))
+
+        def setup():
+            # Every round creates the codes of a new coupon, alongside the same number of existing codes.
+            Voucher.objects.exclude(id__in=existing_voucher_ids).delete()
+            coupon = self.create_coupon(catalog=self.catalog, partner=self.partner, quantity=1)
+            return (), dict(data, coupon=coupon)
+
+        vouchers = self.benchmark.pedantic(create_vouchers, setup=setup, rounds=self.rounds)
+
+        self.assertEqual(len(vouchers), COUPON_CODE_COUNT)
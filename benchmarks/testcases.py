@@ -0,0 +1,16 @@
+import pytest
+
+from ecommerce.tests.testcases import TestCase
+
+
+class BenchmarkTestCase(TestCase):
+    """
+    Base test case for benchmarks.
+
+    Benchmarks time their code with ``self.benchmark``, the pytest-benchmark fixture. Code that changes the data it
+    runs on should be timed with ``self.benchmark.pedantic``, restoring the data in its ``setup``.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _benchmark(self, benchmark):
+        self.benchmark = benchmark  # pylint: disable=attribute-defined-outside-init
@@ -0,0 +1,101 @@
+"""
+Concurrent calls to upstream services.
+
+Views such as the basket page make several remote calls that do not depend on each other, e.g. the Discovery
+Service for the course of every basket line, or the LMS for a learner's enrollments and entitlements. Made one
+after another, the latency of a request is the sum of the latencies of its calls. ``fan_out`` runs them
+concurrently on a shared thread pool, so the latency approaches that of the slowest call, and abandons the calls
+that have not completed by a deadline.
+"""
+
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connection
+from edx_django_utils.cache import RequestCache
+from requests.exceptions import Timeout
+
+from ecommerce.core import instrumentation
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """ Returns the thread pool shared by all fan outs of this process, creating it on first use. """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.UPSTREAM_FAN_OUT_MAX_WORKERS,
+                thread_name_prefix='upstream-fan-out',
+            )
+        return _executor
+
+
+def _call_in_thread(func, profiles):
+    try:
+        # Calls are counted by the profiles of the request that fanned them out.
+        with ExitStack() as stack:
+            for request_profile in profiles:
+                stack.enter_context(instrumentation.activate(request_profile))
+            return func()
+    finally:
+        # Worker threads have their own database connections, which must not be leaked. They also have their own
+        # request caches, including the request tier of TieredCache, which no middleware clears between the calls of
+        # different requests.
+        connection.close()
+        RequestCache.clear_all_namespaces()
+
+
+def _call_inline(func):
+    future = Future()
+    try:
+        future.set_result(func())
+    except Exception as exc:  # pylint: disable=broad-except
+        future.set_exception(exc)
+    return future
+
+
+def fan_out(calls, timeout=None):
+    """
+    Runs the given calls concurrently and waits for them to complete.
+
+    The calls run on other threads, which do not share the database connection or the request cache of the calling
+    thread: they should only call upstream services, with anything they need from the database loaded beforehand.
+    The request cache of a worker thread is cleared after each call.
+    Calls are run inline, one after another, if there is a single call or the pool has a single worker.
+
+    Arguments:
+        calls (dict): Mapping keys to callables, taking no arguments, that call upstream services.
+        timeout (float): Seconds after which the calls that have not completed are abandoned. Defaults to the
+            ``UPSTREAM_FAN_OUT_TIMEOUT`` setting.
+
+    Returns:
+        dict: Mapping the keys to completed futures. The result of a future is the value returned by its call, or
+        the exception raised by it; calls abandoned at the deadline raise ``requests.exceptions.Timeout``.
+    """
+    if len(calls) <= 1 or settings.UPSTREAM_FAN_OUT_MAX_WORKERS <= 1:
+        return {key: _call_inline(func) for key, func in calls.items()}
+
+    timeout = settings.UPSTREAM_FAN_OUT_TIMEOUT if timeout is None else timeout
+    executor = get_executor()
+    profiles = instrumentation.get_current_profiles()
+    futures = {key: executor.submit(_call_in_thread, func, profiles) for key, func in calls.items()}
+    wait(futures.values(), timeout=timeout)
+
+    for key, future in futures.items():
+        if not future.done():
+            # Calls that have not started are cancelled. Running calls cannot be interrupted, so their results
+            # are discarded when they complete.
+            future.cancel()
+            logger.warning('Abandoned call [%s] to an upstream service after [%s] seconds.', key, timeout)
+            futures[key] = abandoned = Future()
+            abandoned.set_exception(Timeout('Call [{}] did not complete in [{}] seconds.'.format(key, timeout)))
+    return futures
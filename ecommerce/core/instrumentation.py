@@ -0,0 +1,219 @@
+"""
+Counts the database queries, cache lookups and outbound HTTP calls made while handling a request.
+
+``RequestProfileMiddleware`` profiles requests and reports their profiles, tagged by view name, to the logs and as
+custom metrics. ``profile`` profiles any block of code, e.g. to hold an endpoint to a budget in its tests.
+
+Database queries are counted with a database execute wrapper. TieredCache lookups, the requests sent by ``requests``
+sessions, which back the API clients of this service, and the requests sent by ``urllib3`` pool managers, which back
+the CyberSource SDK, have no such hooks, so their methods are wrapped the first time a profile is started. The
+wrappers only record the calls made on threads that are being profiled.
+"""
+
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from urllib.parse import urlparse
+
+import requests
+import urllib3
+from django.db import connections
+from edx_django_utils import monitoring as monitoring_utils
+from edx_django_utils.cache import DEFAULT_REQUEST_CACHE, TieredCache
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CACHE_TIER = 'request'
+DJANGO_CACHE_TIER = 'django'
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+class RequestProfile:
+    """ Counts of the database queries, cache lookups and outbound HTTP calls made while profiling. """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.queries = 0
+        self.db_time = 0.0
+        # Number of executions of every query, keyed by SQL and parameters.
+        self.statements = Counter()
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
+        self.http_calls = 0
+        self.http_time = 0.0
+        self.http_hosts = Counter()
+        # Calls may be recorded by the threads of a fan out, as well as by the profiled thread.
+        self._lock = threading.Lock()
+
+    @property
+    def duplicate_queries(self):
+        """ Number of queries that repeated an earlier query, with the same SQL and parameters. """
+        return sum(count - 1 for count in self.statements.values())
+
+    def get_repeated_queries(self, limit=3):
+        """
+        Returns the SQL of the queries executed more than once, with any parameters, and the number of executions
+        of each, most executed first. Many executions of the same SQL usually point to an N+1 query problem.
+        """
+        executions = Counter()
+        for (sql, __), count in self.statements.items():
+            executions[sql] += count
+        return [(sql, count) for sql, count in executions.most_common(limit) if count > 1]
+
+    def record_query(self, sql, params, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            self.statements[(sql, repr(params))] += 1
+
+    def record_cache_lookup(self, tier, hit):
+        with self._lock:
+            if hit:
+                self.cache_hits[tier] += 1
+            else:
+                self.cache_misses[tier] += 1
+
+    def record_http_call(self, url, duration):
+        with self._lock:
+            self.http_calls += 1
+            self.http_time += duration
+            self.http_hosts[urlparse(url).netloc] += 1
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'queries': self.queries,
+            'duplicate_queries': self.duplicate_queries,
+            'repeated_queries': self.get_repeated_queries(),
+            'db_time': round(self.db_time, 4),
+            'cache_hits': dict(self.cache_hits),
+            'cache_misses': dict(self.cache_misses),
+            'http_calls': self.http_calls,
+            'http_time': round(self.http_time, 4),
+            'http_hosts': dict(self.http_hosts),
+        }
+
+
+def get_current_profiles():
+    """ Returns the profiles active on the current thread, outermost first. """
+    return getattr(_local, 'profiles', [])
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    started = time.time()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.time() - started
+        for request_profile in get_current_profiles():
+            request_profile.record_query(sql, params, duration)
+
+
+def _install():
+    """ Wraps the TieredCache, requests and urllib3 methods whose calls are recorded. """
+    global _installed  # pylint: disable=global-statement
+    with _install_lock:
+        if _installed:
+            return
+
+        get_cached_response = TieredCache.get_cached_response.__func__
+
+        def profiled_get_cached_response(cls, key):
+            profiles = get_current_profiles()
+            if not profiles:
+                return get_cached_response(cls, key)
+
+            in_request_cache = DEFAULT_REQUEST_CACHE.get_cached_response(key).is_found
+            response = get_cached_response(cls, key)
+            for request_profile in profiles:
+                request_profile.record_cache_lookup(REQUEST_CACHE_TIER, in_request_cache)
+                if not in_request_cache:
+                    request_profile.record_cache_lookup(DJANGO_CACHE_TIER, response.is_found)
+            return response
+
+        send = requests.Session.send
+
+        def profiled_send(session, request, **kwargs):
+            started = time.time()
+            try:
+                return send(session, request, **kwargs)
+            finally:
+                duration = time.time() - started
+                for request_profile in get_current_profiles():
+                    request_profile.record_http_call(request.url, duration)
+
+        # Sessions send requests with connection pools of their own, rather than with pool managers, so the requests
+        # recorded by these two wrappers do not overlap.
+        urlopen = urllib3.PoolManager.urlopen
+
+        def profiled_urlopen(pool_manager, method, url, *args, **kwargs):
+            started = time.time()
+            try:
+                return urlopen(pool_manager, method, url, *args, **kwargs)
+            finally:
+                duration = time.time() - started
+                for request_profile in get_current_profiles():
+                    request_profile.record_http_call(url, duration)
+
+        TieredCache.get_cached_response = classmethod(profiled_get_cached_response)
+        requests.Session.send = profiled_send
+        urllib3.PoolManager.urlopen = profiled_urlopen
+        _installed = True
+
+
+@contextmanager
+def activate(request_profile):
+    """
+    Records the calls made on the current thread to the given profile, as well as to the profiles already active
+    on the thread.
+    """
+    _install()
+    profiles = get_current_profiles()
+    with ExitStack() as stack:
+        if not profiles:
+            # The wrapper records to every active profile, so it is only installed by the outermost one.
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_execute_wrapper))
+        _local.profiles = profiles + [request_profile]
+        try:
+            yield
+        finally:
+            _local.profiles = profiles
+
+
+@contextmanager
+def profile(name=None):
+    """
+    Profiles the code run in the context.
+
+    Example:
+
+        with profile('basket:summary') as request_profile:
+            ...
+        logger.info('%d queries', request_profile.queries)
+
+    Yields:
+        RequestProfile
+    """
+    request_profile = RequestProfile(name)
+    with activate(request_profile):
+        yield request_profile
+
+
+def report(request_profile):
+    """ Logs the given profile, and sets its counts as custom metrics of the current transaction. """
+    data = request_profile.as_dict()
+    logger.info('Request profile: %s', json.dumps(data, sort_keys=True))
+
+    for key in ('queries', 'duplicate_queries', 'db_time', 'http_calls', 'http_time'):
+        monitoring_utils.set_custom_metric('profile_{}'.format(key), data[key])
+    for tier in (REQUEST_CACHE_TIER, DJANGO_CACHE_TIER):
+        monitoring_utils.set_custom_metric('profile_{}_cache_hits'.format(tier), request_profile.cache_hits[tier])
+        monitoring_utils.set_custom_metric('profile_{}_cache_misses'.format(tier), request_profile.cache_misses[tier])
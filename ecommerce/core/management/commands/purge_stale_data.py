@@ -0,0 +1,96 @@
+"""
+Management command that purges stale commerce data according to the retention policies in ecommerce.core.purge.
+
+Rows are deleted in primary key order with adaptively sized batches, and progress is checkpointed so an
+interrupted purge resumes where it stopped.
+"""
+
+
+from django.core.management import BaseCommand, CommandError
+
+from ecommerce.core.purge import PURGE_POLICIES, PurgeEngine, get_purge_policy
+
+
+class Command(BaseCommand):
+    help = 'Purge stale data according to the configured retention policies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('policies',
+                            nargs='*',
+                            metavar='POLICY',
+                            help='Names of the policies to run. Available policies: {}.'.format(
+                                ', '.join(sorted(PURGE_POLICIES))))
+        parser.add_argument('--all',
+                            action='store_true',
+                            dest='all',
+                            default=False,
+                            help='Run all available policies.')
+        parser.add_argument('-b', '--batch-size',
+                            action='store',
+                            dest='batch_size',
+                            default=1000,
+                            type=int,
+                            help='Initial size of each batch of rows to be deleted.')
+        parser.add_argument('--max-batch-size',
+                            action='store',
+                            dest='max_batch_size',
+                            default=10000,
+                            type=int,
+                            help='Upper bound for the adaptive batch size.')
+        parser.add_argument('--target-batch-seconds',
+                            action='store',
+                            dest='target_batch_seconds',
+                            default=1.0,
+                            type=float,
+                            help='Batch duration the adaptive batch size aims for.')
+        # Sleeping between each batch deletion gives MySQL time to process other connections and replicas
+        # time to catch up. The engine sleeps for at least as long as the previous batch took.
+        parser.add_argument('-s', '--sleep-seconds',
+                            action='store',
+                            dest='sleep_seconds',
+                            default=1.0,
+                            type=float,
+                            help='Minimum seconds to sleep between each batch deletion.')
+        parser.add_argument('--reset',
+                            action='store_true',
+                            dest='reset',
+                            default=False,
+                            help='Discard saved checkpoints and start each purge from the beginning of the table.')
+        parser.add_argument('--commit',
+                            action='store_true',
+                            dest='commit',
+                            default=False,
+                            help='Actually delete the rows.')
+
+    def handle(self, *args, **options):
+        names = sorted(PURGE_POLICIES) if options['all'] else options['policies']
+        if not names:
+            raise CommandError('Specify one or more policies, or --all.')
+
+        unknown = sorted(set(names) - set(PURGE_POLICIES))
+        if unknown:
+            raise CommandError('Unknown purge policies: {}.'.format(', '.join(unknown)))
+
+        for name in names:
+            engine = PurgeEngine(
+                get_purge_policy(name),
+                batch_size=options['batch_size'],
+                max_batch_size=options['max_batch_size'],
+                target_batch_seconds=options['target_batch_seconds'],
+                sleep_seconds=options['sleep_seconds'],
+                progress_callback=lambda progress: self.stderr.write(str(progress)),
+            )
+
+            if options['reset']:
+                engine.reset()
+
+            if not options['commit']:
+                self.stderr.write(
+                    'This has been an example operation. If the --commit flag had been included, the command '
+                    'would have deleted [{count}] rows for policy [{name}].'.format(count=engine.count(), name=name)
+                )
+                continue
+
+            progress = engine.run()
+            self.stderr.write('Purge [{name}] complete. Deleted [{deleted}] rows at [{rate:.1f}] rows/sec.'.format(
+                name=name, deleted=progress.rows_deleted, rate=progress.rows_per_second))
@@ -1,12 +1,15 @@
 """
 Tests for Django management command to download csv for SDN fallback.
 """
+import hashlib
+
 import requests
 import responses
 from django.core.management import call_command
 from mock import patch
 from testfixtures import LogCapture, StringComparison
 
+from ecommerce.extensions.payment.models import SDNFallbackData, SDNFallbackMetadata
 from ecommerce.tests.testcases import TestCase
 
 
@@ -19,6 +22,10 @@ class TestDownloadSndFallbackCommand(TestCase):
             def __init__(self, **kwargs):
                 self.__dict__ = kwargs
 
+            def iter_content(self, chunk_size=1):
+                for start in range(0, len(self.content), chunk_size):
+                    yield self.content[start:start + chunk_size]
+
         #  mock response for csv download: just one row of the csv
         self.test_response = TestResponse(**{
             'content': bytes('_id,source,entity_number,type,programs,name,title,addresses,federal_register_notice,start_date,end_date,standard_order,license_requirement,license_policy,call_sign,vessel_type,gross_tonnage,gross_registered_tonnage,vessel_flag,vessel_owner,remarks,source_list_url,alt_names,citizenships,dates_of_birth,nationalities,places_of_birth,source_information_url,ids\ne5a9eff64cec4a74ed5e9e93c2d851dc2d9132d2,Denied Persons List (DPL) - Bureau of Industry and Security,,,, MICKEY MOUSE,,"123 S. TEST DRIVE, SCOTTSDALE, AZ, 85251",82 F.R. 48792 10/01/2017,2017-10-18,2020-10-15,Y,,,,,,,,,FR NOTICE ADDED,http://bit.ly/1Qi5heF,,,,,,http://bit.ly/1iwxiF0', 'utf-8'),  # pylint: disable=line-too-long
@@ -51,6 +58,23 @@ class TestDownloadSndFallbackCommand(TestCase):
                 )
             )
 
+    @patch('ecommerce.core.management.commands.populate_sdn_fallback_data_and_metadata.DOWNLOAD_CHUNK_SIZE', 100)
+    @patch('requests.Session.get')
+    def test_handle_streams_download(self, mock_response):
+        """ Verify the csv is streamed, checksummed and imported in batches. """
+        mock_response.return_value = self.test_response
+
+        with patch.object(SDNFallbackData.objects, 'bulk_create', wraps=SDNFallbackData.objects.bulk_create) as bulk:
+            call_command('populate_sdn_fallback_data_and_metadata', '--threshold=0.0001', '--batch-size=1')
+
+        self.assertTrue(mock_response.call_args[1]['stream'])
+        self.assertEqual(bulk.call_count, 1)
+        self.assertEqual(
+            SDNFallbackMetadata.objects.get(import_state='Current').file_checksum,
+            hashlib.sha256(self.test_response.content).hexdigest()
+        )
+        self.assertEqual(SDNFallbackData.objects.count(), 1)
+
     @patch('requests.Session.get')
     def test_handle_fail_size(self, mock_response):
         """ Test using mock response from setup, using threshold it will NOT clear"""
@@ -0,0 +1,65 @@
+"""
+Tests for the purge_stale_data management command.
+"""
+
+
+from io import StringIO
+
+import mock
+from django.core.management import CommandError, call_command
+from oscar.core.loading import get_model
+from oscar.test import factories
+
+from ecommerce.extensions.test.factories import create_order
+from ecommerce.tests.testcases import TestCase
+
+Basket = get_model('basket', 'Basket')
+
+
+@mock.patch('ecommerce.core.purge.time.sleep', mock.Mock())
+class PurgeStaleDataCommandTests(TestCase):
+    command = 'purge_stale_data'
+
+    def setUp(self):
+        super(PurgeStaleDataCommandTests, self).setUp()
+        self.orders = [create_order() for __ in range(3)]
+        self.unordered_basket = factories.BasketFactory()
+
+    def test_without_commit(self):
+        """ Verify the command reports the backlog without deleting anything if the commit flag is not set. """
+        out = StringIO()
+        call_command(self.command, 'ordered_baskets', stderr=out)
+
+        self.assertEqual(Basket.objects.count(), 4)
+        self.assertEqual(
+            out.getvalue().strip(),
+            'This has been an example operation. If the --commit flag had been included, the command '
+            'would have deleted [3] rows for policy [ordered_baskets].'
+        )
+
+    def test_with_commit(self):
+        """ Verify the command deletes the rows selected by the policy and reports its throughput. """
+        out = StringIO()
+        call_command(self.command, 'ordered_baskets', commit=True, batch_size=2, stderr=out)
+
+        self.assertEqual(list(Basket.objects.all()), [self.unordered_basket])
+        output = out.getvalue().strip()
+        self.assertIn('rows/sec', output)
+        self.assertIn('approximately [1] rows remaining', output)
+        self.assertIn('Purge [ordered_baskets] complete. Deleted [3] rows at [', output)
+
+    def test_all(self):
+        """ Verify every registered policy runs with the --all flag. """
+        out = StringIO()
+        call_command(self.command, all=True, commit=True, stderr=out)
+
+        self.assertEqual(list(Basket.objects.all()), [self.unordered_basket])
+        self.assertIn('Purge [expired_sessions] complete.', out.getvalue())
+
+    def test_invalid_policies(self):
+        """ Verify an error is raised for missing or unknown policies. """
+        with self.assertRaisesMessage(CommandError, 'Specify one or more policies, or --all.'):
+            call_command(self.command)
+
+        with self.assertRaisesMessage(CommandError, 'Unknown purge policies: bogus.'):
+            call_command(self.command, 'ordered_baskets', 'bogus')
@@ -0,0 +1,37 @@
+"""
+Middleware for core app to profile requests.
+"""
+
+
+import random
+
+from django.conf import settings
+
+from ecommerce.core import instrumentation
+
+
+class RequestProfileMiddleware:
+    """
+    Middleware that counts the database queries, cache lookups and outbound HTTP calls made while handling a sample
+    of requests, and reports them tagged by the name of the view that handled the request.
+
+    Note:
+        This middleware should be added near the top of the middleware list, so the calls made by other middleware
+        are counted as well. Queries made while a streaming response is being consumed are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+
+        with instrumentation.profile() as request_profile:
+            response = self.get_response(request)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match:
+            request_profile.name = resolver_match.view_name or resolver_match._func_path  # pylint: disable=protected-access
+        instrumentation.report(request_profile)
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-19 08:58
+
+from django.db import migrations, models
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0061_auto_20200407_1725'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Name')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Last processed ID')),
+                ('rows_processed', models.BigIntegerField(default=0, verbose_name='Rows processed')),
+            ],
+            options={
+                'get_latest_by': 'modified',
+                'abstract': False,
+            },
+        ),
+    ]
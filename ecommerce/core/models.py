@@ -2,20 +2,26 @@ import datetime
 import hashlib
 import logging
 from urllib.parse import urljoin, urlsplit
+from uuid import uuid4
 
+import crum
 import waffle
 from analytics import Client as SegmentClient
 from dateutil.parser import parse
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
+from django_extensions.db.models import TimeStampedModel
 from edx_django_utils import monitoring as monitoring_utils
-from edx_django_utils.cache import TieredCache
+from edx_django_utils.cache import RequestCache, TieredCache
 from edx_rbac.models import UserRole, UserRoleAssignment
 from edx_rest_api_client.client import EdxRestApiClient
 from jsonfield.fields import JSONField
@@ -32,6 +38,34 @@ from ecommerce.extensions.payment.helpers import get_processor_class, get_proces
 
 log = logging.getLogger(__name__)
 
+SITE_CONFIGURATION_CACHE_VERSION_KEY = 'site_configuration_cache_version'
+SITE_CONFIGURATION_CACHE_VERSION_NAMESPACE = 'core.models.site_configuration_cache_version'
+
+
+def get_site_configuration_cache_version():
+    """
+    Returns the current version of the process-local caches of site configurations.
+
+    The version is shared by all processes through the Django cache. A new version is started when it is invalidated,
+    or when it expires, so that processes that missed an invalidation reload their caches eventually. During a
+    request, the version is memoized in the request cache, so that the Django cache is read once per request.
+    """
+    request_cache = None
+    if crum.get_current_request() is not None:
+        request_cache = RequestCache(SITE_CONFIGURATION_CACHE_VERSION_NAMESPACE)
+        cached_response = request_cache.get_cached_response(SITE_CONFIGURATION_CACHE_VERSION_KEY)
+        if cached_response.is_found:
+            return cached_response.value
+
+    version = cache.get(SITE_CONFIGURATION_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(SITE_CONFIGURATION_CACHE_VERSION_KEY, uuid4().hex, settings.SITE_CONFIGURATION_CACHE_TIMEOUT)
+        version = cache.get(SITE_CONFIGURATION_CACHE_VERSION_KEY)
+
+    if request_cache is not None:
+        request_cache.set(SITE_CONFIGURATION_CACHE_VERSION_KEY, version)
+    return version
+
 
 class SiteConfiguration(models.Model):
     """Tenant configuration.
@@ -40,6 +74,11 @@ class SiteConfiguration(models.Model):
     providing databased-backed configuration specific to each site.
     """
 
+    # Process-local cache of site configurations, with their sites and partners, keyed by site ID.
+    _cache = {}
+    # Enabled payment processors of this instance, with the cache key they were resolved for.
+    _payment_processors_cache = None
+
     site = models.OneToOneField('sites.Site', null=False, blank=False, on_delete=models.CASCADE)
     partner = models.ForeignKey('partner.Partner', null=False, blank=False, on_delete=models.CASCADE)
     lms_url_root = models.URLField(
@@ -212,6 +251,39 @@ class SiteConfiguration(models.Model):
         blank=True
     )
 
+    @classmethod
+    def get_cached(cls, site_id):
+        """
+        Returns the configuration of a site, with its site and partner, from a process-local cache.
+
+        Nearly every request needs the configuration and partner of a site, and those of sites loaded through foreign
+        keys, e.g. `basket.site`, are queried again each time. The cached configurations are shared by all requests
+        of the process, and reloaded when their version changes.
+
+        Arguments:
+            site_id (int)
+
+        Returns:
+            SiteConfiguration
+
+        Raises:
+            SiteConfiguration.DoesNotExist: If the site is not configured.
+        """
+        version = get_site_configuration_cache_version()
+        cached = cls._cache.get(site_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        site_configuration = cls.objects.select_related('site', 'partner').get(site_id=site_id)
+        cls._cache[site_id] = (version, site_configuration)
+        return site_configuration
+
+    @classmethod
+    def invalidate_cache(cls):
+        """ Invalidates the caches of site configurations, and of their payment processors, in all processes. """
+        cache.delete(SITE_CONFIGURATION_CACHE_VERSION_KEY)
+        RequestCache(SITE_CONFIGURATION_CACHE_VERSION_NAMESPACE).clear()
+
     @property
     def payment_processors_set(self):
         """
@@ -270,6 +342,14 @@ class SiteConfiguration(models.Model):
         Returns:
             list[BasePaymentProcessor]: Returns payment processor classes enabled for the corresponding Site
         """
+        # The enabled processors depend on the site, the settings and the waffle switches of the processors.
+        # They are resolved once per version of the site configuration caches, which switch changes invalidate.
+        cache_key = (
+            get_site_configuration_cache_version(), self.payment_processors, tuple(settings.PAYMENT_PROCESSORS)
+        )
+        if self._payment_processors_cache and self._payment_processors_cache[0] == cache_key:
+            return list(self._payment_processors_cache[1])
+
         all_processors = self._all_payment_processors()
         all_processor_names = {processor.NAME for processor in all_processors}
 
@@ -280,10 +360,12 @@ class SiteConfiguration(models.Model):
                 'Unknown payment processors [%s] are configured for site %s', processor_config_repr, self.site.id
             )
 
-        return [
+        processors = [
             processor for processor in all_processors
             if processor.NAME in self.payment_processors_set and processor.is_enabled()
         ]
+        self._payment_processors_cache = (cache_key, processors)
+        return list(processors)
 
     def get_client_side_payment_processor_class(self):
         """ Returns the payment processor class to be used for client-side payments.
@@ -823,3 +905,31 @@ class EcommerceFeatureRoleAssignment(UserRoleAssignment):
         Return uniquely identifying string representation.
         """
         return self.__str__()
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(post_save, sender=SiteConfiguration)
+@receiver(post_delete, sender=SiteConfiguration)
+@receiver(post_save, sender='partner.Partner')
+@receiver(post_delete, sender='partner.Partner')
+def invalidate_site_configuration_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """ Invalidates the cached site configurations when a site, its configuration or its partner changes. """
+    SiteConfiguration.invalidate_cache()
+
+
+class JobCheckpoint(TimeStampedModel):
+    """
+    Progress marker for long-running batch jobs (e.g. data purges).
+
+    Batch jobs walk their tables in primary key order. Recording the last primary key handled allows an
+    interrupted run to resume where it stopped instead of rescanning the table from the beginning.
+     .. no_pii:
+    """
+
+    name = models.CharField(_('Name'), unique=True, max_length=255)
+    last_id = models.BigIntegerField(_('Last processed ID'), default=0)
+    rows_processed = models.BigIntegerField(_('Rows processed'), default=0)
+
+    def __str__(self):
+        return '{name} [{last_id}]'.format(name=self.name, last_id=self.last_id)
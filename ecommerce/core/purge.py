@@ -0,0 +1,304 @@
+"""
+Retention policies and a batched purge engine for stale commerce data.
+
+Each policy describes which rows of a single table are eligible for deletion. The engine walks the
+eligible rows in primary key order (keyset pagination), so sparse id ranges cost nothing, and deletes
+them in batches whose size adapts to the observed delete latency. Progress is checkpointed after every
+batch so an interrupted purge resumes where it stopped.
+"""
+
+
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+
+from ecommerce.core.models import JobCheckpoint
+
+logger = logging.getLogger(__name__)
+
+ArchivedPaymentProcessorResponse = get_model('payment', 'ArchivedPaymentProcessorResponse')
+Basket = get_model('basket', 'Basket')
+PaymentProcessorResponse = get_model('payment', 'PaymentProcessorResponse')
+Product = get_model('catalogue', 'Product')
+StockRecord = get_model('partner', 'StockRecord')
+
+
+class PurgePolicy:
+    """
+    Describes the rows of a single table that are eligible for deletion.
+
+    Subclasses must set ``name`` and implement ``get_queryset``. Policies with a ``retention_days`` value only
+    purge rows older than that many days; the value can be overridden with the ``PURGE_RETENTION_DAYS`` setting.
+    Policies may override ``delete`` to move rows elsewhere, e.g. to an archive, rather than dropping them.
+    """
+    name = None
+    description = None
+    retention_days = None
+    # Whether progress can be checkpointed. This requires an integer primary key.
+    resumable = True
+
+    def get_retention_days(self):
+        return settings.PURGE_RETENTION_DAYS.get(self.name, self.retention_days)
+
+    def get_cutoff(self):
+        """ Returns the datetime before which rows are considered stale, or None if retention does not apply. """
+        retention_days = self.get_retention_days()
+        if retention_days is None:
+            return None
+        return now() - datetime.timedelta(days=retention_days)
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def delete(self, queryset):
+        """ Removes a batch of eligible rows from the table. """
+        queryset.delete()
+
+
+class OrderedBasketPurgePolicy(PurgePolicy):
+    name = 'ordered_baskets'
+    description = 'Baskets for which orders have been placed.'
+
+    def get_queryset(self):
+        # Baskets linked to an invoice are still needed to display the invoice.
+        # TODO: Simplify this query when the foreign key to Basket is removed from Invoice.
+        return Basket.objects.filter(order__isnull=False, invoice__isnull=True)
+
+
+class AbandonedBasketPurgePolicy(PurgePolicy):
+    name = 'abandoned_baskets'
+    description = 'Open baskets that have not been touched within the retention period.'
+    retention_days = 180
+
+    def get_queryset(self):
+        cutoff = self.get_cutoff()
+        # Open baskets are reused until they are submitted, so baskets with recently added lines are still in use.
+        return Basket.objects.filter(
+            status=Basket.OPEN,
+            date_created__lt=cutoff,
+            order__isnull=True,
+            invoice__isnull=True,
+        ).exclude(lines__date_created__gte=cutoff)
+
+
+class PaymentProcessorResponseArchivalPolicy(PurgePolicy):
+    name = 'payment_processor_response_archival'
+    description = 'Payment processor responses older than the retention period, which are moved to the archive.'
+    retention_days = 180
+
+    def get_queryset(self):
+        return PaymentProcessorResponse.objects.filter(created__lt=self.get_cutoff())
+
+    def delete(self, queryset):
+        ArchivedPaymentProcessorResponse.archive(queryset)
+
+
+class ArchivedPaymentProcessorResponsePurgePolicy(PurgePolicy):
+    name = 'archived_payment_processor_responses'
+    description = 'Archived payment processor responses from months that ended before the retention period.'
+    retention_days = 365 * 3
+
+    def get_queryset(self):
+        return ArchivedPaymentProcessorResponse.objects.filter(month__lt=self.get_cutoff().date().replace(day=1))
+
+
+class HistoricalProductPurgePolicy(PurgePolicy):
+    name = 'historical_products'
+    description = 'Product history records older than the retention period.'
+    retention_days = 365
+
+    def get_queryset(self):
+        return Product.history.model.objects.filter(history_date__lt=self.get_cutoff())
+
+
+class HistoricalStockRecordPurgePolicy(PurgePolicy):
+    name = 'historical_stock_records'
+    description = 'Stock record history records older than the retention period.'
+    retention_days = 365
+
+    def get_queryset(self):
+        return StockRecord.history.model.objects.filter(history_date__lt=self.get_cutoff())
+
+
+class ExpiredSessionPurgePolicy(PurgePolicy):
+    name = 'expired_sessions'
+    description = 'Expired sessions, along with the payment capture contexts stored in them.'
+    resumable = False
+
+    def get_queryset(self):
+        return Session.objects.filter(expire_date__lt=now())
+
+
+PURGE_POLICIES = {
+    policy.name: policy for policy in (
+        OrderedBasketPurgePolicy,
+        AbandonedBasketPurgePolicy,
+        PaymentProcessorResponseArchivalPolicy,
+        ArchivedPaymentProcessorResponsePurgePolicy,
+        HistoricalProductPurgePolicy,
+        HistoricalStockRecordPurgePolicy,
+        ExpiredSessionPurgePolicy,
+    )
+}
+
+
+def get_purge_policy(name):
+    """
+    Returns an instance of the purge policy registered under the given name.
+
+    Raises:
+        KeyError: If no policy is registered under the given name.
+    """
+    return PURGE_POLICIES[name]()
+
+
+class PurgeProgress:
+    """ Running totals for a single purge, reported after every batch. """
+
+    def __init__(self, policy_name, backlog, last_id=None):
+        self.policy_name = policy_name
+        self.backlog = backlog
+        self.last_id = last_id
+        self.rows_deleted = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def remaining(self):
+        return max(self.backlog - self.rows_deleted, 0)
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.rows_deleted / self.elapsed
+
+    def __str__(self):
+        return '[{name}] deleted [{deleted}] rows in [{batches}] batches at [{rate:.1f}] rows/sec, ' \
+               'last id [{last_id}], approximately [{remaining}] rows remaining.'.format(
+                   name=self.policy_name,
+                   deleted=self.rows_deleted,
+                   batches=self.batches,
+                   rate=self.rows_per_second,
+                   last_id=self.last_id,
+                   remaining=self.remaining,
+               )
+
+
+class PurgeEngine:
+    """
+    Deletes the rows selected by a purge policy in adaptively sized batches.
+
+    Each batch selects the next ``batch_size`` primary keys greater than the last one handled and deletes
+    the rows among them that the policy still selects, so rows changed since they were selected are kept.
+    After each batch the size is scaled towards ``target_batch_seconds`` (by at most a factor of two) and
+    the engine pauses for at least ``sleep_seconds``, or longer if the batch itself was slow, to give
+    replicas time to catch up.
+    """
+
+    def __init__(self, policy, batch_size=1000, min_batch_size=None, max_batch_size=10000,
+                 target_batch_seconds=1.0, sleep_seconds=0.0, progress_callback=None):
+        self.policy = policy
+        self.min_batch_size = min_batch_size or min(batch_size, 100)
+        self.max_batch_size = max(max_batch_size, self.min_batch_size)
+        self.batch_size = self._clamp(batch_size)
+        self.target_batch_seconds = target_batch_seconds
+        self.sleep_seconds = sleep_seconds
+        self.progress_callback = progress_callback
+
+    @property
+    def checkpoint_name(self):
+        return 'purge:{}'.format(self.policy.name)
+
+    def _clamp(self, batch_size):
+        return int(min(max(batch_size, self.min_batch_size), self.max_batch_size))
+
+    def adapt_batch_size(self, rows, duration):
+        """ Scale the batch size so that the next batch takes approximately ``target_batch_seconds``. """
+        if not rows or duration <= 0:
+            return self.batch_size
+
+        factor = min(max(self.target_batch_seconds / duration, 0.5), 2.0)
+        self.batch_size = self._clamp(self.batch_size * factor)
+        return self.batch_size
+
+    def get_checkpoint(self):
+        if not self.policy.resumable:
+            return None
+        return JobCheckpoint.objects.filter(name=self.checkpoint_name).first()
+
+    def reset(self):
+        JobCheckpoint.objects.filter(name=self.checkpoint_name).delete()
+
+    def get_remaining_queryset(self, last_id):
+        queryset = self.policy.get_queryset()
+        if last_id is not None:
+            queryset = queryset.filter(pk__gt=last_id)
+        return queryset
+
+    def count(self):
+        """ Returns the number of rows the policy currently considers eligible for deletion. """
+        checkpoint = self.get_checkpoint()
+        return self.get_remaining_queryset(checkpoint.last_id if checkpoint else None).count()
+
+    def run(self):
+        """
+        Purge all eligible rows, resuming from the last checkpoint if a previous run was interrupted.
+
+        Returns:
+            PurgeProgress
+        """
+        checkpoint = None
+        last_id = None
+        if self.policy.resumable:
+            checkpoint, __ = JobCheckpoint.objects.get_or_create(name=self.checkpoint_name)
+            if checkpoint.last_id:
+                last_id = checkpoint.last_id
+                logger.info('Resuming purge [%s] after id [%d].', self.policy.name, last_id)
+
+        progress = PurgeProgress(self.policy.name, self.get_remaining_queryset(last_id).count(), last_id=last_id)
+
+        started = time.time()
+        while True:
+            batch_size = self.batch_size
+            ids = list(
+                self.get_remaining_queryset(progress.last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            batch_started = time.time()
+            with transaction.atomic():
+                self.policy.delete(self.policy.get_queryset().filter(pk__in=ids))
+                if checkpoint:
+                    checkpoint.last_id = ids[-1]
+                    checkpoint.rows_processed += len(ids)
+                    checkpoint.save(update_fields=['last_id', 'rows_processed', 'modified'])
+            duration = time.time() - batch_started
+
+            progress.last_id = ids[-1]
+            progress.rows_deleted += len(ids)
+            progress.batches += 1
+            progress.elapsed = time.time() - started
+            if self.progress_callback:
+                self.progress_callback(progress)
+
+            if len(ids) < batch_size:
+                # A short batch means the end of the table has been reached.
+                break
+
+            self.adapt_batch_size(len(ids), duration)
+            time.sleep(max(self.sleep_seconds, duration))
+            progress.elapsed = time.time() - started
+
+        if checkpoint:
+            # The sweep finished, so the next run should start from the beginning of the table.
+            checkpoint.delete()
+        logger.info('%s', progress)
+        return progress
@@ -0,0 +1,78 @@
+
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+from django.test import override_settings
+from edx_django_utils.cache import RequestCache, TieredCache
+from requests.exceptions import Timeout
+
+from ecommerce.core.fanout import fan_out
+from ecommerce.tests.testcases import TestCase
+
+
+class FanOutTests(TestCase):
+    def test_concurrent_calls(self):
+        """ Verify the calls run concurrently, and their results are returned by key. """
+        # Each call waits for the other at the barrier, so the calls only complete if they run concurrently.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def call(value):
+            barrier.wait()
+            return value
+
+        futures = fan_out({'first': lambda: call(1), 'second': lambda: call(2)})
+
+        self.assertEqual(futures['first'].result(), 1)
+        self.assertEqual(futures['second'].result(), 2)
+
+    def test_exceptions(self):
+        """ Verify exceptions raised by a call are raised by the result of its future, without affecting others. """
+        def fail():
+            raise ValueError
+
+        futures = fan_out({'failed': fail, 'succeeded': lambda: True})
+
+        with self.assertRaises(ValueError):
+            futures['failed'].result()
+        self.assertTrue(futures['succeeded'].result())
+
+    def test_request_cache_cleared(self):
+        """ Verify the request caches of worker threads do not outlive the calls that populate them. """
+        def cache():
+            TieredCache.set_all_tiers('fan-out-key', 'value', 60)
+            RequestCache('fan-out').set('key', 'value')
+
+        def cached():
+            return (
+                RequestCache().get_cached_response('fan-out-key').is_found or
+                RequestCache('fan-out').get_cached_response('key').is_found
+            )
+
+        # The calls share a single worker thread.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with mock.patch('ecommerce.core.fanout.get_executor', return_value=executor):
+                fan_out({'first': cache, 'second': cache})
+                futures = fan_out({'first': cached, 'second': cached})
+
+        self.assertFalse(futures['first'].result())
+        self.assertFalse(futures['second'].result())
+
+    def test_timeout(self):
+        """ Verify calls that do not complete before the timeout are abandoned. """
+        released = threading.Event()
+        try:
+            futures = fan_out({'slow': lambda: released.wait(5), 'fast': lambda: True}, timeout=0.1)
+            self.assertTrue(futures['fast'].result())
+            with self.assertRaises(Timeout):
+                futures['slow'].result()
+        finally:
+            released.set()
+
+    @override_settings(UPSTREAM_FAN_OUT_MAX_WORKERS=1)
+    def test_inline(self):
+        """ Verify the calls are run on the calling thread if the pool has a single worker. """
+        futures = fan_out({'first': threading.get_ident, 'second': threading.get_ident})
+        self.assertEqual(futures['first'].result(), threading.get_ident())
+        self.assertEqual(futures['second'].result(), threading.get_ident())
@@ -0,0 +1,119 @@
+
+
+import httpretty
+import mock
+import requests
+import urllib3
+from django.urls import reverse
+from edx_django_utils.cache import DEFAULT_REQUEST_CACHE, TieredCache
+from oscar.core.loading import get_model
+
+from ecommerce.core.fanout import fan_out
+from ecommerce.core.instrumentation import DJANGO_CACHE_TIER, REQUEST_CACHE_TIER, profile
+from ecommerce.tests.testcases import TestCase
+
+Partner = get_model('partner', 'Partner')
+
+
+class ProfileTests(TestCase):
+    def test_queries(self):
+        """ Verify queries are counted, and queries repeated with the same parameters are detected. """
+        with profile() as request_profile:
+            Partner.objects.get(id=self.partner.id)
+            Partner.objects.get(id=self.partner.id)
+            list(Partner.objects.filter(id=0))
+
+        self.assertEqual(request_profile.queries, 3)
+        self.assertEqual(request_profile.duplicate_queries, 1)
+        self.assertGreater(request_profile.db_time, 0)
+        sql, count = request_profile.get_repeated_queries()[0]
+        self.assertIn('partner_partner', sql)
+        self.assertEqual(count, 3)
+
+    def test_cache_lookups(self):
+        """ Verify TieredCache lookups are counted by tier. """
+        TieredCache.set_all_tiers('key', 'value')
+
+        with profile() as request_profile:
+            TieredCache.get_cached_response('key')
+            DEFAULT_REQUEST_CACHE.clear()
+            TieredCache.get_cached_response('key')
+            TieredCache.get_cached_response('missing')
+
+        self.assertEqual(request_profile.cache_hits, {REQUEST_CACHE_TIER: 1, DJANGO_CACHE_TIER: 1})
+        self.assertEqual(request_profile.cache_misses, {REQUEST_CACHE_TIER: 2, DJANGO_CACHE_TIER: 1})
+
+    @httpretty.activate
+    def test_http_calls(self):
+        """ Verify outbound HTTP calls are counted by host, including those made by the calls of a fan out. """
+        httpretty.register_uri(httpretty.GET, 'http://lms.example.com/api/')
+        httpretty.register_uri(httpretty.GET, 'http://discovery.example.com/api/')
+
+        with profile() as request_profile:
+            requests.get('http://lms.example.com/api/')
+            fan_out({
+                'lms': lambda: requests.get('http://lms.example.com/api/'),
+                'discovery': lambda: requests.get('http://discovery.example.com/api/'),
+            })
+
+        self.assertEqual(request_profile.http_calls, 3)
+        self.assertEqual(request_profile.http_hosts, {'lms.example.com': 2, 'discovery.example.com': 1})
+
+    @httpretty.activate
+    def test_http_calls_without_session(self):
+        """ Verify HTTP calls made with urllib3 pool managers, as by the CyberSource SDK, are counted. """
+        httpretty.register_uri(httpretty.POST, 'http://cybersource.example.com/pts/v2/payments')
+
+        with profile() as request_profile:
+            urllib3.PoolManager().request('POST', 'http://cybersource.example.com/pts/v2/payments')
+
+        self.assertEqual(request_profile.http_calls, 1)
+        self.assertEqual(request_profile.http_hosts, {'cybersource.example.com': 1})
+
+    def test_nested(self):
+        """ Verify calls are recorded to every active profile. """
+        with profile() as outer:
+            Partner.objects.get(id=self.partner.id)
+            with profile() as inner:
+                Partner.objects.get(id=self.partner.id)
+
+        self.assertEqual(outer.queries, 2)
+        self.assertEqual(inner.queries, 1)
+
+    def test_not_profiled(self):
+        """ Verify calls made outside of a profile are not recorded. """
+        with profile() as request_profile:
+            pass
+        Partner.objects.get(id=self.partner.id)
+        TieredCache.get_cached_response('key')
+
+        self.assertEqual(request_profile.queries, 0)
+        self.assertEqual(sum(request_profile.cache_misses.values()), 0)
+
+    def test_assert_within_budget(self):
+        """ Verify code exceeding its budget fails the test, with the repeated queries. """
+        with self.assert_within_budget(queries=2):
+            Partner.objects.get(id=self.partner.id)
+
+        with self.assertRaisesRegex(AssertionError, 'partner_partner'):
+            with self.assert_within_budget(queries=2):
+                Partner.objects.get(id=self.partner.id)
+                Partner.objects.get(id=self.partner.id)
+
+
+class RequestProfileMiddlewareTests(TestCase):
+    @mock.patch('ecommerce.core.instrumentation.report')
+    def test_report(self, mock_report):
+        """ Verify requests are profiled and reported with the name of their view. """
+        self.client.get(reverse('health'))
+
+        request_profile = mock_report.call_args[0][0]
+        self.assertEqual(request_profile.name, 'health')
+        self.assertGreater(request_profile.queries, 0)
+
+    @mock.patch('ecommerce.core.instrumentation.report')
+    def test_sample_rate(self, mock_report):
+        """ Verify requests are not profiled if they are not sampled. """
+        with self.settings(REQUEST_PROFILE_SAMPLE_RATE=0):
+            self.client.get(reverse('health'))
+        mock_report.assert_not_called()
@@ -2,13 +2,15 @@
 
 import json
 
+import crum
 import ddt
 import httpretty
 import mock
 from django.conf import settings
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import override_settings
+from django.test import RequestFactory, override_settings
 from edx_rest_api_client.auth import SuppliedJwtAuth
 from requests.exceptions import ConnectionError as ReqConnectionError
 from social_django.models import UserSocialAuth
@@ -364,6 +366,62 @@ class SiteConfigurationTests(TestCase):
         result = site_config.get_payment_processors()
         self.assertEqual(result, expected_result)
 
+    @override_settings(PAYMENT_PROCESSORS=[
+        'ecommerce.extensions.payment.tests.processors.DummyProcessor',
+    ])
+    def test_get_payment_processors_cached(self):
+        """ Verify the payment processors are resolved once, until a payment processor switch changes. """
+        self._enable_processor_switches([DummyProcessor])
+        site_config = _make_site_config(DummyProcessor.NAME)
+
+        with mock.patch.object(
+                SiteConfiguration, '_all_payment_processors', autospec=True,
+                side_effect=SiteConfiguration._all_payment_processors  # pylint: disable=protected-access
+        ) as mock_all_payment_processors:
+            self.assertEqual(site_config.get_payment_processors(), [DummyProcessor])
+            self.assertEqual(site_config.get_payment_processors(), [DummyProcessor])
+            self.assertEqual(mock_all_payment_processors.call_count, 1)
+
+        toggle_switch(settings.PAYMENT_PROCESSOR_SWITCH_PREFIX + DummyProcessor.NAME, False)
+        self.assertEqual(site_config.get_payment_processors(), [])
+
+    def test_get_cached(self):
+        """ Verify site configurations are cached, with their partners, until their site or partner changes. """
+        site_configuration = SiteConfiguration.get_cached(self.site.id)
+        self.assertEqual(site_configuration, self.site_configuration)
+
+        with self.assertNumQueries(0):
+            self.assertIs(SiteConfiguration.get_cached(self.site.id), site_configuration)
+            self.assertEqual(site_configuration.partner, self.partner)
+            self.assertEqual(site_configuration.site, self.site)
+
+        self.partner.name = 'Updated Partner'
+        self.partner.save()
+        self.assertEqual(SiteConfiguration.get_cached(self.site.id).partner.name, 'Updated Partner')
+
+        self.site_configuration.lms_url_root = 'https://lms.example.com'
+        self.site_configuration.save()
+        self.assertEqual(SiteConfiguration.get_cached(self.site.id).lms_url_root, 'https://lms.example.com')
+
+        with self.assertRaises(SiteConfiguration.DoesNotExist):
+            SiteConfiguration.get_cached(Site.objects.create(domain='unconfigured.example.com').id)
+
+    def test_get_cached_memoizes_version_per_request(self):
+        """ Verify the cache version is read from the Django cache once per request, until it is invalidated. """
+        crum.set_current_request(RequestFactory().get('/'))
+        self.addCleanup(crum.set_current_request, None)
+        SiteConfiguration.get_cached(self.site.id)
+
+        with mock.patch('ecommerce.core.models.cache.get', wraps=cache.get) as mock_cache_get:
+            SiteConfiguration.get_cached(self.site.id)
+            SiteConfiguration.get_cached(self.site.id)
+            mock_cache_get.assert_not_called()
+
+            self.site_configuration.lms_url_root = 'https://lms.example.com'
+            self.site_configuration.save()
+            self.assertEqual(SiteConfiguration.get_cached(self.site.id).lms_url_root, 'https://lms.example.com')
+            self.assertTrue(mock_cache_get.called)
+
     def test_get_client_side_payment_processor(self):
         """ Verify the method returns the client-side payment processor. """
         processor_name = 'cybersource'
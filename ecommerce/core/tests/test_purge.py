@@ -0,0 +1,170 @@
+
+
+import datetime
+
+import mock
+from django.test import override_settings
+from django.utils.timezone import now
+from oscar.core.loading import get_model
+from oscar.test import factories
+
+from ecommerce.core.models import JobCheckpoint
+from ecommerce.core.purge import (
+    AbandonedBasketPurgePolicy,
+    ArchivedPaymentProcessorResponsePurgePolicy,
+    OrderedBasketPurgePolicy,
+    PaymentProcessorResponseArchivalPolicy,
+    PurgeEngine
+)
+from ecommerce.extensions.test.factories import create_basket, create_order
+from ecommerce.tests.testcases import TestCase
+
+ArchivedPaymentProcessorResponse = get_model('payment', 'ArchivedPaymentProcessorResponse')
+Basket = get_model('basket', 'Basket')
+PaymentProcessorResponse = get_model('payment', 'PaymentProcessorResponse')
+
+
+@mock.patch('ecommerce.core.purge.time.sleep', mock.Mock())
+class PurgeEngineTests(TestCase):
+    def setUp(self):
+        super(PurgeEngineTests, self).setUp()
+        self.orders = [create_order() for __ in range(5)]
+        self.unordered_basket = factories.BasketFactory()
+
+    def test_run(self):
+        """ Verify the engine deletes only the rows selected by the policy, in keyset-paginated batches. """
+        progress_reports = []
+        engine = PurgeEngine(OrderedBasketPurgePolicy(), batch_size=2, max_batch_size=2,
+                             progress_callback=lambda progress: progress_reports.append(progress.rows_deleted))
+
+        progress = engine.run()
+
+        self.assertEqual(progress.rows_deleted, 5)
+        self.assertEqual(progress.batches, 3)
+        self.assertEqual(progress.remaining, 0)
+        self.assertEqual(progress_reports, [2, 4, 5])
+        self.assertEqual(list(Basket.objects.all()), [self.unordered_basket])
+        self.assertFalse(JobCheckpoint.objects.exists())
+
+    def test_run_resumes_from_checkpoint(self):
+        """ Verify an interrupted purge resumes after the last checkpointed id. """
+        baskets = sorted(order.basket_id for order in self.orders)
+        JobCheckpoint.objects.create(name='purge:ordered_baskets', last_id=baskets[2], rows_processed=3)
+
+        engine = PurgeEngine(OrderedBasketPurgePolicy(), batch_size=10)
+        self.assertEqual(engine.count(), 2)
+
+        progress = engine.run()
+
+        self.assertEqual(progress.rows_deleted, 2)
+        self.assertEqual(sorted(Basket.objects.filter(order__isnull=False).values_list('id', flat=True)),
+                         baskets[:3])
+
+    def test_checkpoint_saved_after_each_batch(self):
+        """ Verify the checkpoint records the last id of each completed batch. """
+        checkpoints = []
+
+        def record_checkpoint(__):
+            checkpoints.append(JobCheckpoint.objects.get(name='purge:ordered_baskets').last_id)
+
+        PurgeEngine(OrderedBasketPurgePolicy(), batch_size=2, max_batch_size=2,
+                    progress_callback=record_checkpoint).run()
+
+        baskets = sorted(order.basket_id for order in self.orders)
+        self.assertEqual(checkpoints, [baskets[1], baskets[3], baskets[4]])
+
+    def test_run_skips_rows_no_longer_selected(self):
+        """ Verify rows that stopped matching the policy after they were selected are not deleted. """
+        policy = AbandonedBasketPurgePolicy()
+        stale = create_basket()
+        Basket.objects.filter(id=stale.id).update(date_created=now() - datetime.timedelta(days=365))
+        stale.lines.update(date_created=now() - datetime.timedelta(days=365))
+        original_delete = policy.delete
+
+        def delete(queryset):
+            # The learner adds a product to the basket between the selection and the deletion of the batch.
+            stale.lines.update(date_created=now())
+            original_delete(queryset)
+
+        with mock.patch.object(policy, 'delete', side_effect=delete):
+            PurgeEngine(policy).run()
+
+        self.assertTrue(Basket.objects.filter(id=stale.id).exists())
+
+    def test_adapt_batch_size(self):
+        """ Verify the batch size moves towards the target duration, bounded by a factor of two and the limits. """
+        engine = PurgeEngine(OrderedBasketPurgePolicy(), batch_size=1000, min_batch_size=100,
+                             max_batch_size=3000, target_batch_seconds=1.0)
+
+        self.assertEqual(engine.adapt_batch_size(1000, 0.8), 1250)
+        self.assertEqual(engine.adapt_batch_size(1250, 0.1), 2500)
+        self.assertEqual(engine.adapt_batch_size(2500, 0.1), 3000)
+        self.assertEqual(engine.adapt_batch_size(3000, 10), 1500)
+        self.assertEqual(engine.adapt_batch_size(0, 10), 1500)
+
+        engine.batch_size = 150
+        self.assertEqual(engine.adapt_batch_size(150, 10), 100)
+
+    def test_run_archival(self):
+        """ Verify policies that archive rows move them instead of deleting them. """
+        responses = [PaymentProcessorResponse.objects.create(processor_name='test', response={}) for __ in range(3)]
+        PaymentProcessorResponse.objects.filter(id__in=[responses[0].id, responses[1].id]).update(
+            created=now() - datetime.timedelta(days=365)
+        )
+
+        progress = PurgeEngine(PaymentProcessorResponseArchivalPolicy(), batch_size=1, min_batch_size=1).run()
+
+        self.assertEqual(progress.rows_deleted, 2)
+        self.assertEqual(list(PaymentProcessorResponse.objects.all()), [responses[2]])
+        self.assertEqual(
+            sorted(ArchivedPaymentProcessorResponse.objects.values_list('id', flat=True)),
+            [responses[0].id, responses[1].id]
+        )
+
+
+class PurgePolicyTests(TestCase):
+    def test_abandoned_baskets(self):
+        """ Verify only open, unordered baskets older than the retention period are selected. """
+        stale = factories.BasketFactory()
+        fresh = factories.BasketFactory()
+        ordered = create_order().basket
+        Basket.objects.filter(id__in=[stale.id, ordered.id]).update(date_created=now() - datetime.timedelta(days=365))
+
+        self.assertEqual(list(AbandonedBasketPurgePolicy().get_queryset()), [stale])
+        self.assertNotIn(fresh, AbandonedBasketPurgePolicy().get_queryset())
+
+    def test_abandoned_baskets_in_use(self):
+        """ Verify old open baskets are not selected if lines were added to them within the retention period. """
+        in_use = create_basket()
+        stale = create_basket()
+        Basket.objects.filter(id__in=[in_use.id, stale.id]).update(date_created=now() - datetime.timedelta(days=365))
+        stale.lines.update(date_created=now() - datetime.timedelta(days=365))
+
+        self.assertEqual(list(AbandonedBasketPurgePolicy().get_queryset()), [stale])
+
+    def test_retention_days_override(self):
+        """ Verify the retention period can be overridden in settings. """
+        response = PaymentProcessorResponse.objects.create(processor_name='test', response={})
+        PaymentProcessorResponse.objects.filter(id=response.id).update(created=now() - datetime.timedelta(days=10))
+
+        self.assertFalse(PaymentProcessorResponseArchivalPolicy().get_queryset().exists())
+        with override_settings(PURGE_RETENTION_DAYS={'payment_processor_response_archival': 5}):
+            self.assertEqual(list(PaymentProcessorResponseArchivalPolicy().get_queryset()), [response])
+
+    def test_archived_payment_processor_responses(self):
+        """ Verify only archived responses from months that ended before the retention period are selected. """
+        ArchivedPaymentProcessorResponse.archive(PaymentProcessorResponse.objects.filter(id__in=[
+            PaymentProcessorResponse.objects.create(processor_name='test', response={}).id for __ in range(2)
+        ]))
+        stale, fresh = ArchivedPaymentProcessorResponse.objects.order_by('id')
+        cutoff_month = (now() - datetime.timedelta(days=10)).date().replace(day=1)
+        ArchivedPaymentProcessorResponse.objects.filter(id=stale.id).update(
+            month=cutoff_month - datetime.timedelta(days=1)
+        )
+        ArchivedPaymentProcessorResponse.objects.filter(id=fresh.id).update(month=cutoff_month)
+
+        with override_settings(PURGE_RETENTION_DAYS={'archived_payment_processor_responses': 10}):
+            self.assertEqual(
+                list(ArchivedPaymentProcessorResponsePurgePolicy().get_queryset().values_list('id', flat=True)),
+                [stale.id]
+            )
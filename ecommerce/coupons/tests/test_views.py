@@ -875,3 +875,26 @@ class EnrollmentCodeCsvViewTests(TestCase):
         response = self.client.get(reverse(self.path, args=[order.number]))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['content-type'], 'text/csv')
+
+    def test_streamed_content(self):
+        """ Verify the CSV is streamed, with the codes of every order line, using a fixed number of queries. """
+        order = OrderFactory(user=self.user)
+        product = ProductFactory(categories=[])
+        codes = []
+        for __ in range(2):
+            line = OrderLineFactory(order=order, product=product, partner_sku='test_sku')
+            order_line_vouchers = OrderLineVouchers.objects.create(line=line)
+            vouchers = [VoucherFactory(code=FuzzyText().fuzz()) for __ in range(3)]
+            order_line_vouchers.vouchers.add(*vouchers)
+            codes.append([voucher.code for voucher in vouchers])
+
+        response = self.client.get(reverse(self.path, args=[order.number]))
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(3):
+            content = b''.join(response.streaming_content).decode('utf-8')
+
+        rows = content.splitlines()
+        self.assertEqual(rows[0], 'Order Number:,{}'.format(order.number))
+        self.assertEqual(rows[3], 'Code,Redemption URL,Name Of Employee,Date Of Distribution,Employee Email')
+        streamed_codes = [row.split(',')[0] for row in rows if '?code=' in row]
+        self.assertEqual(streamed_codes, codes[0] + codes[1])
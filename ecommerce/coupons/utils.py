@@ -5,14 +5,26 @@ import hashlib
 import logging
 
 from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, Min, OuterRef, Prefetch, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from edx_django_utils.cache import TieredCache
 from oscar.core.loading import get_model
 from slumber.exceptions import HttpNotFoundError
 
 from ecommerce.core.utils import get_cache_key
-
+from ecommerce.extensions.offer.constants import (
+    OFFER_ASSIGNMENT_EMAIL_BOUNCED,
+    OFFER_ASSIGNMENT_REVOKED,
+    OFFER_MAX_USES_DEFAULT,
+    OFFER_REDEEMED
+)
+
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+CouponVouchers = get_model('voucher', 'CouponVouchers')
+OfferAssignment = get_model('offer', 'OfferAssignment')
 Product = get_model('catalogue', 'Product')
+Voucher = get_model('voucher', 'Voucher')
 
 logger = logging.getLogger(__name__)
 
@@ -175,12 +187,128 @@ def is_voucher_applied(basket, voucher):
     return False
 
 
-def is_coupon_available(coupon):
+def is_coupon_available(coupon, voucher=None):
     """
     Returns True if `coupon` is available, False otherwise.
+
+    Arguments:
+        coupon (Product): The coupon product.
+        voucher (Voucher): The first voucher of the coupon, if it has already been fetched.
     """
-    voucher = coupon.attr.coupon_vouchers.vouchers.first()
+    voucher = voucher or coupon.attr.coupon_vouchers.vouchers.first()
     start_datetime = voucher.start_datetime
     end_datetime = voucher.end_datetime
     current_datetime = timezone.now()
     return start_datetime < current_datetime < end_datetime
+
+
+def annotate_available_slots(vouchers, max_global_applications):
+    """
+    Annotate vouchers with `num_assignments` and `slots`, the number of slots available for assignment, computed
+    in the database as in Voucher.calculate_available_slots.
+
+    Arguments:
+        vouchers (QuerySet): Vouchers of enterprise offers.
+        max_global_applications (Expression): Maximum number of applications of each voucher's enterprise offer,
+            or NULL to use the default maximum number of uses of a code.
+
+    Returns:
+        QuerySet
+    """
+    def _max_uses_per_code(default):
+        return Coalesce(max_global_applications, Value(default), output_field=IntegerField())
+
+    assignment_counts = OfferAssignment.objects.filter(code=OuterRef('code')).exclude(
+        status__in=[OFFER_REDEEMED, OFFER_ASSIGNMENT_REVOKED]
+    ).order_by().values('code').annotate(count=Count('id')).values('count')
+    return vouchers.annotate(
+        num_assignments=Coalesce(Subquery(assignment_counts, output_field=IntegerField()), Value(0)),
+    ).annotate(
+        slots=Case(
+            When(
+                usage__in=[Voucher.SINGLE_USE, Voucher.MULTI_USE_PER_CUSTOMER],
+                then=Case(
+                    When(num_orders=0, num_assignments=0, then=_max_uses_per_code(1)),
+                    default=Value(0),
+                    output_field=IntegerField()
+                )
+            ),
+            default=_max_uses_per_code(OFFER_MAX_USES_DEFAULT) - F('num_orders') - F('num_assignments'),
+            output_field=IntegerField()
+        )
+    )
+
+
+def get_enterprise_coupons_overview(coupons):
+    """
+    Compute the overview of several enterprise coupons with a fixed number of queries.
+
+    Code counts, redemptions and available assignment slots are aggregated in the database across all of the
+    coupons, rather than coupon by coupon.
+
+    Arguments:
+        coupons (iterable): Coupon products.
+
+    Returns:
+        dict: Keyed by coupon id. Each value is a dict containing the coupon's first `voucher` (with its offers
+        prefetched), `num_codes`, `num_uses`, `num_unassigned` and the `bounced_assignments` of its codes.
+    """
+    coupon_ids = [coupon.id for coupon in coupons]
+    if not coupon_ids:
+        return {}
+
+    vouchers = Voucher.objects.filter(coupon_vouchers__coupon_id__in=coupon_ids).annotate(
+        coupon_id=F('coupon_vouchers__coupon_id')
+    )
+    aggregates = {
+        row['coupon_id']: row for row in vouchers.order_by().values('coupon_id').annotate(
+            first_voucher_id=Min('id'),
+            num_codes=Count('id'),
+            num_uses=Sum('num_orders'),
+        )
+    }
+
+    first_vouchers = Voucher.objects.filter(
+        id__in=[row['first_voucher_id'] for row in aggregates.values()]
+    ).prefetch_related(
+        Prefetch('offers', queryset=ConditionalOffer.objects.select_related('condition', 'benefit'))
+    )
+    first_vouchers = {voucher.id: voucher for voucher in first_vouchers}
+
+    # Available slots are computed with the maximum number of applications of each coupon's enterprise offer,
+    # and only positive values are summed.
+    max_global_applications = {}
+    for coupon_id, row in aggregates.items():
+        enterprise_offer = first_vouchers[row['first_voucher_id']].enterprise_offer
+        max_global_applications[coupon_id] = enterprise_offer.max_global_applications if enterprise_offer else None
+
+    slots = annotate_available_slots(vouchers, Case(
+        *[When(coupon_id=coupon_id, then=Value(max_uses or None))
+          for coupon_id, max_uses in max_global_applications.items()],
+        default=Value(None),
+        output_field=IntegerField()
+    )).order_by().values('coupon_id').annotate(num_unassigned=Sum(Greatest('slots', Value(0))))
+    num_unassigned = {row['coupon_id']: row['num_unassigned'] for row in slots}
+
+    bounced_assignments = OfferAssignment.objects.filter(
+        code__in=vouchers.values('code'),
+        status=OFFER_ASSIGNMENT_EMAIL_BOUNCED,
+    ).annotate(
+        coupon_id=Subquery(
+            CouponVouchers.objects.filter(vouchers__code=OuterRef('code')).values('coupon_id')[:1]
+        )
+    ).order_by('id')
+    bounced_assignments_by_coupon = {}
+    for assignment in bounced_assignments:
+        bounced_assignments_by_coupon.setdefault(assignment.coupon_id, []).append(assignment)
+
+    return {
+        coupon_id: {
+            'voucher': first_vouchers[row['first_voucher_id']],
+            'num_codes': row['num_codes'],
+            'num_uses': row['num_uses'],
+            'num_unassigned': num_unassigned.get(coupon_id, 0),
+            'bounced_assignments': bounced_assignments_by_coupon.get(coupon_id, []),
+        }
+        for coupon_id, row in aggregates.items()
+    }
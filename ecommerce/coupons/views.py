@@ -6,7 +6,7 @@ import unicodecsv as csv
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils import timezone
@@ -295,8 +295,17 @@ class CouponRedeemView(EdxOrderPlacementMixin, APIView):
         return HttpResponseRedirect(redirect_url)
 
 
+class EchoBuffer:
+    """ File-like object whose writes return the written value, so CSV rows can be yielded as they are written. """
+
+    def write(self, value):
+        return value
+
+
 class EnrollmentCodeCsvView(View):
     """ Download enrollment code CSV file view. """
+    # Number of voucher codes read from the database at a time.
+    chunk_size = 2000
 
     @method_decorator(login_required)
     def dispatch(self, *args, **kwargs):  # pylint: disable=arguments-differ
@@ -322,7 +331,7 @@ class EnrollmentCodeCsvView(View):
             number (str): Number of the order
 
         Returns:
-            HttpResponse
+            StreamingHttpResponse
 
         Raises:
             Http404: When an order number for a non-existing order is passed.
@@ -340,26 +349,40 @@ class EnrollmentCodeCsvView(View):
         file_name = 'Enrollment code CSV order num {}'.format(order.number)
         file_name = '{filename}.csv'.format(filename=slugify(file_name))
 
-        response = HttpResponse(content_type='text/csv')
+        # The URL is resolved while the request is being handled, as it depends on the request's site.
+        redeem_url = get_ecommerce_url(reverse('coupons:offer'))
+        response = StreamingHttpResponse(self.get_rows(order, redeem_url), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename={filename}'.format(filename=file_name)
+        return response
 
-        redeem_url = get_ecommerce_url(reverse('coupons:offer'))
+    def get_rows(self, order, redeem_url):
+        """
+        Yields the encoded rows of the CSV for the order.
+
+        Bulk enrollment orders can have tens of thousands of codes, so the codes are read in chunks and written as
+        they are read, rather than building the whole file in memory before the response starts.
+        """
+        buffer = EchoBuffer()
         voucher_field_names = ('Code', 'Redemption URL', 'Name Of Employee', 'Date Of Distribution', 'Employee Email')
-        voucher_writer = csv.DictWriter(response, fieldnames=voucher_field_names)
+        voucher_writer = csv.DictWriter(buffer, fieldnames=voucher_field_names)
+        writer = csv.writer(buffer)
 
-        writer = csv.writer(response)
-        writer.writerow(('Order Number:', order.number))
-        writer.writerow([])
+        yield writer.writerow(('Order Number:', order.number))
+        yield writer.writerow([])
 
-        order_line_vouchers = OrderLineVouchers.objects.filter(line__order=order)
+        order_line_vouchers = OrderLineVouchers.objects.filter(line__order=order).select_related(
+            'line__product'
+        ).order_by('id')
         for order_line_voucher in order_line_vouchers:
-            writer.writerow([order_line_voucher.line.product.title])
-            voucher_writer.writeheader()
+            yield writer.writerow([order_line_voucher.line.product.title])
+            yield writer.writerow(voucher_field_names)
 
-            for voucher in order_line_voucher.vouchers.all():
-                voucher_writer.writerow({
-                    voucher_field_names[0]: voucher.code,
-                    voucher_field_names[1]: '{url}?code={code}'.format(url=redeem_url, code=voucher.code)
+            codes = Voucher.objects.filter(order_line_vouchers=order_line_voucher).order_by('id').values_list(
+                'code', flat=True
+            )
+            for code in codes.iterator(chunk_size=self.chunk_size):
+                yield voucher_writer.writerow({
+                    voucher_field_names[0]: code,
+                    voucher_field_names[1]: '{url}?code={code}'.format(url=redeem_url, code=code)
                 })
-            writer.writerow([])
-        return response
+            yield writer.writerow([])
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_auto_20191115_2151'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='catalog_version',
+            field=models.PositiveIntegerField(db_index=True, default=0, help_text='Version of the catalog of the partner in which the course, or its products, last changed.'),
+        ),
+    ]
@@ -1,13 +1,17 @@
 
 
 import logging
+from weakref import WeakKeyDictionary
 
 from django.conf import settings
 from django.db import models, transaction
-from django.db.models import Count, Q
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.timezone import now, timedelta
 from django.utils.translation import ugettext_lazy as _
 from oscar.core.loading import get_class, get_model
+from oscar.core.utils import slugify
 from simple_history.models import HistoricalRecords
 
 from ecommerce.core.constants import (
@@ -16,17 +20,30 @@ from ecommerce.core.constants import (
     SEAT_PRODUCT_CLASS_NAME
 )
 from ecommerce.courses.publishers import LMSPublisher
-from ecommerce.extensions.catalogue.utils import generate_sku
+from ecommerce.extensions.catalogue.utils import generate_seat_sku, generate_sku
 
 logger = logging.getLogger(__name__)
 Category = get_model('catalogue', 'Category')
 Partner = get_model('partner', 'Partner')
 Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 ProductCategory = get_model('catalogue', 'ProductCategory')
 ProductClass = get_model('catalogue', 'ProductClass')
 Selector = get_class('partner.strategy', 'Selector')
 StockRecord = get_model('partner', 'StockRecord')
 
+# Catalog changes recorded in the current transaction of each database connection, by `Course.record_catalog_changes`.
+_pending_catalog_changes = WeakKeyDictionary()
+
+
+def _get_history_user():
+    """ Returns the user of the current request, whom history records of bulk writes are attributed to. """
+    try:
+        user = HistoricalRecords.thread.request.user
+    except AttributeError:
+        return None
+    return user if user.is_authenticated else None
+
 
 class Course(models.Model):
     site = models.ForeignKey('sites.Site', verbose_name=_('Site'), null=True, blank=True, on_delete=models.PROTECT)
@@ -41,7 +58,12 @@ class Course(models.Model):
     created = models.DateTimeField(null=True, auto_now_add=True)
     modified = models.DateTimeField(null=True, auto_now=True)
     thumbnail_url = models.URLField(null=True, blank=True)
-    history = HistoricalRecords()
+    catalog_version = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        help_text=_('Version of the catalog of the partner in which the course, or its products, last changed.')
+    )
+    history = HistoricalRecords(excluded_fields=['catalog_version'])
 
     def __str__(self):
         return str(self.id)
@@ -69,6 +91,59 @@ class Course(models.Model):
         super(Course, self).save(force_insert, force_update, using, update_fields)
         self._create_parent_seat()
 
+    @classmethod
+    def record_catalog_changes(cls, course_ids=(), product_ids=()):
+        """
+        Records that the given courses, or their products, changed, by moving them to a new version of the catalog
+        of their partner. Catalog snapshots are served incrementally by listing the courses changed since a version.
+
+        The courses are moved once the current transaction commits, so that the partner is not locked while the rest
+        of the transaction, e.g. publication to the LMS, runs. Until then, the changes are served with the previous
+        version, and they are served again with the new version. The changes recorded in a transaction are
+        collected, and the courses of the changed products looked up, so that they are moved together.
+
+        Arguments:
+            course_ids (list): IDs of the changed courses.
+            product_ids (list): IDs of the changed products, whose courses, if any, are moved.
+        """
+        connection = transaction.get_connection()
+        changes = _pending_catalog_changes.get(connection)
+        # The callback is discarded if the transaction, or the savepoint it was registered in, is rolled back.
+        registered = changes is not None and any(
+            func is changes['callback'] for __, func in connection.run_on_commit
+        )
+        if not registered:
+            changes = {'course_ids': set(), 'product_ids': set()}
+
+            def move_to_new_version():
+                _pending_catalog_changes.pop(transaction.get_connection(), None)
+                cls._move_to_new_catalog_version(changes['course_ids'], changes['product_ids'])
+
+            changes['callback'] = move_to_new_version
+            _pending_catalog_changes[connection] = changes
+
+        changes['course_ids'].update(course_ids)
+        changes['product_ids'].update(product_ids)
+        if not registered:
+            transaction.on_commit(changes['callback'])
+
+    @classmethod
+    def _move_to_new_catalog_version(cls, course_ids, product_ids):
+        course_ids = set(course_ids)
+        if product_ids:
+            course_ids.update(Product.objects.filter(
+                id__in=product_ids, course__isnull=False
+            ).values_list('course_id', flat=True))
+        if not course_ids:
+            return
+
+        with transaction.atomic():
+            # Updating the partner locks it, so that versions are committed in order.
+            Partner.objects.filter(course__id__in=course_ids).update(catalog_version=F('catalog_version') + 1)
+            cls.objects.filter(id__in=course_ids).update(catalog_version=Subquery(
+                Partner.objects.filter(id=OuterRef('partner_id')).values('catalog_version')[:1]
+            ))
+
     def publish_to_lms(self):
         """ Publish Course and Products to LMS. """
         return LMSPublisher().publish(self)
@@ -266,6 +341,284 @@ class Course(models.Model):
 
         return seat
 
+    @transaction.atomic
+    def create_or_update_seats(self, seats, create_enrollment_code=False, remove_stale_modes=True):
+        """
+        Creates and updates several course seat products at once.
+
+        This is equivalent to calling `create_or_update_seat` for each seat in turn. However, the given seats are
+        compared with the existing seats in memory, and only the changes are written, in bulk and with their history.
+
+        Arguments:
+            seats (list of dict): The arguments of `create_or_update_seat` for each seat, i.e. certificate_type,
+                id_verification_required and price, and optionally credit_provider, expires, credit_hours and sku.
+
+        Optional arguments:
+            create_enrollment_code(bool): Whether an enrollment code is created in addition to the seats.
+            remove_stale_modes(bool): Remove stale modes.
+
+        Returns:
+            list of Product: The seats that have been created or updated, in the order given.
+        """
+        course_id = str(self.id)
+        parent = self.products.select_related('product_class').get(
+            product_class__name=SEAT_PRODUCT_CLASS_NAME, structure=Product.PARENT
+        )
+        attributes = {attribute.code: attribute for attribute in parent.product_class.attributes.all()}
+        existing_seats = list(parent.children.prefetch_related('attribute_values__attribute', 'stockrecords'))
+        seats_by_sku = {
+            stock_record.partner_sku: seat
+            for seat in existing_seats
+            for stock_record in seat.stockrecords.all()
+            if stock_record.partner_id == self.partner_id
+        }
+
+        upserts = []
+        for seat_data in seats:
+            certificate_type = seat_data['certificate_type'].lower()
+            id_verification_required = seat_data['id_verification_required']
+            seat = seats_by_sku.get(seat_data.get('sku'))
+            if seat is None:
+                seat = Product(slug=slugify(self.get_course_seat_name(certificate_type, id_verification_required)))
+
+            values = {
+                'certificate_type': certificate_type,
+                'course_key': course_id,
+                'id_verification_required': id_verification_required,
+            }
+            if seat_data.get('credit_provider'):
+                values['credit_provider'] = seat_data['credit_provider']
+            if seat_data.get('credit_hours'):
+                values['credit_hours'] = seat_data['credit_hours']
+
+            upserts.append((seat, seat_data, values))
+
+        new_seats, updated_seats = self._save_seat_products(parent, existing_seats, upserts)
+        current_values = self._save_seat_attribute_values(attributes, upserts, new_seats)
+        self._save_seat_stock_records(upserts, new_seats, current_values)
+
+        for seat, seat_data, values in upserts:
+            if values['certificate_type'] in ENROLLMENT_CODE_SEAT_TYPES and create_enrollment_code:
+                self._create_or_update_enrollment_code(
+                    values['certificate_type'], values['id_verification_required'], self.partner, seat_data['price'],
+                    seat_data.get('expires')
+                )
+
+        # Bulk writes do not send post_save, so the enrollment code is updated as `update_enrollment_code` would.
+        self._update_enrollment_code_expires([seat for seat in new_seats + updated_seats if seat.expires])
+
+        if remove_stale_modes:
+            self._remove_stale_seats(existing_seats + new_seats, upserts, current_values)
+
+        # Bulk writes do not send post_save either, which records catalog changes.
+        self.record_catalog_changes([self.id])
+
+        logger.info(
+            'Created [%d] and updated [%d] of [%d] course seats for [%s].',
+            len(new_seats), len(updated_seats), len(upserts), course_id
+        )
+        return [seat for seat, __, ___ in upserts]
+
+    def _save_seat_products(self, parent, existing_seats, upserts):
+        """ Creates the new seat products and updates the changed ones, in bulk. Returns both lists. """
+        new_seats = []
+        updated_seats = []
+        for seat, seat_data, values in upserts:
+            fields = {
+                'course_id': self.id,
+                'structure': Product.CHILD,
+                'parent_id': parent.id,
+                'is_discountable': True,
+                'expires': seat_data.get('expires'),
+                'title': self.get_course_seat_name(values['certificate_type'], values['id_verification_required']),
+            }
+            if seat.pk and all(getattr(seat, name) == value for name, value in fields.items()):
+                continue
+
+            for name, value in fields.items():
+                setattr(seat, name, value)
+            if seat.pk and seat not in updated_seats:
+                seat.date_updated = now()
+                updated_seats.append(seat)
+            elif not seat.pk and seat not in new_seats:
+                new_seats.append(seat)
+
+        Product.objects.bulk_create(new_seats)
+        if new_seats and new_seats[0].pk is None:
+            # Not all databases return the primary keys of bulk inserts. The rows are inserted in order.
+            existing_ids = [seat.id for seat in existing_seats]
+            new_ids = list(parent.children.exclude(id__in=existing_ids).order_by('id').values_list('id', flat=True))
+            for seat, seat_id in zip(new_seats, new_ids):
+                seat.pk = seat_id
+        Product.objects.bulk_update(updated_seats, ['course', 'structure', 'parent', 'is_discountable', 'expires',
+                                                    'title', 'date_updated'])
+
+        history_user = _get_history_user()
+        Product.history.bulk_history_create(new_seats, default_user=history_user)
+        Product.history.bulk_history_create(updated_seats, update=True, default_user=history_user)
+        return new_seats, updated_seats
+
+    def _save_seat_attribute_values(self, attributes, upserts, new_seats):
+        """
+        Creates, updates and deletes the attribute values of the seats, in bulk.
+
+        As with `ProductAttributesContainer.save`, only the changed values are written, and empty values are deleted.
+
+        Returns:
+            dict: The attribute values of each seat, keyed by seat ID and then by attribute code.
+        """
+        new_values = []
+        updated_values = []
+        deleted_value_ids = []
+        current_values = {}
+        for seat, __, values in upserts:
+            if seat.id not in current_values:
+                current_values[seat.id] = {} if seat in new_seats else {
+                    value.attribute.code: value for value in seat.attribute_values.all()
+                }
+            seat_values = current_values[seat.id]
+
+            for code, value in values.items():
+                if code not in attributes:
+                    continue
+
+                value_obj = seat_values.get(code)
+                if value is None or value == '':
+                    if value_obj:
+                        deleted_value_ids.append(value_obj.id)
+                        del seat_values[code]
+                elif value_obj is None:
+                    value_obj = ProductAttributeValue(product=seat, attribute=attributes[code])
+                    value_obj.value = value
+                    new_values.append(value_obj)
+                    seat_values[code] = value_obj
+                elif value != value_obj.value:
+                    value_obj.value = value
+                    if value_obj.pk and value_obj not in updated_values:
+                        updated_values.append(value_obj)
+
+        ProductAttributeValue.objects.filter(id__in=deleted_value_ids).delete()
+        ProductAttributeValue.objects.bulk_create(new_values)
+        ProductAttributeValue.objects.bulk_update(
+            updated_values, ['value_text', 'value_boolean', 'value_integer']
+        )
+
+        if new_values and new_values[0].pk is None:
+            # Not all databases return the primary keys of bulk inserts, but attribute values are unique per product.
+            created_ids = {
+                (product_id, attribute_id): value_id
+                for value_id, product_id, attribute_id in ProductAttributeValue.objects.filter(
+                    product_id__in={value.product_id for value in new_values},
+                    attribute_id__in={value.attribute_id for value in new_values},
+                ).values_list('id', 'product_id', 'attribute_id')
+            }
+            for value in new_values:
+                value.pk = created_ids[(value.product_id, value.attribute_id)]
+
+        history_user = _get_history_user()
+        ProductAttributeValue.history.bulk_history_create(new_values, default_user=history_user)
+        ProductAttributeValue.history.bulk_history_create(updated_values, update=True, default_user=history_user)
+
+        return {
+            seat_id: {code: value.value for code, value in seat_values.items()}
+            for seat_id, seat_values in current_values.items()
+        }
+
+    def _save_seat_stock_records(self, upserts, new_seats, current_values):
+        """ Creates and updates the stock records of the seats for this course's partner, in bulk. """
+        stock_records = {}
+        for seat, __, ___ in upserts:
+            if seat not in new_seats:
+                stock_records.update({
+                    seat.id: stock_record for stock_record in seat.stockrecords.all()
+                    if stock_record.partner_id == self.partner_id
+                })
+
+        new_stock_records = []
+        updated_stock_records = []
+        for seat, seat_data, __ in upserts:
+            stock_record = stock_records.get(seat.id)
+            if stock_record is None:
+                values = current_values[seat.id]
+                stock_record = StockRecord(
+                    product=seat,
+                    partner=self.partner,
+                    partner_sku=generate_seat_sku(
+                        self.partner,
+                        values.get('certificate_type', ''),
+                        values['course_key'],
+                        values['id_verification_required'],
+                        values.get('credit_provider', ''),
+                    )
+                )
+                stock_records[seat.id] = stock_record
+                new_stock_records.append(stock_record)
+            elif (stock_record.price_excl_tax == seat_data['price'] and
+                  stock_record.price_currency == settings.OSCAR_DEFAULT_CURRENCY):
+                continue
+            elif stock_record.pk and stock_record not in updated_stock_records:
+                stock_record.date_updated = now()
+                updated_stock_records.append(stock_record)
+
+            stock_record.price_excl_tax = seat_data['price']
+            stock_record.price_currency = settings.OSCAR_DEFAULT_CURRENCY
+
+        StockRecord.objects.bulk_create(new_stock_records)
+        if new_stock_records and new_stock_records[0].pk is None:
+            # Not all databases return the primary keys of bulk inserts, but SKUs are unique per partner.
+            created_ids = dict(StockRecord.objects.filter(
+                partner=self.partner, partner_sku__in=[stock_record.partner_sku for stock_record in new_stock_records]
+            ).values_list('partner_sku', 'id'))
+            for stock_record in new_stock_records:
+                stock_record.pk = created_ids[stock_record.partner_sku]
+        StockRecord.objects.bulk_update(
+            updated_stock_records, ['price_excl_tax', 'price_currency', 'date_updated']
+        )
+
+        history_user = _get_history_user()
+        StockRecord.history.bulk_history_create(new_stock_records, default_user=history_user)
+        StockRecord.history.bulk_history_create(updated_stock_records, update=True, default_user=history_user)
+
+    def _update_enrollment_code_expires(self, seats):
+        """ Updates the expiration date of the enrollment code after the expiration dates of the seats changed. """
+        seats = [seat for seat in seats if seat.expires != seat.original_expires]
+        if not seats:
+            return
+
+        enrollment_code = self.get_enrollment_code()
+        if enrollment_code:
+            for seat in seats:
+                if enrollment_code.expires is None or enrollment_code.expires >= seat.expires:
+                    enrollment_code.expires = seat.expires
+            enrollment_code.save()
+
+        for seat in seats:
+            seat.original_expires = seat.expires
+
+    def _remove_stale_seats(self, seats, upserts, current_values):
+        """
+        Deletes the seats that professional seats replace, i.e. those with the same certificate type and a
+        different verification requirement, unless they have been purchased.
+        """
+        upserted_positions = {seat.id: position for position, (seat, __, ___) in enumerate(upserts)}
+        stale_seat_ids = set()
+        for position, (__, ___, values) in enumerate(upserts):
+            if self.certificate_type_for_mode(values['certificate_type']) != 'professional':
+                continue
+
+            for seat in seats:
+                seat_values = current_values.get(seat.id) or {
+                    value.attribute.code: value.value for value in seat.attribute_values.all()
+                }
+                # Seats given later replace the stale seats, rather than being deleted.
+                if (seat_values.get('certificate_type') == values['certificate_type'] and
+                        seat_values.get('id_verification_required') == (not values['id_verification_required']) and
+                        upserted_positions.get(seat.id, -1) < position):
+                    stale_seat_ids.add(seat.id)
+
+        if stale_seat_ids:
+            Product.objects.filter(id__in=stale_seat_ids).annotate(orders=Count('line')).filter(orders=0).delete()
+
     def get_enrollment_code(self):
         """ Returns an enrollment code Product related to this course. """
         try:
@@ -348,3 +701,30 @@ class Course(models.Model):
             else:
                 enrollment_code.expires = now() - timedelta(days=365)
             enrollment_code.save()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def record_course_catalog_change(sender, **kwargs):  # pylint: disable=unused-argument
+    """ Records the change of a course in the catalog of its partner. """
+    Course.record_catalog_changes(course_ids=[kwargs['instance'].id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def record_product_catalog_change(sender, **kwargs):  # pylint: disable=unused-argument
+    """ Records the change of a course product in the catalog of the partner of the course. """
+    course_id = kwargs['instance'].course_id
+    if course_id:
+        Course.record_catalog_changes(course_ids=[course_id])
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def record_product_detail_catalog_change(sender, **kwargs):  # pylint: disable=unused-argument
+    """ Records the change of the stock record or an attribute of a course product. """
+    # The courses of the products are looked up together when the transaction commits, rather than loading the
+    # product of every deleted row.
+    Course.record_catalog_changes(product_ids=[kwargs['instance'].product_id])
@@ -3,18 +3,21 @@
 import ddt
 import mock
 from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now, timedelta
 from freezegun import freeze_time
 from oscar.core.loading import get_model
-from oscar.test.factories import BasketFactory
+from oscar.test.factories import BasketFactory, create_product
 
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME
 from ecommerce.courses.models import Course
 from ecommerce.courses.publishers import LMSPublisher
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.catalogue.utils import generate_sku
 from ecommerce.extensions.test.factories import create_order
-from ecommerce.tests.testcases import TestCase
+from ecommerce.tests.testcases import TestCase, TransactionTestCase
 
 Product = get_model('catalogue', 'Product')
 ProductClass = get_model('catalogue', 'ProductClass')
@@ -76,6 +79,36 @@ class CourseTests(DiscoveryTestMixin, TestCase):
         """ Verify the method returns the correct certificate type for a given mode. """
         self.assertEqual(Course.certificate_type_for_mode(mode), expected)
 
+    # Catalog changes are recorded when transactions commit, which they do not in these tests.
+    @mock.patch('django.db.transaction.on_commit', lambda func: func())
+    def test_record_catalog_changes(self):
+        """ Verify changes of courses and their products move the courses to new versions of the partner catalog. """
+        course = CourseFactory(partner=self.partner)
+        other_course = CourseFactory(partner=self.partner)
+
+        def assert_latest_version(expected_course):
+            self.partner.refresh_from_db()
+            latest = Course.objects.filter(partner=self.partner).order_by('-catalog_version').first()
+            self.assertEqual(latest, expected_course)
+            self.assertEqual(latest.catalog_version, self.partner.catalog_version)
+
+        assert_latest_version(other_course)
+
+        seat = course.create_or_update_seat('verified', True, 100)
+        assert_latest_version(course)
+
+        other_course.create_or_update_seats([{'certificate_type': 'verified', 'id_verification_required': True,
+                                              'price': 100}])
+        assert_latest_version(other_course)
+
+        stock_record = seat.stockrecords.get()
+        stock_record.price_excl_tax = 50
+        stock_record.save()
+        assert_latest_version(course)
+
+        other_course.seat_products.first().attribute_values.first().delete()
+        assert_latest_version(other_course)
+
     def test_publish_to_lms(self):
         """ Verify the method publishes data to LMS. """
         course = CourseFactory()
@@ -301,6 +334,91 @@ class CourseTests(DiscoveryTestMixin, TestCase):
         self.assertEqual(product_mode.attr.id_verification_required, False)
         self.assertEqual(product_mode.attr.certificate_type, 'professional')
 
+    def test_create_or_update_seats(self):
+        """ Verify the method creates the same seats as create_or_update_seat, and updates only what changed. """
+        course = CourseFactory(id='a/b/c', name='Test Course', partner=self.partner)
+        expires = now() + timedelta(days=30)
+        seats = course.create_or_update_seats([
+            {'certificate_type': '', 'id_verification_required': False, 'price': 0},
+            {'certificate_type': 'Verified', 'id_verification_required': True, 'price': 10, 'expires': expires},
+            {'certificate_type': 'credit', 'id_verification_required': True, 'price': 100, 'credit_provider': 'MIT',
+             'credit_hours': 2},
+        ])
+
+        self.assertEqual(course.products.count(), 4)
+        self.assertEqual(course.seat_products.count(), 3)
+        self.assert_course_seat_valid(seats[0], course, '', False, 0)
+        self.assert_course_seat_valid(seats[1], course, 'verified', True, 10)
+        self.assert_course_seat_valid(seats[2], course, 'credit', True, 100, credit_provider='MIT', credit_hours=2)
+        self.assertEqual(Product.objects.get(id=seats[1].id).expires, expires)
+
+        # The seats have the SKUs and history that create_or_update_seat would have given them.
+        for seat in seats:
+            expected_sku = generate_sku(Product.objects.get(id=seat.id), self.partner)
+            self.assertEqual(seat.stockrecords.get().partner_sku, expected_sku)
+        self.assertEqual(seats[2].history.count(), 1)
+        self.assertEqual(seats[2].stockrecords.get().history.count(), 1)
+        self.assertEqual(seats[2].attribute_values.get(attribute__code='credit_hours').history.count(), 1)
+
+        skus = [seat.stockrecords.get().partner_sku for seat in seats]
+        # The changes, and the savepoint they are written in.
+        with self.assertNumQueries(12):
+            updated_seats = course.create_or_update_seats([
+                {'certificate_type': '', 'id_verification_required': False, 'price': 0, 'sku': skus[0]},
+                {'certificate_type': 'verified', 'id_verification_required': True, 'price': 20, 'expires': expires,
+                 'sku': skus[1]},
+                {'certificate_type': 'credit', 'id_verification_required': True, 'price': 100,
+                 'credit_provider': 'MIT', 'credit_hours': 4, 'sku': skus[2]},
+            ])
+
+        self.assertEqual(updated_seats, seats)
+        self.assertEqual(course.seat_products.count(), 3)
+        self.assert_course_seat_valid(updated_seats[1], course, 'verified', True, 20)
+        self.assert_course_seat_valid(updated_seats[2], course, 'credit', True, 100, credit_provider='MIT',
+                                      credit_hours=4)
+        self.assertEqual(seats[1].history.count(), 1)
+        self.assertEqual(seats[1].stockrecords.get().history.count(), 2)
+        self.assertEqual(seats[2].attribute_values.get(attribute__code='credit_hours').history.count(), 2)
+
+    def test_create_or_update_seats_enrollment_code(self):
+        """ Verify the enrollment code is created, and follows the expiration date of its seat. """
+        course = CourseFactory(partner=self.partner)
+        expires = now() + timedelta(days=30)
+        seat = course.create_or_update_seats(
+            [{'certificate_type': 'verified', 'id_verification_required': True, 'price': 10}],
+            create_enrollment_code=True
+        )[0]
+        enrollment_code = course.get_enrollment_code()
+        self.assertEqual(enrollment_code.attr.seat_type, 'verified')
+        self.assertIsNone(enrollment_code.expires)
+
+        course.create_or_update_seats([{
+            'certificate_type': 'verified', 'id_verification_required': True, 'price': 10, 'expires': expires,
+            'sku': seat.stockrecords.get().partner_sku,
+        }])
+        enrollment_code.refresh_from_db()
+        self.assertEqual(enrollment_code.expires, expires)
+
+    def test_create_or_update_seats_stale_product_removal(self):
+        """ Verify stale professional seats are deleted, unless they have been purchased or are given later. """
+        user = self.create_user()
+        course = CourseFactory(partner=self.partner)
+        purchased_seat = course.create_or_update_seat('professional', False, 0)
+        basket = BasketFactory(owner=user, site=self.site)
+        basket.add_product(purchased_seat)
+        create_order(basket=basket, user=user)
+
+        seats = course.create_or_update_seats([
+            {'certificate_type': 'no-id-professional', 'id_verification_required': False, 'price': 0},
+            {'certificate_type': 'no-id-professional', 'id_verification_required': True, 'price': 0},
+            {'certificate_type': 'professional', 'id_verification_required': True, 'price': 0},
+        ])
+
+        self.assertEqual(
+            sorted(course.seat_products.values_list('id', flat=True)),
+            sorted([purchased_seat.id, seats[1].id, seats[2].id])
+        )
+
     def test_type(self):
         """ Verify the property returns a type value corresponding to the available products. """
         course = CourseFactory(id='a/b/c', name='Test Course', partner=self.partner)
@@ -371,3 +489,90 @@ class CourseTests(DiscoveryTestMixin, TestCase):
         ec_expires = now() - timedelta(days=365)
         self.assertEqual(course.get_enrollment_code().expires, ec_expires)
         self.assertIsNone(course.enrollment_code_product)
+
+
+class CourseCatalogVersionTests(DiscoveryTestMixin, TransactionTestCase):
+    def test_record_catalog_changes_on_commit(self):
+        """ Verify courses are moved to a new version of the partner catalog once the transaction commits. """
+        course = CourseFactory(partner=self.partner)
+        self.partner.refresh_from_db()
+        version = self.partner.catalog_version
+
+        with transaction.atomic():
+            course.create_or_update_seat('verified', True, 100)
+            self.partner.refresh_from_db()
+            self.assertEqual(self.partner.catalog_version, version)
+
+        self.partner.refresh_from_db()
+        course.refresh_from_db()
+        self.assertGreater(self.partner.catalog_version, version)
+        self.assertEqual(course.catalog_version, self.partner.catalog_version)
+
+    def test_record_catalog_changes_once_per_transaction(self):
+        """ Verify the changes of a transaction move the courses to a single new version, with one callback. """
+        course = CourseFactory(partner=self.partner)
+        other_course = CourseFactory(partner=self.partner)
+        self.partner.refresh_from_db()
+        version = self.partner.catalog_version
+
+        with mock.patch.object(transaction, 'on_commit', wraps=transaction.on_commit) as mock_on_commit:
+            with transaction.atomic():
+                course.create_or_update_seat('verified', True, 100)
+                other_course.create_or_update_seat('verified', True, 100)
+
+        self.assertEqual(mock_on_commit.call_count, 1)
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.catalog_version, version + 1)
+        for changed_course in (course, other_course):
+            changed_course.refresh_from_db()
+            self.assertEqual(changed_course.catalog_version, version + 1)
+
+    def test_record_catalog_changes_after_rollback(self):
+        """ Verify changes are recorded by the transactions following one that was rolled back. """
+        course = CourseFactory(partner=self.partner)
+        self.partner.refresh_from_db()
+        version = self.partner.catalog_version
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                course.create_or_update_seat('verified', True, 100)
+                raise ValueError
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.catalog_version, version)
+
+        with transaction.atomic():
+            course.create_or_update_seat('verified', True, 100)
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.catalog_version, version + 1)
+
+    def test_record_product_detail_catalog_changes(self):
+        """ Verify deleted product details are recorded without loading their products, one row at a time. """
+        course = CourseFactory(partner=self.partner)
+        seat = course.create_or_update_seat('verified', True, 100)
+        self.partner.refresh_from_db()
+        version = self.partner.catalog_version
+
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                seat.stockrecords.all().delete()
+                seat.attribute_values.all().delete()
+
+        # The courses of the products are looked up once, when the transaction commits.
+        product_queries = [query for query in queries if query['sql'].startswith('SELECT') and
+                           'FROM "catalogue_product" ' in query['sql']]
+        self.assertEqual(len(product_queries), 1)
+        self.partner.refresh_from_db()
+        course.refresh_from_db()
+        self.assertEqual(self.partner.catalog_version, version + 1)
+        self.assertEqual(course.catalog_version, self.partner.catalog_version)
+
+    def test_record_catalog_changes_products_without_course(self):
+        """ Verify changes of products without a course, and their details, do not change the catalog. """
+        self.partner.refresh_from_db()
+        version = self.partner.catalog_version
+
+        product = create_product(price=10)
+        product.stockrecords.get().save()
+
+        self.partner.refresh_from_db()
+        self.assertEqual(self.partner.catalog_version, version)
@@ -2,6 +2,7 @@
 
 import logging
 from decimal import Decimal
+from functools import partial
 from uuid import UUID
 
 import crum
@@ -13,7 +14,8 @@ from requests.exceptions import ConnectionError as ReqConnectionError
 from requests.exceptions import Timeout
 from slumber.exceptions import SlumberHttpBaseException
 
-from ecommerce.courses.utils import get_course_info_from_catalog
+from ecommerce.core.fanout import fan_out
+from ecommerce.courses.utils import get_course_detail
 from ecommerce.enterprise.api import catalog_contains_course_runs, get_enterprise_id_for_user
 from ecommerce.enterprise.utils import get_or_create_enterprise_customer_user
 from ecommerce.extensions.basket.utils import ENTERPRISE_CATALOG_ATTRIBUTE_TYPE
@@ -125,12 +127,22 @@ class EnterpriseCustomerCondition(ConditionWithoutRangeMixin, SingleItemConsumpt
         enterprise_name_in_condition = str(self.enterprise_customer_name)
         username = basket.owner.username
 
+        # The courses of the entitlement products in the basket are retrieved concurrently.
+        lines = basket.all_lines()
+        site = basket.site
+        # Load the site configuration, needed to call the Discovery Service, before the calls leave this thread.
+        site.siteconfiguration  # pylint: disable=pointless-statement
+        courses = fan_out({
+            line.id: partial(get_course_detail, site, line.product.attr.UUID)
+            for line in lines if line.product.is_course_entitlement_product
+        })
+
         # This variable will hold both course keys and course run identifiers.
         course_ids = []
-        for line in basket.all_lines():
+        for line in lines:
             if line.product.is_course_entitlement_product:
                 try:
-                    response = get_course_info_from_catalog(basket.site, line.product)
+                    response = courses[line.id].result()
                 except (ReqConnectionError, KeyError, SlumberHttpBaseException, Timeout) as exc:
                     logger.exception(
                         '[Code Redemption Failure] Unable to apply enterprise offer because basket '
@@ -11,6 +11,7 @@ from oscar.core.loading import get_model
 from oscar.test.factories import BasketFactory, OrderDiscountFactory, OrderFactory
 from requests.exceptions import ConnectionError as ReqConnectionError
 
+from ecommerce.core.fanout import fan_out
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.enterprise.conditions import EnterpriseCustomerCondition
@@ -29,6 +30,7 @@ from ecommerce.extensions.test import factories
 from ecommerce.tests.factories import ProductFactory, SiteConfigurationFactory, UserFactory
 from ecommerce.tests.testcases import TestCase
 
+Basket = get_model('basket', 'Basket')
 Benefit = get_model('offer', 'Benefit')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 OfferAssignment = get_model('offer', 'OfferAssignment')
@@ -305,6 +307,27 @@ class EnterpriseCustomerConditionTests(EnterpriseServiceMockMixin, DiscoveryTest
 
         self.assertTrue(self.condition.is_satisfied(offer, basket))
 
+    @httpretty.activate
+    def test_is_satisfied_with_course_entitlement_loads_site_configuration(self):
+        """ Ensure the site configuration is loaded before the course details are retrieved in other threads. """
+        offer = factories.EnterpriseOfferFactory(partner=self.partner, condition=self.condition)
+        basket = BasketFactory(site=self.site, owner=self.user)
+        basket.add_product(self.entitlement)
+        basket = Basket.objects.get(id=basket.id)
+        self.mock_course_detail_endpoint(
+            discovery_api_url=self.site_configuration.discovery_api_url,
+            course=self.entitlement
+        )
+
+        def fan_out_without_queries(calls):
+            with self.assertNumQueries(0):
+                basket.site.siteconfiguration  # pylint: disable=pointless-statement
+            return fan_out(calls)
+
+        with mock.patch('ecommerce.enterprise.conditions.fan_out', side_effect=fan_out_without_queries) as mock_fan_out:
+            self.condition.is_satisfied(offer, basket)
+        self.assertTrue(mock_fan_out.called)
+
     @httpretty.activate
     def test_is_satisfied_with_course_entitlement_request_error(self):
         """ Ensure the condition returns False if an error occurs while fetching course details. """
@@ -4,6 +4,7 @@ import django_filters
 from django.db.models import Q
 from oscar.core.loading import get_model
 
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
 Product = get_model('catalogue', 'Product')
 
@@ -25,7 +26,11 @@ class OrderFilter(django_filters.FilterSet):
     """ Filter orders via query string parameter."""
 
     username = django_filters.CharFilter(field_name='user__username')
+    course_id = django_filters.CharFilter(method='filter_course_id')
+
+    def filter_course_id(self, queryset, name, value):  # pylint: disable=unused-argument
+        return queryset.filter(id__in=Line.for_course(value).values('order_id'))
 
     class Meta:
         model = Order
-        fields = ('username',)
+        fields = ('username', 'course_id',)
@@ -2,7 +2,7 @@
 
 
 import logging
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 from decimal import Decimal
 from urllib.parse import urljoin
 
@@ -13,7 +13,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Count, Q, Sum, prefetch_related_objects
+from django.db.models import Count, Manager, Prefetch, Q, prefetch_related_objects
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from oscar.core.loading import get_class, get_model
@@ -29,7 +29,7 @@ from ecommerce.core.constants import (
 )
 from ecommerce.core.url_utils import get_ecommerce_url
 from ecommerce.core.utils import log_message_and_raise_validation_error
-from ecommerce.coupons.utils import is_coupon_available
+from ecommerce.coupons.utils import get_enterprise_coupons_overview, is_coupon_available
 from ecommerce.courses.models import Course
 from ecommerce.enterprise.benefits import BENEFIT_MAP as ENTERPRISE_BENEFIT_MAP
 from ecommerce.entitlements.utils import create_or_update_course_entitlement
@@ -61,12 +61,14 @@ from ecommerce.programs.custom import class_path
 
 logger = logging.getLogger(__name__)
 
+ArchivedPaymentProcessorResponse = get_model('payment', 'ArchivedPaymentProcessorResponse')
 Basket = get_model('basket', 'Basket')
 BasketLine = get_model('basket', 'Line')
 Benefit = get_model('offer', 'Benefit')
 BillingAddress = get_model('order', 'BillingAddress')
 Catalog = get_model('catalogue', 'Catalog')
 CodeAssignmentNudgeEmails = get_model('offer', 'CodeAssignmentNudgeEmails')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
 Category = get_model('catalogue', 'Category')
 Line = get_model('order', 'Line')
 OfferAssignment = get_model('offer', 'OfferAssignment')
@@ -200,10 +202,23 @@ class ProductPaymentInfoMixin(serializers.ModelSerializer):
             return serializers.DecimalField(max_digits=10, decimal_places=2).to_representation(info.price.excl_tax)
         return None
 
+    def get_strategy(self):
+        """ Returns the strategy shared by the serializers of the request, which memoizes the purchase info. """
+        if 'strategy' not in self.context:
+            self.context['strategy'] = Selector().strategy(request=self.context.get('request'))
+        return self.context['strategy']
+
     def _get_info(self, product):
-        return Selector().strategy(
-            request=self.context.get('request')
-        ).fetch_for_product(product)
+        return self.get_strategy().fetch_for_products([product])[product.id]
+
+
+class ProductPaymentInfoListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """ List serializer retrieving the price information of all the products in a single pass. """
+
+    def to_representation(self, data):
+        products = list(data.all() if isinstance(data, Manager) else data)
+        self.child.get_strategy().fetch_for_products(products)
+        return super(ProductPaymentInfoListSerializer, self).to_representation(products)
 
 
 class BillingAddressSerializer(serializers.ModelSerializer):
@@ -294,6 +309,7 @@ class ProductSerializer(ProductPaymentInfoMixin, serializers.HyperlinkedModelSer
         model = Product
         fields = ('id', 'url', 'structure', 'product_class', 'title', 'price', 'expires', 'attribute_values',
                   'is_available_to_buy', 'stockrecords',)
+        list_serializer_class = ProductPaymentInfoListSerializer
         extra_kwargs = {
             'url': {'view_name': PRODUCT_DETAIL_VIEW},
         }
@@ -380,13 +396,21 @@ class BasketSerializer(serializers.ModelSerializer):
         )
         if successful_payment_notifications:
             return "Accepted"
+        # Archived responses are compressed, so they are only read, and checked one by one, when no recent
+        # response matches.
+        archived_payment_notifications = ArchivedPaymentProcessorResponse.objects.filter(basket=obj)
+        if any(notification.as_response().is_successful for notification in archived_payment_notifications):
+            return "Accepted"
         return "Declined"
 
     def get_payment_processor(self, obj):
         payment_notifications = obj.paymentprocessorresponse_set.filter(transaction_id__isnull=False)
         if payment_notifications:
             return payment_notifications[0].processor_name
-        return "None"
+        archived_processor_name = ArchivedPaymentProcessorResponse.objects.filter(
+            basket=obj, transaction_id__isnull=False
+        ).values_list('processor_name', flat=True).first()
+        return archived_processor_name or "None"
 
     def get_products(self, obj):
         lines = BasketLine.objects.filter(basket=obj)
@@ -523,39 +547,44 @@ class SeatProductHelper:
             raise serializers.ValidationError(_(u"Products must have a price."))
 
     @staticmethod
-    def save(course, product, create_enrollment_code):
+    def get_seat_data(product):
+        """ Returns the arguments of `Course.create_or_update_seats` for the given product serialization. """
         attrs = _flatten(product['attribute_values'])
 
         # Extract arguments required for Seat creation, deserializing as necessary.
-        certificate_type = attrs.get('certificate_type', '')
-        id_verification_required = attrs['id_verification_required']
-        price = Decimal(product['price'])
+        seat_data = {
+            'certificate_type': attrs.get('certificate_type', ''),
+            'id_verification_required': attrs['id_verification_required'],
+            'price': Decimal(product['price']),
+        }
 
         # Extract arguments which are optional for Seat creation, deserializing as necessary.
         expires = product.get('expires')
-        expires = parse(expires) if expires else None
-        credit_provider = attrs.get('credit_provider')
+        seat_data['expires'] = parse(expires) if expires else None
+        seat_data['credit_provider'] = attrs.get('credit_provider')
         credit_hours = attrs.get('credit_hours')
-        credit_hours = int(credit_hours) if credit_hours else None
-        sku = None
+        seat_data['credit_hours'] = int(credit_hours) if credit_hours else None
+        seat_data['sku'] = None
         stockrecords = product.get('stockrecords', [])
         if stockrecords:
-            sku = stockrecords[0].get('partner_sku')
+            seat_data['sku'] = stockrecords[0].get('partner_sku')
 
-        seat = course.create_or_update_seat(
-            certificate_type,
-            id_verification_required,
-            price,
-            expires=expires,
-            credit_provider=credit_provider,
-            credit_hours=credit_hours,
+        return seat_data
+
+    @staticmethod
+    def save_all(course, products, create_enrollment_code):
+        seats = course.create_or_update_seats(
+            [SeatProductHelper.get_seat_data(product) for product in products],
             create_enrollment_code=create_enrollment_code,
-            sku=sku,
         )
 
         # As a convenience to our caller, provide the SKU in the returned product serialization.
-        # We only create one stockrecord per product, so this first() business is safe.
-        product['partner_sku'] = seat.stockrecords.first().partner_sku
+        # We only create one stockrecord per product, so this is safe.
+        partner_skus = dict(StockRecord.objects.filter(
+            product__in=seats, partner=course.partner
+        ).values_list('product_id', 'partner_sku'))
+        for product, seat in zip(products, seats):
+            product['partner_sku'] = partner_skus[seat.id]
 
 
 class AtomicPublicationSerializer(serializers.Serializer):  # pylint: disable=abstract-method
@@ -641,8 +670,13 @@ class AtomicPublicationSerializer(serializers.Serializer):  # pylint: disable=ab
 
                     if product_class == COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME:
                         EntitlementProductHelper.save(partner, course, course_uuid, product)
-                    elif product_class == SEAT_PRODUCT_CLASS_NAME:
-                        SeatProductHelper.save(course, product, create_or_activate_enrollment_code)
+
+                # Seats are compared with the existing seats of the course, and saved, all at once.
+                seat_products = [
+                    product for product in products if product.get('product_class') == SEAT_PRODUCT_CLASS_NAME
+                ]
+                if seat_products:
+                    SeatProductHelper.save_all(course, seat_products, create_or_activate_enrollment_code)
 
                 if course.get_enrollment_code():
                     course.toggle_enrollment_code_status(is_active=create_or_activate_enrollment_code)
@@ -738,6 +772,12 @@ class VoucherSerializer(serializers.ModelSerializer):
 
 
 class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """
+    Serializes a code usage, a dict containing a code and the email of the user it is assigned to.
+
+    The vouchers, assignments and counts needed to serialize a list of usages can be fetched up front with
+    `get_usages_context` and passed in the `code_usages` context; otherwise they are queried usage by usage.
+    """
     code = serializers.SerializerMethodField()
     assigned_to = serializers.SerializerMethodField()
     redeem_url = serializers.SerializerMethodField()
@@ -747,10 +787,67 @@ class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-m
     revocation_date = serializers.SerializerMethodField()
     is_public = serializers.SerializerMethodField()
 
+    code_key = 'code'
+    assigned_to_key = 'user_email'
+
+    @classmethod
+    def get_usages_context(cls, usages):
+        """
+        Fetch everything needed to serialize `usages` with a fixed number of queries.
+
+        Returns:
+            dict: To be passed to the serializer as its `code_usages` context.
+        """
+        usages = list(usages)
+        codes = {usage[cls.code_key] for usage in usages}
+        emails = {usage[cls.assigned_to_key] for usage in usages if usage.get(cls.assigned_to_key)}
+
+        vouchers = Voucher.objects.filter(code__in=codes).prefetch_related(
+            Prefetch('offers', queryset=ConditionalOffer.objects.select_related('condition'))
+        )
+
+        assignments = {}
+        if emails:
+            for assignment in OfferAssignment.objects.filter(code__in=codes, user_email__in=emails).order_by('id'):
+                assignments.setdefault((assignment.code, assignment.user_email), assignment)
+
+        # Assignments are counted both per code and per code and email.
+        num_assignments = Counter()
+        assignment_counts = OfferAssignment.objects.filter(
+            code__in=codes,
+            status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING, OFFER_ASSIGNMENT_EMAIL_BOUNCED],
+        ).order_by().values('code', 'user_email').annotate(count=Count('id'))
+        for row in assignment_counts:
+            num_assignments[(row['code'], row['user_email'])] += row['count']
+            num_assignments[(row['code'], None)] += row['count']
+
+        application_counts = VoucherApplication.objects.filter(
+            voucher__code__in=codes
+        ).order_by().values('voucher__code', 'user__email').annotate(count=Count('id'))
+
+        return {
+            'vouchers': {voucher.code: voucher for voucher in vouchers},
+            'assignments': assignments,
+            'num_assignments': num_assignments,
+            'num_applications': {
+                (row['voucher__code'], row['user__email']): row['count'] for row in application_counts
+            },
+        }
+
+    def _get_voucher(self, obj):
+        code = self.get_code(obj)
+        code_usages = self.context.get('code_usages')
+        if code_usages is not None:
+            return code_usages['vouchers'][code]
+        return Voucher.objects.get(code=code)
+
     def _get_assignment(self, obj):
         assigned_to = self.get_assigned_to(obj)
         code = self.get_code(obj)
         if assigned_to and code:
+            code_usages = self.context.get('code_usages')
+            if code_usages is not None:
+                return code_usages['assignments'].get((code, assigned_to))
             return OfferAssignment.objects.filter(code=code, user_email=assigned_to).first()
         return None
 
@@ -770,17 +867,17 @@ class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-m
         return revocation_date.strftime("%B %d, %Y %H:%M") if revocation_date else ''
 
     def get_code(self, obj):
-        return obj.get('code')
+        return obj.get(self.code_key)
 
     def get_redeem_url(self, obj):
         url = get_ecommerce_url('/coupons/offer/')
         return '{url}?code={code}'.format(url=url, code=self.get_code(obj))
 
     def get_assigned_to(self, obj):
-        return obj.get('user_email')
+        return obj.get(self.assigned_to_key)
 
     def get_redemptions(self, obj):
-        voucher = Voucher.objects.get(code=self.get_code(obj))
+        voucher = self._get_voucher(obj)
         offer = voucher.best_offer
         redemption_count = voucher.num_orders
 
@@ -797,10 +894,13 @@ class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-m
         }
 
     def get_is_public(self, obj):
-        voucher = Voucher.objects.get(code=self.get_code(obj))
-        return voucher.is_public
+        return self._get_voucher(obj).is_public
 
     def num_assignments(self, code, user_email=None):
+        code_usages = self.context.get('code_usages')
+        if code_usages is not None:
+            return code_usages['num_assignments'][(code, user_email or None)]
+
         offer_assignments = OfferAssignment.objects.filter(
             code=code,
             status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING, OFFER_ASSIGNMENT_EMAIL_BOUNCED],
@@ -810,6 +910,13 @@ class CodeUsageSerializer(serializers.Serializer):  # pylint: disable=abstract-m
 
         return offer_assignments.count()
 
+    def num_applications(self, code, user_email):
+        code_usages = self.context.get('code_usages')
+        if code_usages is not None:
+            return code_usages['num_applications'].get((code, user_email), 0)
+
+        return VoucherApplication.objects.filter(voucher__code=code, user__email=user_email).count()
+
 
 class NotAssignedCodeUsageSerializer(CodeUsageSerializer):  # pylint: disable=abstract-method
 
@@ -843,26 +950,16 @@ class PartialRedeemedCodeUsageSerializer(CodeUsageSerializer):  # pylint: disabl
             return super(PartialRedeemedCodeUsageSerializer, self).get_redemptions(obj)
 
         num_assignments = self.num_assignments(code=self.get_code(obj), user_email=self.get_assigned_to(obj))
-        num_applications = VoucherApplication.objects.filter(
-            voucher__code=self.get_code(obj),
-            user__email=self.get_assigned_to(obj)
-        ).count()
+        num_applications = self.num_applications(code=self.get_code(obj), user_email=self.get_assigned_to(obj))
         return {'used': num_applications, 'total': num_assignments + num_applications}
 
 
 class RedeemedCodeUsageSerializer(CodeUsageSerializer):  # pylint: disable=abstract-method
-
-    def get_code(self, obj):
-        return obj.get('voucher__code')
-
-    def get_assigned_to(self, obj):
-        return obj.get('user__email')
+    code_key = 'voucher__code'
+    assigned_to_key = 'user__email'
 
     def get_redemptions(self, obj):
-        num_applications = VoucherApplication.objects.filter(
-            voucher__code=self.get_code(obj),
-            user__email=self.get_assigned_to(obj)
-        ).count()
+        num_applications = self.num_applications(code=self.get_code(obj), user_email=self.get_assigned_to(obj))
         return {'used': num_applications, 'total': num_applications}
 
 
@@ -912,8 +1009,9 @@ class OfferAssignmentSummarySerializer(serializers.BaseSerializer):  # pylint: d
         representation['redemptions_remaining'] = instance['count']
         representation['code'] = offer_assignment.code
         representation['catalog'] = offer_assignment.offer.condition.enterprise_customer_catalog_uuid
-        representation['coupon_start_date'] = offer_assignment.offer.vouchers.first().start_datetime
-        representation['coupon_end_date'] = offer_assignment.offer.vouchers.first().end_datetime
+        voucher = instance.get('voucher') or offer_assignment.offer.vouchers.first()
+        representation['coupon_start_date'] = voucher.start_datetime
+        representation['coupon_end_date'] = voucher.end_datetime
 
         return representation
 
@@ -982,41 +1080,11 @@ class OfferAssignmentEmailTemplatesSerializer(serializers.ModelSerializer):
 class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     """
     Serializer for Enterprise Coupons list overview.
-    """
-    def _get_num_unassigned(self, vouchers):
-        """
-        Return number of available assignments.
-        """
-        all_slots_available = 0
-        enterprise_offer = vouchers.first().enterprise_offer
-
-        assignments = OfferAssignment.objects.filter(code__in=vouchers.values_list('code', flat=True)).exclude(
-            status__in=[OFFER_REDEEMED, OFFER_ASSIGNMENT_REVOKED]
-        ).values('code').annotate(num_assignments=Count('code')).order_by('code')
-
-        vouchers_num_assignments = {item['code']: item['num_assignments'] for item in assignments}
-
-        for voucher in vouchers:
-            num_assignments = vouchers_num_assignments.get(voucher.code, 0)
-            voucher_slots_available = voucher.calculate_available_slots(
-                enterprise_offer.max_global_applications,
-                num_assignments
-            )
-            if voucher_slots_available > 0:
-                all_slots_available += voucher_slots_available
 
-        return all_slots_available
-
-    def _get_errors(self, coupon):
-        """
-        Returns a list of OfferAssignment errors associated with coupon.
-        """
-        codes = coupon.attr.coupon_vouchers.vouchers.values_list('code', flat=True)
-        offer_assignments_with_error = OfferAssignment.objects.filter(
-            code__in=codes,
-            status=OFFER_ASSIGNMENT_EMAIL_BOUNCED
-        )
-        return OfferAssignmentSerializer(offer_assignments_with_error, many=True).data
+    The overview data is read from the `coupons_overview` context, as returned by
+    `get_enterprise_coupons_overview` for all coupons being serialized, so a page of
+    coupons costs a fixed number of queries. It is computed for the single coupon otherwise.
+    """
 
     # Max number of codes available (Maximum Coupon Usage).
     def _get_max_uses(self, voucher, voucher_usage, voucher_count):
@@ -1035,22 +1103,25 @@ class EnterpriseCouponOverviewListSerializer(serializers.ModelSerializer):
     def to_representation(self, coupon):  # pylint: disable=arguments-differ
         representation = super(EnterpriseCouponOverviewListSerializer, self).to_representation(coupon)
 
-        vouchers = coupon.attr.coupon_vouchers.vouchers.all()
-        voucher = vouchers.first()
+        coupons_overview = self.context.get('coupons_overview')
+        if coupons_overview is None:
+            coupons_overview = get_enterprise_coupons_overview([coupon])
+        overview = coupons_overview[coupon.id]
+
+        voucher = overview['voucher']
         usage = voucher.usage
-        count = vouchers.count()
-        num_orders = vouchers.aggregate(Sum('num_orders'))
+        count = overview['num_codes']
 
         data = {
             'start_date': voucher.start_datetime,
             'end_date': voucher.end_datetime,
-            'num_uses': num_orders['num_orders__sum'],
+            'num_uses': overview['num_uses'],
             'usage_limitation': usage,
             'num_codes': count,
             'max_uses': self._get_max_uses(voucher, usage, count),
-            'num_unassigned': self._get_num_unassigned(vouchers),
-            'errors': self._get_errors(coupon),
-            'available': is_coupon_available(coupon),
+            'num_unassigned': overview['num_unassigned'],
+            'errors': OfferAssignmentSerializer(overview['bounced_assignments'], many=True).data,
+            'available': is_coupon_available(coupon, voucher=voucher),
         }
 
         return dict(representation, **data)
@@ -5,15 +5,19 @@ from oscar.core.loading import get_model
 from testfixtures import LogCapture
 
 from ecommerce.coupons.tests.mixins import CouponMixin
+from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.api.serializers import (
     CouponCodeAssignmentSerializer,
     CouponCodeRemindSerializer,
-    CouponCodeRevokeSerializer
+    CouponCodeRevokeSerializer,
+    ProductSerializer
 )
+from ecommerce.extensions.partner.strategy import DefaultStrategy
 from ecommerce.extensions.test import factories
 from ecommerce.tests.testcases import TestCase
 
 OfferAssignment = get_model('offer', 'OfferAssignment')
+Product = get_model('catalogue', 'Product')
 Voucher = get_model('voucher', 'Voucher')
 
 
@@ -238,3 +242,25 @@ class CouponCodeSerializerTests(CouponMixin, TestCase):
         with LogCapture(self.LOGGER_NAME) as log:
             serializer.create(validated_data=validated_data)
             log.check_present(*expected)
+
+
+class ProductSerializerTests(TestCase):
+    """ Tests for the product serializer. """
+
+    def test_purchase_info_fetched_once(self):
+        """ Verify the purchase info of each listed product is fetched once, for both its price and availability. """
+        course = CourseFactory(partner=self.partner)
+        course.create_or_update_seat('verified', True, 50)
+        course.create_or_update_seat('professional', True, 100)
+        products = Product.objects.filter(course=course).select_related(
+            'parent__product_class', 'product_class'
+        ).prefetch_related('stockrecords')
+
+        with mock.patch.object(
+                DefaultStrategy, 'fetch_for_product', autospec=True, side_effect=DefaultStrategy.fetch_for_product
+        ) as mock_fetch_for_product:
+            data = ProductSerializer(products, many=True, context={'request': None}).data
+
+        self.assertEqual(mock_fetch_for_product.call_count, 3)
+        self.assertEqual(sorted(product['price'] for product in data if product['structure'] == 'child'),
+                         ['100.00', '50.00'])
@@ -28,7 +28,7 @@ from ecommerce.extensions.api.v2.tests.views import JSON_CONTENT_TYPE, OrderDeta
 from ecommerce.extensions.api.v2.views.baskets import BasketCalculateView, BasketCreateView
 from ecommerce.extensions.basket.constants import EMAIL_OPT_IN_ATTRIBUTE
 from ecommerce.extensions.payment import exceptions as payment_exceptions
-from ecommerce.extensions.payment.models import PaymentProcessorResponse
+from ecommerce.extensions.payment.models import ArchivedPaymentProcessorResponse, PaymentProcessorResponse
 from ecommerce.extensions.payment.processors.cybersource import Cybersource
 from ecommerce.extensions.test.factories import (
     PercentageDiscountBenefitWithoutRangeFactory,
@@ -340,6 +340,21 @@ class BasketViewSetTests(AccessTokenMixin, ThrottlingMixin, TestCase):
         self.assertIsNotNone(content['results'][0]['vouchers'])
         self.assertEqual(content['results'][0]['payment_status'], "Accepted")
 
+    def test_basket_information_archived_payment(self):
+        """ Verify the payment status and processor are read from archived payment processor responses. """
+        basket = BasketFactory(site=self.site)
+        ArchivedPaymentProcessorResponse.archive(PaymentProcessorResponse.objects.filter(id=(
+            PaymentProcessorResponse.objects.create(
+                basket=basket, transaction_id='PAY-123', processor_name='paypal', response={'state': 'approved'}
+            ).id
+        )))
+        response = self.client.get(self.path, HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(response.status_code, 200)
+        content = response.json()
+        self.assertEqual(content['results'][0]['payment_status'], "Accepted")
+        self.assertEqual(content['results'][0]['payment_processor'], 'paypal')
+
     def test_voucher_errors(self):
         """ Test data when voucher error happen"""
         basket = BasketFactory(site=self.site)
@@ -432,7 +447,8 @@ class BasketCalculateViewTests(ProgramTestMixin, ThrottlingMixin, TestCase):
             'currency': 'GBP'
         }
 
-        response = self.client.get(self.url)
+        with self.assert_within_budget(queries=53, duplicate_queries=9, http_calls=1):
+            response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, expected)
 
@@ -31,7 +31,10 @@ class CourseViewSetTests(ProductSerializerMixin, DiscoveryTestMixin, TestCase):
         super(CourseViewSetTests, self).setUp()
         self.user = self.create_user(is_staff=True)
         self.client.login(username=self.user.username, password=self.password)
-        self.course = self.create_course()
+        # Catalog changes are recorded when transactions commit, which they do not in these tests. The changes of the
+        # course are recorded as if it had been committed, so that the tests record changes of their own.
+        with mock.patch('django.db.transaction.on_commit', lambda func: func()):
+            self.course = self.create_course()
 
     def create_course(self):
         return CourseFactory(id='edX/DemoX/Demo_Course', name='Test Course', partner=self.partner)
@@ -110,6 +113,50 @@ class CourseViewSetTests(ProductSerializerMixin, DiscoveryTestMixin, TestCase):
         response = self.client.get(self.list_path)
         self.assertDictEqual(response.json(), {'count': 0, 'next': None, 'previous': None, 'results': []})
 
+    # Catalog changes are recorded when transactions commit, which they do not in these tests.
+    @mock.patch('django.db.transaction.on_commit', lambda func: func())
+    def test_snapshot(self):
+        """ Verify the view returns the versioned snapshot of the courses of the partner, with their products. """
+        seat = self.course.create_or_update_seat('verified', True, 100)
+        other_course = CourseFactory(partner=self.partner)
+        CourseFactory()
+        path = reverse('api:v2:course-snapshot')
+
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.partner.refresh_from_db()
+        self.assertEqual(response.json(), {
+            'version': self.partner.catalog_version,
+            'since': None,
+            'results': [
+                self.serialize_course(course, include_products=True)
+                for course in sorted((self.course, other_course), key=lambda course: course.id)
+            ],
+        })
+        etag = response['ETag']
+        self.assertEqual(etag, '"{}.{}"'.format(self.partner.id, self.partner.catalog_version))
+
+        # The snapshot is not modified until a course, or one of its products, changes.
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        version = self.partner.catalog_version
+        stock_record = seat.stockrecords.get()
+        stock_record.price_excl_tax = 150
+        stock_record.save()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Pollers request the courses changed since the version they have.
+        response = self.client.get(path, {'since': version})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([course['id'] for course in response.json()['results']], [self.course.id])
+        self.assertEqual(response.json()['since'], version)
+
+        response = self.client.get(path, {'since': 'latest'})
+        self.assertEqual(response.status_code, 400)
+
     def test_create(self):
         """ Verify the view can create a new Course."""
         Course.objects.all().delete()
@@ -12,7 +12,9 @@ import httpretty
 import mock
 import rules
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.http import urlencode
@@ -46,6 +48,8 @@ from ecommerce.extensions.offer.constants import (
     OFFER_ASSIGNMENT_EMAIL_SUBJECT_LIMIT,
     OFFER_ASSIGNMENT_EMAIL_TEMPLATE_FIELD_LIMIT,
     OFFER_ASSIGNMENT_REVOKED,
+    VOUCHER_IS_PRIVATE,
+    VOUCHER_IS_PUBLIC,
     VOUCHER_NOT_ASSIGNED,
     VOUCHER_NOT_REDEEMED,
     VOUCHER_PARTIAL_REDEEMED,
@@ -1015,6 +1019,48 @@ class EnterpriseCouponViewSetRbacTests(
             codes
         )
 
+    @ddt.data(VOUCHER_NOT_ASSIGNED, VOUCHER_NOT_REDEEMED)
+    def test_coupon_codes_detail_query_count(self, code_filter):
+        """
+        Test that the number of queries made by the codes listing does not grow with the number of codes on the page.
+        """
+        coupon_post_data = dict(self.data, voucher_type=Voucher.MULTI_USE, quantity=6, max_uses=3)
+        coupon_id = self.get_response('POST', ENTERPRISE_COUPONS_LINK, coupon_post_data).json()['coupon_id']
+        codes = Product.objects.get(id=coupon_id).attr.coupon_vouchers.vouchers.values_list('code', flat=True)
+        for index, code in enumerate(codes):
+            self.assign_user_to_code(coupon_id, ['user{}@example.com'.format(index)], [code])
+
+        def count_codes_queries(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_response(
+                    'GET',
+                    '/api/v2/enterprise/coupons/{}/codes/?code_filter={}&page_size={}'.format(
+                        coupon_id, code_filter, page_size
+                    )
+                )
+            self.assertEqual(len(response.json()['results']), page_size)
+            return len(queries)
+
+        self.assertEqual(count_codes_queries(page_size=1), count_codes_queries(page_size=5))
+
+    def test_coupon_codes_detail_visibility_filter(self):
+        """
+        Test that the visibility filter selects the usages of public or private codes.
+        """
+        coupon_id = self.get_response('POST', ENTERPRISE_COUPONS_LINK, self.data).json()['coupon_id']
+        vouchers = Product.objects.get(id=coupon_id).attr.coupon_vouchers.vouchers.all()
+        codes = [voucher.code for voucher in vouchers]
+        self.assign_user_to_code(coupon_id, ['user1@example.com'], [codes[0]])
+
+        for visibility_filter, expected_count in ((VOUCHER_IS_PRIVATE, 1), (VOUCHER_IS_PUBLIC, 0)):
+            response = self.get_response(
+                'GET',
+                '/api/v2/enterprise/coupons/{}/codes/?code_filter={}&visibility_filter={}'.format(
+                    coupon_id, VOUCHER_NOT_REDEEMED, visibility_filter
+                )
+            ).json()
+            self.assertEqual(response['count'], expected_count)
+
     def test_implicit_permission_coupon_overview(self):
         """
         Test that we get implicit access via role assignment
@@ -1567,6 +1613,43 @@ class EnterpriseCouponViewSetRbacTests(
         for actual_result in overview_response['results']:
             self.assertIn(actual_result, expected_results)
 
+    def test_enterprise_coupon_overview_query_count(self):
+        """
+        Test that the number of queries made by the overview does not grow with the number of coupons on the page.
+        """
+        enterprise_id = '85b08dde-0877-4474-a4e9-8408fe47ce88'
+        EcommerceFeatureRoleAssignment.objects.all().delete()
+        EcommerceFeatureRoleAssignment.objects.get_or_create(
+            role=self.role,
+            user=self.user,
+            enterprise_id=enterprise_id
+        )
+        overview_url = reverse('api:v2:enterprise-coupons-overview', kwargs={'enterprise_id': enterprise_id})
+
+        def create_coupon(title):
+            coupon = self.get_response('POST', ENTERPRISE_COUPONS_LINK, dict(
+                self.data,
+                title=title,
+                enterprise_customer={'name': 'LOTRx', 'id': enterprise_id}
+            )).json()
+            codes = Product.objects.get(id=coupon['coupon_id']).attr.coupon_vouchers.vouchers.values_list(
+                'code', flat=True
+            )
+            self.assign_user_to_code(coupon['coupon_id'], ['user@example.com'], [codes[0]])
+
+        def count_overview_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_response('GET', overview_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        create_coupon('coupon-1')
+        single_coupon_queries = count_overview_queries()
+
+        create_coupon('coupon-2')
+        create_coupon('coupon-3')
+        self.assertEqual(count_overview_queries(), single_coupon_queries)
+
     @ddt.data(
         (
             '85b08dde-0877-4474-a4e9-8408fe47ce88',
@@ -3382,6 +3465,19 @@ class OfferAssignmentSummaryViewSetTests(
             else:  # To test if response has something in it it shouldn't
                 assert False
 
+    def test_view_query_count(self):
+        """
+        Test that the number of queries made by the view does not grow with the number of codes on the page.
+        """
+        def count_summary_queries(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('{}?page_size={}'.format(OFFER_ASSIGNMENT_SUMMARY_LINK, page_size)).json()
+            assert len(response['results']) == page_size
+            assert all(result['coupon_start_date'] and result['coupon_end_date'] for result in response['results'])
+            return len(queries)
+
+        assert count_summary_queries(page_size=1) == count_summary_queries(page_size=3)
+
 
 @ddt.ddt
 class OfferAssignmentEmailTemplatesViewSetTests(JwtMixin, TestCase):
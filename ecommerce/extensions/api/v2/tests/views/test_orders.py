@@ -16,6 +16,7 @@ from oscar.core.loading import get_class, get_model
 from oscar.test import factories
 from rest_framework import status
 
+from ecommerce.core.tests import toggle_switch
 from ecommerce.coupons.tests.mixins import DiscoveryMockMixin
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.entitlements.utils import create_or_update_course_entitlement
@@ -25,7 +26,8 @@ from ecommerce.extensions.api.v2.tests.views import OrderDetailViewTestMixin
 from ecommerce.extensions.checkout.exceptions import BasketNotFreeError
 from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
 from ecommerce.extensions.fulfillment.status import LINE, ORDER
-from ecommerce.extensions.test.factories import create_order
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
+from ecommerce.extensions.test.factories import create_basket, create_order
 from ecommerce.tests.factories import SiteConfigurationFactory
 from ecommerce.tests.mixins import ThrottlingMixin
 from ecommerce.tests.testcases import TestCase
@@ -154,6 +156,31 @@ class OrderListViewTests(AccessTokenMixin, ThrottlingMixin, TestCase):
         self.assert_list_with_username_filter(self.user, order)
         self.assert_list_with_username_filter(other_user, other_order)
 
+    def test_course_id_filter(self):
+        """ Verify the staff user can filter orders by the course of their lines. """
+        course_id = 'course-v1:edX+DemoX+Demo_Course'
+        create_order(site=self.site, user=self.user)
+        order = create_order(site=self.site, user=self.user)
+        order.lines.update(course_key=course_id)
+
+        requester = self.create_user(is_staff=True)
+        self.client.login(email=requester.email, password=self.password)
+
+        response = self.client.get(self.path, {'course_id': course_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['number'] for result in response.data['results']], [order.number])
+
+        # Lines not backfilled with course keys are found through their products.
+        toggle_switch(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, True)
+        course = CourseFactory(id='course-v1:edX+Backfill+Run', partner=self.partner)
+        basket = create_basket(site=self.site, owner=self.user, empty=True)
+        basket.add_product(course.create_or_update_seat('verified', True, 10))
+        unfilled_order = create_order(site=self.site, user=self.user, basket=basket)
+        unfilled_order.lines.update(course_key=None)
+
+        response = self.client.get(self.path, {'course_id': course.id})
+        self.assertEqual([result['number'] for result in response.data['results']], [unfilled_order.number])
+
     def test_username_filter_with_non_staff(self):
         """Non staff users are not allowed to filter on any other username."""
         requester = self.create_user(is_staff=False)
@@ -7,7 +7,9 @@ import ddt
 import httpretty
 import mock
 import pytz
+from django.db import connection
 from django.http import Http404
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import now
 from opaque_keys.edx.keys import CourseKey
@@ -20,6 +22,7 @@ from rest_framework.test import APIRequestFactory
 from slumber.exceptions import SlumberBaseException
 
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
+from ecommerce.coupons.utils import get_catalog_course_runs
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.v2.views.vouchers import VoucherViewSet
@@ -211,6 +214,39 @@ class VoucherViewSetTests(DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockMixi
             self.assertTrue(offer['multiple_credit_providers'])
             self.assertIsNone(offer['credit_provider_price'])
 
+    @httpretty.activate
+    def test_offers_cached(self):
+        """ Verify the offers of a voucher are cached per page. """
+        self.mock_access_token_response()
+        products, request, voucher = self.prepare_get_offers_response(quantity=2)
+        offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
+        self.assertEqual(len(offers), 2)
+
+        product = products[0]
+        product.expires = pytz.utc.localize(datetime.datetime.min)
+        product.save()
+        self.assertEqual(VoucherViewSet().get_offers(request=request, voucher=voucher)['results'], offers)
+
+        request.GET = {'code': voucher.code, 'page': 2}
+        self.assertEqual(len(VoucherViewSet().get_offers(request=request, voucher=voucher)['results']), 1)
+
+    @httpretty.activate
+    def test_offers_queries(self):
+        """ Verify the number of queries run to build the offers does not depend on the number of seats. """
+        self.mock_access_token_response()
+        __, request, voucher = self.prepare_get_offers_response(quantity=3)
+        response = get_catalog_course_runs(request.site, '*:*')
+
+        query_counts = []
+        for quantity in (1, 3):
+            with CaptureQueriesContext(connection) as queries:
+                offers = VoucherViewSet().convert_catalog_response_to_offers(
+                    request, voucher, dict(response, results=response['results'][:quantity])
+                )
+            self.assertEqual(len(offers), quantity)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
     def test_omitting_expired_courses(self):
         """Verify professional courses who's enrollment end datetime have passed are omitted."""
         no_enrollment_end_seat = CourseFactory(partner=self.partner).create_or_update_seat('professional', False, 100)
@@ -356,24 +392,8 @@ class VoucherViewOffersEndpointTests(DiscoveryMockMixin, CouponMixin, DiscoveryT
 
         self.assertEqual(response.status_code, 200)
 
-    @ddt.data(
-        (
-            StockRecord.objects.none(),
-            'ecommerce.extensions.api.v2.views.vouchers.StockRecord.objects.filter'
-        ),
-        (
-            Product.objects.none(),
-            'ecommerce.extensions.api.v2.views.vouchers.Product.objects.filter'
-        )
-    )
-    @ddt.unpack
-    def test_voucher_offers_listing_catalog_query_exception(self, return_value, method):
-        """
-        Verify the endpoint returns status 200 and an empty list of course offers
-        when all product Courses and Stock Records are not found
-        and range has a catalog query
-        """
-        self.mock_access_token_response()
+    def prepare_catalog_query_voucher(self):
+        """ Returns a seat and a voucher whose range has a catalog query matching the course of the seat. """
         course, seat = self.create_course_and_seat()
         self.mock_course_runs_endpoint(
             self.site_configuration.discovery_api_url, query='*:*', course_run=course
@@ -381,12 +401,37 @@ class VoucherViewOffersEndpointTests(DiscoveryMockMixin, CouponMixin, DiscoveryT
         new_range, __ = Range.objects.get_or_create(catalog_query='*:*', course_seat_types='verified')
         new_range.add_product(seat)
         voucher, __ = prepare_voucher(_range=new_range)
+        return seat, voucher
+
+    def test_voucher_offers_listing_catalog_query_exception(self):
+        """
+        Verify the endpoint returns status 200 and an empty list of course offers
+        when all product Courses are not found and range has a catalog query
+        """
+        self.mock_access_token_response()
+        __, voucher = self.prepare_catalog_query_voucher()
         request = self.prepare_offers_listing_request(voucher.code)
 
-        with mock.patch(method, mock.Mock(return_value=return_value)):
+        with mock.patch(
+                'ecommerce.extensions.api.v2.views.vouchers.Product.objects.filter',
+                mock.Mock(return_value=Product.objects.none())
+        ):
             offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
             self.assertEqual(len(offers), 0)
 
+    def test_voucher_offers_listing_catalog_query_missing_stock_record(self):
+        """
+        Verify the endpoint returns status 200 and an empty list of course offers
+        when all product Stock Records are not found and range has a catalog query
+        """
+        self.mock_access_token_response()
+        seat, voucher = self.prepare_catalog_query_voucher()
+        seat.stockrecords.all().delete()
+        request = self.prepare_offers_listing_request(voucher.code)
+
+        offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
+        self.assertEqual(len(offers), 0)
+
     def test_voucher_offers_listing_catalog_query(self):
         """ Verify the endpoint returns offers data for single product range. """
         self.mock_access_token_response()
@@ -2,7 +2,10 @@
 
 
 import waffle
+from django.conf import settings
 from django.db.models import Prefetch
+from django.utils.http import parse_etags, quote_etag
+from edx_django_utils.cache import TieredCache
 from oscar.core.loading import get_model
 from rest_framework import status
 from rest_framework.decorators import action
@@ -10,10 +13,12 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from ecommerce.core.constants import COURSE_ID_REGEX
+from ecommerce.core.utils import get_cache_key
 from ecommerce.courses.models import Course
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
 
+Partner = get_model('partner', 'Partner')
 Product = get_model('catalogue', 'Product')
 ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 
@@ -25,7 +30,7 @@ class CourseViewSet(NonDestroyableModelViewSet):
     )
     products_prefetch = Prefetch(
         'products',
-        queryset=Product.objects.select_related('parent__product_class').all()
+        queryset=Product.objects.select_related('parent__product_class', 'product_class').all()
     )
     lookup_value_regex = COURSE_ID_REGEX
     serializer_class = serializers.CourseSerializer
@@ -97,3 +102,61 @@ class CourseViewSet(NonDestroyableModelViewSet):
 
         return Response({'status': msg.format(course_id=course.id)},
                         status=status.HTTP_200_OK if published else status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False)
+    def snapshot(self, request):
+        """
+        Snapshot of the courses of the partner, with their products.
+
+        The snapshot is versioned: every change of a course, or of its products, moves the course to a new version
+        of the catalog of the partner. The response carries the version as its ETag, and is not modified while the
+        version is the one given in the If-None-Match header. Pollers that already have the snapshot of a version
+        request the courses changed since that version.
+        ---
+        parameters:
+            - name: since
+              description: Only include the courses changed after this catalog version.
+              required: false
+              type: integer
+              paramType: query
+              multiple: false
+        """
+        partner = request.site.siteconfiguration.partner
+        version = Partner.objects.filter(id=partner.id).values_list('catalog_version', flat=True).get()
+        etag = quote_etag('{}.{}'.format(partner.id, version))
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        since = request.GET.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response({'since': 'The since parameter must be a catalog version.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            data = self.get_snapshot_data(request, version, since)
+        else:
+            # Snapshots of a version never change, and are cached until they expire.
+            cache_key = get_cache_key(partner_id=partner.id, catalog_version=version, resource='catalog_snapshot')
+            snapshot_cached_response = TieredCache.get_cached_response(cache_key)
+            if snapshot_cached_response.is_found:
+                data = snapshot_cached_response.value
+            else:
+                data = self.get_snapshot_data(request, version)
+                TieredCache.set_all_tiers(cache_key, data, settings.CATALOG_SNAPSHOT_CACHE_TIMEOUT)
+
+        return Response(data, headers={'ETag': etag})
+
+    def get_snapshot_data(self, request, version, since=None):
+        """
+        Serializes the courses of a catalog version with their products, or only those changed since a version.
+
+        Courses that changed after the version was read belong to a later version, and are left out.
+        """
+        courses = self.get_queryset().filter(catalog_version__lte=version).order_by('id')
+        if since is not None:
+            courses = courses.filter(catalog_version__gt=since)
+        results = serializers.CourseSerializer(
+            courses, many=True, context={'request': request, 'include_products': True}
+        ).data
+        return {'version': version, 'since': since, 'results': results}
@@ -6,7 +6,7 @@ from urllib.parse import urlparse
 import django_filters
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q, prefetch_related_objects
+from django.db.models import Count, Exists, IntegerField, Min, OuterRef, Prefetch, Q, Value, prefetch_related_objects
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from edx_rbac.decorators import permission_required
@@ -23,7 +23,7 @@ from rest_framework.viewsets import ModelViewSet, ViewSet
 from slumber.exceptions import SlumberHttpBaseException
 
 from ecommerce.core.constants import COUPON_PRODUCT_CLASS_NAME, DEFAULT_CATALOG_PAGE_SIZE
-from ecommerce.coupons.utils import is_coupon_available
+from ecommerce.coupons.utils import annotate_available_slots, get_enterprise_coupons_overview, is_coupon_available
 from ecommerce.enterprise.utils import (
     get_enterprise_catalog,
     get_enterprise_customer_catalogs,
@@ -59,6 +59,8 @@ from ecommerce.extensions.offer.constants import (
     OFFER_ASSIGNMENT_EMAIL_PENDING,
     OFFER_ASSIGNMENT_EMAIL_SUBJECT_LIMIT,
     OFFER_ASSIGNMENT_EMAIL_TEMPLATE_FIELD_LIMIT,
+    OFFER_ASSIGNMENT_REVOKED,
+    OFFER_REDEEMED,
     REMIND,
     REVOKE,
     VOUCHER_IS_PRIVATE,
@@ -79,6 +81,7 @@ from ecommerce.extensions.voucher.utils import (
 logger = logging.getLogger(__name__)
 Order = get_model('order', 'Order')
 Line = get_model('basket', 'Line')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
 OfferAssignment = get_model('offer', 'OfferAssignment')
 OfferAssignmentEmailTemplates = get_model('offer', 'OfferAssignmentEmailTemplates')
 CodeAssignmentNudgeEmails = get_model('offer', 'CodeAssignmentNudgeEmails')
@@ -151,35 +154,55 @@ class OfferAssignmentSummaryViewSet(ModelViewSet):
 
     def get_queryset(self):
         """
-        Return a list of dictionaries to be serialized.
+        Return a queryset of dictionaries to be serialized.
 
-        Each dictionary contains one offerAssignment object, and the count of
-        how many total offerAssignment objects the DB returned with the same
-        code, as a way of "rolling up" offerAssignments a user has.
+        Each dictionary contains a code and the count of how many offerAssignment
+        objects the learner has with that code, as a way of "rolling up"
+        offerAssignments a user has. The rollup is done by the database, so only
+        the codes of the requested page are loaded.
         """
         queryset = OfferAssignment.objects.filter(
             user_email=self.request.user.email,
             status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING],
-        ).select_related(
-            'offer__benefit',
-            'offer__condition',
         )
-        offer_assignments_with_counts = {}
         if self.request.query_params.get('full_discount_only'):
             queryset = queryset.filter(offer__benefit__value=100.0)
-        for offer_assignment in queryset:
-            if offer_assignment.code not in offer_assignments_with_counts:
-                # Note that we can get away with just dropping in the first
-                # offerAssignment object of particular code that we see
-                # because most of the data we are returning lives on related
-                # objects that each of these offerAssignments share (e.g. the benefit)
-                offer_assignments_with_counts[offer_assignment.code] = {
-                    'count': 1,
-                    'obj': offer_assignment,
-                }
-            else:
-                offer_assignments_with_counts[offer_assignment.code]['count'] += 1
-        return list(offer_assignments_with_counts.values())
+        return queryset.values('code').annotate(
+            count=Count('id'),
+            first_id=Min('id'),
+        ).order_by('first_id')
+
+    def paginate_queryset(self, queryset):
+        page = super(OfferAssignmentSummaryViewSet, self).paginate_queryset(queryset)
+        if page is None:
+            return None
+
+        # Note that we can get away with just dropping in the first
+        # offerAssignment object of a particular code because most of the
+        # data we are returning lives on related objects that each of these
+        # offerAssignments share (e.g. the benefit)
+        offer_assignments = OfferAssignment.objects.filter(
+            id__in=[row['first_id'] for row in page]
+        ).select_related(
+            'offer__benefit',
+            'offer__condition',
+        ).in_bulk()
+
+        offer_ids = {offer_assignment.offer_id for offer_assignment in offer_assignments.values()}
+        first_voucher_ids = Voucher.objects.filter(
+            offers__in=offer_ids
+        ).order_by().values('offers').annotate(first_id=Min('id'))
+        vouchers = Voucher.objects.in_bulk([row['first_id'] for row in first_voucher_ids])
+        offer_vouchers = {row['offers']: vouchers[row['first_id']] for row in first_voucher_ids}
+
+        return [
+            {
+                'count': row['count'],
+                'obj': offer_assignments[row['first_id']],
+                'voucher': offer_vouchers.get(offer_assignments[row['first_id']].offer_id),
+            }
+            for row in page
+        ]
 
 
 class EnterpriseCouponViewSet(CouponViewSet):
@@ -364,41 +387,47 @@ class EnterpriseCouponViewSet(CouponViewSet):
         usage_type = coupon_vouchers.first().usage
         code_filter = request.query_params.get('code_filter')
         visibility_filter = request.query_params.get('visibility_filter')
-        queryset = None
+        get_usages = None
         serializer_class = None
         if not code_filter:
             raise serializers.ValidationError('code_filter must be specified')
 
         if code_filter == VOUCHER_NOT_ASSIGNED:
-            queryset = self._get_not_assigned_usages(coupon_vouchers)
+            get_usages = self._get_not_assigned_usages
             serializer_class = NotAssignedCodeUsageSerializer
         elif code_filter == VOUCHER_NOT_REDEEMED:
-            queryset = self._get_not_redeemed_usages(coupon_vouchers)
+            get_usages = self._get_not_redeemed_usages
             serializer_class = NotRedeemedCodeUsageSerializer
         elif code_filter == VOUCHER_PARTIAL_REDEEMED:
-            queryset = self._get_partial_redeemed_usages(coupon_vouchers)
+            get_usages = self._get_partial_redeemed_usages
             serializer_class = PartialRedeemedCodeUsageSerializer
         elif code_filter == VOUCHER_REDEEMED:
-            queryset = self._get_redeemed_usages(coupon_vouchers)
+            get_usages = self._get_redeemed_usages
             serializer_class = RedeemedCodeUsageSerializer
 
         if not serializer_class:
             raise serializers.ValidationError('Invalid code_filter specified: {}'.format(code_filter))
 
+        # Visibility is a property of the codes, so it is applied before the usages of the codes are selected.
         if visibility_filter == VOUCHER_IS_PUBLIC:
-            queryset = queryset.filter(is_public=True)
+            coupon_vouchers = coupon_vouchers.filter(is_public=True)
         elif visibility_filter == VOUCHER_IS_PRIVATE:
-            queryset = queryset.filter(is_public=False)
+            coupon_vouchers = coupon_vouchers.filter(is_public=False)
         elif visibility_filter is not None:
             raise serializers.ValidationError(
                 "visibility_filter must be specified as 'public' or 'private' received: {}".format(visibility_filter))
 
+        queryset = get_usages(coupon_vouchers)
+
         if format is None:
             page = self.paginate_queryset(queryset)
-            serializer = serializer_class(page, many=True, context={'usage_type': usage_type})
+            context = {'usage_type': usage_type, 'code_usages': serializer_class.get_usages_context(page)}
+            serializer = serializer_class(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = serializer_class(queryset, many=True, context={'usage_type': usage_type})
+        usages = list(queryset)
+        context = {'usage_type': usage_type, 'code_usages': serializer_class.get_usages_context(usages)}
+        serializer = serializer_class(usages, many=True, context=context)
         return Response(serializer.data)
 
     def _get_not_assigned_usages(self, vouchers):
@@ -406,34 +435,38 @@ class EnterpriseCouponViewSet(CouponViewSet):
         Returns a queryset containing Vouchers with slots that have not been assigned.
         Unique Vouchers will be included in the final queryset for all types.
         """
+        # The vouchers of a coupon share their offers, so the enterprise offer of the first voucher applies to all.
+        voucher = vouchers.prefetch_related(
+            Prefetch('offers', queryset=ConditionalOffer.objects.select_related('condition'))
+        ).first()
+        enterprise_offer = voucher.enterprise_offer if voucher else None
 
-        prefetch_related_objects(vouchers, 'offers', 'offers__condition', 'offers__offerassignment_set')
-        vouchers_with_slots = []
-        for voucher in vouchers:
-            slots_available = voucher.slots_available_for_assignment
-            if slots_available == 0:
-                continue
-
-            vouchers_with_slots.append(voucher.id)
+        # Assignment is only valid for Vouchers linked to an enterprise offer, so all other Vouchers are included.
+        if enterprise_offer:
+            vouchers = annotate_available_slots(
+                vouchers, Value(enterprise_offer.max_global_applications or None, output_field=IntegerField())
+            ).exclude(slots=0)
 
-        return Voucher.objects.filter(id__in=vouchers_with_slots).values('code').order_by('code')
+        return vouchers.values('code').order_by('code')
 
     def _get_not_redeemed_usages(self, vouchers):
         """
         Returns a queryset containing unique code and user_email pairs from OfferAssignments.
         Only code and user_email pairs that have no corresponding VoucherApplication are returned.
         """
-        prefetch_related_objects(vouchers, 'applications', 'applications__user', 'offers', 'offers__condition',
-                                 'offers__offerassignment_set')
-        not_redeemed_assignments = []
-        for voucher in vouchers:
-            assignments = voucher.not_redeemed_assignment_ids
-            if assignments:
-                not_redeemed_assignments.extend(assignments)
-
+        redemptions = VoucherApplication.objects.filter(
+            voucher__code=OuterRef('code'),
+            user__email=OuterRef('user_email'),
+        )
         return OfferAssignment.objects.filter(
-            id__in=not_redeemed_assignments
-        ).values('code', 'user_email').order_by('user_email').distinct()
+            code__in=vouchers.values('code')
+        ).exclude(
+            status__in=[OFFER_REDEEMED, OFFER_ASSIGNMENT_REVOKED]
+        ).annotate(
+            is_redeemed=Exists(redemptions)
+        ).filter(
+            is_redeemed=False
+        ).values('code', 'user_email').order_by('user_email', 'code').distinct()
 
     def _get_partial_redeemed_usages(self, vouchers):
         """
@@ -441,7 +474,8 @@ class EnterpriseCouponViewSet(CouponViewSet):
         Only code and user_email pairs that have at least one corresponding VoucherApplication are returned.
         """
         # There are no partially redeemed SINGLE_USE codes, so return the empty queryset.
-        if vouchers.first().usage == Voucher.SINGLE_USE:
+        voucher = vouchers.first()
+        if voucher is None or voucher.usage == Voucher.SINGLE_USE:
             return OfferAssignment.objects.none()
 
         users_having_usages = VoucherApplication.objects.filter(
@@ -450,7 +484,7 @@ class EnterpriseCouponViewSet(CouponViewSet):
             code__in=vouchers.values_list('code', flat=True),
             status__in=[OFFER_ASSIGNED, OFFER_ASSIGNMENT_EMAIL_PENDING],
             user_email__in=users_having_usages
-        ).values('code', 'user_email').order_by('user_email').distinct()
+        ).values('code', 'user_email').order_by('user_email', 'code').distinct()
 
     def _get_redeemed_usages(self, vouchers):
         """
@@ -466,7 +500,7 @@ class EnterpriseCouponViewSet(CouponViewSet):
         return vouchers_applications.exclude(
             voucher__code__in=unredeemed_voucher_assignments.values_list('code', flat=True),
             user__email__in=unredeemed_voucher_assignments.values_list('user_email', flat=True)
-        ).values('voucher__code', 'user__email').order_by('user__email').distinct()
+        ).values('voucher__code', 'user__email').order_by('user__email', 'voucher__code').distinct()
 
     @action(detail=False, url_path=r'(?P<enterprise_id>.+)/search', permission_classes=[IsAuthenticated])
     @permission_required('enterprise.can_view_coupon', fn=lambda request, enterprise_id: enterprise_id)
@@ -639,7 +673,8 @@ class EnterpriseCouponViewSet(CouponViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         page = self.paginate_queryset(enterprise_coupons)
-        serializer = self.get_serializer(page, many=True)
+        context = dict(self.get_serializer_context(), coupons_overview=get_enterprise_coupons_overview(page))
+        serializer = self.get_serializer_class()(page, many=True, context=context)
         return self.get_paginated_response(serializer.data)
 
     def _validate_coupon_availablity(self, coupon, message):
@@ -8,8 +8,11 @@ import django_filters
 import pytz
 from dateutil.parser import parse
 from dateutil.utils import default_tzinfo
+from django.conf import settings
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
+from edx_django_utils.cache import TieredCache
 from opaque_keys.edx.keys import CourseKey
 from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError as ReqConnectionError
@@ -20,6 +23,7 @@ from rest_framework.response import Response
 from slumber.exceptions import SlumberBaseException
 
 from ecommerce.core.constants import DEFAULT_CATALOG_PAGE_SIZE
+from ecommerce.core.utils import get_cache_key
 from ecommerce.coupons.utils import fetch_course_catalog, get_catalog_course_runs
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import get_course_info_from_catalog
@@ -35,6 +39,18 @@ StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 
 
+def _parse_datetime(value):
+    """ Parses a date from the Discovery Service, which is in UTC unless it says otherwise. """
+    return value and default_tzinfo(parse(value), pytz.UTC)
+
+
+def _load_attributes(product):
+    """ Loads `product.attr` from the prefetched attribute values of the product, which it would query again. """
+    for value in product.attribute_values.all():
+        setattr(product.attr, value.attribute.code, value.value)
+    product.attr.initialised = True
+
+
 class VoucherFilter(django_filters.rest_framework.FilterSet):
     """
     Filter for vouchers via query string parameters.
@@ -82,7 +98,8 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            offers_data = self.get_offers(request, voucher)
+            # The offers may be cached, and are copied before the link to the next page is rewritten.
+            offers_data = dict(self.get_offers(request, voucher))
         except (ReqConnectionError, SlumberBaseException, Timeout):
             logger.exception('Could not connect to Discovery Service.')
             return Response(status=status.HTTP_400_BAD_REQUEST)
@@ -105,26 +122,29 @@ class VoucherViewSet(NonDestroyableModelViewSet):
         from course IDs in course catalog response results. Professional courses
         which have a set enrollment end date and which has passed are omitted.
 
+        The products of all seat types are retrieved together with their courses,
+        parents, attribute values and stock records, so that building the offers
+        does not query the database per product.
+
         Args:
             results(dict): Course catalog response results.
             course_seat_types(str): Comma-separated list of accepted seat types.
 
         Returns:
-            Querysets of products and stock records retrieved from results.
+            The list of products, a dictionary mapping product IDs to their stock
+            records, and the course run metadata retrieved from results.
         """
         course_run_metadata = {}
+        current_time = now()
 
         def is_course_run_enrollable(course_run):
             # Checks if a course run is available for enrollment by checking the following conditions:
             #   if end date is not set or is in the future
             #   if enrollment start is not set or is in the past
             #   if enrollment end is not set or is in the future
-            end = course_run.get('end') and default_tzinfo(parse(course_run['end']), pytz.UTC)
-            enrollment_start = (course_run.get('enrollment_start') and
-                                default_tzinfo(parse(course_run['enrollment_start']), pytz.UTC))
-            enrollment_end = (course_run.get('enrollment_end') and
-                              default_tzinfo(parse(course_run['enrollment_end']), pytz.UTC))
-            current_time = now()
+            end = _parse_datetime(course_run.get('end'))
+            enrollment_start = _parse_datetime(course_run.get('enrollment_start'))
+            enrollment_end = _parse_datetime(course_run.get('enrollment_end'))
 
             return (
                 (not end or end > current_time) and
@@ -144,25 +164,60 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             elif is_course_run_enrollable(result):
                 course_run_metadata[result['key']] = result
 
-        products = []
-        for seat_type in course_seat_types.split(','):
-            products.extend(Product.objects.filter(
-                course_id__in=list(course_run_metadata.keys()),
-                attributes__name='certificate_type',
-                attribute_values__value_text=seat_type
-            ))
-        stock_records = StockRecord.objects.filter(product__in=products)
+        seat_types = course_seat_types.split(',')
+        products = list(Product.objects.filter(
+            course_id__in=list(course_run_metadata.keys()),
+            attribute_values__attribute__name='certificate_type',
+            attribute_values__value_text__in=seat_types
+        ).select_related(
+            'course', 'parent__product_class', 'product_class'
+        ).prefetch_related(
+            'attribute_values__attribute', 'stockrecords'
+        ).distinct())
+        for product in products:
+            _load_attributes(product)
+        # Products are listed by seat type, in the order of the accepted seat types.
+        products.sort(key=lambda product: seat_types.index(product.attr.certificate_type))
+        stock_records = {
+            product.id: product.stockrecords.all()[0] for product in products if product.stockrecords.all()
+        }
         return products, stock_records, course_run_metadata
 
+    def get_course_seat_types(self, voucher):
+        """ Returns the comma-separated list of seat types offered by the voucher. """
+        benefit = voucher.best_offer.benefit
+        if benefit.range and benefit.range.course_seat_types:
+            return benefit.range.course_seat_types
+        # default course_seat_types value to all paid seat types.
+        return 'verified,professional,credit'
+
+    def get_credit_seat_data(self, request, credit_products):
+        """ Helper method to retrieve what is needed to offer credit seats, for all of them at once.
+
+        Args:
+            request (WSGIRequest): Request data.
+            credit_products (list): Credit seats being offered.
+
+        Returns:
+            The set of IDs of the credit seats bought by the user, and a dictionary
+            mapping the IDs of parent products to the number of their credit seats.
+        """
+        if not credit_products:
+            return set(), {}
+
+        purchased_product_ids = set(Order.objects.filter(
+            user=request.user, lines__product__in=credit_products
+        ).values_list('lines__product_id', flat=True))
+        credit_seat_counts = dict(Product.objects.filter(
+            parent_id__in={product.parent_id for product in credit_products},
+            attributes__name='credit_provider'
+        ).order_by().values('parent_id').annotate(count=Count('id', distinct=True)).values_list('parent_id', 'count'))
+        return purchased_product_ids, credit_seat_counts
+
     def convert_catalog_response_to_offers(self, request, voucher, response):
         offers = []
         benefit = voucher.best_offer.benefit
-        # default course_seat_types value to all paid seat types.
-        course_seat_types = 'verified,professional,credit'
-        if benefit.range and benefit.range.course_seat_types:
-            course_seat_types = benefit.range.course_seat_types
-        multiple_credit_providers = False
-        credit_provider_price = None
+        course_seat_types = self.get_course_seat_types(voucher)
 
         logger.info('[Voucher Offers] CourseSeatTypes: [%s], Voucher: [%s]', course_seat_types, voucher.id)
 
@@ -170,42 +225,53 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             response['results'], course_seat_types
         )
         contains_verified_course = ('verified' in course_seat_types)
+
+        # Omit unavailable seats from the offer results so that one seat does not cause an
+        # error message for every seat in the query result.
+        available_products = []
         for product in products:
-            logger.info('[Voucher Offers] Constructing offer data. Product: [%s]', product.id)
-            # Omit unavailable seats from the offer results so that one seat does not cause an
-            # error message for every seat in the query result.
-            if not request.strategy.fetch_for_product(product).availability.is_available_to_buy:
+            stock_record = stock_records.get(product.id)
+            if request.strategy.fetch_for_product(product, stock_record).availability.is_available_to_buy:
+                available_products.append(product)
+            else:
                 logger.info('%s is unavailable to buy. Omitting it from the results.', product)
-                continue
 
+        credit_products = [
+            product for product in available_products
+            if course_seat_types == 'credit' or product.attr.certificate_type == 'credit'
+        ]
+        purchased_product_ids, credit_seat_counts = self.get_credit_seat_data(request, credit_products)
+        credit_product_ids = {product.id for product in credit_products}
+        credit_eligibility = {}
+
+        for product in available_products:
+            logger.info('[Voucher Offers] Constructing offer data. Product: [%s]', product.id)
             course_id = product.course_id
             course_catalog_data = course_run_metadata[course_id]
-            if course_seat_types == 'credit' or product.attr.certificate_type == 'credit':
+            multiple_credit_providers = False
+            credit_provider_price = None
+            stock_record = stock_records.get(product.id)
+
+            if product.id in credit_product_ids:
                 logger.info('[Voucher Offers] Constructing offer data for credit.')
                 # Omit credit seats for which the user is not eligible or which the user already bought.
-                if not request.user.is_eligible_for_credit(product.course_id, request.site.siteconfiguration):
+                if course_id not in credit_eligibility:
+                    credit_eligibility[course_id] = request.user.is_eligible_for_credit(
+                        course_id, request.site.siteconfiguration
+                    )
+                if not credit_eligibility[course_id] or product.id in purchased_product_ids:
                     continue
-                if Order.objects.filter(user=request.user, lines__product=product).exists():
-                    continue
-                credit_seats = Product.objects.filter(parent=product.parent, attributes__name='credit_provider')
 
-                if credit_seats.count() > 1:
+                if credit_seat_counts.get(product.parent_id, 0) > 1:
                     multiple_credit_providers = True
-                    credit_provider_price = None
-                else:
-                    multiple_credit_providers = False
-                    credit_provider_price = StockRecord.objects.get(product=product).price_excl_tax
-
-            try:
-                stock_record = stock_records.get(product__id=product.id)
-            except StockRecord.DoesNotExist:
-                stock_record = None
+                elif stock_record:
+                    credit_provider_price = stock_record.price_excl_tax
+
+            if not stock_record:
                 logger.error('Stock Record for product %s not found.', product.id)
 
-            try:
-                course = Course.objects.get(id=course_id)
-            except Course.DoesNotExist:  # pragma: no cover
-                course = None
+            course = product.course
+            if not course:  # pragma: no cover
                 logger.error('Course %s not found.', course_id)
 
             if course_catalog_data and course and stock_record:
@@ -289,6 +355,20 @@ class VoucherViewSet(NonDestroyableModelViewSet):
             dict: Dictionary containing a link to the next page of Course Discovery results and
                   a List of course offers where each offer is represented as a dictionary.
         """
+        # Offers of credit seats depend on the credit eligibility and purchases of the user, and are not cached.
+        cache_key = None
+        if 'credit' not in self.get_course_seat_types(voucher):
+            cache_key = get_cache_key(
+                voucher_id=voucher.id,
+                page=request.GET.get('page'),
+                offset=request.GET.get('offset'),
+                limit=request.GET.get('limit'),
+                is_staff=getattr(request.strategy.user, 'is_staff', False),
+            )
+            offers_cached_response = TieredCache.get_cached_response(cache_key)
+            if offers_cached_response.is_found:
+                return offers_cached_response.value
+
         offers, next_page = self.get_offers_from_catalog(request, voucher)
         if offers is None:
             offers = []
@@ -316,7 +396,10 @@ class VoucherViewSet(NonDestroyableModelViewSet):
                     voucher=voucher
                 ))
 
-        return {'next': next_page, 'results': offers}
+        offers_data = {'next': next_page, 'results': offers}
+        if cache_key:
+            TieredCache.set_all_tiers(cache_key, offers_data, settings.VOUCHER_OFFERS_CACHE_TIMEOUT)
+        return offers_data
 
     def get_course_offer_data(
             self, benefit, course, course_info, credit_provider_price, is_verified,
@@ -5,6 +5,7 @@ from oscar.apps.basket.admin import *  # noqa pylint: disable=wildcard-import,un
 from ecommerce.extensions.basket.models import BasketAttribute, BasketAttributeType
 
 Basket = get_model('basket', 'basket')
+ArchivedPaymentProcessorResponse = get_model('payment', 'ArchivedPaymentProcessorResponse')
 PaymentProcessorResponse = get_model('payment', 'PaymentProcessorResponse')
 
 admin.site.unregister((Basket, Line,))
@@ -22,6 +23,11 @@ class PaymentProcessorResponseInline(admin.TabularInline):
         return False
 
 
+class ArchivedPaymentProcessorResponseInline(PaymentProcessorResponseInline):
+    model = ArchivedPaymentProcessorResponse
+    fields = ('id', 'processor_name', 'transaction_id', 'created', 'response')
+
+
 class BasketAttributeInLine(admin.TabularInline):
     model = BasketAttribute
     readonly_fields = ('id', 'attribute_type', 'value_text',)
@@ -36,7 +42,9 @@ class BasketAttributeInLine(admin.TabularInline):
 @admin.register(Basket)
 class BasketAdminExtended(BasketAdmin):
     raw_id_fields = ('vouchers', )
-    inlines = (LineInline, PaymentProcessorResponseInline, BasketAttributeInLine,)
+    inlines = (
+        LineInline, PaymentProcessorResponseInline, ArchivedPaymentProcessorResponseInline, BasketAttributeInLine,
+    )
     show_full_result_count = False
 
 
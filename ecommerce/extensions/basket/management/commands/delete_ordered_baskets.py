@@ -5,13 +5,9 @@ These baskets don't have much value once the order is placed, and unnecessarily
 """
 
 
-import time
-
 from django.core.management import BaseCommand
-from django.db import transaction
-from oscar.core.loading import get_model
 
-Basket = get_model('basket', 'Basket')
+from ecommerce.core.purge import OrderedBasketPurgePolicy, PurgeEngine
 
 
 class Command(BaseCommand):
@@ -39,28 +35,23 @@ class Command(BaseCommand):
                             help='Actually delete the baskets.')
 
     def handle(self, *args, **options):
-        # Only select those baskets linked to an order, and those not linked to an invoice.
-        # TODO: Simplify this query when the foreign key to Basket is removed from Invoice.
-        queryset = Basket.objects.filter(order__isnull=False, invoice__isnull=True)
-        count = queryset.count()
+        # Batches are selected by walking the primary keys of the matching baskets, rather than the whole
+        # id space, so sparse ranges do not issue empty deletes. See ecommerce.core.purge for details.
+        engine = PurgeEngine(
+            OrderedBasketPurgePolicy(),
+            batch_size=options['batch_size'],
+            max_batch_size=options['batch_size'],
+            sleep_seconds=options['sleep_seconds'],
+            progress_callback=lambda progress: self.stderr.write(
+                'Deleted baskets through [{last_id}]. Approximately [{remaining}] remaining.'.format(
+                    last_id=progress.last_id, remaining=progress.remaining))
+        )
+        count = engine.count()
 
         if options['commit']:
             if count:
                 self.stderr.write('Deleting [{}] baskets.'.format(count))
-
-                batch_size = options['batch_size']
-                sleep_seconds = options['sleep_seconds']
-
-                max_id = queryset.order_by('-id')[0].id
-                for start in range(0, max_id, batch_size):
-                    end = min(start + batch_size, max_id)
-                    self.stderr.write('Deleting baskets [{start}] through [{end}].'.format(start=start, end=end))
-                    with transaction.atomic():
-                        queryset.filter(pk__gte=start, pk__lte=end).delete()
-
-                    self.stderr.write('Complete. Sleeping.'.format(start=start, end=end))
-                    time.sleep(sleep_seconds)
-
+                engine.run()
                 self.stderr.write('All baskets deleted.')
             else:
                 self.stderr.write('No baskets to delete.')
@@ -508,7 +508,8 @@ class PaymentApiViewTests(PaymentApiResponseTestMixin, BasketMixin, DiscoveryMoc
             self.course, discovery_api_url=self.site_configuration.discovery_api_url
         )
 
-        with self.assert_events_fired_to_segment(basket):
+        with self.assert_events_fired_to_segment(basket), \
+                self.assert_within_budget(queries=36, duplicate_queries=6, http_calls=3):
             self.assert_expected_response(
                 basket,
                 certificate_type=certificate_type,
@@ -705,7 +706,8 @@ class BasketSummaryViewTests(EnterpriseServiceMockMixin, DiscoveryTestMixin, Dis
         self.create_basket_and_add_product(enrollment_code)
         self.mock_course_runs_endpoint(self.site_configuration.discovery_api_url, course_run=course)
 
-        response = self.client.get(self.path)
+        with self.assert_within_budget(queries=46, duplicate_queries=8, http_calls=3):
+            response = self.client.get(self.path)
         self.assertEqual(response.status_code, 200)
         self.assertFalse(response.context['show_voucher_form'])
         line_data = response.context['formset_lines_data'][0][1]
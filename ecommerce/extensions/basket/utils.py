@@ -148,6 +148,14 @@ def prepare_basket(request, products, voucher=None):
             )
             return basket
 
+    # Look up which of the products were already purchased at once, so the checks below are answered from the
+    # request's memo rather than with queries for each product.
+    UserAlreadyPlacedOrder.get_already_purchased_products(
+        request.user,
+        [product for product in products if not product.is_enrollment_code_product],
+        request.site
+    )
+
     is_multi_product_basket = len(products) > 1
     for product in products:
         # Multiple clicks can try adding twice, return if product is seat already in basket
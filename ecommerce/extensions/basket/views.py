@@ -7,6 +7,7 @@ import urllib
 from collections import OrderedDict
 from datetime import datetime
 from decimal import Decimal
+from functools import partial
 
 import dateutil.parser
 import newrelic.agent
@@ -30,8 +31,14 @@ from rest_framework.views import APIView
 from slumber.exceptions import SlumberBaseException
 
 from ecommerce.core.exceptions import SiteConfigurationError
+from ecommerce.core.fanout import fan_out
 from ecommerce.core.url_utils import absolute_redirect, get_lms_course_about_url, get_lms_url
-from ecommerce.courses.utils import get_certificate_type_display_value, get_course_info_from_catalog
+from ecommerce.courses.utils import (
+    get_certificate_type_display_value,
+    get_course_detail,
+    get_course_info_from_catalog,
+    get_course_run_detail
+)
 from ecommerce.enterprise.utils import (
     CONSENT_FAILED_PARAM,
     construct_enterprise_course_consent_url,
@@ -117,17 +124,18 @@ class BasketLogicMixin:
         }
 
         lines_data = []
+        courses = self._fetch_courses(lines)
         for line in lines:
             product = line.product
             if product.is_seat_product or product.is_course_entitlement_product:
-                line_data, _ = self._get_course_data(product)
+                line_data, _ = self._get_course_data(product, courses.get(line.id))
 
                 # TODO this is only used by hosted_checkout_basket template, which may no longer be
                 # used. Consider removing both.
                 if self._is_id_verification_required(product):
                     context_updates['display_verification_message'] = True
             elif product.is_enrollment_code_product:
-                line_data, course = self._get_course_data(product)
+                line_data, course = self._get_course_data(product, courses.get(line.id))
                 self._set_single_enrollment_code_warning_if_needed(product, course)
                 context_updates['is_enrollment_code_purchase'] = True
                 context_updates['show_voucher_form'] = False
@@ -242,12 +250,38 @@ class BasketLogicMixin:
                 )
 
     @newrelic.agent.function_trace()
-    def _get_course_data(self, product):
+    def _fetch_courses(self, lines):
+        """
+        Retrieves the course information of the course products of the given lines from the Discovery Service,
+        with concurrent calls.
+
+        Args:
+            lines (list): List of basket lines.
+        Returns:
+            dict: Mapping the IDs of the lines to futures of their course information.
+        """
+        site = self.request.site
+        # Load the partner, which is needed to retrieve course runs, before the calls leave this thread.
+        site.siteconfiguration.partner  # pylint: disable=pointless-statement
+
+        calls = {}
+        for line in lines:
+            product = line.product
+            if product.is_course_entitlement_product:
+                calls[line.id] = partial(get_course_detail, site, product.attr.UUID)
+            elif product.is_seat_product or product.is_enrollment_code_product:
+                calls[line.id] = partial(get_course_run_detail, site, CourseKey.from_string(product.attr.course_key))
+        return fan_out(calls)
+
+    @newrelic.agent.function_trace()
+    def _get_course_data(self, product, course_future=None):
         """
         Return course data.
 
         Args:
             product (Product): A product that has course_key as attribute (seat or bulk enrollment coupon)
+            course_future (Future): Course information retrieved by `_fetch_courses`. The information is retrieved
+                from the Discovery Service if it is not given.
         Returns:
             A dictionary containing product title, course key, image URL, description, and start and end dates.
             Also returns course information found from catalog.
@@ -266,7 +300,10 @@ class BasketLogicMixin:
             course_data['course_key'] = CourseKey.from_string(product.attr.course_key)
 
         try:
-            course = get_course_info_from_catalog(self.request.site, product)
+            if course_future:
+                course = course_future.result()
+            else:
+                course = get_course_info_from_catalog(self.request.site, product)
             try:
                 course_data['image_url'] = course['image']['src']
             except (KeyError, TypeError):
@@ -195,13 +195,13 @@ def generate_sku(product, partner):
             str(partner.id)
         )).encode('utf-8')
     elif product.is_seat_product:
-        _hash = ' '.join((
+        return generate_seat_sku(
+            partner,
             getattr(product.attr, 'certificate_type', ''),
-            str(product.attr.course_key),
-            str(product.attr.id_verification_required),
+            product.attr.course_key,
+            product.attr.id_verification_required,
             getattr(product.attr, 'credit_provider', ''),
-            str(partner.id)
-        )).encode('utf-8')
+        )
     elif product.is_course_entitlement_product:
         _hash = ' '.join((
             getattr(product.attr, 'certificate_type', ''),
@@ -212,6 +212,26 @@ def generate_sku(product, partner):
     else:
         raise Exception('Unexpected product class')
 
+    return _get_sku_digest(_hash)
+
+
+def generate_seat_sku(partner, certificate_type, course_key, id_verification_required, credit_provider):
+    """
+    Generates the SKU of a seat with the given attributes, without reading the attributes of a seat product.
+
+    Returns the same SKU as `generate_sku` for a seat with these attributes.
+    """
+    _hash = ' '.join((
+        certificate_type,
+        str(course_key),
+        str(id_verification_required),
+        credit_provider,
+        str(partner.id)
+    )).encode('utf-8')
+    return _get_sku_digest(_hash)
+
+
+def _get_sku_digest(_hash):
     md5_hash = md5(_hash.lower())
     digest = md5_hash.hexdigest()[-7:]
 
@@ -1,5 +1,7 @@
 
 
+from django import forms
+from django.utils.translation import ugettext_lazy as _
 from oscar.apps.dashboard.orders.forms import OrderSearchForm as CoreOrderSearchForm
 
 from ecommerce.extensions.dashboard.forms import UserFormMixin
@@ -7,3 +9,4 @@ from ecommerce.extensions.dashboard.forms import UserFormMixin
 
 class OrderSearchForm(UserFormMixin, CoreOrderSearchForm):
     """ Order Search Form. """
+    course_id = forms.CharField(required=False, label=_('Course ID'))
@@ -10,6 +10,7 @@ from oscar.core.loading import get_model
 
 from ecommerce.extensions.dashboard.views import FilterFieldsMixin
 
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
 Partner = get_model('partner', 'Partner')
 Refund = get_model('refund', 'Refund')
@@ -55,6 +56,10 @@ class OrderListView(FilterFieldsMixin, CoreOrderListView):
                     if _filter:
                         queryset = queryset.filter(**{_filter['query_filter']: value})
 
+            course_id = self.form.cleaned_data.get('course_id')
+            if course_id:
+                queryset = queryset.filter(id__in=Line.for_course(course_id).values('order_id'))
+
         return queryset
 
 
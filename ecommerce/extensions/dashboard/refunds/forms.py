@@ -14,6 +14,7 @@ status_choices = tuple([(status, status) for status in Refund.all_statuses()])
 class RefundSearchForm(UserFormMixin, forms.Form):
     id = forms.IntegerField(required=False, label=_('Refund ID'))
     status = forms.MultipleChoiceField(choices=status_choices, label=_('Status'), required=False)
+    course_id = forms.CharField(required=False, label=_('Course ID'))
 
     def clean(self):
         cleaned_data = super(RefundSearchForm, self).clean()
@@ -1,11 +1,14 @@
 
 
 from django.urls import reverse
+from oscar.core.loading import get_model
 
 from ecommerce.extensions.refund.status import REFUND
 from ecommerce.extensions.refund.tests.factories import RefundFactory
 from ecommerce.tests.testcases import TestCase
 
+Line = get_model('order', 'Line')
+
 
 class RefundViewTestMixin:
     def setUp(self):
@@ -91,6 +94,17 @@ class RefundListViewTests(RefundViewTestMixin, TestCase):
         ))
         self.assert_successful_response(response, [new_refund])
 
+    def test_filtering_by_course(self):
+        """ The view should allow filtering by the course of the refunded lines. """
+        course_id = 'course-v1:edX+DemoX+Demo_Course'
+        RefundFactory()
+        course_refund = RefundFactory()
+        Line.objects.filter(order=course_refund.order).update(course_key=course_id)
+
+        self.client.login(username=self.user.username, password=self.password)
+        response = self.client.get(self.path, {'course_id': course_id})
+        self.assert_successful_response(response, [course_refund])
+
     def test_sorting(self):
         """ The view should allow sorting by ID. """
         refunds = [RefundFactory(), RefundFactory(), RefundFactory()]
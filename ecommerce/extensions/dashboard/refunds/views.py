@@ -6,7 +6,9 @@ from oscar.views import sort_queryset
 
 from ecommerce.extensions.dashboard.views import FilterFieldsMixin
 
+Line = get_model('order', 'Line')
 Refund = get_model('refund', 'Refund')
+RefundLine = get_model('refund', 'RefundLine')
 RefundSearchForm = get_class('dashboard.refunds.forms', 'RefundSearchForm')
 
 
@@ -37,12 +39,19 @@ class RefundListView(FilterFieldsMixin, ListView):
         self.form = self.form_class(self.request.GET)
         if self.form.is_valid():
             for field, value in self.form.cleaned_data.items():
-                if value:
+                # The course filter matches lines of the course, rather than a field of refunds.
+                if value and field != 'course_id':
                     # Check if the field has a custom query filter setup.
                     # If not, use a standard Django equals/match filter.
                     _filter = self.get_filter_fields().get(field, {}).get('query_filter', field)
                     queryset = queryset.filter(**{_filter: value})
 
+            course_id = self.form.cleaned_data.get('course_id')
+            if course_id:
+                queryset = queryset.filter(id__in=RefundLine.objects.filter(
+                    order_line__in=Line.for_course(course_id)
+                ).values('refund_id'))
+
         return queryset
 
     def get_context_data(self, **kwargs):
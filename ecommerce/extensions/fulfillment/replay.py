@@ -0,0 +1,338 @@
+""" Bulk replay of order lines whose fulfillment failed because of upstream errors.
+
+After an LMS outage, thousands of order lines can be left with network, timeout or server errors. Rather than
+retrying each order through the fulfill endpoint, the replayer selects the failed lines in primary key order,
+groups them by order and fulfillment module, and replays the groups concurrently. Requests are rate limited, and
+a per-host circuit breaker stops hammering an upstream that is still failing. Orders whose lines have all been
+fulfilled are then marked complete in bulk.
+"""
+
+
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.db import connection, transaction
+from django.http import HttpRequest
+from oscar.core.loading import get_class, get_model
+from simple_history.utils import bulk_update_with_history
+from threadlocals.threadlocals import set_thread_variable
+
+from ecommerce.core.models import JobCheckpoint
+from ecommerce.extensions.fulfillment.api import get_fulfillment_modules
+from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
+from ecommerce.extensions.fulfillment.status import LINE, ORDER
+
+logger = logging.getLogger(__name__)
+
+EventHandler = get_class('order.processing', 'EventHandler')
+Line = get_model('order', 'Line')
+Order = get_model('order', 'Order')
+OrderStatusChange = get_model('order', 'OrderStatusChange')
+ShippingEventType = get_model('order', 'ShippingEventType')
+
+RETRYABLE_LINE_STATUSES = (
+    LINE.FULFILLMENT_NETWORK_ERROR,
+    LINE.FULFILLMENT_TIMEOUT_ERROR,
+    LINE.FULFILLMENT_SERVER_ERROR,
+)
+
+
+class RateLimiter:
+    """ Thread-safe limiter spacing calls at least ``1 / rate`` seconds apart. A falsy rate disables limiting. """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self._lock:
+            current = time.time()
+            delay = self._next_call - current
+            self._next_call = max(current, self._next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe, per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit for a host opens and calls are refused for
+    ``reset_timeout`` seconds. After that a call is let through again; the circuit closes on its first success
+    and reopens on its first failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = defaultdict(int)
+        self._opened_at = {}
+
+    def allow(self, host):
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            return opened_at is None or time.time() - opened_at >= self.reset_timeout
+
+    def is_open(self, host):
+        return not self.allow(host)
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures[host] = 0
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            self._failures[host] += 1
+            if self._failures[host] >= self.failure_threshold:
+                if host not in self._opened_at:
+                    logger.warning('Opening fulfillment circuit for host [%s].', host)
+                self._opened_at[host] = time.time()
+
+
+class ReplayProgress:
+    """ Running totals for a replay, reported after every batch. """
+
+    def __init__(self, backlog):
+        self.backlog = backlog
+        self.last_id = 0
+        self.lines_fulfilled = 0
+        self.lines_failed = 0
+        self.lines_skipped = 0
+        self.orders_completed = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def lines_attempted(self):
+        return self.lines_fulfilled + self.lines_failed
+
+    @property
+    def remaining(self):
+        return max(self.backlog - self.lines_attempted - self.lines_skipped, 0)
+
+    @property
+    def lines_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.lines_attempted / self.elapsed
+
+    def __str__(self):
+        return 'Replayed [{attempted}] lines: [{fulfilled}] fulfilled, [{failed}] failed, [{skipped}] skipped, ' \
+               '[{orders}] orders completed at [{rate:.1f}] lines/sec. Approximately [{remaining}] lines ' \
+               'remaining.'.format(
+                   attempted=self.lines_attempted,
+                   fulfilled=self.lines_fulfilled,
+                   failed=self.lines_failed,
+                   skipped=self.lines_skipped,
+                   orders=self.orders_completed,
+                   rate=self.lines_per_second,
+                   remaining=self.remaining,
+               )
+
+
+class FulfillmentReplayer:
+    """
+    Replays order lines that failed fulfillment with a retryable error.
+
+    Arguments:
+        workers (int): Number of replays to run concurrently. A value of 1 replays inline, on the calling thread.
+        rate (float): Maximum number of replays started per second, across all workers.
+        batch_size (int): Number of failed lines selected, replayed and checkpointed at a time.
+        failure_threshold (int): Consecutive failures after which the circuit for an upstream host opens.
+        reset_timeout (int): Seconds an open circuit refuses replays before trying the host again.
+        email_opt_in (bool): Passed to the fulfillment modules.
+        progress_callback (callable): Called with the ReplayProgress after every batch.
+    """
+    checkpoint_name = 'fulfillment_replay'
+
+    def __init__(self, workers=4, rate=10.0, batch_size=100, failure_threshold=5, reset_timeout=60,
+                 email_opt_in=False, progress_callback=None):
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.email_opt_in = email_opt_in
+        self.progress_callback = progress_callback
+        self.rate_limiter = RateLimiter(rate)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.modules = [module_class() for module_class in get_fulfillment_modules()]
+        # Looked up when the replay runs, so that dry runs do not write to the database.
+        self.shipping_event_type = None
+
+    def get_queryset(self):
+        return Line.objects.filter(
+            status__in=RETRYABLE_LINE_STATUSES,
+            order__status=ORDER.FULFILLMENT_ERROR,
+        ).select_related(
+            'order__site__siteconfiguration',
+            'order__user',
+            'product__product_class',
+            'product__parent__product_class',
+        ).order_by('id')
+
+    def get_checkpoint(self):
+        return JobCheckpoint.objects.filter(name=self.checkpoint_name).first()
+
+    def reset(self):
+        JobCheckpoint.objects.filter(name=self.checkpoint_name).delete()
+
+    def count(self):
+        """ Returns the number of failed lines that remain to be replayed. """
+        checkpoint = self.get_checkpoint()
+        return self.get_queryset().filter(id__gt=checkpoint.last_id if checkpoint else 0).count()
+
+    def get_host(self, order):
+        """ Returns the upstream host used to fulfill lines of the given order. """
+        return urlsplit(order.site.siteconfiguration.lms_url_root).netloc
+
+    def group_lines(self, lines):
+        """
+        Group lines by order and the fulfillment module that supports them.
+
+        Returns:
+            list of (order, module, lines) tuples, in the order the lines were given.
+        """
+        groups = OrderedDict()
+        for line in lines:
+            module = next((module for module in self.modules if module.supports_line(line)), None)
+            if module is None:
+                logger.warning('Line [%d] of order [%s] has no fulfillment module and will not be replayed.',
+                               line.id, line.order.number)
+                continue
+            groups.setdefault((line.order_id, type(module)), (line.order, module, []))[2].append(line)
+        return list(groups.values())
+
+    def replay_group(self, order, module, lines):
+        """
+        Replay fulfillment of a group of lines belonging to the same order and module.
+
+        Returns:
+            bool or None: True if all lines were fulfilled, False if any failed, and None if the replay was
+            skipped because the circuit for the upstream host is open.
+        """
+        host = self.get_host(order)
+        if not self.circuit_breaker.allow(host):
+            return None
+
+        self.rate_limiter.wait()
+
+        # The fulfillment modules build LMS URLs from the site of the current request.
+        request = HttpRequest()
+        request.site = order.site
+        request.user = order.user
+        set_thread_variable('request', request)
+
+        try:
+            module.fulfill_product(order, lines, email_opt_in=self.email_opt_in)
+            # Replayed lines are shipped like lines fulfilled at checkout, which only records the completed lines.
+            EventHandler().create_shipping_event(
+                order, self.shipping_event_type, lines, [line.quantity for line in lines]
+            )
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('An unexpected error occurred while replaying fulfillment of order [%s].', order.number)
+        finally:
+            set_thread_variable('request', None)
+
+        succeeded = all(line.status == LINE.COMPLETE for line in lines)
+        if succeeded:
+            self.circuit_breaker.record_success(host)
+        else:
+            self.circuit_breaker.record_failure(host)
+        return succeeded
+
+    def _replay_group_in_thread(self, order, module, lines):
+        try:
+            return self.replay_group(order, module, lines)
+        finally:
+            # Worker threads have their own database connections, which must not be leaked.
+            connection.close()
+
+    def replay_groups(self, groups):
+        if self.workers == 1:
+            return [self.replay_group(*group) for group in groups]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(lambda group: self._replay_group_in_thread(*group), groups))
+
+    def complete_orders(self, order_ids):
+        """
+        Mark the orders whose lines have all been fulfilled as complete, in bulk.
+
+        Returns:
+            int: Number of orders completed.
+        """
+        incomplete = Line.objects.filter(order_id__in=order_ids).exclude(status=LINE.COMPLETE).values('order_id')
+        orders = list(Order.objects.filter(id__in=order_ids, status=ORDER.FULFILLMENT_ERROR).exclude(id__in=incomplete))
+        if not orders:
+            return 0
+
+        for order in orders:
+            order.status = ORDER.COMPLETE
+
+        with transaction.atomic():
+            bulk_update_with_history(orders, Order, ['status'])
+            OrderStatusChange.objects.bulk_create([
+                OrderStatusChange(order=order, old_status=ORDER.FULFILLMENT_ERROR, new_status=ORDER.COMPLETE)
+                for order in orders
+            ])
+        return len(orders)
+
+    def run(self):
+        """
+        Replay all failed lines, resuming after the last checkpoint if a previous run was interrupted.
+
+        Lines whose upstream host has an open circuit are skipped and left in their failed state; the next full
+        run will pick them up again.
+
+        Returns:
+            ReplayProgress
+        """
+        self.shipping_event_type, __ = ShippingEventType.objects.get_or_create(name=SHIPPING_EVENT_NAME)
+        checkpoint = self.get_checkpoint() or JobCheckpoint(name=self.checkpoint_name)
+        queryset = self.get_queryset()
+        progress = ReplayProgress(queryset.filter(id__gt=checkpoint.last_id).count())
+        progress.last_id = checkpoint.last_id
+        if checkpoint.last_id:
+            logger.info('Resuming fulfillment replay after line [%d].', checkpoint.last_id)
+
+        started = time.time()
+        while True:
+            lines = list(queryset.filter(id__gt=progress.last_id)[:self.batch_size])
+            if not lines:
+                break
+
+            groups = self.group_lines(lines)
+            for (__, ___, group_lines), succeeded in zip(groups, self.replay_groups(groups)):
+                if succeeded is None:
+                    progress.lines_skipped += len(group_lines)
+                else:
+                    fulfilled = sum(1 for line in group_lines if line.status == LINE.COMPLETE)
+                    progress.lines_fulfilled += fulfilled
+                    progress.lines_failed += len(group_lines) - fulfilled
+
+            progress.orders_completed += self.complete_orders({line.order_id for line in lines})
+            progress.last_id = lines[-1].id
+            progress.batches += 1
+            progress.elapsed = time.time() - started
+
+            checkpoint.last_id = progress.last_id
+            checkpoint.rows_processed += len(lines)
+            # The checkpoint is created with the first batch.
+            checkpoint.save(update_fields=['last_id', 'rows_processed', 'modified'] if checkpoint.pk else None)
+
+            if self.progress_callback:
+                self.progress_callback(progress)
+
+        # The sweep finished, so the next run should start from the first failed line.
+        self.reset()
+        logger.info('%s', progress)
+        return progress
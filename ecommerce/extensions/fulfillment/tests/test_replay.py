@@ -0,0 +1,130 @@
+"""Tests of the bulk fulfillment replayer."""
+
+
+import mock
+from django.test import override_settings
+from oscar.core.loading import get_model
+from oscar.test import factories
+from requests.exceptions import ConnectionError as ReqConnectionError
+
+from ecommerce.core.models import JobCheckpoint
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.fulfillment.modules import EnrollmentFulfillmentModule
+from ecommerce.extensions.fulfillment.replay import CircuitBreaker, FulfillmentReplayer, RateLimiter
+from ecommerce.extensions.fulfillment.status import LINE, ORDER
+from ecommerce.extensions.test.factories import create_order
+from ecommerce.tests.factories import UserFactory
+from ecommerce.tests.testcases import TestCase
+
+Order = get_model('order', 'Order')
+OrderStatusChange = get_model('order', 'OrderStatusChange')
+ShippingEvent = get_model('order', 'ShippingEvent')
+
+
+@override_settings(EDX_API_KEY='foo')
+class FulfillmentReplayerTests(TestCase):
+    def setUp(self):
+        super(FulfillmentReplayerTests, self).setUp()
+        course = CourseFactory(id='edX/DemoX/Demo_Course', name='Demo Course', partner=self.partner)
+        self.seat = course.create_or_update_seat('verified', False, 100)
+        self.orders = [self.create_failed_order(status) for status in (
+            LINE.FULFILLMENT_NETWORK_ERROR,
+            LINE.FULFILLMENT_TIMEOUT_ERROR,
+            LINE.FULFILLMENT_SERVER_ERROR,
+        )]
+
+    def create_failed_order(self, line_status):
+        user = UserFactory()
+        basket = factories.BasketFactory(owner=user, site=self.site)
+        basket.add_product(self.seat, 1)
+        order = create_order(basket=basket, user=user, site=self.site)
+        order.lines.update(status=line_status)
+        Order.objects.filter(id=order.id).update(status=ORDER.FULFILLMENT_ERROR)
+        return order
+
+    def mock_enrollment_api(self, **kwargs):
+        return mock.patch.object(EnrollmentFulfillmentModule, '_post_to_enrollment_api', **kwargs)
+
+    def test_run(self):
+        """ Verify failed lines are replayed and their orders are completed in bulk. """
+        progress_reports = []
+        replayer = FulfillmentReplayer(workers=1, rate=0, batch_size=2,
+                                       progress_callback=lambda progress: progress_reports.append(str(progress)))
+        self.assertEqual(replayer.count(), 3)
+
+        with self.mock_enrollment_api(return_value=mock.Mock(status_code=200)):
+            progress = replayer.run()
+
+        self.assertEqual(progress.lines_fulfilled, 3)
+        self.assertEqual(progress.orders_completed, 3)
+        self.assertEqual(progress.batches, 2)
+        self.assertEqual(len(progress_reports), 2)
+        self.assertIn('Approximately [0] lines remaining.', progress_reports[-1])
+        for order in self.orders:
+            order.refresh_from_db()
+            self.assertEqual(order.status, ORDER.COMPLETE)
+            self.assertEqual(order.lines.get().status, LINE.COMPLETE)
+            self.assertTrue(order.lines.get().has_shipping_event_occurred(replayer.shipping_event_type))
+            self.assertTrue(OrderStatusChange.objects.filter(order=order, new_status=ORDER.COMPLETE).exists())
+        self.assertEqual(replayer.count(), 0)
+        self.assertFalse(JobCheckpoint.objects.exists())
+
+    def test_run_opens_circuit(self):
+        """ Verify replays to a failing host stop once its circuit opens, leaving the lines failed. """
+        replayer = FulfillmentReplayer(workers=1, rate=0, failure_threshold=2, reset_timeout=600)
+
+        with self.mock_enrollment_api(side_effect=ReqConnectionError) as mock_post:
+            progress = replayer.run()
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(progress.lines_failed, 2)
+        self.assertEqual(progress.lines_skipped, 1)
+        self.assertEqual(progress.orders_completed, 0)
+        self.assertEqual(Order.objects.filter(status=ORDER.FULFILLMENT_ERROR).count(), 3)
+        self.assertFalse(ShippingEvent.objects.exists())
+
+    def test_run_resumes_from_checkpoint(self):
+        """ Verify an interrupted replay resumes after the last checkpointed line. """
+        first_line = self.orders[0].lines.get()
+        JobCheckpoint.objects.create(name=FulfillmentReplayer.checkpoint_name, last_id=first_line.id)
+        replayer = FulfillmentReplayer(workers=1, rate=0)
+        self.assertEqual(replayer.count(), 2)
+
+        with self.mock_enrollment_api(return_value=mock.Mock(status_code=200)):
+            progress = replayer.run()
+
+        self.assertEqual(progress.lines_fulfilled, 2)
+        first_line.refresh_from_db()
+        self.assertEqual(first_line.status, LINE.FULFILLMENT_NETWORK_ERROR)
+
+
+class CircuitBreakerTests(TestCase):
+    def test_circuit(self):
+        """ Verify the circuit opens after consecutive failures, and closes after a success once it is retried. """
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure('lms')
+        self.assertTrue(breaker.allow('lms'))
+
+        breaker.record_failure('lms')
+        self.assertTrue(breaker.is_open('lms'))
+        self.assertTrue(breaker.allow('other'))
+
+        with mock.patch('ecommerce.extensions.fulfillment.replay.time.time', return_value=10 ** 10):
+            self.assertTrue(breaker.allow('lms'))
+
+        breaker.record_success('lms')
+        self.assertFalse(breaker.is_open('lms'))
+
+
+class RateLimiterTests(TestCase):
+    @mock.patch('ecommerce.extensions.fulfillment.replay.time.sleep')
+    @mock.patch('ecommerce.extensions.fulfillment.replay.time.time', return_value=100.0)
+    def test_wait(self, __, mock_sleep):
+        """ Verify consecutive calls are spaced by the rate interval. """
+        limiter = RateLimiter(rate=4)
+        limiter.wait()
+        mock_sleep.assert_not_called()
+
+        limiter.wait()
+        limiter.wait()
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list], [0.25, 0.5])
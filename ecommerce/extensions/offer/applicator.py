@@ -3,13 +3,57 @@
 import logging
 from itertools import chain
 
+from django.http import HttpRequest
+from edx_django_utils.cache import RequestCache
 from oscar.apps.offer.applicator import Applicator as OscarApplicator
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
+from ecommerce.core.utils import get_cache_key
 from ecommerce.enterprise.api import get_enterprise_id_for_user
 
 logger = logging.getLogger(__name__)
 BUNDLE = 'bundle_identifier'
+OFFER_APPLICATIONS_CACHE_NAMESPACE = 'offer.applicator.offer_applications'
+OfferApplications = get_class('offer.results', 'OfferApplications')
+
+
+class OfferApplicationsSnapshot:
+    """
+    The discounts given by applying offers to a basket, which can be replayed onto the same, unchanged basket.
+
+    Replaying the snapshot restores the offer applications of the basket, and the discounts and offer consumptions
+    of its lines, without evaluating the offers' conditions and benefits again.
+    """
+
+    def __init__(self, basket):
+        self.applications = {
+            offer_id: dict(application) for offer_id, application in basket.offer_applications.applications.items()
+        }
+        # pylint: disable=protected-access
+        self.lines = {
+            line.id: (
+                line._discount_excl_tax,
+                line._discount_incl_tax,
+                line.consumer.consumed(),
+                [(offer, line.consumer.consumed(offer)) for offer in line.consumer.consumers],
+            )
+            for line in basket.all_lines()
+        }
+
+    def replay(self, basket):
+        applications = OfferApplications()
+        applications.applications = {offer_id: dict(application) for offer_id, application in self.applications.items()}
+        basket.offer_applications = applications
+
+        for line in basket.all_lines():
+            # pylint: disable=protected-access
+            line._discount_excl_tax, line._discount_incl_tax, consumed, consumptions = self.lines[line.id]
+            line.consumer = type(line.consumer)(line)
+            for offer, quantity in consumptions:
+                line.consumer.consume(quantity, offer)
+            # Items may also have been consumed for any offer.
+            if consumed > line.consumer.consumed():
+                line.consumer.consume(consumed - line.consumer.consumed())
 
 
 class Applicator(OscarApplicator):
@@ -38,7 +82,66 @@ class Applicator(OscarApplicator):
                 we get an error when trying to create the bundle_id BasketAttribute.
         """
         offers = self.get_offers(basket, user, request, bundle_id)
-        self.apply_offers(basket, offers)
+
+        # Offers are often applied several times to the same basket while handling a request. The discounts only
+        # depend on the basket, the offers and the request's discount JWT, so they are computed once per request
+        # for each combination of those and replayed afterwards. Middleware and views may be given the Django
+        # request or its DRF wrapper, which must share the cache.
+        request = getattr(request, '_request', request)
+        cache = self._get_request_cache(request)
+        fingerprint = self.get_basket_fingerprint(basket, user, request, offers) if cache is not None else None
+        if fingerprint is None:
+            self.apply_offers(basket, offers)
+            return
+
+        snapshot = cache.get(fingerprint)
+        if snapshot is None:
+            self.apply_offers(basket, offers)
+            cache[fingerprint] = OfferApplicationsSnapshot(basket)
+        else:
+            snapshot.replay(basket)
+
+    def _get_request_cache(self, request):
+        """
+        Returns the offer applications cached for the current request, or None if applications should not be cached.
+        """
+        if not isinstance(request, HttpRequest):
+            return None
+        return RequestCache(OFFER_APPLICATIONS_CACHE_NAMESPACE).data
+
+    def get_basket_fingerprint(self, basket, user, request, offers):
+        """
+        Returns a key identifying everything the offer applications of the basket depend on.
+
+        Returns None if the basket cannot be fingerprinted, either because it has not been saved, or because its
+        lines already carry discounts that applying offers would add to.
+        """
+        if basket.id is None:
+            return None
+
+        lines = []
+        for line in basket.all_lines():
+            if line.discount_value or line.consumer.consumed():
+                return None
+
+            price = line.purchase_info.price
+            lines.append((
+                line.id,
+                line.product_id,
+                line.stockrecord_id,
+                line.quantity,
+                str(price.excl_tax),
+                str(price.incl_tax) if price.is_tax_known else None,
+            ))
+
+        query_params = request.GET if request.method == 'GET' else request.POST
+        return get_cache_key(
+            basket_id=basket.id,
+            user_id=getattr(user, 'id', None),
+            lines=lines,
+            offers=[(offer.id, getattr(offer.get_voucher(), 'id', None)) for offer in offers],
+            discount_jwt=query_params.get('discount_jwt'),
+        )
 
     def get_offers(self, basket, user=None, request=None, bundle_id=None):  # pylint: disable=arguments-differ
         """
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-19 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offer', '0047_codeassignmentnudgeemailtemplates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offerassignment',
+            index=models.Index(fields=['user_email', 'status', 'code'], name='offer_offer_user_em_a504fb_idx'),
+        ),
+    ]
@@ -47,6 +47,7 @@ OFFER_PRIORITY_MANUAL_ORDER = 100
 
 logger = logging.getLogger(__name__)
 
+SiteConfiguration = get_model('core', 'SiteConfiguration')
 Voucher = get_model('voucher', 'Voucher')
 
 
@@ -127,16 +128,16 @@ class Benefit(AbstractBenefit):
             query = applicable_range.catalog_query
             applicable_lines = self._filter_for_paid_course_products(basket.all_lines(), applicable_range)
 
-            site = basket.site
-            partner_code = site.siteconfiguration.partner.short_code
+            site_configuration = SiteConfiguration.get_cached(basket.site_id)
+            partner_code = site_configuration.partner.short_code
             course_run_ids, course_uuids, applicable_lines = self._identify_uncached_product_identifiers(
-                applicable_lines, site.domain, partner_code, query
+                applicable_lines, site_configuration.site.domain, partner_code, query
             )
 
             if course_run_ids or course_uuids:
                 # Hit Discovery Service to determine if remaining courses and runs are in the range.
                 try:
-                    response = site.siteconfiguration.discovery_api_client.catalog.query_contains.get(
+                    response = site_configuration.discovery_api_client.catalog.query_contains.get(
                         course_run_ids=','.join([metadata['id'] for metadata in course_run_ids]),
                         course_uuids=','.join([metadata['id'] for metadata in course_uuids]),
                         query=query,
@@ -447,7 +448,8 @@ class Range(AbstractRange):
         catalog service for the catalog id contained in field "course_catalog".
         """
         request = get_current_request()
-        partner_code = request.site.siteconfiguration.partner.short_code
+        site_configuration = SiteConfiguration.get_cached(request.site.id)
+        partner_code = site_configuration.partner.short_code
         cache_key = get_cache_key(
             site_domain=request.site.domain,
             partner_code=partner_code,
@@ -459,7 +461,7 @@ class Range(AbstractRange):
         if cached_response.is_found:
             return cached_response.value
 
-        discovery_api_client = request.site.siteconfiguration.discovery_api_client
+        discovery_api_client = site_configuration.discovery_api_client
         try:
             # GET: /api/v1/catalogs/{catalog_id}/contains?course_run_id={course_run_ids}
             response = discovery_api_client.catalogs(self.course_catalog).contains.get(
@@ -579,6 +581,7 @@ class OfferAssignment(TimeStampedModel):
         indexes = [
             models.Index(fields=['code', 'user_email']),
             models.Index(fields=['code', 'status']),
+            models.Index(fields=['user_email', 'status', 'code']),
         ]
 
     def __str__(self):
@@ -4,6 +4,8 @@ from uuid import uuid4
 
 import ddt
 import mock
+from django.test import RequestFactory
+from oscar.apps.offer.applicator import Applicator as OscarApplicator
 from oscar.core.loading import get_model
 from oscar.test import factories
 
@@ -130,3 +132,33 @@ class ApplicatorTests(TestCase):
             assert not enterprise_offers
         else:
             assert enterprise_offers.count() == num_expected_offers
+
+    def test_apply_replays_offer_applications(self):
+        """ Verify offers are applied once per request to an unchanged basket, and replayed afterwards. """
+        self.basket.add_product(factories.create_product(price=100))
+        offer = factories.create_offer()
+        request = RequestFactory().get('/')
+
+        def apply_offers():
+            self.basket.reset_offer_applications()
+            with mock.patch('ecommerce.extensions.offer.applicator.get_enterprise_id_for_user', return_value=None):
+                with mock.patch.object(Applicator, 'apply_offers', autospec=True,
+                                       side_effect=OscarApplicator.apply_offers) as mock_apply_offers:
+                    self.applicator.apply(self.basket, self.user, request)
+            return mock_apply_offers.call_count
+
+        self.assertEqual(apply_offers(), 1)
+        expected_total = self.basket.total_incl_tax
+        self.assertEqual(list(self.basket.offer_applications.offers), [offer.id])
+
+        self.assertEqual(apply_offers(), 0)
+        self.assertEqual(self.basket.total_incl_tax, expected_total)
+        self.assertEqual(list(self.basket.offer_applications.offers), [offer.id])
+        self.assertTrue(self.basket.all_lines()[0].has_discount)
+        self.assertEqual(self.basket.all_lines()[0].consumer.consumed(offer), 1)
+        self.assertEqual(self.basket.all_lines()[0].consumer.consumed(), 1)
+
+        # Changing the basket invalidates the replayed applications.
+        self.basket.all_lines()[0].quantity = 2
+        self.basket.all_lines()[0].save()
+        self.assertEqual(apply_offers(), 1)
@@ -6,3 +6,5 @@ class PaymentEventTypeName:
 # switch is used to disable/enable ORDER table list/change view in django admin
 ORDER_LIST_VIEW_SWITCH = 'enable_order_list_view'
 DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME = 'disable_repeat_order_check'
+# switch used to find order lines whose course key has not been backfilled through the attributes of their products
+ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME = 'enable_order_line_course_key_fallback'
@@ -0,0 +1,100 @@
+
+
+import logging
+import time
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand
+from oscar.core.loading import get_model
+from waffle.models import Switch
+
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
+
+logger = logging.getLogger(__name__)
+Line = get_model('order', 'Line')
+Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+
+COURSE_ATTRIBUTE_CODES = ('course_key', 'certificate_type')
+
+
+class Command(BaseCommand):
+    """
+    Command to copy the course key and certificate type of their products to order lines created before
+    order lines recorded them. Lines whose product is not a course product are given an empty course key.
+
+    Once every line has been processed, the order line course key fallback switch is turned off, and lines are
+    only found by their course key.
+
+    Example:
+
+        ./manage.py backfill_order_line_course_keys
+    """
+    help = dedent(__doc__)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size',
+                            action='store',
+                            dest='batch_size',
+                            type=int,
+                            default=1000,
+                            help='Maximum number of order lines to update per query.')
+        parser.add_argument('--sleep-time',
+                            action='store',
+                            dest='sleep_time',
+                            type=float,
+                            default=0,
+                            help='Sleep time in seconds between update of batches.')
+
+    def get_course_attributes(self, product_ids):
+        """
+        Returns a dictionary mapping the given product IDs to their course attributes. As with `Product.attr`,
+        child products inherit the attributes of their parent that they do not set themselves.
+        """
+        parents = dict(Product.objects.filter(id__in=product_ids, parent__isnull=False).values_list('id', 'parent_id'))
+        values = {}
+        for product_id, code, value in ProductAttributeValue.objects.filter(
+                product_id__in=set(product_ids) | set(parents.values()),
+                attribute__code__in=COURSE_ATTRIBUTE_CODES,
+        ).values_list('product_id', 'attribute__code', 'value_text'):
+            values.setdefault(product_id, {})[code] = value
+
+        attributes = {}
+        for product_id in product_ids:
+            product_attributes = dict(values.get(parents.get(product_id), {}))
+            product_attributes.update(values.get(product_id, {}))
+            attributes[product_id] = product_attributes
+        return attributes
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sleep_time = options['sleep_time']
+
+        lines = Line.objects.filter(course_key__isnull=True, product__isnull=False).only('id', 'product_id')
+        last_id = 0
+        updated_count = 0
+        while True:
+            batch = list(lines.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+
+            last_id = batch[-1].id
+            attributes = self.get_course_attributes({line.product_id for line in batch})
+            for line in batch:
+                line.course_key = attributes[line.product_id].get('course_key') or ''
+                line.certificate_type = attributes[line.product_id].get('certificate_type')
+
+            Line.objects.bulk_update(batch, ['course_key', 'certificate_type'])
+            updated_count += len(batch)
+            logger.info('Backfilled course keys of [%d] order lines with IDs up to [%d].', len(batch), last_id)
+
+            if sleep_time:
+                time.sleep(sleep_time)
+
+        logger.info('Backfilled course keys of [%d] order lines.', updated_count)
+
+        switch, __ = Switch.objects.get_or_create(name=ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME)
+        if switch.active:
+            switch.active = False
+            switch.save()
+            logger.info('Turned off the [%s] switch.', ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME)
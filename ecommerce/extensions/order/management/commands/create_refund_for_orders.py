@@ -7,25 +7,20 @@ import logging
 import os
 
 from django.core.management import BaseCommand, CommandError
-from django.db.utils import IntegrityError
-from oscar.core.loading import get_model
-
-logger = logging.getLogger(__name__)
-
-Order = get_model('order', 'Order')
-OrderLine = get_model('order', 'Line')
-Refund = get_model('refund', 'Refund')
 
+from ecommerce.extensions.refund.bulk import BulkRefunder
 
-class RefundError(Exception):
-    """
-    Raised when refund could not be processed.
-    """
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
     """
     Creates refund for orders.
+
+    Refunds are created in batches. Refunds with a total credit of $0 are approved; other refunds are only approved,
+    crediting the purchaser and revoking fulfillment, if the --approve flag is set. Running the command again with
+    the same file resumes a run that failed: orders that have been refunded are skipped, and refunds that have not
+    been completed are approved again.
     """
 
     help = 'Create refund for orders.'
@@ -39,6 +34,29 @@ class Command(BaseCommand):
             help='Path of the file to read order numbers from.',
             type=str,
         )
+        parser.add_argument(
+            '--approve',
+            action='store_true',
+            dest='approve',
+            default=False,
+            help='Approve the refunds, crediting the purchasers and revoking fulfillment.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            action='store',
+            dest='batch_size',
+            default=100,
+            help='Number of orders refunded at a time.',
+            type=int,
+        )
+        parser.add_argument(
+            '--workers',
+            action='store',
+            dest='workers',
+            default=1,
+            help='Number of refunds approved concurrently for each payment processor.',
+            type=int,
+        )
 
     def handle(self, *args, **options):
         order_numbers_file = options[str('order_numbers_file')]
@@ -48,7 +66,12 @@ class Command(BaseCommand):
                 raise CommandError(
                     'Pass the correct absolute path to order numbers file as --order-numbers-file argument.'
                 )
-            total_orders, failed_orders = self._create_refunds_from_file(order_numbers_file)
+            refunder = BulkRefunder(
+                approve=options['approve'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+            )
+            total_orders, failed_orders = self._create_refunds_from_file(order_numbers_file, refunder)
         if failed_orders:
             logger.error(
                 u'[Ecommerce Order Refund]: Completed refund generation. %d of %d failed. '
@@ -56,33 +79,22 @@ class Command(BaseCommand):
         else:
             logger.info(u'[Ecommerce Order Refund] Generated refunds for the batch of %d orders.', total_orders)
 
-    def _create_refunds_from_file(self, order_numbers_file):
+    def _create_refunds_from_file(self, order_numbers_file, refunder):
         """
         Generate refunds for the orders provided in the order numbers file.
 
         Arguments:
             order_numbers_file (str): path of the file containing order numbers.
+            refunder (BulkRefunder): refunder creating the refunds.
 
         Returns:
             (total_orders, failed_orders): a tuple containing count of orders processed and a list containing
             order numbers whose refunds could not be generated.
         """
-        failed_orders = []
-
         with open(order_numbers_file, 'r') as file_handler:
-            order_numbers = file_handler.readlines()
-            total_orders = len(order_numbers)
-            logger.info(u'Creating refund for %d orders.', total_orders)
-            for index, order_number in enumerate(order_numbers, start=1):
-                try:
-                    order_number = order_number.strip()
-                    order = Order.objects.get(number=order_number)
-                    refund = Refund.create_with_lines(order, list(order.lines.all()))
-                    if refund is None:
-                        raise RefundError
-                except (Order.DoesNotExist, RefundError, IntegrityError) as e:
-                    failed_orders.append(order_number)
-                    logger.error(
-                        u'[Ecommerce Order Refund] %d/%d '
-                        u'Failed to generate refund for %s. %s', index, total_orders, order_number, str(e))
-        return total_orders, failed_orders
+            order_numbers = [order_number.strip() for order_number in file_handler if order_number.strip()]
+
+        total_orders = len(order_numbers)
+        logger.info(u'Creating refund for %d orders.', total_orders)
+        report = refunder.run(order_numbers)
+        return total_orders, report.failed_orders
@@ -0,0 +1,113 @@
+"""
+This command replays fulfillment of order lines that failed with network, timeout or server errors.
+"""
+
+
+import logging
+from textwrap import dedent
+
+from django.core.management import BaseCommand
+
+from ecommerce.extensions.fulfillment.replay import FulfillmentReplayer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Replay fulfillment of order lines that failed with network, timeout or server errors.
+
+    Lines are replayed concurrently, rate limited, and skipped while the circuit for their upstream host is open.
+    Progress is checkpointed after every batch, so an interrupted run resumes where it stopped.
+
+    Example:
+        ./manage.py replay_failed_fulfillments
+        ./manage.py replay_failed_fulfillments --commit --workers=8 --rate=20
+    """
+
+    help = dedent(__doc__)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            action='store',
+            dest='workers',
+            type=int,
+            default=4,
+            help='Number of fulfillments to replay concurrently.',
+        )
+        parser.add_argument(
+            '--rate',
+            action='store',
+            dest='rate',
+            type=float,
+            default=10.0,
+            help='Maximum number of fulfillments replayed per second.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            action='store',
+            dest='batch_size',
+            type=int,
+            default=100,
+            help='Number of failed lines replayed between checkpoints.',
+        )
+        parser.add_argument(
+            '--failure-threshold',
+            action='store',
+            dest='failure_threshold',
+            type=int,
+            default=5,
+            help='Consecutive failures after which replays to an upstream host are suspended.',
+        )
+        parser.add_argument(
+            '--reset-timeout',
+            action='store',
+            dest='reset_timeout',
+            type=int,
+            default=60,
+            help='Seconds replays to a failing upstream host are suspended for.',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            dest='reset',
+            default=False,
+            help='Discard the saved checkpoint and start from the first failed line.',
+        )
+        parser.add_argument(
+            '--commit',
+            action='store_true',
+            dest='commit',
+            default=False,
+            help='Actually replay the fulfillments.',
+        )
+
+    def handle(self, *args, **options):
+        replayer = FulfillmentReplayer(
+            workers=options['workers'],
+            rate=options['rate'],
+            batch_size=options['batch_size'],
+            failure_threshold=options['failure_threshold'],
+            reset_timeout=options['reset_timeout'],
+            progress_callback=lambda progress: self.stderr.write(str(progress)),
+        )
+
+        if options['reset']:
+            replayer.reset()
+
+        if not options['commit']:
+            self.stderr.write(
+                'This has been an example operation. If the --commit flag had been included, the command '
+                'would have replayed fulfillment of [{}] order lines.'.format(replayer.count())
+            )
+            return
+
+        progress = replayer.run()
+        logger.info(
+            u'[Replay Failed Fulfillments] Fulfilled %d lines, %d failed, %d skipped. Completed %d orders.',
+            progress.lines_fulfilled,
+            progress.lines_failed,
+            progress.lines_skipped,
+            progress.orders_completed,
+        )
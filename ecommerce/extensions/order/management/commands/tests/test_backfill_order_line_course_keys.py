@@ -0,0 +1,49 @@
+
+
+from django.core.management import call_command
+from oscar.core.loading import get_model
+from oscar.test import factories
+from waffle.models import Switch
+
+from ecommerce.core.tests import toggle_switch
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
+from ecommerce.extensions.test.factories import create_basket, create_order
+from ecommerce.tests.testcases import TestCase
+
+Line = get_model('order', 'Line')
+
+
+class BackfillOrderLineCourseKeysTests(TestCase):
+    command = 'backfill_order_line_course_keys'
+
+    def create_order_for_product(self, product):
+        basket = create_basket(empty=True)
+        basket.add_product(product)
+        return create_order(basket=basket)
+
+    def test_backfill(self):
+        """
+        Verify the course attributes of their products are copied to lines missing them, in batches, and the
+        fallback switch turned off.
+        """
+        toggle_switch(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, True)
+        course = CourseFactory(partner=self.partner)
+        seats = [
+            course.create_or_update_seat('verified', True, 10),
+            course.create_or_update_seat('professional', False, 100),
+        ]
+        orders = [self.create_order_for_product(seat) for seat in seats]
+        product = factories.ProductFactory()
+        other_order = self.create_order_for_product(product)
+        Line.objects.update(course_key=None, certificate_type=None)
+
+        call_command(self.command, batch_size=1)
+
+        for order, certificate_type in zip(orders, ('verified', 'professional')):
+            line = order.lines.get()
+            self.assertEqual(line.course_key, course.id)
+            self.assertEqual(line.certificate_type, certificate_type)
+        # Lines whose product is not a course product are marked as processed.
+        self.assertEqual(other_order.lines.get().course_key, '')
+        self.assertFalse(Switch.objects.get(name=ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME).active)
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import json
 
 import httpretty
+import mock
 from django.contrib.auth import get_user_model
 from django.core.management import CommandError, call_command
 from django.urls import reverse
@@ -182,3 +183,22 @@ class CreateRefundForOrdersTests(DiscoveryMockMixin, TestCase):
             'create_refund_for_orders', '--order-numbers-file={}'.format(filename)
         )
         self.assertFalse(Refund.objects.exists())
+
+    def test_refunder_options(self):
+        """
+        Verify the command configures the bulk refunder with its options.
+        """
+        filename = 'orders_file.txt'
+        with open(filename, 'w') as f:
+            f.write('EDX-100001\n\nEDX-100002\n')
+
+        with mock.patch('ecommerce.extensions.order.management.commands.create_refund_for_orders.'
+                        'BulkRefunder') as mock_refunder:
+            mock_refunder.return_value.run.return_value.failed_orders = []
+            call_command(
+                'create_refund_for_orders', '--order-numbers-file={}'.format(filename), '--approve',
+                '--batch-size=10', '--workers=2'
+            )
+
+        mock_refunder.assert_called_once_with(approve=True, batch_size=10, workers=2)
+        mock_refunder.return_value.run.assert_called_once_with(['EDX-100001', 'EDX-100002'])
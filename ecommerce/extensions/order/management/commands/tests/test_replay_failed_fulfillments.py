@@ -0,0 +1,58 @@
+
+
+from io import StringIO
+
+import mock
+from django.core.management import call_command
+from oscar.core.loading import get_model
+
+from ecommerce.core.models import JobCheckpoint
+from ecommerce.extensions.fulfillment.replay import ReplayProgress
+from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
+from ecommerce.extensions.fulfillment.status import LINE, ORDER
+from ecommerce.extensions.test.factories import create_order
+from ecommerce.tests.testcases import TestCase
+
+Order = get_model('order', 'Order')
+ShippingEventType = get_model('order', 'ShippingEventType')
+
+
+class ReplayFailedFulfillmentsTests(TestCase):
+    """
+    Tests for `replay_failed_fulfillments` command.
+    """
+    command = 'replay_failed_fulfillments'
+
+    def setUp(self):
+        super(ReplayFailedFulfillmentsTests, self).setUp()
+        order = create_order(site=self.site, status=ORDER.FULFILLMENT_ERROR)
+        order.lines.update(status=LINE.FULFILLMENT_TIMEOUT_ERROR)
+
+    def test_without_commit(self):
+        """ Verify the command only reports the backlog if the commit flag is not set. """
+        ShippingEventType.objects.filter(name=SHIPPING_EVENT_NAME).delete()
+        out = StringIO()
+        with mock.patch('ecommerce.extensions.fulfillment.replay.FulfillmentReplayer.run') as mock_run:
+            call_command(self.command, stderr=out)
+
+        mock_run.assert_not_called()
+        self.assertEqual(
+            out.getvalue().strip(),
+            'This has been an example operation. If the --commit flag had been included, the command '
+            'would have replayed fulfillment of [1] order lines.'
+        )
+        self.assertFalse(ShippingEventType.objects.filter(name=SHIPPING_EVENT_NAME).exists())
+        self.assertFalse(JobCheckpoint.objects.exists())
+
+    def test_with_commit(self):
+        """ Verify the command configures and runs the replayer. """
+        with mock.patch('ecommerce.extensions.order.management.commands.replay_failed_fulfillments.'
+                        'FulfillmentReplayer') as mock_replayer:
+            mock_replayer.return_value.run.return_value = ReplayProgress(backlog=1)
+            call_command(self.command, commit=True, workers=8, rate=20, reset=True)
+
+        __, kwargs = mock_replayer.call_args
+        self.assertEqual(kwargs['workers'], 8)
+        self.assertEqual(kwargs['rate'], 20)
+        mock_replayer.return_value.reset.assert_called_once_with()
+        mock_replayer.return_value.run.assert_called_once_with()
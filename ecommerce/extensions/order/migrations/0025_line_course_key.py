@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0024_markordersstatuscompleteconfig'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalline',
+            name='certificate_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Certificate type'),
+        ),
+        migrations.AddField(
+            model_name='historicalline',
+            name='course_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True, verbose_name='Course key'),
+        ),
+        migrations.AddField(
+            model_name='line',
+            name='certificate_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Certificate type'),
+        ),
+        migrations.AddField(
+            model_name='line',
+            name='course_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True, verbose_name='Course key'),
+        ),
+    ]
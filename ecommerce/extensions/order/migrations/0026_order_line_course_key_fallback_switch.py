@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+
+from django.db import migrations
+
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
+
+
+def create_switch(apps, schema_editor):
+    """Create the switch finding order lines through their products until their course keys are backfilled."""
+    Switch = apps.get_model('waffle', 'Switch')
+    Switch.objects.get_or_create(name=ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, defaults={'active': True})
+
+
+def remove_switch(apps, schema_editor):
+    """Remove the order line course key fallback switch."""
+    Switch = apps.get_model('waffle', 'Switch')
+    Switch.objects.filter(name=ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0025_line_course_key'),
+        ('waffle', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_switch, remove_switch)
+    ]
@@ -1,5 +1,6 @@
 
 
+import waffle
 from config_models.models import ConfigurationModel
 from django.core.validators import FileExtensionValidator
 from django.db import models
@@ -9,6 +10,7 @@ from oscar.apps.order.abstract_models import AbstractLine, AbstractOrder, Abstra
 from simple_history.models import HistoricalRecords
 
 from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
 
 
 class Order(AbstractOrder):
@@ -34,6 +36,37 @@ class Line(AbstractLine):
     history = HistoricalRecords()
     effective_contract_discount_percentage = models.DecimalField(max_digits=8, decimal_places=5, null=True)
     effective_contract_discounted_price = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    # Copies of the product's course attributes, so lines can be found by course without joining product attributes.
+    # The course key of lines whose product is not a course product is empty. It is null for lines created before
+    # lines recorded it, until the backfill_order_line_course_keys command has copied it to them.
+    course_key = models.CharField(_('Course key'), max_length=255, null=True, blank=True, db_index=True)
+    certificate_type = models.CharField(_('Certificate type'), max_length=255, null=True, blank=True)
+
+    def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        if self.pk is None and self.course_key is None and self.product:
+            self.course_key = getattr(self.product.attr, 'course_key', None) or ''
+            self.certificate_type = getattr(self.product.attr, 'certificate_type', None)
+        super(Line, self).save(*args, **kwargs)  # pylint: disable=bad-super-call
+
+    @classmethod
+    def for_course(cls, course_id):
+        """
+        Returns the lines of the given course.
+
+        Until the backfill_order_line_course_keys command has run, which turns the
+        ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME switch off, lines without a course key are found through the
+        attributes of their products.
+        """
+        if not waffle.switch_is_active(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME):
+            return cls.objects.filter(course_key=course_id)
+
+        products = cls._meta.get_field('product').related_model.objects.filter(
+            attribute_values__attribute__code='course_key',
+            attribute_values__value_text=course_id,
+        )
+        return cls.objects.filter(
+            models.Q(course_key=course_id) | models.Q(course_key__isnull=True, product__in=products)
+        )
 
 
 class PaymentEvent(AbstractPaymentEvent):
@@ -1,13 +1,19 @@
 
 
 import ddt
+from oscar.core.loading import get_model
 from oscar.test import factories
 
 from ecommerce.core.constants import COUPON_PRODUCT_CLASS_NAME
+from ecommerce.core.tests import toggle_switch
+from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
 from ecommerce.extensions.test.factories import create_basket, create_order
 from ecommerce.tests.testcases import TestCase
 
+Line = get_model('order', 'Line')
+
 
 @ddt.ddt
 class OrderTests(TestCase):
@@ -41,3 +47,58 @@ class OrderTests(TestCase):
         basket.add_product(product)
         order = create_order(basket=basket)
         self.assertTrue(order.contains_coupon)
+
+
+class LineTests(TestCase):
+    def test_course_attributes(self):
+        """ Verify lines record the course key and certificate type of their product when created. """
+        course = CourseFactory(partner=self.partner)
+        seat = course.create_or_update_seat('verified', True, 10)
+        basket = create_basket(empty=True)
+        basket.add_product(seat)
+        line = create_order(basket=basket).lines.get()
+        self.assertEqual(line.course_key, course.id)
+        self.assertEqual(line.certificate_type, 'verified')
+
+        product = factories.create_product(product_class=COUPON_PRODUCT_CLASS_NAME)
+        basket = create_basket(empty=True)
+        factories.create_stockrecord(product, num_in_stock=1)
+        basket.add_product(product)
+        line = create_order(basket=basket).lines.get()
+        self.assertEqual(line.course_key, '')
+        self.assertIsNone(line.certificate_type)
+
+    def test_for_course(self):
+        """ Verify lines of a course are found by their course key, or by their product until they are backfilled. """
+        toggle_switch(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, True)
+        course = CourseFactory(partner=self.partner)
+        seat = course.create_or_update_seat('verified', True, 10)
+        lines = []
+        for __ in range(2):
+            basket = create_basket(empty=True)
+            basket.add_product(seat)
+            lines.append(create_order(basket=basket).lines.get())
+        Line.objects.filter(id=lines[1].id).update(course_key=None)
+        create_order()
+
+        self.assertEqual(sorted(Line.for_course(course.id).values_list('id', flat=True)), [lines[0].id, lines[1].id])
+
+        # Lines whose course key is recorded are not found through their product.
+        Line.objects.filter(id=lines[0].id).update(course_key='course-v1:edX+Other+Run')
+        self.assertEqual(list(Line.for_course(course.id).values_list('id', flat=True)), [lines[1].id])
+
+    def test_for_course_after_backfill(self):
+        """ Verify lines of a course are only found by their course key once the fallback switch is off. """
+        toggle_switch(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, False)
+        course = CourseFactory(partner=self.partner)
+        seat = course.create_or_update_seat('verified', True, 10)
+        lines = []
+        for __ in range(2):
+            basket = create_basket(empty=True)
+            basket.add_product(seat)
+            lines.append(create_order(basket=basket).lines.get())
+        Line.objects.filter(id=lines[1].id).update(course_key=None)
+
+        # The switch lookup and the lines.
+        with self.assertNumQueries(2):
+            self.assertEqual(list(Line.for_course(course.id).values_list('id', flat=True)), [lines[0].id])
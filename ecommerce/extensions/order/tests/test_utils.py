@@ -5,6 +5,7 @@ import datetime
 import json
 import logging
 
+import crum
 import ddt
 import httpretty
 import mock
@@ -304,6 +305,38 @@ class UserAlreadyPlacedOrderTests(RefundTestMixin, TestCase):
         product = self.get_order_product(order=refund.order)
         self.assertFalse(UserAlreadyPlacedOrder.user_already_placed_order(user=user, product=product, site=self.site))
 
+    def test_get_already_purchased_products(self):
+        """
+        Test that the purchased products are resolved at once, excluding refunded order lines.
+        """
+        refund = RefundFactory(user=self.user)
+        RefundLine.objects.filter(refund=refund).update(status='Complete')
+        refunded_product = self.get_order_product(order=refund.order)
+        not_purchased_product = create_order().lines.first().product
+        products = [self.product, refunded_product, not_purchased_product]
+        for product in products:
+            product.get_product_class()
+
+        # The switch lookup, the order lines and their entitlement attributes.
+        with self.assertNumQueries(3):
+            purchased = UserAlreadyPlacedOrder.get_already_purchased_products(
+                user=self.user, products=products, site=self.site
+            )
+        self.assertEqual(purchased, {self.product.id})
+
+    def test_get_already_purchased_products_memoized(self):
+        """
+        Test that the purchased products are memoized for the duration of a request.
+        """
+        crum.set_current_request(RequestFactory().get('/'))
+        self.addCleanup(crum.set_current_request, None)
+
+        self.assertTrue(UserAlreadyPlacedOrder.user_already_placed_order(user=self.user, product=self.product,
+                                                                         site=self.site))
+        with self.assertNumQueries(0):
+            self.assertTrue(UserAlreadyPlacedOrder.user_already_placed_order(user=self.user, product=self.product,
+                                                                             site=self.site))
+
     @ddt.data(('Open', False), ('Revocation Error', False), ('Denied', False), ('Complete', True))
     @ddt.unpack
     def test_is_order_line_refunded(self, refund_line_status, is_refunded):
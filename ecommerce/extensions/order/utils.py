@@ -3,9 +3,11 @@
 
 import logging
 
+import crum
 import waffle
 from django.conf import settings
-from edx_django_utils.cache import TieredCache
+from django.db.models import Exists, OuterRef, Prefetch
+from edx_django_utils.cache import RequestCache, TieredCache
 from edx_rest_api_client.client import EdxRestApiClient
 from edx_rest_api_client.exceptions import HttpNotFoundError
 from oscar.apps.order.utils import OrderCreator as OscarOrderCreator
@@ -14,6 +16,7 @@ from requests.exceptions import ConnectionError as ReqConnectionError  # pylint:
 from requests.exceptions import ConnectTimeout
 from threadlocals.threadlocals import get_current_request
 
+from ecommerce.core.models import SiteConfiguration
 from ecommerce.core.url_utils import get_lms_entitlement_api_url
 from ecommerce.extensions.order.constants import DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME
 from ecommerce.extensions.refund.status import REFUND_LINE
@@ -21,11 +24,13 @@ from ecommerce.referrals.models import Referral
 
 logger = logging.getLogger(__name__)
 
-Option = get_model('catalogue', 'Option')
+LineAttribute = get_model('order', 'LineAttribute')
 Order = get_model('order', 'Order')
 OrderLine = get_model('order', 'Line')
 RefundLine = get_model('refund', 'RefundLine')
 
+ALREADY_PURCHASED_PRODUCTS_CACHE_NAMESPACE = 'order.utils.already_purchased_products'
+
 
 class OrderNumberGenerator:
     OFFSET = 100000
@@ -40,12 +45,12 @@ class OrderNumberGenerator:
         Returns:
             string: Order number
         """
-        site = basket.site
-        if not site:
-            site = get_current_request().site
-            logger.warning('Basket [%d] is not associated with a Site. Defaulting to Site [%d].', basket.id, site.id)
+        site_id = basket.site_id
+        if not site_id:
+            site_id = get_current_request().site.id
+            logger.warning('Basket [%d] is not associated with a Site. Defaulting to Site [%d].', basket.id, site_id)
 
-        partner = site.siteconfiguration.partner
+        partner = SiteConfiguration.get_cached(site_id).partner
         return self.order_number_from_basket_id(partner, basket.id)
 
     def order_number_from_basket_id(self, partner, basket_id):
@@ -135,20 +140,24 @@ class UserAlreadyPlacedOrder:
     """
 
     @staticmethod
-    def is_entitlement_expired(entitlement_uuid, site):
+    def get_entitlement_api_client(site):
+        return EdxRestApiClient(get_lms_entitlement_api_url(), jwt=site.siteconfiguration.access_token)
+
+    @staticmethod
+    def is_entitlement_expired(entitlement_uuid, site, entitlement_api_client=None):
         """
         Checks to see if a given entitlement is expired.
 
         Args:
             entitlement_uuid: UUID
             site: (Site)
+            entitlement_api_client: (EdxRestApiClient) Client shared by several lookups. If it is not given, a
+                client is built when the entitlement is not cached.
 
         Returns:
             bool: True if the entitlement is expired
 
         """
-        entitlement_api_client = EdxRestApiClient(get_lms_entitlement_api_url(),
-                                                  jwt=site.siteconfiguration.access_token)
         partner_short_code = site.siteconfiguration.partner.short_code
         key = 'course_entitlement_detail_{}{}'.format(entitlement_uuid, partner_short_code)
         entitlement_cached_response = TieredCache.get_cached_response(key)
@@ -156,6 +165,7 @@ class UserAlreadyPlacedOrder:
             entitlement = entitlement_cached_response.value
         else:
             logger.debug('Trying to get entitlement {%s}', entitlement_uuid)
+            entitlement_api_client = entitlement_api_client or UserAlreadyPlacedOrder.get_entitlement_api_client(site)
             entitlement = entitlement_api_client.entitlements(entitlement_uuid).get()
             TieredCache.set_all_tiers(key, entitlement, settings.COURSES_API_CACHE_TIMEOUT)
 
@@ -183,28 +193,90 @@ class UserAlreadyPlacedOrder:
             If the switch with the name `ecommerce.extensions.order.constants.DISABLE_REPEAT_ORDER_SWITCH_NAME`
             is active this check will be disabled, and this method will already return `False`.
         """
+        return product.id in UserAlreadyPlacedOrder.get_already_purchased_products(user, [product], site)
+
+    @staticmethod
+    def get_already_purchased_products(user, products, site):
+        """
+        Returns the ids of the products the user has already purchased, out of the given products.
+
+        The order lines of all of the products are selected with a single query, which excludes refunded lines.
+        Entitlement expiry is looked up with a single API client, for the entitlements that are not cached.
+        Results are memoized for the duration of the current request.
+
+        Args:
+            user: (User)
+            products: (list of Product)
+            site: (Site)
+
+        Returns:
+            set: Ids of the products the user has purchased.
+        """
         if waffle.switch_is_active(DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME):
-            return False
-
-        entitlement_option = Option.objects.get(code='course_entitlement')
-
-        orders_lines = OrderLine.objects.filter(product=product, order__user=user)
-        for order_line in orders_lines:
-            if not UserAlreadyPlacedOrder.is_order_line_refunded(order_line):
-                if not order_line.product.is_course_entitlement_product:
-                    return True
-
-                entitlement_uuid = order_line.attributes.get(option=entitlement_option).value
-                try:
-                    if not UserAlreadyPlacedOrder.is_entitlement_expired(entitlement_uuid, site):
-                        return True
-                except (ConnectTimeout, ReqConnectionError, HttpNotFoundError):
-                    logger.exception(
-                        'Unable to get entitlement info [%s] due to a network problem',
-                        entitlement_uuid
-                    )
-
-        return False
+            return set()
+
+        if crum.get_current_request() is None:
+            return UserAlreadyPlacedOrder._get_purchased_products(user, products, site)
+
+        memo = RequestCache(ALREADY_PURCHASED_PRODUCTS_CACHE_NAMESPACE).data
+
+        unknown_products = [product for product in products if (user.id, site.id, product.id) not in memo]
+        if unknown_products:
+            purchased = UserAlreadyPlacedOrder._get_purchased_products(user, unknown_products, site)
+            for product in unknown_products:
+                memo[(user.id, site.id, product.id)] = product.id in purchased
+
+        return {product.id for product in products if memo[(user.id, site.id, product.id)]}
+
+    @staticmethod
+    def _get_purchased_products(user, products, site):
+        products = {product.id: product for product in products}
+        if not products:
+            return set()
+
+        refunded = RefundLine.objects.filter(order_line=OuterRef('pk'), status=REFUND_LINE.COMPLETE)
+        order_lines = OrderLine.objects.filter(
+            product__in=list(products), order__user=user
+        ).annotate(
+            is_refunded=Exists(refunded)
+        ).filter(
+            is_refunded=False
+        ).prefetch_related(
+            Prefetch(
+                'attributes',
+                queryset=LineAttribute.objects.filter(option__code='course_entitlement'),
+                to_attr='entitlement_attributes'
+            )
+        ).order_by('id')
+
+        purchased = set()
+        entitlement_api_client = None
+        for order_line in order_lines:
+            if order_line.product_id in purchased:
+                continue
+
+            if not products[order_line.product_id].is_course_entitlement_product:
+                purchased.add(order_line.product_id)
+                continue
+
+            if not order_line.entitlement_attributes:
+                logger.warning('Order line [%d] of a course entitlement has no entitlement attribute.', order_line.id)
+                continue
+
+            entitlement_uuid = order_line.entitlement_attributes[0].value
+            try:
+                entitlement_api_client = (
+                    entitlement_api_client or UserAlreadyPlacedOrder.get_entitlement_api_client(site)
+                )
+                if not UserAlreadyPlacedOrder.is_entitlement_expired(entitlement_uuid, site, entitlement_api_client):
+                    purchased.add(order_line.product_id)
+            except (ConnectTimeout, ReqConnectionError, HttpNotFoundError):
+                logger.exception(
+                    'Unable to get entitlement info [%s] due to a network problem',
+                    entitlement_uuid
+                )
+
+        return purchased
 
     @staticmethod
     def is_order_line_refunded(order_line):
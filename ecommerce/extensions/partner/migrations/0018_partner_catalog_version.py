@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0017_auto_20200305_1448'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partner',
+            name='catalog_version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented whenever a course of the partner, or its products, change.'),
+        ),
+    ]
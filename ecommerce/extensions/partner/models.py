@@ -16,8 +16,11 @@ class Partner(AbstractPartner):
     enable_sailthru = models.BooleanField(default=True, verbose_name=_('Enable Sailthru Reporting'),
                                           help_text='DEPRECATED: Use SiteConfiguration!')
     default_site = models.OneToOneField('sites.Site', null=True, blank=True, on_delete=models.PROTECT)
+    catalog_version = models.PositiveIntegerField(
+        default=0, help_text=_('Incremented whenever a course of the partner, or its products, change.')
+    )
 
-    history = HistoricalRecords(excluded_fields=['code'])
+    history = HistoricalRecords(excluded_fields=['code', 'catalog_version'])
 
     class Meta:
         # Model name that will appear in the admin panel
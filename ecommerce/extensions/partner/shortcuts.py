@@ -1,6 +1,9 @@
+from ecommerce.core.models import SiteConfiguration
+
+
 def get_partner_for_site(request):
     """ Returns the Partner associated with the request. """
     if not request:
         return None
 
-    return request.site.siteconfiguration.partner
+    return SiteConfiguration.get_cached(request.site.id).partner
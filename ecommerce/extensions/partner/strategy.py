@@ -1,6 +1,7 @@
 
 
 from django.utils import timezone
+from django.utils.functional import cached_property
 from oscar.apps.partner import availability, strategy
 from oscar.core.loading import get_model
 
@@ -15,7 +16,7 @@ class CourseSeatAvailabilityPolicyMixin(strategy.StockRequired):
     Parent seats are never available.
     """
 
-    @property
+    @cached_property
     def seat_class(self):
         ProductClass = get_model('catalogue', 'ProductClass')
         return ProductClass.objects.get(name=SEAT_PRODUCT_CLASS_NAME)
@@ -37,6 +38,23 @@ class DefaultStrategy(strategy.UseFirstStockRecord, CourseSeatAvailabilityPolicy
                       strategy.NoTax, strategy.Structured):
     """ Default Strategy """
 
+    def __init__(self, request=None):
+        super(DefaultStrategy, self).__init__(request)
+        self._purchase_info = {}
+
+    def fetch_for_products(self, products):
+        """
+        Returns the purchase info of the given products, keyed by product ID.
+
+        The purchase info of each product is memoized for the lifetime of the strategy, so that the serializers of a
+        request can share it. Products should be fetched with their stock records, and product classes, so that a
+        collection of products is priced and checked for availability without querying per product.
+        """
+        for product in products:
+            if product.id not in self._purchase_info:
+                self._purchase_info[product.id] = self.fetch_for_product(product)
+        return {product.id: self._purchase_info[product.id] for product in products}
+
 
 class Selector:
     def strategy(self, request=None, user=None, **kwargs):  # pylint: disable=unused-argument
@@ -6,12 +6,15 @@ import ddt
 import pytz
 from django.test import RequestFactory
 from oscar.apps.partner import availability
+from oscar.core.loading import get_model
 
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
 from ecommerce.extensions.partner.strategy import DefaultStrategy, Selector
 from ecommerce.tests.testcases import TestCase
 
+Product = get_model('catalogue', 'Product')
+
 
 @ddt.ddt
 class DefaultStrategyTests(DiscoveryTestMixin, TestCase):
@@ -45,6 +48,19 @@ class DefaultStrategyTests(DiscoveryTestMixin, TestCase):
         actual = self.strategy.availability_policy(product, stock_record)
         self.assertIsInstance(actual, availability.Unavailable)
 
+    def test_fetch_for_products(self):
+        """ Verify the purchase info of products is fetched without queries, and memoized. """
+        product = Product.objects.select_related('parent__product_class').prefetch_related('stockrecords').get(
+            id=self.honor_seat.id
+        )
+        with self.assertNumQueries(0):
+            info = self.strategy.fetch_for_products([product])[product.id]
+        self.assertTrue(info.availability.is_available_to_buy)
+        self.assertEqual(info.stockrecord, self.honor_seat.stockrecords.first())
+
+        product.expires = pytz.utc.localize(datetime.datetime.min)
+        self.assertIs(self.strategy.fetch_for_products([product])[product.id], info)
+
     @ddt.unpack
     @ddt.data(
         (True, availability.Available),
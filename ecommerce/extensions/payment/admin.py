@@ -9,6 +9,7 @@ from solo.admin import SingletonModelAdmin
 
 from ecommerce.extensions.payment.models import SDNCheckFailure
 
+ArchivedPaymentProcessorResponse = get_model('payment', 'ArchivedPaymentProcessorResponse')
 PaymentProcessorResponse = get_model('payment', 'PaymentProcessorResponse')
 PaypalProcessorConfiguration = get_model('payment', 'PaypalProcessorConfiguration')
 
@@ -37,6 +38,13 @@ class PaymentProcessorResponseAdmin(admin.ModelAdmin):
         return format_html('<br><br><pre>{}</pre>', pretty_response)
 
 
+@admin.register(ArchivedPaymentProcessorResponse)
+class ArchivedPaymentProcessorResponseAdmin(PaymentProcessorResponseAdmin):
+    list_filter = ('processor_name', 'month',)
+    search_fields = ('id', 'transaction_id', 'basket__id',)
+    raw_id_fields = ('basket',)
+
+
 @admin.register(SDNCheckFailure)
 class SDNCheckFailureAdmin(admin.ModelAdmin):
     search_fields = ('username', 'full_name')
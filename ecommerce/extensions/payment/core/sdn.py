@@ -4,10 +4,14 @@ import csv
 import hashlib
 import io
 import logging
+import random
 import re
 import string
+import threading
 import unicodedata
-from datetime import datetime, timezone
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlencode
 
 # Changes part of REV-1209 - see https://github.com/edx/ecommerce/pull/3020
@@ -18,9 +22,12 @@ import requests
 import waffle
 from django.conf import settings
 from django.contrib.auth import logout
+from django.db import connection
+from edx_django_utils.cache import TieredCache
 from oscar.core.loading import get_model
 from requests.exceptions import HTTPError, Timeout
 
+from ecommerce.core.utils import get_cache_key
 from ecommerce.extensions.payment.exceptions import SDNFallbackDataEmptyError
 from ecommerce.extensions.payment.models import SDNCheckFailure, SDNFallbackData, SDNFallbackMetadata
 
@@ -31,6 +38,19 @@ BasketAttributeType = get_model('basket', 'BasketAttributeType')
 
 COUNTRY_CODES = {country.alpha_2 for country in pycountry.countries}
 
+# Cached SDN API results are keyed on this version, which changes whenever new SDN fallback data is imported.
+SDN_CHECK_CACHE_VERSION_KEY = 'sdn_check_cache_version'
+
+# Maximum number of SDNFallbackData records held in memory and inserted per query while importing the sdn csv.
+SDN_FALLBACK_IMPORT_BATCH_SIZE = 1000
+
+# A 'New' SDNFallbackMetadata entry older than this is assumed to be left by an interrupted import, rather than
+# belonging to an import that is still running.
+SDN_FALLBACK_STALE_IMPORT_AGE = timedelta(hours=1)
+
+# Form fields read by the SDN fallback comparison.
+SDN_COMPARISON_FIELDS = ('first_name', 'last_name', 'city', 'country')
+
 
 def checkSDN(request, name, city, country):
     """
@@ -108,6 +128,23 @@ def checkSDNFallback(name, city, country):
     return hit_count
 
 
+def get_sdn_check_cache_version():
+    """ Returns the version of the SDN API result cache, creating one if none is set. """
+    version_cached_response = TieredCache.get_cached_response(SDN_CHECK_CACHE_VERSION_KEY)
+    if version_cached_response.is_found:
+        return version_cached_response.value
+
+    version = uuid.uuid4().hex
+    TieredCache.set_all_tiers(SDN_CHECK_CACHE_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_sdn_check_cache():
+    """ Invalidate all cached SDN API results, across all workers. """
+    TieredCache.delete_all_tiers(SDN_CHECK_CACHE_VERSION_KEY)
+    logger.info('Invalidated SDN check cache.')
+
+
 class SDNClient:
     """A utility class that handles SDN related operations."""
     def __init__(self, api_url, api_key, sdn_list):
@@ -164,6 +201,21 @@ class SDNClient:
             # we ensure any error would not interfere with the actual transaction.
             logger.warning("Fuzzy SDN check error [%s]", str(e))
 
+    def get_search_cache_key(self, name, city, country):
+        """
+        Returns the key under which the result of a search is cached.
+
+        Names and cities are normalized with `process_text`, so searches that differ only in word order,
+        punctuation, case or accents share a key.
+        """
+        return get_cache_key(
+            sdn_check_version=get_sdn_check_cache_version(),
+            name=' '.join(sorted(process_text(str(name)))),
+            city=' '.join(sorted(process_text(str(city)))),
+            country=str(country).upper(),
+            sdn_list=self.sdn_list,
+        )
+
     def search(self, name, city, country):
         """
         Searches the OFAC list for an individual with the specified details.
@@ -172,6 +224,9 @@ class SDNClient:
             * SDN API returns a non-200 status code response
             * user is not found on the SDN list
 
+        Successful responses are cached for SDN_CHECK_HIT_CACHE_TIMEOUT seconds if they have hits, and for
+        SDN_CHECK_MISS_CACHE_TIMEOUT seconds if they do not.
+
         Args:
             name (str): Individual's full name.
             city (str): Individual's city.
@@ -179,6 +234,11 @@ class SDNClient:
         Returns:
             dict: SDN API response.
         """
+        cache_key = self.get_search_cache_key(name, city, country)
+        search_cached_response = TieredCache.get_cached_response(cache_key)
+        if search_cached_response.is_found:
+            return search_cached_response.value
+
         # Changes part of REV-1209 - see https://github.com/edx/ecommerce/pull/3020
         params_dict = {
             'sources': self.sdn_list,
@@ -216,7 +276,13 @@ class SDNClient:
             )
             raise requests.exceptions.HTTPError('Unable to connect to SDN API')
 
-        return response.json()
+        search_results = response.json()
+        if search_results.get('total'):
+            timeout = settings.SDN_CHECK_HIT_CACHE_TIMEOUT
+        else:
+            timeout = settings.SDN_CHECK_MISS_CACHE_TIMEOUT
+        TieredCache.set_all_tiers(cache_key, search_results, timeout)
+        return search_results
 
     def deactivate_user(self, basket, name, city, country, search_results):
         """ Deactivates a user account.
@@ -319,6 +385,62 @@ def populate_sdn_fallback_metadata(sdn_csv_string):
     return metadata_entry
 
 
+def get_sdn_fallback_record(row, metadata_entry):
+    """
+    Build an SDNFallbackData record from a row of the sdn csv, with its names, addresses and countries
+    normalized for checkSDNFallback.
+
+    Args:
+        row (dict): Row of the sdn csv
+        metadata_entry (SDNFallbackMetadata): Instance of the current SDNFallbackMetadata class
+
+    Returns:
+        SDNFallbackData: Unsaved record
+    """
+    sdn_source, sdn_type, names, addresses, alt_names, ids = (
+        row['source'] or '', row['type'] or '', row['name'] or '',
+        row['addresses'] or '', row['alt_names'] or '', row['ids'] or ''
+    )
+    processed_names = ' '.join(process_text(' '.join(filter(None, [names, alt_names]))))
+    processed_addresses = ' '.join(process_text(addresses))
+    countries = extract_country_information(addresses, ids)
+    return SDNFallbackData(
+        sdn_fallback_metadata=metadata_entry,
+        source=sdn_source,
+        sdn_type=sdn_type,
+        names=processed_names,
+        addresses=processed_addresses,
+        countries=countries
+    )
+
+
+def import_sdn_fallback_data(sdn_csv_file, metadata_entry, batch_size=SDN_FALLBACK_IMPORT_BATCH_SIZE):
+    """
+    Create SDNFallbackData records from a csv file, parsing it row by row and inserting batch_size records at a time
+
+    Args:
+        sdn_csv_file (file): Text file object of the sdn csv
+        metadata_entry (SDNFallbackMetadata): Instance of the current SDNFallbackMetadata class
+        batch_size (int): Maximum number of records held in memory and inserted per query
+
+    Returns:
+        int: Number of records created
+    """
+    records_count = 0
+    records = []
+    for row in csv.DictReader(sdn_csv_file):
+        records.append(get_sdn_fallback_record(row, metadata_entry))
+        if len(records) >= batch_size:
+            SDNFallbackData.objects.bulk_create(records)
+            records_count += len(records)
+            records = []
+
+    if records:
+        SDNFallbackData.objects.bulk_create(records)
+        records_count += len(records)
+    return records_count
+
+
 def populate_sdn_fallback_data(sdn_csv_string, metadata_entry):
     """
     Process CSV data and create SDNFallbackData records
@@ -327,47 +449,83 @@ def populate_sdn_fallback_data(sdn_csv_string, metadata_entry):
         sdn_csv_string (str): String of the sdn csv
         metadata_entry (SDNFallbackMetadata): Instance of the current SDNFallbackMetadata class
     """
-    sdn_csv_reader = csv.DictReader(io.StringIO(sdn_csv_string))
-    processed_records = []
-    for row in sdn_csv_reader:
-        sdn_source, sdn_type, names, addresses, alt_names, ids = (
-            row['source'] or '', row['type'] or '', row['name'] or '',
-            row['addresses'] or '', row['alt_names'] or '', row['ids'] or ''
-        )
-        processed_names = ' '.join(process_text(' '.join(filter(None, [names, alt_names]))))
-        processed_addresses = ' '.join(process_text(addresses))
-        countries = extract_country_information(addresses, ids)
-        processed_records.append(SDNFallbackData(
-            sdn_fallback_metadata=metadata_entry,
-            source=sdn_source,
-            sdn_type=sdn_type,
-            names=processed_names,
-            addresses=processed_addresses,
-            countries=countries
-        ))
-    # Bulk create should be more efficient for a few thousand records without needing to use SQL directly.
-    SDNFallbackData.objects.bulk_create(processed_records)
+    import_sdn_fallback_data(io.StringIO(sdn_csv_string), metadata_entry)
 
 
-def populate_sdn_fallback_data_and_metadata(sdn_csv_string):
+def delete_stale_sdn_fallback_import():
     """
-    1. Create the SDNFallbackMetadata entry
-    2. Populate the SDNFallbackData from the csv
+    Delete the 'New' SDNFallbackMetadata entry left by an interrupted import, and its SDNFallbackData records.
+
+    The import_state of metadata entries is unique, so the entry would otherwise block every later import. Entries
+    created less than SDN_FALLBACK_STALE_IMPORT_AGE ago are kept, as they may belong to an import that is running.
+    """
+    stale_entries = SDNFallbackMetadata.objects.filter(
+        import_state='New',
+        created__lt=datetime.now(timezone.utc) - SDN_FALLBACK_STALE_IMPORT_AGE,
+    )
+    if stale_entries.exists():
+        logger.warning('SDNFallback: Deleting the metadata entry and records of an interrupted import.')
+        SDNFallbackData.objects.filter(sdn_fallback_metadata__in=stale_entries).delete()
+        stale_entries.delete()
+
+
+def import_sdn_fallback_csv(sdn_csv_file, file_checksum, batch_size=SDN_FALLBACK_IMPORT_BATCH_SIZE):
+    """
+    1. Create the SDNFallbackMetadata entry, unless the csv matches the current one
+    2. Populate the SDNFallbackData from the csv, in batches
+    3. Make the new data current
+
+    Until the import completes, its records belong to the 'New' metadata entry, which checkSDNFallback does not
+    read. The batches therefore do not need to share a transaction; if the import fails, the new entry and its
+    records are deleted. The 'New' entry of an import that was interrupted before it could clean up, e.g. because
+    its process was killed, is deleted, with its records, by the first import that runs once it is stale. Until
+    then, imports are skipped, as another import may still be running.
 
     Args:
-        sdn_csv_string (str): String of the sdn csv
+        sdn_csv_file (file): Text file object of the sdn csv
+        file_checksum (str): SHA-256 hex digest of the sdn csv
+        batch_size (int): Maximum number of records held in memory and inserted per query
+
+    Returns:
+        sdn_fallback_metadata_entry (SDNFallbackMetadata): The imported SDNFallbackMetadata entry, or None if the
+        csv was not imported
     """
-    metadata_entry = populate_sdn_fallback_metadata(sdn_csv_string)
+    delete_stale_sdn_fallback_import()
+    if SDNFallbackMetadata.objects.filter(import_state='New').exists():
+        logger.warning('SDNFallback: Skipping import, as another import is in progress.')
+        return None
+
+    metadata_entry = SDNFallbackMetadata.insert_new_sdn_fallback_metadata_entry(file_checksum)
     if metadata_entry:
-        populate_sdn_fallback_data(sdn_csv_string, metadata_entry)
+        try:
+            records_count = import_sdn_fallback_data(sdn_csv_file, metadata_entry, batch_size)
+        except Exception:
+            metadata_entry.delete()
+            raise
+
+        logger.info('SDNFallback: Imported %d SDNFallbackData records for metadata id %s.',
+                    records_count, metadata_entry.id)
         # Once data is successfully imported, update the metadata import timestamp and state
         now = datetime.now(timezone.utc)
         metadata_entry.import_timestamp = now
         metadata_entry.save()
         metadata_entry.swap_all_states()
+        invalidate_sdn_check_cache()
     return metadata_entry
 
 
+def populate_sdn_fallback_data_and_metadata(sdn_csv_string):
+    """
+    1. Create the SDNFallbackMetadata entry
+    2. Populate the SDNFallbackData from the csv
+
+    Args:
+        sdn_csv_string (str): String of the sdn csv
+    """
+    file_checksum = hashlib.sha256(sdn_csv_string.encode('utf-8')).hexdigest()
+    return import_sdn_fallback_csv(io.StringIO(sdn_csv_string), file_checksum)
+
+
 def compare_SDNCheck_vs_fallback(basket_id, data, hit_count):
     """ Temporary checkSDNFallback comparison call (REV-1338)
 
@@ -411,3 +569,81 @@ def compare_SDNCheck_vs_fallback(basket_id, data, hit_count):
                         data.get('last_name'),
                         data.get('city'),
                         data.get('country'))
+
+
+class BoundedBackgroundExecutor:
+    """
+    Runs best-effort work on a small pool of background threads.
+
+    At most ``max_pending`` calls may be queued or running at once; further calls are dropped rather than queued,
+    so a slow backlog can never hold on to request data or grow without bound. The pool is created on first use.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sdn-comparison')
+            return self._executor
+
+    def _run(self, func, *args):
+        try:
+            func(*args)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('Background call to [%s] failed.', func.__name__)
+        finally:
+            self._slots.release()
+            # Worker threads have their own database connections, which must not be leaked.
+            connection.close()
+
+    def submit(self, func, *args):
+        """
+        Schedule ``func(*args)`` to run in the background.
+
+        Returns:
+            bool: True if the call was scheduled, False if it was dropped because the executor is saturated.
+        """
+        if not self._slots.acquire(blocking=False):
+            return False
+
+        try:
+            self._get_executor().submit(self._run, func, *args)
+        except Exception:  # pylint: disable=broad-except
+            self._slots.release()
+            raise
+        return True
+
+
+sdn_comparison_executor = BoundedBackgroundExecutor(
+    max_workers=settings.SDN_FALLBACK_COMPARISON_WORKERS,
+    max_pending=settings.SDN_FALLBACK_COMPARISON_MAX_PENDING,
+)
+
+
+def schedule_SDNCheck_vs_fallback_comparison(basket_id, data, hit_count):
+    """ Run the checkSDNFallback comparison (REV-1338) in the background, for a sample of checkouts.
+
+    The comparison only logs its results, so it is kept off the checkout request: it is sampled at
+    SDN_FALLBACK_COMPARISON_SAMPLE_RATE and dropped when the background executor is saturated.
+
+    Args:
+        basket_id (int): ID of the current basket
+        data (dict): data inputted on checkout form
+        hit_count (int): result this basket got during SDN API call
+
+    Returns:
+        bool: True if the comparison was scheduled.
+    """
+    if random.random() >= settings.SDN_FALLBACK_COMPARISON_SAMPLE_RATE:
+        return False
+
+    comparison_data = {field: data.get(field) for field in SDN_COMPARISON_FIELDS}
+    scheduled = sdn_comparison_executor.submit(compare_SDNCheck_vs_fallback, basket_id, comparison_data, hit_count)
+    if not scheduled:
+        logger.info('Skip SDN API vs fallback comparison for basket %d; too many comparisons pending.', basket_id)
+    return scheduled
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import datetime
+import io
 import json
 import logging
 import random
 import string
+import threading
 import time
 from urllib.parse import urlencode
 
@@ -18,15 +21,21 @@ from testfixtures import LogCapture
 
 from ecommerce.core.models import User
 from ecommerce.extensions.payment.core.sdn import (
+    SDN_FALLBACK_STALE_IMPORT_AGE,
+    BoundedBackgroundExecutor,
     SDNClient,
     checkSDN,
     checkSDNFallback,
     compare_SDNCheck_vs_fallback,
     extract_country_information,
+    get_sdn_check_cache_version,
+    import_sdn_fallback_csv,
+    invalidate_sdn_check_cache,
     populate_sdn_fallback_data,
     populate_sdn_fallback_data_and_metadata,
     populate_sdn_fallback_metadata,
-    process_text
+    process_text,
+    schedule_SDNCheck_vs_fallback_comparison
 )
 from ecommerce.extensions.payment.exceptions import SDNFallbackDataEmptyError
 from ecommerce.extensions.payment.models import SDNCheckFailure, SDNFallbackData, SDNFallbackMetadata
@@ -119,6 +128,47 @@ class SDNCheckTests(TestCase):
         response = self.sdn_validator.search(self.name, self.city, self.country)
         self.assertEqual(response, sdn_response)
 
+    @httpretty.activate
+    def test_sdn_check_cached(self):
+        """ Verify search results are cached under normalized keys until the cache is invalidated. """
+        self.mock_sdn_response(json.dumps({'total': 0}))
+        self.sdn_validator.search(self.name, self.city, self.country)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 1)
+
+        response = self.sdn_validator.search('evil DR', 'top secret LAIR!', self.country.lower())
+        self.assertEqual(response, {'total': 0})
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 1)
+
+        other_list_validator = SDNClient(self.sdn_api_url, self.sdn_api_key, 'SDN')
+        self.assertNotEqual(
+            other_list_validator.get_search_cache_key(self.name, self.city, self.country),
+            self.sdn_validator.get_search_cache_key(self.name, self.city, self.country)
+        )
+
+        invalidate_sdn_check_cache()
+        self.sdn_validator.search(self.name, self.city, self.country)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+    @httpretty.activate
+    @override_settings(SDN_CHECK_HIT_CACHE_TIMEOUT=30, SDN_CHECK_MISS_CACHE_TIMEOUT=60)
+    def test_sdn_check_cache_timeouts(self):
+        """ Verify results with and without hits are cached for their own timeouts. """
+        for total, timeout in ((1, 30), (0, 60)):
+            invalidate_sdn_check_cache()
+            self.mock_sdn_response(json.dumps({'total': total}))
+            with mock.patch('ecommerce.extensions.payment.core.sdn.TieredCache.set_all_tiers') as mock_set:
+                self.sdn_validator.search(self.name, self.city, self.country)
+            mock_set.assert_called_with(mock.ANY, {'total': total}, timeout)
+
+    @httpretty.activate
+    def test_sdn_check_error_not_cached(self):
+        """ Verify failed searches are not cached. """
+        self.mock_sdn_response(json.dumps({'total': 1}), status_code=400)
+        for __ in range(2):
+            with self.assertRaises(HTTPError):
+                self.sdn_validator.search(self.name, self.city, self.country)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
     def test_deactivate_user(self):
         """ Verify an SDN failure is logged. """
         response = {'description': 'Bad dude.'}
@@ -248,6 +298,84 @@ Joshuafort, MD 72104, TH",,,,,,,,,,,,,,https://banks-bender.com/,Michael Anderso
         self.assertNotEqual(import_timestamp, SDNFallbackMetadata.objects.get(import_state="Current").import_timestamp)
 
     # pylint: enable=line-too-long
+    def test_import_invalidates_sdn_check_cache(self):
+        """ Verify importing new data, and only new data, invalidates cached SDN API results. """
+        csv_string = self.csv_header + '1,SDN,2,Individual,material,Victor Conrad'
+        version = get_sdn_check_cache_version()
+        populate_sdn_fallback_data_and_metadata(csv_string)
+        new_version = get_sdn_check_cache_version()
+        self.assertNotEqual(new_version, version)
+
+        populate_sdn_fallback_data_and_metadata(csv_string)
+        self.assertEqual(get_sdn_check_cache_version(), new_version)
+
+    def test_import_sdn_fallback_csv_in_batches(self):
+        """ Verify the csv is imported in batches, and its checksum recorded. """
+        csv_file = io.StringIO(self.csv_header + '\n'.join(
+            '{0},SDN,{0},Individual,material,Person {0}'.format(index) for index in range(3)
+        ))
+        with mock.patch.object(SDNFallbackData.objects, 'bulk_create', wraps=SDNFallbackData.objects.bulk_create) \
+                as mock_bulk_create:
+            metadata_entry = import_sdn_fallback_csv(csv_file, 'checksum', batch_size=2)
+
+        self.assertEqual([len(call[0][0]) for call in mock_bulk_create.call_args_list], [2, 1])
+        metadata_entry.refresh_from_db()
+        self.assertEqual(metadata_entry.import_state, 'Current')
+        self.assertEqual(metadata_entry.file_checksum, 'checksum')
+        self.assertEqual(SDNFallbackData.objects.filter(sdn_fallback_metadata=metadata_entry).count(), 3)
+
+    def test_import_sdn_fallback_csv_failure(self):
+        """ Verify a failed import removes its metadata entry and records, leaving the current data in place. """
+        populate_sdn_fallback_data_and_metadata(self.csv_header + '1,SDN,2,Individual,material,Victor Conrad')
+        current = SDNFallbackMetadata.objects.get(import_state='Current')
+        records_count = SDNFallbackData.objects.count()
+        csv_file = io.StringIO(self.csv_header + '1,SDN,2,Individual,material,Juan Cruz\n' + '2,SDN,3,Individual')
+
+        with mock.patch('ecommerce.extensions.payment.core.sdn.extract_country_information',
+                        side_effect=[''] + [ValueError]):
+            with self.assertRaises(ValueError):
+                import_sdn_fallback_csv(csv_file, 'checksum', batch_size=1)
+
+        self.assertFalse(SDNFallbackMetadata.objects.filter(import_state='New').exists())
+        self.assertEqual(SDNFallbackMetadata.objects.get(import_state='Current'), current)
+        self.assertEqual(SDNFallbackData.objects.count(), records_count)
+
+    def test_import_sdn_fallback_csv_after_interrupted_import(self):
+        """ Verify an import deletes the metadata entry and records left by an interrupted import. """
+        populate_sdn_fallback_data_and_metadata(self.csv_header + '1,SDN,2,Individual,material,Victor Conrad')
+        current = SDNFallbackMetadata.objects.get(import_state='Current')
+        stale = populate_sdn_fallback_metadata('interrupted')
+        populate_sdn_fallback_data(self.csv_header + '1,SDN,2,Individual,material,Juan Cruz', stale)
+        SDNFallbackMetadata.objects.filter(id=stale.id).update(
+            created=stale.created - SDN_FALLBACK_STALE_IMPORT_AGE - datetime.timedelta(minutes=1)
+        )
+
+        metadata_entry = import_sdn_fallback_csv(
+            io.StringIO(self.csv_header + '1,SDN,2,Individual,material,Jane Doe'), 'checksum'
+        )
+
+        self.assertFalse(SDNFallbackMetadata.objects.filter(id=stale.id).exists())
+        self.assertFalse(SDNFallbackData.objects.filter(sdn_fallback_metadata_id=stale.id).exists())
+        self.assertEqual(SDNFallbackMetadata.objects.get(import_state='Current'), metadata_entry)
+        self.assertEqual(SDNFallbackMetadata.objects.get(import_state='Discard'), current)
+        self.assertEqual(SDNFallbackData.objects.filter(sdn_fallback_metadata=metadata_entry).count(), 1)
+
+    def test_import_sdn_fallback_csv_during_running_import(self):
+        """ Verify an import is skipped, and the running import left in place, while another import is running. """
+        populate_sdn_fallback_data_and_metadata(self.csv_header + '1,SDN,2,Individual,material,Victor Conrad')
+        current = SDNFallbackMetadata.objects.get(import_state='Current')
+        running = populate_sdn_fallback_metadata('running')
+        populate_sdn_fallback_data(self.csv_header + '1,SDN,2,Individual,material,Juan Cruz', running)
+
+        metadata_entry = import_sdn_fallback_csv(
+            io.StringIO(self.csv_header + '1,SDN,2,Individual,material,Jane Doe'), 'checksum'
+        )
+
+        self.assertIsNone(metadata_entry)
+        self.assertEqual(SDNFallbackMetadata.objects.get(import_state='New'), running)
+        self.assertEqual(SDNFallbackMetadata.objects.get(import_state='Current'), current)
+        self.assertEqual(SDNFallbackData.objects.filter(sdn_fallback_metadata=running).count(), 1)
+
     def test_populate_sdn_fallback_metadata(self):
         """ Verify that we are able to correctly create a new metadata entry """
         metadata = populate_sdn_fallback_metadata('test')
@@ -569,3 +697,82 @@ class SDNFallbackTestsWithoutSetup(TestCase):
         """
         with self.assertRaises(SDNFallbackDataEmptyError):
             checkSDNFallback('Juan', 'North Kristinaport', 'SN')
+
+
+@ddt.ddt
+class SDNFallbackComparisonSchedulingTests(TestCase):
+    """ Tests for running the SDN fallback comparison in the background. """
+    form_data = {
+        'basket': 999,
+        'first_name': 'Test',
+        'last_name': 'User',
+        'city': 'Cambridge',
+        'country': 'US',
+        'address_line1': '141 Portland Ave.',
+    }
+
+    @ddt.data((0, False), (1, True))
+    @ddt.unpack
+    def test_schedule_comparison_sampling(self, sample_rate, scheduled):
+        """ Verify comparisons are only scheduled for sampled checkouts, with the fields they need. """
+        with override_settings(SDN_FALLBACK_COMPARISON_SAMPLE_RATE=sample_rate), \
+                mock.patch('ecommerce.extensions.payment.core.sdn.sdn_comparison_executor') as mock_executor:
+            mock_executor.submit.return_value = True
+            self.assertEqual(schedule_SDNCheck_vs_fallback_comparison(999, self.form_data, 0), scheduled)
+
+        if scheduled:
+            __, basket_id, data, hit_count = mock_executor.submit.call_args[0]
+            self.assertEqual((basket_id, hit_count), (999, 0))
+            self.assertEqual(data, {'first_name': 'Test', 'last_name': 'User', 'city': 'Cambridge', 'country': 'US'})
+        else:
+            mock_executor.submit.assert_not_called()
+
+    @override_settings(SDN_FALLBACK_COMPARISON_SAMPLE_RATE=1)
+    def test_schedule_comparison_saturated(self):
+        """ Verify comparisons are dropped, and logged, when the executor is saturated. """
+        with mock.patch('ecommerce.extensions.payment.core.sdn.sdn_comparison_executor') as mock_executor:
+            mock_executor.submit.return_value = False
+            with LogCapture('ecommerce.extensions.payment.core.sdn') as logger:
+                self.assertFalse(schedule_SDNCheck_vs_fallback_comparison(999, self.form_data, 0))
+                logger.check((
+                    'ecommerce.extensions.payment.core.sdn',
+                    'INFO',
+                    'Skip SDN API vs fallback comparison for basket 999; too many comparisons pending.'
+                ))
+
+
+class BoundedBackgroundExecutorTests(TestCase):
+    """ Tests for BoundedBackgroundExecutor. """
+
+    def test_submit_bounded(self):
+        """ Verify calls beyond the pending limit are dropped, and slots are freed once calls finish. """
+        executor = BoundedBackgroundExecutor(max_workers=1, max_pending=1)
+        release = threading.Event()
+        done = threading.Event()
+
+        self.assertTrue(executor.submit(release.wait, 5))
+        self.assertFalse(executor.submit(done.set))
+
+        release.set()
+        for __ in range(50):
+            if executor.submit(done.set):
+                break
+            time.sleep(0.1)
+        self.assertTrue(done.wait(5))
+
+    def test_submit_logs_exceptions(self):
+        """ Verify exceptions raised in the background are logged and free their slot. """
+        executor = BoundedBackgroundExecutor(max_workers=1, max_pending=1)
+        done = threading.Event()
+
+        def fail():
+            raise ValueError
+
+        with LogCapture('ecommerce.extensions.payment.core.sdn') as logger:
+            self.assertTrue(executor.submit(fail))
+            for __ in range(50):
+                if executor.submit(done.set):
+                    break
+                time.sleep(0.1)
+            self.assertTrue(done.wait(5))
+            self.assertEqual(logger.records[0].getMessage(), 'Background call to [fail] failed.')
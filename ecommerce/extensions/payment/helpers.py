@@ -7,6 +7,7 @@ import hmac
 from importlib import import_module
 
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 
 from ecommerce.extensions.payment import exceptions
 
@@ -31,6 +32,21 @@ def get_processor_class(path):
     return processor_class
 
 
+def lazy_import(module_path):
+    """Return a proxy of the module at the specified path, which imports the module on first use.
+
+    Payment processor modules import their SDKs with this function, so that loading
+    processor classes, e.g. to read their names, does not import the SDKs.
+
+    Arguments:
+        module_path (string): Fully-qualified path to a module.
+
+    Returns:
+        SimpleLazyObject: Proxy of the module.
+    """
+    return SimpleLazyObject(lambda: import_module(module_path))
+
+
 def get_default_processor_class():
     """Return the default payment processor class.
 
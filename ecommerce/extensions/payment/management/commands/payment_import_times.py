@@ -0,0 +1,103 @@
+"""
+This command reports the time taken to import the URLs and the payment processors.
+"""
+
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Packages whose import should be deferred until payments are processed.
+SDK_PACKAGES = ('CyberSource', 'paypalrestsdk', 'stripe', 'zeep')
+
+# Run in a new interpreter for every module, so that the modules imported by one are not cached for the next.
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+from importlib import import_module
+
+import django
+
+started = time.perf_counter()
+django.setup()
+setup_time = time.perf_counter() - started
+
+imported = set(sys.modules)
+started = time.perf_counter()
+import_module(sys.argv[1])
+import_time = time.perf_counter() - started
+
+json.dump({
+    'setup_time': setup_time,
+    'import_time': import_time,
+    'modules': sorted(set(sys.modules) - imported),
+}, sys.stdout)
+"""
+
+
+class Command(BaseCommand):
+    """
+    Reports the time taken to import the URLs, as workers do when they start, and the payment processors.
+
+    Example:
+
+        ./manage.py payment_import_times --fail-on-sdk
+    """
+
+    help = 'Reports the time taken to import the URLs and the payment processors, and the SDKs they import.'
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help='Modules to import, in addition to the default modules.')
+        parser.add_argument(
+            '--fail-on-sdk',
+            action='store_true',
+            help='Fail if any module imports a payment processor SDK ({}).'.format(', '.join(SDK_PACKAGES)),
+        )
+
+    def get_default_modules(self):
+        """ Returns the URL configuration, followed by the modules of the payment processors, in settings order. """
+        modules = [settings.ROOT_URLCONF]
+        for path in settings.PAYMENT_PROCESSORS:
+            module = path.rpartition('.')[0]
+            if module not in modules:
+                modules.append(module)
+        return modules
+
+    def measure(self, module):
+        """ Imports the given module in a new interpreter, and returns the timings and modules of the import. """
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        try:
+            output = subprocess.check_output(
+                [sys.executable, '-c', IMPORT_SCRIPT, module], cwd=settings.SITE_ROOT, env=env
+            )
+        except subprocess.CalledProcessError:
+            raise CommandError('Module [{}] could not be imported.'.format(module))
+        return json.loads(output.decode('utf-8'))
+
+    def handle(self, *args, **options):
+        modules = self.get_default_modules()
+        modules += [module for module in options['modules'] if module not in modules]
+
+        rows = []
+        offenders = []
+        for module in modules:
+            result = self.measure(module)
+            sdks = sorted({name.split('.')[0] for name in result['modules']} & set(SDK_PACKAGES))
+            if sdks:
+                offenders.append(module)
+            rows.append((module, result['import_time'] * 1000, len(result['modules']), ', '.join(sdks) or '-'))
+
+        width = max(len(module) for module in modules)
+        self.stdout.write('{}  {:>9}  {:>7}  {}'.format('module'.ljust(width), 'ms', 'modules', 'sdks'))
+        for module, import_time, count, sdks in rows:
+            self.stdout.write('{}  {:>9.1f}  {:>7}  {}'.format(module.ljust(width), import_time, count, sdks))
+        self.stdout.write('django.setup() took {:.1f} ms.'.format(result['setup_time'] * 1000))
+
+        if offenders and options['fail_on_sdk']:
+            raise CommandError('Payment processor SDKs are imported by: {}.'.format(', '.join(offenders)))
@@ -0,0 +1,39 @@
+
+
+from io import StringIO
+
+import mock
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+COMMAND_PATH = 'ecommerce.extensions.payment.management.commands.payment_import_times.Command'
+
+
+class PaymentImportTimesTests(TestCase):
+    """Tests for payment_import_times management command."""
+
+    def test_processors_do_not_import_sdks(self):
+        """ Verify the URLs and the payment processors are imported without the payment processor SDKs. """
+        out = StringIO()
+        call_command('payment_import_times', fail_on_sdk=True, stdout=out)
+        output = out.getvalue()
+        self.assertIn('ecommerce.urls', output)
+        self.assertIn('ecommerce.extensions.payment.processors.cybersource', output)
+
+    def test_fail_on_sdk(self):
+        """ Verify the command fails if a module imports a payment processor SDK, and --fail-on-sdk is given. """
+        result = {'setup_time': 1.0, 'import_time': 0.2, 'modules': ['CyberSource', 'CyberSource.rest']}
+        with mock.patch(COMMAND_PATH + '.get_default_modules', return_value=['ecommerce.urls']):
+            with mock.patch(COMMAND_PATH + '.measure', return_value=result):
+                out = StringIO()
+                call_command('payment_import_times', stdout=out)
+                self.assertIn('CyberSource', out.getvalue())
+
+                with self.assertRaisesMessage(CommandError, 'Payment processor SDKs are imported by: ecommerce.urls.'):
+                    call_command('payment_import_times', fail_on_sdk=True, stdout=StringIO())
+
+    def test_unimportable_module(self):
+        """ Verify the command fails if a module cannot be imported. """
+        with mock.patch(COMMAND_PATH + '.get_default_modules', return_value=[]):
+            with self.assertRaisesMessage(CommandError, 'Module [ecommerce.missing] could not be imported.'):
+                call_command('payment_import_times', 'ecommerce.missing', stdout=StringIO(), stderr=StringIO())
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.28 on 2026-10-19 10:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basket', '0013_auto_20200305_1448'),
+        ('payment', '0031_sdnfallbackdata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPaymentProcessorResponse',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('processor_name', models.CharField(max_length=255, verbose_name='Payment Processor')),
+                ('transaction_id', models.CharField(blank=True, max_length=255, null=True, verbose_name='Transaction ID')),
+                ('compressed_response', models.BinaryField()),
+                ('created', models.DateTimeField()),
+                ('month', models.DateField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Payment Processor Response',
+                'verbose_name_plural': 'Archived Payment Processor Responses',
+                'get_latest_by': 'created',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='paymentprocessorresponse',
+            index=models.Index(fields=['basket', 'processor_name', 'created'], name='payment_ppr_basket_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedpaymentprocessorresponse',
+            name='basket',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_payment_processor_responses', to='basket.Basket', verbose_name='Basket'),
+        ),
+        migrations.AlterIndexTogether(
+            name='archivedpaymentprocessorresponse',
+            index_together={('processor_name', 'transaction_id')},
+        ),
+    ]
@@ -1,4 +1,6 @@
+import json
 import logging
+import zlib
 from datetime import datetime
 from decimal import Decimal
 
@@ -23,6 +25,9 @@ class PaymentProcessorResponse(models.Model):
     """
     Auditing model used to save all responses received
     from payment processors, which includes payments and refunds.
+
+    Older responses are moved to ArchivedPaymentProcessorResponse by the payment_processor_response_archival
+    purge policy. Use `filter_including_archived` for lookups that may need them.
     """
     processor_name = models.CharField(max_length=255, verbose_name=_('Payment Processor'))
     transaction_id = models.CharField(max_length=255, verbose_name=_('Transaction ID'), null=True, blank=True)
@@ -34,9 +39,114 @@ class PaymentProcessorResponse(models.Model):
     class Meta:
         get_latest_by = 'created'
         index_together = ('processor_name', 'transaction_id')
+        indexes = [
+            models.Index(fields=['basket', 'processor_name', 'created'], name='payment_ppr_basket_idx'),
+        ]
         verbose_name = _('Payment Processor Response')
         verbose_name_plural = _('Payment Processor Responses')
 
+    @classmethod
+    def filter_including_archived(cls, **filters):
+        """
+        Returns the responses, recent and archived, matching the given filters.
+
+        Arguments:
+            **filters: Lookups on the fields shared by both tables, e.g. `basket`, `processor_name`,
+                `transaction_id` or `created`.
+
+        Returns:
+            list of PaymentProcessorResponse: Oldest first. Archived responses are unsaved instances.
+        """
+        responses = list(cls.objects.filter(**filters))
+        responses += [
+            archived_response.as_response()
+            for archived_response in ArchivedPaymentProcessorResponse.objects.filter(**filters)
+        ]
+        return sorted(responses, key=lambda response: (response.created, response.id))
+
+    @classmethod
+    def exists_including_archived(cls, **filters):
+        """ Returns True if any response, recent or archived, matches the given filters. """
+        return cls.objects.filter(**filters).exists() or ArchivedPaymentProcessorResponse.objects.filter(
+            **filters
+        ).exists()
+
+    @property
+    def is_successful(self):
+        """
+        Whether this response records a successful payment.
+
+        CyberSource responses include "'decision': 'ACCEPT'", and PayPal responses include "'state': 'approved'".
+        """
+        serialized_response = json.dumps(self.response)
+        return 'ACCEPT' in serialized_response or 'approved' in serialized_response
+
+
+class ArchivedPaymentProcessorResponse(models.Model):
+    """
+    PaymentProcessorResponse moved out of the main table once it is no longer needed to process payments.
+
+    Responses keep their IDs and are stored compressed. Each row records the month in which the response was
+    created, so that retention drops whole months at a time.
+    """
+    id = models.IntegerField(primary_key=True)
+    processor_name = models.CharField(max_length=255, verbose_name=_('Payment Processor'))
+    transaction_id = models.CharField(max_length=255, verbose_name=_('Transaction ID'), null=True, blank=True)
+    basket = models.ForeignKey('basket.Basket', verbose_name=_('Basket'), null=True, blank=True,
+                               related_name='archived_payment_processor_responses', on_delete=models.SET_NULL)
+    compressed_response = models.BinaryField()
+    created = models.DateTimeField()
+    month = models.DateField(db_index=True)
+
+    class Meta:
+        get_latest_by = 'created'
+        index_together = ('processor_name', 'transaction_id')
+        verbose_name = _('Archived Payment Processor Response')
+        verbose_name_plural = _('Archived Payment Processor Responses')
+
+    @property
+    def response(self):
+        return json.loads(zlib.decompress(self.compressed_response).decode('utf-8'))
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(
+            id=response.id,
+            processor_name=response.processor_name,
+            transaction_id=response.transaction_id,
+            basket_id=response.basket_id,
+            compressed_response=zlib.compress(json.dumps(response.response).encode('utf-8')),
+            created=response.created,
+            month=response.created.date().replace(day=1),
+        )
+
+    @classmethod
+    def archive(cls, responses):
+        """
+        Moves the given responses to the archive.
+
+        Arguments:
+            responses (QuerySet): PaymentProcessorResponses to archive.
+
+        Returns:
+            int: Number of responses archived.
+        """
+        with atomic():
+            archived_responses = cls.objects.bulk_create([cls.from_response(response) for response in responses])
+            responses.model.objects.filter(id__in=[response.id for response in archived_responses]).delete()
+        return len(archived_responses)
+
+    def as_response(self):
+        """ Returns an unsaved PaymentProcessorResponse with the data of this archived response. """
+        return PaymentProcessorResponse(
+            id=self.id,
+            processor_name=self.processor_name,
+            transaction_id=self.transaction_id,
+            basket_id=self.basket_id,
+            response=self.response,
+            created=self.created,
+        )
+
 
 class Source(AbstractSource):
     card_type = models.CharField(max_length=255, choices=CARD_TYPE_CHOICES, null=True, blank=True)
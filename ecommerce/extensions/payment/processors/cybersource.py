@@ -14,36 +14,12 @@ from typing import Optional
 import jwt
 import jwt.exceptions
 import waffle
-from CyberSource import (
-    AuthReversalRequest,
-    CreatePaymentRequest,
-    GeneratePublicKeyRequest,
-    KeyGenerationApi,
-    PaymentsApi,
-    Ptsv2paymentsClientReferenceInformation,
-    Ptsv2paymentsidreversalsClientReferenceInformation,
-    Ptsv2paymentsidreversalsReversalInformation,
-    Ptsv2paymentsidreversalsReversalInformationAmountDetails,
-    Ptsv2paymentsMerchantDefinedInformation,
-    Ptsv2paymentsOrderInformation,
-    Ptsv2paymentsOrderInformationAmountDetails,
-    Ptsv2paymentsOrderInformationBillTo,
-    Ptsv2paymentsOrderInformationInvoiceDetails,
-    Ptsv2paymentsOrderInformationLineItems,
-    Ptsv2paymentsProcessingInformation,
-    Ptsv2paymentsTokenInformation,
-    ReversalApi
-)
-from CyberSource.rest import ApiException
 from django.conf import settings
 from django.urls import reverse
 from jwt.algorithms import RSAAlgorithm
 from oscar.apps.payment.exceptions import GatewayError, TransactionDeclined, UserCancelled
 from oscar.core.loading import get_class, get_model
 from pytz import UTC
-from zeep import Client
-from zeep.helpers import serialize_object
-from zeep.wsse import UsernameToken
 
 from ecommerce.core.constants import ISO_8601_FORMAT
 from ecommerce.core.url_utils import get_ecommerce_url
@@ -60,7 +36,7 @@ from ecommerce.extensions.payment.exceptions import (
     ProcessorMisconfiguredError,
     RedundantPaymentNotificationError
 )
-from ecommerce.extensions.payment.helpers import sign
+from ecommerce.extensions.payment.helpers import lazy_import, sign
 from ecommerce.extensions.payment.processors import (
     ApplePayMixin,
     BaseClientSidePaymentProcessor,
@@ -70,6 +46,13 @@ from ecommerce.extensions.payment.utils import clean_field_value, get_basket_pro
 
 logger = logging.getLogger(__name__)
 
+# The SDKs take long to import, so they are imported when payments are processed, rather than with the processors.
+cybersource_sdk = lazy_import('CyberSource')
+cybersource_sdk_rest = lazy_import('CyberSource.rest')
+zeep = lazy_import('zeep')
+zeep_helpers = lazy_import('zeep.helpers')
+zeep_wsse = lazy_import('zeep.wsse')
+
 
 BillingAddress = get_model('order', 'BillingAddress')
 Country = get_model('address', 'Country')
@@ -196,14 +179,14 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
     def get_capture_context(self, session):  # pragma: no cover
         # To delete None values in Input Request Json body
 
-        requestObj = GeneratePublicKeyRequest(
+        requestObj = cybersource_sdk.GeneratePublicKeyRequest(
             encryption_type='RsaOaep256',
             target_origin=self.flex_target_origin,
         )
         requestObj = del_none(requestObj.__dict__)
         requestObj = json.dumps(requestObj)
 
-        api_instance = KeyGenerationApi(self.cybersource_api_config)
+        api_instance = cybersource_sdk.KeyGenerationApi(self.cybersource_api_config)
         return_data, _, _ = api_instance.generate_public_key(
             generate_public_key_request=requestObj,
             format='JWT',
@@ -419,7 +402,7 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
         return _response
 
     def serialize_order_completion(self, order_completion_message):
-        return serialize_object(order_completion_message)
+        return zeep_helpers.serialize_object(order_completion_message)
 
     def extract_reason_code(self, order_completion_message):
         return order_completion_message.get('reason_code')
@@ -514,7 +497,7 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
         transaction_id = response.transaction_id
         if transaction_id and response.decision == Decision.accept:
             if Order.objects.filter(number=response.order_id).exists():
-                if PaymentProcessorResponse.objects.filter(transaction_id=transaction_id).exists():
+                if PaymentProcessorResponse.exists_including_archived(transaction_id=transaction_id):
                     raise RedundantPaymentNotificationError
                 raise ExcessivePaymentForOrderError
 
@@ -593,7 +576,9 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
         and the response is saved in the database, with error handling.
         """
         try:
-            client = Client(self.soap_api_url, wsse=UsernameToken(self.merchant_id, self.transaction_key))
+            client = zeep.Client(
+                self.soap_api_url, wsse=zeep_wsse.UsernameToken(self.merchant_id, self.transaction_key)
+            )
 
             credit_service = {
                 'captureRequestID': reference_number,
@@ -613,7 +598,7 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
             )
 
             request_id = response.requestID
-            ppr = self.record_processor_response(serialize_object(response), transaction_id=request_id,
+            ppr = self.record_processor_response(zeep_helpers.serialize_object(response), transaction_id=request_id,
                                                  basket=basket)
         except:
             msg = 'An error occurred while attempting to issue a credit (via CyberSource) for order [{}].'.format(
@@ -647,7 +632,9 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
             GatewayError
         """
         try:
-            client = Client(self.soap_api_url, wsse=UsernameToken(self.merchant_id, self.transaction_key))
+            client = zeep.Client(
+                self.soap_api_url, wsse=zeep_wsse.UsernameToken(self.merchant_id, self.transaction_key)
+            )
             card_type = APPLE_PAY_CYBERSOURCE_CARD_TYPE_MAP[payment_token['paymentMethod']['network'].lower()]
             bill_to = {
                 'firstName': billing_address.first_name,
@@ -713,7 +700,9 @@ class Cybersource(ApplePayMixin, BaseClientSidePaymentProcessor):
             raise GatewayError(msg)
 
         request_id = response.requestID
-        ppr = self.record_processor_response(serialize_object(response), transaction_id=request_id, basket=basket)
+        ppr = self.record_processor_response(
+            zeep_helpers.serialize_object(response), transaction_id=request_id, basket=basket
+        )
 
         if response.decision == 'ACCEPT':
             currency = basket.currency
@@ -767,7 +756,7 @@ class CybersourceREST(Cybersource):
                 form_data,
             )
             return payment_processor_response, payment_processor_response.id
-        except ApiException as e:
+        except cybersource_sdk_rest.ApiException as e:
             if e.body is None:
                 self.record_processor_response({
                     'status': e.status,
@@ -791,7 +780,7 @@ class CybersourceREST(Cybersource):
         }
         response_json = self.serialize_order_completion(response)
 
-        if isinstance(response, ApiException):
+        if isinstance(response, cybersource_sdk_rest.ApiException):
             decision = decision_map.get(response_json.get('status'), response_json.get('status'))
 
             return UnhandledCybersourceResponse(
@@ -844,7 +833,7 @@ class CybersourceREST(Cybersource):
         )
 
     def serialize_order_completion(self, order_completion_message):
-        if isinstance(order_completion_message, ApiException):
+        if isinstance(order_completion_message, cybersource_sdk_rest.ApiException):
             try:
                 return json.loads(order_completion_message.body)
             except:  # pylint: disable=bare-except
@@ -853,12 +842,12 @@ class CybersourceREST(Cybersource):
         return order_completion_message.to_dict()
 
     def extract_reason_code(self, order_completion_message):
-        if isinstance(order_completion_message, ApiException):
+        if isinstance(order_completion_message, cybersource_sdk_rest.ApiException):
             return self.serialize_order_completion(order_completion_message).get('reason')
         return order_completion_message.error_information and order_completion_message.error_information.reason
 
     def extract_payment_response_message(self, order_completion_message):
-        if isinstance(order_completion_message, ApiException):
+        if isinstance(order_completion_message, cybersource_sdk_rest.ApiException):
             return self.serialize_order_completion(order_completion_message).get('message')
 
         return order_completion_message.error_information and order_completion_message.error_information.message
@@ -871,20 +860,20 @@ class CybersourceREST(Cybersource):
 
     def reverse_payment_api(self, payment_processor_response: UnhandledCybersourceResponse, reason: str, basket=None):
 
-        clientReferenceInformation = Ptsv2paymentsidreversalsClientReferenceInformation(
+        clientReferenceInformation = cybersource_sdk.Ptsv2paymentsidreversalsClientReferenceInformation(
             code=payment_processor_response.order_id
         )
 
-        reversalInformationAmountDetails = Ptsv2paymentsidreversalsReversalInformationAmountDetails(
+        reversalInformationAmountDetails = cybersource_sdk.Ptsv2paymentsidreversalsReversalInformationAmountDetails(
             total_amount=str(payment_processor_response.total)
         )
 
-        reversalInformation = Ptsv2paymentsidreversalsReversalInformation(
+        reversalInformation = cybersource_sdk.Ptsv2paymentsidreversalsReversalInformation(
             amount_details=reversalInformationAmountDetails.__dict__,
             reason=reason,
         )
 
-        requestObj = AuthReversalRequest(
+        requestObj = cybersource_sdk.AuthReversalRequest(
             client_reference_information=clientReferenceInformation.__dict__,
             reversal_information=reversalInformation.__dict__
         )
@@ -894,7 +883,7 @@ class CybersourceREST(Cybersource):
         # HACK: log the processor request into the processor response model for analyzing declines
         self.record_processor_response(requestObj, transaction_id='[REVERSAL REQUEST]', basket=basket)
 
-        api_instance = ReversalApi(self.cybersource_api_config)
+        api_instance = cybersource_sdk.ReversalApi(self.cybersource_api_config)
 
         try:
             reversal_response, _, _ = api_instance.auth_reversal(
@@ -902,10 +891,10 @@ class CybersourceREST(Cybersource):
                 json.dumps(requestObj),
                 _request_timeout=(self.connect_timeout, self.read_timeout)
             )
-        except ApiException as e:
+        except cybersource_sdk_rest.ApiException as e:
             reversal_response = e
 
-        if isinstance(reversal_response, ApiException):
+        if isinstance(reversal_response, cybersource_sdk_rest.ApiException):
             reversal_transaction_id = None
         else:
             reversal_transaction_id = reversal_response.id
@@ -918,22 +907,22 @@ class CybersourceREST(Cybersource):
         return reversal_response
 
     def authorize_payment_api(self, transient_token_jwt, basket, request, form_data):
-        clientReferenceInformation = Ptsv2paymentsClientReferenceInformation(
+        clientReferenceInformation = cybersource_sdk.Ptsv2paymentsClientReferenceInformation(
             code=basket.order_number,
         )
-        processingInformation = Ptsv2paymentsProcessingInformation(
+        processingInformation = cybersource_sdk.Ptsv2paymentsProcessingInformation(
             capture=True,
             purchase_level="3",
         )
-        tokenInformation = Ptsv2paymentsTokenInformation(
+        tokenInformation = cybersource_sdk.Ptsv2paymentsTokenInformation(
             transient_token_jwt=transient_token_jwt,
         )
-        orderInformationAmountDetails = Ptsv2paymentsOrderInformationAmountDetails(
+        orderInformationAmountDetails = cybersource_sdk.Ptsv2paymentsOrderInformationAmountDetails(
             total_amount=str(basket.total_incl_tax),
             currency=basket.currency,
         )
 
-        orderInformationBillTo = Ptsv2paymentsOrderInformationBillTo(
+        orderInformationBillTo = cybersource_sdk.Ptsv2paymentsOrderInformationBillTo(
             first_name=form_data['first_name'],
             last_name=form_data['last_name'],
             address1=form_data['address_line1'],
@@ -948,7 +937,7 @@ class CybersourceREST(Cybersource):
         merchantDefinedInformation = []
         program_uuid = get_basket_program_uuid(basket)
         if program_uuid:
-            programInfo = Ptsv2paymentsMerchantDefinedInformation(
+            programInfo = cybersource_sdk.Ptsv2paymentsMerchantDefinedInformation(
                 key="1",
                 value="program,{program_uuid}".format(program_uuid=program_uuid)
             )
@@ -957,7 +946,7 @@ class CybersourceREST(Cybersource):
         merchantDataIndex = 2
         orderInformationLineItems = []
         for line in basket.all_lines():
-            orderInformationLineItem = Ptsv2paymentsOrderInformationLineItems(
+            orderInformationLineItem = cybersource_sdk.Ptsv2paymentsOrderInformationLineItems(
                 product_name=clean_field_value(line.product.title),
                 product_code=line.product.get_product_class().slug,
                 product_sku=line.stockrecord.partner_sku,
@@ -974,7 +963,7 @@ class CybersourceREST(Cybersource):
             orderInformationLineItems.append(orderInformationLineItem.__dict__)
             line_course = line.product.course
             if line_course:
-                courseInfo = Ptsv2paymentsMerchantDefinedInformation(
+                courseInfo = cybersource_sdk.Ptsv2paymentsMerchantDefinedInformation(
                     key=str(merchantDataIndex),
                     value="course,{course_id},{course_type}".format(
                         course_id=line_course.id if line_course else None,
@@ -984,18 +973,18 @@ class CybersourceREST(Cybersource):
                 merchantDefinedInformation.append(courseInfo.__dict__)
                 merchantDataIndex += 1
 
-        orderInformationInvoiceDetails = Ptsv2paymentsOrderInformationInvoiceDetails(
+        orderInformationInvoiceDetails = cybersource_sdk.Ptsv2paymentsOrderInformationInvoiceDetails(
             purchase_order_number='BLANK'
         )
 
-        orderInformation = Ptsv2paymentsOrderInformation(
+        orderInformation = cybersource_sdk.Ptsv2paymentsOrderInformation(
             amount_details=orderInformationAmountDetails.__dict__,
             bill_to=orderInformationBillTo.__dict__,
             line_items=orderInformationLineItems,
             invoice_details=orderInformationInvoiceDetails.__dict__
         )
 
-        requestObj = CreatePaymentRequest(
+        requestObj = cybersource_sdk.CreatePaymentRequest(
             client_reference_information=clientReferenceInformation.__dict__,
             processing_information=processingInformation.__dict__,
             token_information=tokenInformation.__dict__,
@@ -1008,7 +997,7 @@ class CybersourceREST(Cybersource):
         # HACK: log the processor request into the processor response model for analyzing declines
         self.record_processor_response(requestObj, transaction_id='[REQUEST]', basket=basket)
 
-        api_instance = PaymentsApi(self.cybersource_api_config)
+        api_instance = cybersource_sdk.PaymentsApi(self.cybersource_api_config)
         payment_processor_response, _, _ = api_instance.create_payment(
             json.dumps(requestObj),
             _request_timeout=(self.connect_timeout, self.read_timeout)
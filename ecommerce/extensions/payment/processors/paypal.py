@@ -7,7 +7,6 @@ import uuid
 from decimal import Decimal
 from urllib.parse import urljoin
 
-import paypalrestsdk
 import waffle
 from django.conf import settings
 from django.urls import reverse
@@ -17,11 +16,13 @@ from oscar.apps.payment.exceptions import GatewayError
 
 from ecommerce.core.url_utils import get_ecommerce_url
 from ecommerce.extensions.payment.constants import PAYPAL_LOCALES
+from ecommerce.extensions.payment.helpers import lazy_import
 from ecommerce.extensions.payment.models import PaypalProcessorConfiguration, PaypalWebProfile
 from ecommerce.extensions.payment.processors import BasePaymentProcessor, HandledProcessorResponse
 from ecommerce.extensions.payment.utils import get_basket_program_uuid, middle_truncate
 
 logger = logging.getLogger(__name__)
+paypalrestsdk = lazy_import('paypalrestsdk')
 
 
 class Paypal(BasePaymentProcessor):
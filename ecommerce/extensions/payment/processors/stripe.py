@@ -3,11 +3,11 @@
 
 import logging
 
-import stripe
 from oscar.apps.payment.exceptions import GatewayError, TransactionDeclined
 from oscar.core.loading import get_model
 
 from ecommerce.extensions.payment.constants import STRIPE_CARD_TYPE_MAP
+from ecommerce.extensions.payment.helpers import lazy_import
 from ecommerce.extensions.payment.processors import (
     ApplePayMixin,
     BaseClientSidePaymentProcessor,
@@ -15,6 +15,7 @@ from ecommerce.extensions.payment.processors import (
 )
 
 logger = logging.getLogger(__name__)
+stripe = lazy_import('stripe')
 
 BillingAddress = get_model('order', 'BillingAddress')
 Country = get_model('address', 'Country')
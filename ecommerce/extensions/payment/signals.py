@@ -8,6 +8,7 @@ from django.dispatch import receiver
 from edx_django_utils.cache import TieredCache
 from waffle.models import Switch
 
+from ecommerce.core.models import SiteConfiguration
 from ecommerce.extensions.api.v2.views.payments import PAYMENT_PROCESSOR_CACHE_KEY
 
 logger = logging.getLogger(__name__)
@@ -25,4 +26,5 @@ def invalidate_processor_cache(*_args, **kwargs):
         processor = parts[1]
         logger.info('Switched payment processor [%s] %s.', processor, 'on' if switch.active else 'off')
         TieredCache.delete_all_tiers(PAYMENT_PROCESSOR_CACHE_KEY)
+        SiteConfiguration.invalidate_cache()
         logger.info('Invalidated payment processor cache after toggling [%s].', switch.name)
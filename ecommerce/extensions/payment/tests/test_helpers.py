@@ -1,6 +1,7 @@
 
 
 import ddt
+import mock
 from django.test import override_settings
 
 from ecommerce.extensions.payment import helpers
@@ -36,6 +37,14 @@ class HelperTests(TestCase):
         """
         self.assertRaises(ProcessorNotFoundError, helpers.get_processor_class_by_name, 'foo')
 
+    def test_lazy_import(self):
+        """ Verify the function returns a proxy of the module, which imports the module on first use. """
+        with mock.patch.object(helpers, 'import_module', wraps=helpers.import_module) as import_module:
+            module = helpers.lazy_import('ecommerce.extensions.payment.tests.processors')
+            import_module.assert_not_called()
+            self.assertIs(module.DummyProcessor, DummyProcessor)
+            import_module.assert_called_once_with('ecommerce.extensions.payment.tests.processors')
+
     def test_sign(self):
         """ Verify the function returns a valid HMAC SHA-256 signature. """
         message = "This is a super-secret message!"
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.core.exceptions import ValidationError
+from django.utils.timezone import now
+from oscar.test.factories import BasketFactory
 from testfixtures import LogCapture
 
 from ecommerce.extensions.payment.exceptions import SDNFallbackDataEmptyError
 from ecommerce.extensions.payment.models import (
+    ArchivedPaymentProcessorResponse,
     EnterpriseContractMetadata,
+    PaymentProcessorResponse,
     SDNCheckFailure,
     SDNFallbackData,
     SDNFallbackMetadata
@@ -319,3 +323,65 @@ class SDNFallbackDataTests(TestCase):
 
         with self.assertRaises(SDNFallbackDataEmptyError):
             SDNFallbackData.get_current_records_and_filter_by_source_and_type(sdn_source, sdn_type)
+
+
+class ArchivedPaymentProcessorResponseTests(TestCase):
+    def setUp(self):
+        super(ArchivedPaymentProcessorResponseTests, self).setUp()
+        self.basket = BasketFactory(site=self.site)
+        self.responses = [
+            PaymentProcessorResponse.objects.create(
+                processor_name='cybersource', transaction_id='txn-{}'.format(index), basket=self.basket,
+                response={'decision': 'ACCEPT', 'index': index, 'note': 'Søze'}
+            )
+            for index in range(3)
+        ]
+        PaymentProcessorResponse.objects.filter(id=self.responses[0].id).update(
+            created=datetime(2019, 5, 31, 23, 59, tzinfo=now().tzinfo)
+        )
+        self.responses[0].refresh_from_db()
+
+    def test_archive(self):
+        """ Verify archived responses keep their IDs and data, and are removed from the main table. """
+        archived_count = ArchivedPaymentProcessorResponse.archive(
+            PaymentProcessorResponse.objects.filter(id__in=[self.responses[0].id, self.responses[1].id])
+        )
+
+        self.assertEqual(archived_count, 2)
+        self.assertEqual(list(PaymentProcessorResponse.objects.all()), [self.responses[2]])
+        archived_response = ArchivedPaymentProcessorResponse.objects.get(id=self.responses[0].id)
+        self.assertEqual(archived_response.response, self.responses[0].response)
+        self.assertEqual(archived_response.transaction_id, 'txn-0')
+        self.assertEqual(archived_response.basket, self.basket)
+        self.assertEqual(archived_response.created, self.responses[0].created)
+        self.assertEqual(archived_response.month, datetime(2019, 5, 1).date())
+
+    def test_filter_including_archived(self):
+        """ Verify lookups return recent and archived responses, oldest first. """
+        ArchivedPaymentProcessorResponse.archive(PaymentProcessorResponse.objects.filter(id=self.responses[1].id))
+        PaymentProcessorResponse.objects.create(processor_name='paypal', response={})
+
+        responses = PaymentProcessorResponse.filter_including_archived(basket=self.basket)
+        self.assertEqual([response.id for response in responses], [response.id for response in self.responses])
+        self.assertEqual(
+            [response.response for response in responses], [response.response for response in self.responses]
+        )
+
+        responses = PaymentProcessorResponse.filter_including_archived(
+            processor_name='cybersource', transaction_id='txn-1', created__gt=now() - timedelta(days=1)
+        )
+        self.assertEqual([response.id for response in responses], [self.responses[1].id])
+
+    def test_exists_including_archived(self):
+        """ Verify lookups find archived responses. """
+        ArchivedPaymentProcessorResponse.archive(PaymentProcessorResponse.objects.filter(id=self.responses[1].id))
+
+        self.assertTrue(PaymentProcessorResponse.exists_including_archived(transaction_id='txn-1'))
+        self.assertTrue(PaymentProcessorResponse.exists_including_archived(transaction_id='txn-2'))
+        self.assertFalse(PaymentProcessorResponse.exists_including_archived(transaction_id='txn-3'))
+
+    def test_is_successful(self):
+        """ Verify accepted CyberSource and approved PayPal responses are successful. """
+        self.assertTrue(self.responses[0].is_successful)
+        self.assertTrue(PaymentProcessorResponse(response={'state': 'approved'}).is_successful)
+        self.assertFalse(PaymentProcessorResponse(response={'decision': 'DECLINE'}).is_successful)
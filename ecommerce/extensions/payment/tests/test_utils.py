@@ -2,8 +2,10 @@
 import json
 
 import httpretty
+import mock
 
-from ecommerce.extensions.payment.utils import clean_field_value, middle_truncate
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.payment.utils import clean_field_value, embargo_check, middle_truncate
 from ecommerce.tests.testcases import TestCase
 
 
@@ -61,3 +63,83 @@ class EmbargoCheckTests(TestCase):
         self.mock_embargo_response(json.dumps(embargo_response))
         response = self.site.siteconfiguration.embargo_api_client.course_access.get(**self.params)
         self.assertEqual(response, embargo_response)
+
+
+@httpretty.activate
+class EmbargoCheckCacheTests(TestCase):
+    """ Tests for the caching of embargo check decisions. """
+
+    def setUp(self):
+        super(EmbargoCheckCacheTests, self).setUp()
+        self.user = self.create_user()
+        self.seats = [
+            CourseFactory(id='edX/DemoX/Demo_{}'.format(index), partner=self.partner).create_or_update_seat(
+                'verified', False, 10
+            )
+            for index in range(3)
+        ]
+        self.mock_access_token_response()
+
+    def mock_embargo_response(self, access):
+        httpretty.register_uri(
+            httpretty.GET,
+            self.site_configuration.build_lms_url('/api/embargo/v1/course_access/'),
+            body=json.dumps({'access': access}),
+            content_type='application/json'
+        )
+
+    def get_requested_course_ids(self):
+        """ Returns the course IDs of each request made to the embargo API. """
+        return [
+            request.querystring['course_ids'] for request in httpretty.httpretty.latest_requests
+            if '/api/embargo/' in request.path
+        ]
+
+    def embargo_check(self, seats):
+        with mock.patch('ecommerce.extensions.payment.utils.parse_tracking_context',
+                        return_value=(None, None, '1.2.3.4')):
+            return embargo_check(self.user, self.site, seats)
+
+    def test_access_cached_per_course(self):
+        """ Verify allowed courses are cached individually, so overlapping baskets only check new courses. """
+        self.mock_embargo_response(True)
+
+        self.assertTrue(self.embargo_check(self.seats[:2]))
+        self.assertTrue(self.embargo_check(self.seats[:2]))
+        self.assertTrue(self.embargo_check(self.seats[1:]))
+        self.assertTrue(self.embargo_check([self.seats[2]]))
+
+        self.assertEqual(self.get_requested_course_ids(), [
+            [self.seats[0].course_id, self.seats[1].course_id],
+            [self.seats[2].course_id],
+        ])
+
+    def test_denial_cached(self):
+        """ Verify a denial is cached for the courses checked together, and for a single course on its own. """
+        self.mock_embargo_response(False)
+
+        self.assertFalse(self.embargo_check(self.seats[:2]))
+        self.assertFalse(self.embargo_check(list(reversed(self.seats[:2]))))
+        self.assertFalse(self.embargo_check([self.seats[0]]))
+        self.assertFalse(self.embargo_check(self.seats))
+
+        self.assertEqual(self.get_requested_course_ids(), [
+            [self.seats[0].course_id, self.seats[1].course_id],
+            [self.seats[0].course_id],
+        ])
+
+    def test_api_error_not_cached(self):
+        """ Verify access is allowed, without caching, when the API cannot be reached. """
+        httpretty.register_uri(
+            httpretty.GET,
+            self.site_configuration.build_lms_url('/api/embargo/v1/course_access/'),
+            status=500
+        )
+
+        self.assertTrue(self.embargo_check(self.seats[:1]))
+        self.assertTrue(self.embargo_check(self.seats[:1]))
+        self.assertEqual(len(self.get_requested_course_ids()), 2)
+
+    def test_no_seats(self):
+        """ Verify the API is not called for baskets without seats. """
+        self.assertTrue(self.embargo_check([]))
@@ -1,16 +1,20 @@
 import logging
 import re
 
+from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
+from edx_django_utils.cache import TieredCache
 from oscar.core.loading import get_model
 
 from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
+from ecommerce.core.utils import get_cache_key
 from ecommerce.extensions.analytics.utils import parse_tracking_context
 
 logger = logging.getLogger(__name__)
 Basket = get_model('basket', 'Basket')
 BasketAttribute = get_model('basket', 'BasketAttribute')
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
+Product = get_model('catalogue', 'Product')
 
 
 def get_basket_program_uuid(basket):
@@ -98,9 +102,41 @@ def clean_field_value(value):
     return re.sub(r'[\^:"\']', '', value)
 
 
+def get_embargo_cache_key(user, site, ip, course_ids):
+    """ Returns the key under which the embargo decision for the given user, IP address and courses is cached. """
+    return get_cache_key(
+        embargo_check='embargo_check',
+        site=site.domain,
+        user=user.username,
+        ip=ip,
+        course_ids=','.join(sorted(course_ids))
+    )
+
+
+def get_seat_course_ids(products):
+    """ Returns the IDs of the courses of the seats amongst the given products, without duplicates. """
+    product_class_names = {
+        product_id: product_class_name or parent_product_class_name
+        for product_id, product_class_name, parent_product_class_name in Product.objects.filter(
+            id__in=[product.id for product in products]
+        ).values_list('id', 'product_class__name', 'parent__product_class__name')
+    }
+
+    course_ids = []
+    for product in products:
+        # We only are checking Seats
+        if product_class_names.get(product.id) == SEAT_PRODUCT_CLASS_NAME and product.course_id not in course_ids:
+            course_ids.append(product.course_id)
+    return course_ids
+
+
 def embargo_check(user, site, products):
     """ Checks if the user has access to purchase products by calling the LMS embargo API.
 
+    Decisions are cached for each course, so that baskets sharing courses with a basket checked recently do not call
+    the API again. When the API denies access to several courses at once, the decision is cached for those courses
+    together, since it cannot be attributed to one of them.
+
     Args:
         request : The current request
         products (list): A list of products to check access against
@@ -108,26 +144,47 @@ def embargo_check(user, site, products):
     Returns:
         Bool
     """
-    courses = []
-    _, _, ip = parse_tracking_context(user, usage='embargo')
-
-    for product in products:
-        # We only are checking Seats
-        if product.get_product_class().name == SEAT_PRODUCT_CLASS_NAME:
-            courses.append(product.course.id)
+    courses = get_seat_course_ids(products)
 
     if courses:
+        _, _, ip = parse_tracking_context(user, usage='embargo')
+
+        uncached_courses = []
+        for course_id in courses:
+            cached_response = TieredCache.get_cached_response(get_embargo_cache_key(user, site, ip, [course_id]))
+            if not cached_response.is_found:
+                uncached_courses.append(course_id)
+            elif not cached_response.value:
+                return False
+
+        if not uncached_courses:
+            return True
+
+        cache_key = get_embargo_cache_key(user, site, ip, uncached_courses)
+        cached_response = TieredCache.get_cached_response(cache_key)
+        if cached_response.is_found:
+            return cached_response.value
+
         params = {
             'user': user,
             'ip_address': ip,
-            'course_ids': courses
+            'course_ids': uncached_courses
         }
 
         try:
             response = site.siteconfiguration.embargo_api_client.course_access.get(**params)
-            return response.get('access', True)
         except:  # pylint: disable=bare-except
             # We are going to allow purchase if the API is un-reachable.
-            pass
+            return True
+
+        access = response.get('access', True)
+        if access:
+            for course_id in uncached_courses:
+                TieredCache.set_all_tiers(
+                    get_embargo_cache_key(user, site, ip, [course_id]), True, settings.EMBARGO_CHECK_CACHE_TIMEOUT
+                )
+        else:
+            TieredCache.set_all_tiers(cache_key, False, settings.EMBARGO_CHECK_CACHE_TIMEOUT)
+        return access
 
     return True
@@ -4,6 +4,7 @@ from oscar.core.loading import get_model
 
 from ecommerce.extensions.fulfillment.status import ORDER
 
+Line = get_model('order', 'Line')
 Option = get_model('catalogue', 'Option')
 Refund = get_model('refund', 'Refund')
 RefundLine = get_model('refund', 'RefundLine')
@@ -32,9 +33,7 @@ def find_orders_associated_with_course(user, course_id):
         return []
 
     # Find all complete orders associated with the course.
-    orders = user.orders.filter(status=ORDER.COMPLETE,
-                                lines__product__attribute_values__attribute__code='course_key',
-                                lines__product__attribute_values__value_text=course_id)
+    orders = user.orders.filter(status=ORDER.COMPLETE, id__in=Line.for_course(course_id).values('order_id'))
 
     return list(orders)
 
@@ -80,9 +79,7 @@ def create_refunds(orders, course_id):
 
     for order in orders:
         # Find lines associated with the course and not refunded.
-        lines = order.lines.filter(refund_lines__id__isnull=True,
-                                   product__attribute_values__attribute__code='course_key',
-                                   product__attribute_values__value_text=course_id)
+        lines = order.lines.filter(refund_lines__id__isnull=True, id__in=Line.for_course(course_id).values('id'))
 
         refund = Refund.create_with_lines(order, lines)
         if refund is not None:
@@ -0,0 +1,267 @@
+""" Bulk creation and approval of refunds, e.g. for all orders of a cancelled course.
+
+Refunding orders one at a time checks every line for an existing refund and creates every refund line with its own
+query. The bulk refunder instead resolves the unrefunded lines of a batch of orders with a single query and creates
+their refund lines together. Approvals, which issue credits through the payment processors and revoke fulfillment,
+are grouped by payment processor and run with bounded concurrency; a per-processor circuit breaker stops calling a
+processor that keeps failing.
+
+Runs are idempotent, so a failed run is resumed by running it again: lines that have been refunded are skipped, and
+refunds that have not been completed are approved again, provided that they only refund lines the run would refund.
+"""
+
+
+import logging
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DatabaseError, connection
+from django.http import HttpRequest
+from oscar.core.loading import get_model
+from threadlocals.threadlocals import set_thread_variable
+
+from ecommerce.extensions.fulfillment.replay import CircuitBreaker
+from ecommerce.extensions.refund.status import REFUND
+
+logger = logging.getLogger(__name__)
+
+Line = get_model('order', 'Line')
+Order = get_model('order', 'Order')
+Refund = get_model('refund', 'Refund')
+
+# Approvals of refunds for orders without payment sources, which do not call a payment processor.
+FREE_ORDERS_PROCESSOR = 'free'
+
+
+class BulkRefundReport:
+    """ Summary of a bulk refund run. """
+
+    def __init__(self, total_orders):
+        self.total_orders = total_orders
+        self.refunds_created = 0
+        self.refunds_approved = 0
+        self.refunds_failed = 0
+        self.refunds_skipped = 0
+        self.orders_skipped = 0
+        self.failed_orders = []
+        self.approvals_by_processor = Counter()
+        self.elapsed = 0.0
+
+    def __str__(self):
+        return 'Refunded [{total}] orders in [{elapsed:.1f}] seconds: [{created}] refunds created, [{approved}] ' \
+               'approved, [{failed}] failed to approve, [{skipped}] skipped. [{orders_skipped}] orders had already ' \
+               'been refunded, [{failed_orders}] orders could not be refunded.'.format(
+                   total=self.total_orders,
+                   elapsed=self.elapsed,
+                   created=self.refunds_created,
+                   approved=self.refunds_approved,
+                   failed=self.refunds_failed,
+                   skipped=self.refunds_skipped,
+                   orders_skipped=self.orders_skipped,
+                   failed_orders=len(self.failed_orders),
+               )
+
+
+class BulkRefunder:
+    """
+    Creates, and optionally approves, refunds for the lines of many orders.
+
+    Refunds with a total credit of $0 are always approved, as they are by `Refund.create_with_lines`.
+
+    Arguments:
+        approve (bool): Approve the refunds, issuing credits and revoking fulfillment.
+        workers (int): Number of refunds of the same payment processor approved concurrently. A value of 1 approves
+            inline, on the calling thread.
+        batch_size (int): Number of orders whose refunds are created and approved at a time.
+        failure_threshold (int): Consecutive failed approvals after which the circuit for a payment processor opens.
+        reset_timeout (int): Seconds an open circuit refuses approvals before trying the processor again.
+        revoke_fulfillment (bool): Passed to `Refund.approve`.
+        notify_purchaser (bool): Passed to `Refund.approve`.
+    """
+
+    def __init__(self, approve=False, workers=4, batch_size=100, failure_threshold=5, reset_timeout=60,
+                 revoke_fulfillment=True, notify_purchaser=False):
+        self.approve = approve
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.revoke_fulfillment = revoke_fulfillment
+        self.notify_purchaser = notify_purchaser
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def get_unrefunded_lines(self, orders, line_filter=None):
+        """
+        Returns the lines of the given orders that have not been refunded, grouped by order.
+
+        Arguments:
+            orders (list of Order)
+            line_filter (dict): Lookups restricting the lines to refund, e.g. `{'course_key': course_id}`.
+
+        Returns:
+            OrderedDict: Mapping orders to their unrefunded lines, in the order the orders were given. Orders without
+            lines to refund are left out; orders whose lines have all been refunded are mapped to an empty list.
+        """
+        lines = list(Line.objects.filter(order__in=orders, **(line_filter or {})).order_by('order_id', 'id'))
+        order_ids = {line.order_id for line in lines}
+        orders_lines = OrderedDict((order.id, (order, [])) for order in orders if order.id in order_ids)
+        for line in Refund.get_unrefunded_lines(lines):
+            orders_lines[line.order_id][1].append(line)
+        return OrderedDict(orders_lines.values())
+
+    def get_incomplete_refunds(self, orders, line_filter=None):
+        """
+        Returns the refunds of the given orders that have been neither completed nor denied, and that only refund
+        lines matching the filter, as the refunds created by a previous run do.
+        """
+        refunds = Refund.objects.filter(order__in=orders).exclude(status__in=(REFUND.COMPLETE, REFUND.DENIED))
+        if line_filter:
+            refunds = refunds.exclude(
+                lines__order_line__in=Line.objects.filter(order__in=orders).exclude(**line_filter)
+            )
+        return refunds
+
+    def get_processor_name(self, refund):
+        """ Returns the name of the payment processor that credits the given refund. """
+        # NOTE: Update this if we ever support multiple payment sources for a single order.
+        sources = list(refund.order.sources.all())
+        return sources[0].source_type.name if sources else FREE_ORDERS_PROCESSOR
+
+    def approve_refund(self, refund, processor_name):
+        """
+        Approve a refund, unless the circuit for its payment processor is open.
+
+        Returns:
+            bool or None: Whether the refund was approved, or None if the approval was skipped.
+        """
+        if not self.circuit_breaker.allow(processor_name):
+            return None
+
+        # The fulfillment modules build LMS URLs, to revoke fulfillment, from the site of the current request.
+        request = HttpRequest()
+        request.site = refund.order.site
+        request.user = refund.user
+        set_thread_variable('request', request)
+
+        try:
+            approved = refund.approve(revoke_fulfillment=self.revoke_fulfillment,
+                                      notify_purchaser=self.notify_purchaser)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception('An unexpected error occurred while approving refund [%d].', refund.id)
+            approved = False
+        finally:
+            set_thread_variable('request', None)
+
+        if approved:
+            self.circuit_breaker.record_success(processor_name)
+        else:
+            self.circuit_breaker.record_failure(processor_name)
+        return approved
+
+    def _approve_refund_in_thread(self, refund, processor_name):
+        try:
+            return self.approve_refund(refund, processor_name)
+        finally:
+            # Worker threads have their own database connections, which must not be leaked.
+            connection.close()
+
+    def approve_refunds(self, refunds, report):
+        """ Approve the given refunds, one payment processor at a time. """
+        refunds_by_processor = OrderedDict()
+        for refund in refunds:
+            refunds_by_processor.setdefault(self.get_processor_name(refund), []).append(refund)
+
+        for processor_name, processor_refunds in refunds_by_processor.items():
+            if self.workers == 1:
+                results = [self.approve_refund(refund, processor_name) for refund in processor_refunds]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    results = list(executor.map(
+                        lambda refund, name=processor_name: self._approve_refund_in_thread(refund, name),
+                        processor_refunds
+                    ))
+
+            for approved in results:
+                if approved is None:
+                    report.refunds_skipped += 1
+                elif approved:
+                    report.refunds_approved += 1
+                    report.approvals_by_processor[processor_name] += 1
+                else:
+                    report.refunds_failed += 1
+
+    def create_refunds(self, orders_lines, report):
+        """
+        Create the refunds of the given orders.
+
+        The refunds are created together. If that fails, they are created one order at a time, so that only the
+        orders whose refunds cannot be created are reported as failed.
+        """
+        try:
+            return Refund.create_for_unrefunded_lines(list(orders_lines.items()))
+        except DatabaseError:
+            logger.warning('Failed to create refunds for orders [%s]. Retrying one order at a time.', ', '.join(
+                order.number for order in orders_lines), exc_info=True)
+
+        refunds = []
+        for order, lines in orders_lines.items():
+            try:
+                refunds += Refund.create_for_unrefunded_lines([(order, lines)])
+            except DatabaseError:
+                logger.exception('Failed to create a refund for order [%s].', order.number)
+                report.failed_orders.append(order.number)
+        return refunds
+
+    def refund_orders(self, orders, report, line_filter=None):
+        """ Create and approve the refunds of a batch of orders. """
+        orders_lines = self.get_unrefunded_lines(orders, line_filter)
+        report.failed_orders += [order.number for order in orders if order not in orders_lines]
+        report.orders_skipped += len([lines for lines in orders_lines.values() if not lines])
+        orders_lines = OrderedDict((order, lines) for order, lines in orders_lines.items() if lines)
+        if not orders_lines and not self.approve:
+            return
+
+        refunds = self.create_refunds(orders_lines, report) if orders_lines else []
+        report.refunds_created += len(refunds)
+
+        if self.approve:
+            # Refunds left incomplete by a previous run are approved again.
+            refunds += list(self.get_incomplete_refunds(orders, line_filter).exclude(
+                id__in=[refund.id for refund in refunds]
+            ))
+        else:
+            refunds = [refund for refund in refunds if refund.total_credit_excl_tax == 0]
+
+        # Refunds are approved with the orders of this batch, whose sources were prefetched.
+        orders_by_id = {order.id: order for order in orders}
+        for refund in refunds:
+            refund.order = orders_by_id[refund.order_id]
+        self.approve_refunds(refunds, report)
+
+    def run(self, order_numbers, line_filter=None):
+        """
+        Refund the given orders.
+
+        Arguments:
+            order_numbers (list of str)
+            line_filter (dict): Lookups restricting the lines to refund, e.g. `{'course_key': course_id}`.
+
+        Returns:
+            BulkRefundReport
+        """
+        order_numbers = list(OrderedDict.fromkeys(order_numbers))
+        report = BulkRefundReport(len(order_numbers))
+        started = time.time()
+
+        for start in range(0, len(order_numbers), self.batch_size):
+            batch = order_numbers[start:start + self.batch_size]
+            orders = list(Order.objects.filter(number__in=batch).select_related(
+                'site__siteconfiguration', 'user'
+            ).prefetch_related('sources__source_type').order_by('id'))
+            found = {order.number for order in orders}
+            report.failed_orders += [number for number in batch if number not in found]
+
+            self.refund_orders(orders, report, line_filter)
+            report.elapsed = time.time() - started
+            logger.info('%s', report)
+
+        return report
@@ -3,7 +3,7 @@
 import logging
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 from ecommerce_worker.sailthru.v1.tasks import send_course_refund_email
@@ -90,6 +90,21 @@ class Refund(StatusMixin, TimeStampedModel):
         """Returns all possible statuses for a refund."""
         return list(getattr(settings, cls.pipeline_setting).keys())
 
+    @classmethod
+    def get_unrefunded_lines(cls, lines):
+        """Returns the given order lines that have not been refunded, or whose refunds have been denied.
+
+        Arguments:
+            lines (list of order.Line): Order lines, of one or more orders.
+
+        Returns:
+            list of order.Line
+        """
+        refunded_line_ids = set(RefundLine.objects.filter(
+            order_line__in=lines
+        ).exclude(status=REFUND_LINE.DENIED).values_list('order_line_id', flat=True))
+        return [line for line in lines if line.id not in refunded_line_ids]
+
     @classmethod
     def create_with_lines(cls, order, lines):
         """Given an order and order lines, creates a Refund with corresponding RefundLines.
@@ -105,44 +120,73 @@ class Refund(StatusMixin, TimeStampedModel):
             None: If no unrefunded order lines have been provided.
             Refund: With RefundLines corresponding to each given unrefunded order line.
         """
-        unrefunded_lines = [line for line in lines if not line.refund_lines.exclude(status=REFUND_LINE.DENIED).exists()]
+        unrefunded_lines = cls.get_unrefunded_lines(lines)
 
         if not unrefunded_lines:
             return None
 
-        status = getattr(settings, 'OSCAR_INITIAL_REFUND_STATUS', REFUND.OPEN)
-        total_credit_excl_tax = sum([line.line_price_excl_tax for line in unrefunded_lines])
-        refund = cls.objects.create(
-            order=order,
-            user=order.user,
-            status=status,
-            total_credit_excl_tax=total_credit_excl_tax
-        )
-
-        audit_log(
-            'refund_created',
-            amount=total_credit_excl_tax,
-            currency=refund.currency,
-            order_number=order.number,
-            refund_id=refund.id,
-            user_id=refund.user.id
-        )
-
-        status = getattr(settings, 'OSCAR_INITIAL_REFUND_LINE_STATUS', REFUND_LINE.OPEN)
-        for line in unrefunded_lines:
-            RefundLine.objects.create(
-                refund=refund,
-                order_line=line,
-                line_credit_excl_tax=line.line_price_excl_tax,
-                quantity=line.quantity,
-                status=status
-            )
+        refund = cls.create_for_unrefunded_lines([(order, unrefunded_lines)])[0]
 
-        if total_credit_excl_tax == 0:
+        if refund.total_credit_excl_tax == 0:
             refund.approve(notify_purchaser=False)
 
         return refund
 
+    @classmethod
+    def create_for_unrefunded_lines(cls, orders_lines):
+        """Creates a Refund, with corresponding RefundLines, for each of the given orders.
+
+        The order lines must not have been refunded already (see `get_unrefunded_lines`). The RefundLines of all
+        orders are created together, and the refunds are not approved.
+
+        Arguments:
+            orders_lines (list of (order.Order, list of order.Line)): Orders, with their lines to be refunded.
+
+        Returns:
+            list of Refund: In the order of the given orders.
+        """
+        refund_status = getattr(settings, 'OSCAR_INITIAL_REFUND_STATUS', REFUND.OPEN)
+        line_status = getattr(settings, 'OSCAR_INITIAL_REFUND_LINE_STATUS', REFUND_LINE.OPEN)
+        refunds = []
+        refund_lines = []
+
+        with transaction.atomic():
+            for order, lines in orders_lines:
+                total_credit_excl_tax = sum([line.line_price_excl_tax for line in lines])
+                refund = cls.objects.create(
+                    order=order,
+                    user=order.user,
+                    status=refund_status,
+                    total_credit_excl_tax=total_credit_excl_tax
+                )
+                refunds.append(refund)
+
+                audit_log(
+                    'refund_created',
+                    amount=total_credit_excl_tax,
+                    currency=refund.currency,
+                    order_number=order.number,
+                    refund_id=refund.id,
+                    user_id=order.user_id
+                )
+
+                refund_lines += [
+                    RefundLine(
+                        refund=refund,
+                        order_line=line,
+                        line_credit_excl_tax=line.line_price_excl_tax,
+                        quantity=line.quantity,
+                        status=line_status
+                    )
+                    for line in lines
+                ]
+
+            RefundLine.objects.bulk_create(refund_lines)
+            # Primary keys are not set by bulk_create on all databases, so history is recorded from the created rows.
+            RefundLine.history.bulk_history_create(list(RefundLine.objects.filter(refund__in=refunds)))
+
+        return refunds
+
     @property
     def num_items(self):
         """Returns the number of items in this refund."""
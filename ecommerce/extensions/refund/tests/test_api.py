@@ -4,7 +4,9 @@ import ddt
 from django.test import override_settings
 from oscar.core.loading import get_model
 
+from ecommerce.core.tests import toggle_switch
 from ecommerce.extensions.fulfillment.status import ORDER
+from ecommerce.extensions.order.constants import ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME
 from ecommerce.extensions.refund.api import create_refunds, find_orders_associated_with_course
 from ecommerce.extensions.refund.tests.factories import RefundLineFactory
 from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
@@ -35,6 +37,15 @@ class ApiTests(RefundTestMixin, TestCase):
         actual = find_orders_associated_with_course(self.user, self.course.id)
         self.assertEqual(actual, [order])
 
+    def test_find_orders_associated_with_course_without_course_key(self):
+        """ Orders whose lines have not been backfilled with course keys should be found through their products. """
+        toggle_switch(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, True)
+        order = self.create_order()
+        order.lines.update(course_key=None)
+
+        actual = find_orders_associated_with_course(self.user, self.course.id)
+        self.assertEqual(actual, [order])
+
     @ddt.data('', ' ', None)
     def test_find_orders_associated_with_course_invalid_course_id(self, course_id):
         """ ValueError should be raised if course_id is invalid. """
@@ -72,6 +83,18 @@ class ApiTests(RefundTestMixin, TestCase):
         self.assertEqual(actual, [refund])
         self.assert_refund_matches_order(refund, order)
 
+    @override_settings(OSCAR_INITIAL_REFUND_STATUS=OSCAR_INITIAL_REFUND_STATUS,
+                       OSCAR_INITIAL_REFUND_LINE_STATUS=OSCAR_INITIAL_REFUND_LINE_STATUS)
+    def test_create_refunds_without_course_key(self):
+        """ The method should create refunds for lines that have not been backfilled with course keys. """
+        toggle_switch(ORDER_LINE_COURSE_KEY_FALLBACK_SWITCH_NAME, True)
+        order = self.create_order()
+        order.lines.update(course_key=None)
+        actual = create_refunds([order], self.course.id)
+        refund = Refund.objects.get(order=order)
+        self.assertEqual(actual, [refund])
+        self.assert_refund_matches_order(refund, order)
+
     def test_create_refunds_with_existing_refund(self):
         """ The method should NOT create refunds for lines that have already been refunded. """
         order = self.create_order()
@@ -0,0 +1,195 @@
+
+
+import httpretty
+import mock
+from django.db import DatabaseError
+from django.test import override_settings
+from oscar.core.loading import get_model
+from threadlocals.threadlocals import set_thread_variable
+
+from ecommerce.core.url_utils import get_lms_enrollment_api_url
+from ecommerce.extensions.payment.tests.processors import DummyProcessor
+from ecommerce.extensions.refund.bulk import FREE_ORDERS_PROCESSOR, BulkRefunder, BulkRefundReport
+from ecommerce.extensions.refund.status import REFUND, REFUND_LINE
+from ecommerce.extensions.refund.tests.mixins import RefundTestMixin
+from ecommerce.tests.testcases import TestCase
+
+Refund = get_model('refund', 'Refund')
+Source = get_model('payment', 'Source')
+SourceType = get_model('payment', 'SourceType')
+
+
+def _revoke_lines(refund):
+    for line in refund.lines.all():
+        line.set_status(REFUND_LINE.COMPLETE)
+    refund.set_status(REFUND.COMPLETE)
+
+
+@override_settings(PAYMENT_PROCESSORS=['ecommerce.extensions.payment.tests.processors.DummyProcessor'])
+class BulkRefunderTests(RefundTestMixin, TestCase):
+    def setUp(self):
+        super(BulkRefunderTests, self).setUp()
+        self.user = self.create_user()
+
+    def create_paid_order(self, **kwargs):
+        order = self.create_order(**kwargs)
+        source_type, __ = SourceType.objects.get_or_create(name=DummyProcessor.NAME)
+        Source.objects.create(source_type=source_type, order=order, currency=order.currency,
+                              amount_allocated=order.total_incl_tax, amount_debited=order.total_incl_tax)
+        return order
+
+    def run_refunder(self, orders, **kwargs):
+        kwargs.setdefault('workers', 1)
+        with mock.patch.object(Refund, '_revoke_lines', side_effect=_revoke_lines, autospec=True):
+            return BulkRefunder(**kwargs).run([order.number for order in orders])
+
+    def test_create_refunds(self):
+        """ Verify refunds are created for the unrefunded lines of the orders, without approving paid refunds. """
+        paid_order = self.create_paid_order(multiple_lines=True)
+        free_order = self.create_order(free=True)
+        refunded_order = self.create_paid_order()
+        Refund.create_with_lines(refunded_order, list(refunded_order.lines.all()))
+
+        report = self.run_refunder([paid_order, free_order, refunded_order], batch_size=2)
+
+        refund = Refund.objects.get(order=paid_order)
+        self.assert_refund_matches_order(refund, paid_order)
+        self.assertEqual(refund.lines.count(), 2)
+        self.assertEqual(refund.history.count(), 1)
+        self.assertEqual(refund.lines.first().history.count(), 1)
+        self.assertEqual(Refund.objects.get(order=free_order).status, REFUND.COMPLETE)
+        self.assertEqual(Refund.objects.filter(order=refunded_order).count(), 1)
+
+        self.assertEqual(report.refunds_created, 2)
+        self.assertEqual(report.refunds_approved, 1)
+        self.assertEqual(report.approvals_by_processor[FREE_ORDERS_PROCESSOR], 1)
+        self.assertEqual(report.orders_skipped, 1)
+        self.assertEqual(report.failed_orders, [])
+
+    def test_create_refunds_one_order_at_a_time(self):
+        """ Verify the refunds of a batch are created one order at a time if they cannot be created together. """
+        orders = [self.create_paid_order() for __ in range(3)]
+        create_for_unrefunded_lines = Refund.create_for_unrefunded_lines
+
+        def create(orders_lines):
+            if len(orders_lines) > 1 or orders_lines[0][0] == orders[1]:
+                raise DatabaseError
+            return create_for_unrefunded_lines(orders_lines)
+
+        with mock.patch.object(Refund, 'create_for_unrefunded_lines', side_effect=create):
+            report = self.run_refunder(orders)
+
+        self.assertEqual(report.refunds_created, 2)
+        self.assertEqual(report.failed_orders, [orders[1].number])
+        self.assertEqual(set(Refund.objects.values_list('order_id', flat=True)), {orders[0].id, orders[2].id})
+
+    def test_missing_orders(self):
+        """ Verify order numbers that do not exist are reported as failed. """
+        order = self.create_paid_order()
+        report = BulkRefunder(workers=1).run(['missing', order.number])
+        self.assertEqual(report.failed_orders, ['missing'])
+        self.assertEqual(report.refunds_created, 1)
+
+    def test_line_filter(self):
+        """ Verify only the lines matching the filter are refunded. """
+        order = self.create_paid_order(multiple_lines=True)
+        line = order.lines.get(product=self.verified_product)
+
+        report = BulkRefunder(workers=1).run([order.number], line_filter={'id': line.id})
+
+        self.assertEqual(report.refunds_created, 1)
+        self.assertEqual([refund_line.order_line for refund_line in Refund.objects.get(order=order).lines.all()],
+                         [line])
+
+    def test_approve(self):
+        """ Verify refunds are credited and revoked when approval is requested. """
+        orders = [self.create_paid_order() for __ in range(3)]
+
+        report = self.run_refunder(orders, approve=True)
+
+        for order in orders:
+            refund = Refund.objects.get(order=order)
+            self.assertEqual(refund.status, REFUND.COMPLETE)
+            self.assertEqual(order.sources.first().amount_refunded, refund.total_credit_excl_tax)
+        self.assertEqual(report.refunds_approved, 3)
+        self.assertEqual(report.approvals_by_processor[DummyProcessor.NAME], 3)
+
+    @httpretty.activate
+    @override_settings(EDX_API_KEY='foo')
+    def test_approve_revokes_enrollments(self):
+        """ Verify approvals revoke enrollments through the LMS of the site of the orders. """
+        enrollment_api_url = self.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment')
+        httpretty.register_uri(httpretty.POST, enrollment_api_url, status=200, body='{}',
+                               content_type='application/json')
+        orders = [self.create_paid_order() for __ in range(2)]
+        # Management commands run without a request.
+        set_thread_variable('request', None)
+
+        report = BulkRefunder(approve=True, workers=1).run([order.number for order in orders])
+
+        self.assertEqual(report.refunds_approved, 2)
+        self.assertEqual(len(httpretty.latest_requests()), 2)
+        for order in orders:
+            refund = Refund.objects.get(order=order)
+            self.assertEqual(refund.status, REFUND.COMPLETE)
+            self.assertEqual(refund.lines.get().status, REFUND_LINE.COMPLETE)
+
+    def test_approve_in_threads_with_request(self):
+        """ Verify refunds approved by worker threads are approved with a request for the site of their order. """
+        orders = [self.create_paid_order() for __ in range(2)]
+        enrollment_api_urls = []
+
+        def approve(*args, **kwargs):  # pylint: disable=unused-argument
+            enrollment_api_urls.append(get_lms_enrollment_api_url())
+            return True
+
+        set_thread_variable('request', None)
+        refunds = Refund.create_for_unrefunded_lines([(order, list(order.lines.all())) for order in orders])
+        report = BulkRefundReport(len(orders))
+        # Approval is mocked, since the test database cannot be written to by other threads.
+        with mock.patch.object(Refund, 'approve', side_effect=approve):
+            BulkRefunder(approve=True, workers=2).approve_refunds(refunds, report)
+
+        self.assertEqual(report.refunds_approved, 2)
+        self.assertEqual(enrollment_api_urls,
+                         [self.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment')] * 2)
+
+    def test_resume(self):
+        """ Verify refunds that were not completed by a previous run are approved again, without new refunds. """
+        order = self.create_paid_order()
+        with mock.patch.object(Refund, 'approve', return_value=False):
+            report = self.run_refunder([order], approve=True)
+        self.assertEqual(report.refunds_failed, 1)
+        self.assertEqual(Refund.objects.get(order=order).status, REFUND.OPEN)
+
+        report = self.run_refunder([order], approve=True)
+
+        self.assertEqual(report.refunds_created, 0)
+        self.assertEqual(report.refunds_approved, 1)
+        self.assertEqual(Refund.objects.get(order=order).status, REFUND.COMPLETE)
+
+    def test_resume_with_line_filter(self):
+        """ Verify incomplete refunds are only approved again if they only refund lines matching the filter. """
+        order = self.create_paid_order(multiple_lines=True)
+        line, other_line = order.lines.get(product=self.verified_product), order.lines.exclude(
+            product=self.verified_product).get()
+        other_refund = Refund.create_for_unrefunded_lines([(order, [other_line])])[0]
+
+        with mock.patch.object(Refund, '_revoke_lines', side_effect=_revoke_lines, autospec=True):
+            report = BulkRefunder(approve=True, workers=1).run([order.number], line_filter={'id': line.id})
+
+        self.assertEqual(report.refunds_created, 1)
+        self.assertEqual(report.refunds_approved, 1)
+        self.assertEqual(Refund.objects.get(lines__order_line=line).status, REFUND.COMPLETE)
+        other_refund.refresh_from_db()
+        self.assertEqual(other_refund.status, REFUND.OPEN)
+
+    def test_circuit_breaker(self):
+        """ Verify approvals are skipped once a payment processor keeps failing. """
+        orders = [self.create_paid_order() for __ in range(3)]
+        with mock.patch.object(Refund, 'approve', side_effect=Exception) as mock_approve:
+            report = self.run_refunder(orders, approve=True, failure_threshold=2)
+
+        self.assertEqual(mock_approve.call_count, 2)
+        self.assertEqual(report.refunds_failed, 2)
+        self.assertEqual(report.refunds_skipped, 1)
@@ -2,7 +2,6 @@
 
 import logging
 
-from django.db.models import Q
 from oscar.apps.partner import strategy
 from oscar.core.loading import get_class, get_model
 
@@ -18,6 +17,7 @@ Basket = get_model('basket', 'Basket')
 EventHandler = get_class('order.processing', 'EventHandler')
 NoShippingRequired = get_class('shipping.methods', 'NoShippingRequired')
 Order = get_model('order', 'Order')
+PaymentProcessorResponse = get_model('payment', 'PaymentProcessorResponse')
 OrderTotalCalculator = get_class('checkout.calculators', 'OrderTotalCalculator')
 ShippingEventType = get_model('order', 'ShippingEventType')
 
@@ -48,8 +48,10 @@ def refund_basket_transactions(site, basket_ids):
         Applicator().apply(basket, basket.owner, None)
 
         logger.info('Refunding transactions for basket [%d]...', basket.id)
-        transactions = set(
-            list(basket.paymentprocessorresponse_set.values_list('processor_name', 'transaction_id')))
+        transactions = {
+            (response.processor_name, response.transaction_id)
+            for response in PaymentProcessorResponse.filter_including_archived(basket=basket)
+        }
 
         for processor_name, transaction_id in transactions:
             try:
@@ -107,9 +109,10 @@ class FulfillFrozenBaskets(EdxOrderPlacementMixin):
         # Filter the successful payment processor response which in case
         # of Cybersource includes "u'decision': u'ACCEPT'" and in case of
         # Paypal includes "u'state': u'approved'".
-        successful_transaction = basket.paymentprocessorresponse_set.filter(
-            Q(response__contains='ACCEPT') | Q(response__contains='approved')
-        )
+        successful_transaction = [
+            response for response in PaymentProcessorResponse.filter_including_archived(basket=basket)
+            if response.is_successful
+        ]
 
         # In case of no successful transactions log and return none.
         if not successful_transaction:
@@ -11,6 +11,7 @@ from requests.exceptions import ConnectionError as ReqConnectionError
 from requests.exceptions import Timeout
 from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 
+from ecommerce.core.fanout import fan_out
 from ecommerce.core.utils import deprecated_traverse_pagination, get_cache_key
 from ecommerce.extensions.offer.decorators import check_condition_applicability
 from ecommerce.extensions.offer.mixins import SingleItemConsumptionConditionMixin
@@ -70,17 +71,17 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
             return []
         return self._get_lms_resource_for_user(basket, resource_name, endpoint)
 
-    def _get_user_ownership_data(self, basket, retrieve_entitlements=False):
+    def _get_user_ownership_data(self, basket, retrieve_entitlements=False, enrollments=None):
         """
-        Retrieves existing enrollments and entitlements for a user from LMS
+        Retrieves existing enrollments and entitlements for a user from LMS, unless the enrollments are given.
         """
-        enrollments = []
         entitlements = []
 
         site_configuration = basket.site.siteconfiguration
         if site_configuration.enable_partial_program:
-            enrollments = self._get_lms_resource(
-                basket, 'enrollments', site_configuration.enrollment_api_client.enrollment)
+            if enrollments is None:
+                enrollments = self._get_lms_resource(
+                    basket, 'enrollments', site_configuration.enrollment_api_client.enrollment)
             if retrieve_entitlements:
                 response = self._get_lms_resource(
                     basket, 'entitlements', site_configuration.entitlement_api_client.entitlements
@@ -90,7 +91,7 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
                         response, site_configuration.entitlement_api_client.entitlements)
                 else:
                     entitlements = response
-        return enrollments, entitlements
+        return enrollments or [], entitlements
 
     def _has_entitlements(self, program):
         """
@@ -114,8 +115,19 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
             bool
         """
         basket_skus = {line.stockrecord.partner_sku for line in basket.all_lines()}
+        site_configuration = basket.site.siteconfiguration
+
+        # The program and the enrollments of the user do not depend on each other, so they are retrieved
+        # concurrently. Entitlements are only retrieved if the program has entitlement products.
+        calls = {'program': lambda: get_program(self.program_uuid, site_configuration)}
+        if site_configuration.enable_partial_program and basket.owner:
+            calls['enrollments'] = lambda: self._get_lms_resource_for_user(
+                basket, 'enrollments', site_configuration.enrollment_api_client.enrollment
+            )
+        futures = fan_out(calls)
+
         try:
-            program = get_program(self.program_uuid, basket.site.siteconfiguration)
+            program = futures['program'].result()
         except (HttpNotFoundError, SlumberBaseException, Timeout):
             return False
 
@@ -124,8 +136,16 @@ class ProgramCourseRunSeatsCondition(SingleItemConsumptionConditionMixin, Condit
         else:
             return False
 
+        enrollments = None
+        if 'enrollments' in futures:
+            try:
+                enrollments = futures['enrollments'].result()
+            except Timeout as exc:
+                logger.error('Failed to retrieve enrollments : %s', str(exc))
+                enrollments = []
+
         retrieve_entitlements = self._has_entitlements(program)
-        enrollments, entitlements = self._get_user_ownership_data(basket, retrieve_entitlements)
+        enrollments, entitlements = self._get_user_ownership_data(basket, retrieve_entitlements, enrollments)
 
         for course in program['courses']:
             # If the user is already enrolled in a course, we do not need to check their basket for it
@@ -214,6 +214,8 @@ TEMPLATES = [
 MIDDLEWARE = (
     'corsheaders.middleware.CorsMiddleware',
     'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+    # NOTE: RequestProfileMiddleware counts the calls of the middleware that follow it, and must not be moved down.
+    'ecommerce.core.middleware.RequestProfileMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -273,8 +275,45 @@ LMS_API_CACHE_TIMEOUT = 30  # Value is in seconds.
 
 VOUCHER_CACHE_TIMEOUT = 10  # Value is in seconds.
 
+# Cache timeout for the course offers of a voucher, shown on the coupon landing page.
+VOUCHER_OFFERS_CACHE_TIMEOUT = 60  # Value is in seconds.
+
+# Lifetime of a version of the process-local caches of site configurations and partners. Saving a site, its
+# configuration or partner starts a new version immediately.
+SITE_CONFIGURATION_CACHE_TIMEOUT = 600  # Value is in seconds.
+
+# Cache timeout for the catalog snapshots of partners. Snapshots are cached per catalog version.
+CATALOG_SNAPSHOT_CACHE_TIMEOUT = 3600  # Value is in seconds.
+
+# Cache timeout for embargo access decisions from the LMS.
+EMBARGO_CHECK_CACHE_TIMEOUT = 300  # Value is in seconds.
+
+# Independent calls to upstream services made by a request are run concurrently on a thread pool of this size,
+# shared by the requests of a process. Calls that have not completed by the timeout are abandoned.
+UPSTREAM_FAN_OUT_MAX_WORKERS = 16
+UPSTREAM_FAN_OUT_TIMEOUT = 10  # Value is in seconds.
+
+# Fraction of requests, between 0 and 1, whose database queries, cache lookups and outbound HTTP calls are counted
+# and reported to the logs and as custom metrics (see ecommerce/core/instrumentation.py). Off unless enabled.
+REQUEST_PROFILE_SAMPLE_RATE = 0
+
 SDN_CHECK_REQUEST_TIMEOUT = 5  # Value is in seconds.
 
+# Cache timeouts for SDN API results with and without hits.
+SDN_CHECK_HIT_CACHE_TIMEOUT = 300  # Value is in seconds.
+SDN_CHECK_MISS_CACHE_TIMEOUT = 600  # Value is in seconds.
+
+# Shadow comparison of SDN API results against the SDN fallback data, run on background threads.
+# Fraction of checkouts compared, between 0 and 1.
+SDN_FALLBACK_COMPARISON_SAMPLE_RATE = 1.0
+SDN_FALLBACK_COMPARISON_WORKERS = 2
+# Comparisons requested while this many are already queued or running are dropped.
+SDN_FALLBACK_COMPARISON_MAX_PENDING = 10
+
+# Overrides for the number of days stale data is retained before the purge_stale_data command
+# deletes it, keyed by purge policy name (see ecommerce/core/purge.py).
+PURGE_RETENTION_DAYS = {}
+
 # APP CONFIGURATION
 DJANGO_APPS = [
     'django.contrib.admin',
@@ -173,6 +173,9 @@ ENABLE_AUTO_AUTH = True
 SAILTHRU_KEY = 'abc123'
 SAILTHRU_SECRET = 'top_secret'
 
+# Profile every request.
+REQUEST_PROFILE_SAMPLE_RATE = 1.0
+
 REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] + ('rest_framework.renderers.BrowsableAPIRenderer',)
 
 #####################################################################
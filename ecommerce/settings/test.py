@@ -183,6 +183,12 @@ ENTERPRISE_CATALOG_API_URL = urljoin(ENTERPRISE_CATALOG_SERVICE_URL, 'api/v1/')
 # Don't bother sending fake events to Segment. Doing so creates unnecessary threads.
 SEND_SEGMENT_EVENTS = False
 
+# Background threads cannot see the data of a test's transaction.
+SDN_FALLBACK_COMPARISON_SAMPLE_RATE = 0
+
+# Profile every request, so that tests can hold endpoints to query budgets.
+REQUEST_PROFILE_SAMPLE_RATE = 1.0
+
 # SPEED
 DEBUG = False
 TEMPLATE_DEBUG = False
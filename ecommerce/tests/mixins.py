@@ -5,6 +5,7 @@
 import datetime
 import json
 import re
+from contextlib import contextmanager
 from decimal import Decimal
 
 import httpretty
@@ -27,6 +28,7 @@ from threadlocals.threadlocals import set_thread_variable
 from waffle.models import Flag
 
 from ecommerce.core.constants import ALL_ACCESS_CONTEXT, SYSTEM_ENTERPRISE_ADMIN_ROLE, SYSTEM_ENTERPRISE_OPERATOR_ROLE
+from ecommerce.core.instrumentation import profile
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import mode_for_product
@@ -472,3 +474,38 @@ class TestWaffleFlagMixin:
         waffle_flags_list = []
         for flag_name in waffle_flags_list:
             Flag.objects.update_or_create(name=flag_name, defaults={'everyone': True})
+
+
+class RequestBudgetMixin:
+    """ Holds code under test, e.g. a request to an endpoint, to a budget of database queries and HTTP calls. """
+
+    @contextmanager
+    def assert_within_budget(self, queries=None, duplicate_queries=0, http_calls=None):
+        """
+        Asserts the code run in the context does not make more database queries, duplicate queries or outbound
+        HTTP calls than budgeted. Budgets of None are not enforced.
+
+        Example:
+
+            with self.assert_within_budget(queries=20, http_calls=1):
+                self.client.get(reverse('api:v2:baskets:calculate'))
+
+        Yields:
+            RequestProfile: The profile of the code.
+        """
+        with profile() as request_profile:
+            yield request_profile
+
+        for name, budget in (
+                ('queries', queries),
+                ('duplicate_queries', duplicate_queries),
+                ('http_calls', http_calls),
+        ):
+            count = getattr(request_profile, name)
+            if budget is not None and count > budget:
+                self.fail('[{count}] {name} exceed the budget of [{budget}]. Most repeated queries: {repeated}'.format(
+                    count=count,
+                    name=name,
+                    budget=budget,
+                    repeated=request_profile.get_repeated_queries(),
+                ))
@@ -4,10 +4,10 @@ from django.conf import settings
 from django.test import LiveServerTestCase as DjangoLiveServerTestCase
 from django.test import TestCase as DjangoTestCase
 from django.test import TransactionTestCase as DjangoTransactionTestCase
-from edx_django_utils.cache import TieredCache
+from edx_django_utils.cache import RequestCache, TieredCache
 from oscar.test.factories import CategoryFactory
 
-from ecommerce.tests.mixins import SiteMixin, TestServerUrlMixin, TestWaffleFlagMixin, UserMixin
+from ecommerce.tests.mixins import RequestBudgetMixin, SiteMixin, TestServerUrlMixin, TestWaffleFlagMixin, UserMixin
 
 # When all unit tests are run, the catalog category table will sometimes be empty. However, if only a single test
 # is run, Category will have been populated by migrations (in particular, see
@@ -22,10 +22,14 @@ class TieredCacheMixin:
 
     def setUp(self):
         TieredCache.dangerous_clear_all_tiers()
+        # Only the default namespace of the request cache is cleared above.
+        RequestCache.clear_all_namespaces()
         super(TieredCacheMixin, self).setUp()
 
     def tearDown(self):
         TieredCache.dangerous_clear_all_tiers()
+        # Only the default namespace of the request cache is cleared above.
+        RequestCache.clear_all_namespaces()
         super(TieredCacheMixin, self).tearDown()
 
 
@@ -62,7 +66,8 @@ class ViewTestMixin(TieredCacheMixin):
         self.assert_get_response_status(200)
 
 
-class TestCase(TestServerUrlMixin, UserMixin, SiteMixin, TieredCacheMixin, DjangoTestCase, TestWaffleFlagMixin):
+class TestCase(TestServerUrlMixin, UserMixin, SiteMixin, TieredCacheMixin, RequestBudgetMixin, DjangoTestCase,
+               TestWaffleFlagMixin):
     """
     Base test case for ecommerce tests.
 
@@ -0,0 +1,8 @@
+"""
+Load harness of the checkout.
+
+The harness boots the service, in process, against a test database and local fakes of the Discovery, Enterprise,
+LMS and CyberSource services. It replays a mix of checkout scenarios at the given concurrency, and reports the
+throughput of the service, the latency percentiles of every phase of the checkout, and the database queries and
+HTTP calls made by each. Run ``python -m loadtest --help`` for its options.
+"""
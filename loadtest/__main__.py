@@ -0,0 +1,13 @@
+import os
+import sys
+
+import django
+
+if __name__ == '__main__':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings.test')
+    django.setup()
+
+    # Models can only be imported once Django is set up.
+    from loadtest.cli import main  # pylint: disable=wrong-import-position
+
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Command line interface of the load harness.
+"""
+
+
+import argparse
+import itertools
+import json
+import sys
+
+from loadtest.data import create_catalog, create_learners, create_site, create_voucher
+from loadtest.environment import Environment
+from loadtest.report import format_summary, summarize
+from loadtest.runner import pick_scenarios, run, run_scenario
+from loadtest.scenarios import DEFAULT_MIX, SCENARIOS, Checkout
+
+
+def parse_mix(value):
+    """ Parses a mix of scenarios, given as comma-separated ``scenario=weight`` pairs. """
+    mix = {}
+    for pair in value.split(','):
+        scenario, __, weight = pair.partition('=')
+        if scenario not in SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                'Unknown scenario [{}]. Scenarios are: {}.'.format(scenario, ', '.join(sorted(SCENARIOS)))
+            )
+        try:
+            mix[scenario] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError('Invalid weight [{}] of scenario [{}].'.format(weight, scenario))
+    return mix
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m loadtest',
+        description='Replays checkouts against the service, in process, with fake upstream services.',
+    )
+    parser.add_argument('--scenarios', type=int, default=200, help='number of scenarios to replay')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of scenarios in flight at once')
+    parser.add_argument(
+        '--mix',
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help='relative weights of the scenarios, e.g. {}'.format(
+            ','.join('{}={}'.format(scenario, weight) for scenario, weight in sorted(DEFAULT_MIX.items()))
+        ),
+    )
+    parser.add_argument('--warmup', type=int, default=5, help='number of checkouts run, untimed, before the run')
+    parser.add_argument('--seats', type=int, default=20, help='number of course runs whose seats are sold')
+    parser.add_argument('--offers', type=int, default=20, help='number of site offers on the seats')
+    parser.add_argument(
+        '--upstream-latency', type=float, default=0.0, help='milliseconds taken by the fakes to answer a request'
+    )
+    parser.add_argument('--seed', type=int, help='seed of the random draw of the scenarios')
+    parser.add_argument(
+        '--keepdb', action='store_true', help='migrate SQLite databases once, and copy them for the next runs'
+    )
+    parser.add_argument('--json', type=argparse.FileType('w'), help='file to write the summary of the run to')
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+
+    with Environment(upstream_latency=args.upstream_latency / 1000, keepdb=args.keepdb) as environment:
+        site = create_site(environment)
+        partner = site.siteconfiguration.partner
+        skus = create_catalog(partner, args.seats, args.offers)
+        voucher_code = create_voucher(site, skus)
+
+        scenarios = pick_scenarios(args.mix, args.scenarios, args.seed)
+        learners = create_learners(args.warmup + len(scenarios))
+        # Learners buy the seats in turn, so that the basket of every learner is different from the last one.
+        checkouts = [
+            Checkout(learner, sku, voucher_code, environment.cybersource)
+            for learner, sku in zip(learners, itertools.cycle(skus))
+        ]
+        for checkout in checkouts:
+            checkout.log_in()
+
+        for checkout in checkouts[:args.warmup]:
+            run_scenario('voucher_checkout', checkout)
+        for fake in environment.fakes:
+            fake.requests.clear()
+
+        results = run(scenarios, checkouts[args.warmup:], args.concurrency)
+        summary = summarize(results, environment.fakes)
+
+    sys.stdout.write(format_summary(summary) + '\n')
+    if args.json:
+        json.dump(summary, args.json, indent=2, sort_keys=True)
+
+    failed = sum(counts['failed'] for counts in summary['scenarios'].values())
+    return 1 if failed else 0
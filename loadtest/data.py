@@ -0,0 +1,91 @@
+"""
+Creates the site, catalog, offers and learners that checkouts run on.
+"""
+
+
+import uuid
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from oscar.core.loading import get_model
+from oscar.test import factories
+from waffle.models import Flag
+
+from benchmarks.factories import create_seats, create_site_offers
+from ecommerce.extensions.test.factories import prepare_voucher
+from ecommerce.tests.factories import UserFactory
+
+Country = get_model('address', 'Country')
+Partner = get_model('partner', 'Partner')
+Product = get_model('catalogue', 'Product')
+SiteConfiguration = get_model('core', 'SiteConfiguration')
+Voucher = get_model('voucher', 'Voucher')
+
+DOMAIN = 'loadtest.ecommerce.fake'
+FLEX_MICROFORM_FLAG_NAME = 'payment.cybersource.flex_microform_enabled'
+PAYMENT_MICROFRONTEND_URL = 'http://payment.loadtest.fake/'
+PAYMENT_PROCESSOR = 'cybersource-rest'
+
+
+def create_site(environment):
+    """ Returns the site checkouts are made on, configured to call the fakes of the given environment. """
+    lms_url_root = environment.lms.url.rstrip('/')
+    partner, __ = Partner.objects.get_or_create(short_code='edx', defaults={'name': 'edX'})
+    site, __ = Site.objects.update_or_create(id=settings.SITE_ID, defaults={'domain': DOMAIN, 'name': DOMAIN})
+    SiteConfiguration.objects.update_or_create(site=site, defaults={
+        'partner': partner,
+        'lms_url_root': lms_url_root,
+        'discovery_api_url': environment.discovery.url + 'api/v1/',
+        'payment_processors': PAYMENT_PROCESSOR,
+        'client_side_payment_processor': PAYMENT_PROCESSOR,
+        'enable_microfrontend_for_basket_page': True,
+        'payment_microfrontend_url': PAYMENT_MICROFRONTEND_URL,
+        'from_email': 'loadtest@example.com',
+        'segment_key': None,
+        'enable_sdn_check': False,
+        'enable_embargo_check': False,
+        'oauth_settings': {
+            'SOCIAL_AUTH_EDX_OAUTH2_KEY': 'loadtest-key',
+            'SOCIAL_AUTH_EDX_OAUTH2_SECRET': 'loadtest-secret',
+            'BACKEND_SERVICE_EDX_OAUTH2_KEY': 'loadtest-key',
+            'BACKEND_SERVICE_EDX_OAUTH2_SECRET': 'loadtest-secret',
+            'SOCIAL_AUTH_EDX_OAUTH2_LOGOUT_URL': lms_url_root + '/logout',
+        },
+    })
+    partner.default_site = site
+    partner.save()
+
+    # The payment page tokenizes card details with Flex Microform, rather than posting them to CyberSource.
+    Flag.objects.update_or_create(name=FLEX_MICROFORM_FLAG_NAME, defaults={'everyone': True})
+    # Learners are billed at addresses in the United States.
+    Country.objects.get_or_create(iso_3166_1_a2='US', defaults={'name': 'United States of America'})
+    return site
+
+
+def create_catalog(partner, seat_count, offer_count):
+    """ Returns the SKUs of seats of the given number of course runs, on which the given number of offers run. """
+    seats = create_seats(partner, seat_count)
+    if offer_count:
+        create_site_offers(seats, offer_count)
+    return [seat.stockrecords.get(partner=partner).partner_sku for seat in seats]
+
+
+def create_voucher(site, skus):
+    """ Returns the code of a voucher, which any number of learners can redeem, on the seats with the given SKUs. """
+    product_range = factories.RangeFactory()
+    for product in Product.objects.filter(stockrecords__partner_sku__in=skus):
+        product_range.add_product(product)
+
+    voucher, __ = prepare_voucher(
+        code='LOADTEST{}'.format(uuid.uuid4().hex[:8].upper()),
+        _range=product_range,
+        benefit_value=10,
+        usage=Voucher.MULTI_USE,
+        site=site,
+    )
+    return voucher.code
+
+
+def create_learners(count):
+    """ Returns the given number of learners, who have not bought anything. """
+    return [UserFactory(username='loadtest_{}'.format(uuid.uuid4().hex)) for __ in range(count)]
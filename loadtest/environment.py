@@ -0,0 +1,129 @@
+"""
+Boots the service against a test database and fakes of its upstream services.
+"""
+
+
+import os
+import shutil
+import tempfile
+from copy import deepcopy
+
+from CyberSource.configuration import Configuration
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from loadtest.fakes import FakeCyberSource, FakeDiscovery, FakeEnterprise, FakeLMS
+
+# Copied for every run, with --keepdb, so that SQLite databases are only migrated once.
+SQLITE_MIGRATED_DATABASE_PATH = os.path.join(tempfile.gettempdir(), 'ecommerce_loadtest.sqlite3')
+
+
+class Environment:
+    """
+    The test database and the fakes checkouts run against.
+
+    The database is created and migrated like the database of the acceptance tests: with the engine, and any other
+    connection details, set by the ``DB_*`` environment variables read by the test settings. SQLite databases are
+    created as files, rather than in memory, so that every thread has a connection of its own, as it would with
+    MySQL. Every run starts from an empty database: with ``keepdb``, SQLite databases are copied from a database
+    migrated by an earlier run.
+
+    SQLite databases have a single writer, so their transactions are serialized: capacity should be measured
+    against MySQL.
+    """
+
+    def __init__(self, upstream_latency=0.0, keepdb=False):
+        self.keepdb = keepdb
+        self.directory = tempfile.mkdtemp(prefix='ecommerce_loadtest')
+        self.lms = FakeLMS(upstream_latency)
+        self.discovery = FakeDiscovery(upstream_latency)
+        self.enterprise = FakeEnterprise(upstream_latency)
+        self.cybersource = FakeCyberSource(self.directory, upstream_latency)
+        self.fakes = (self.lms, self.discovery, self.enterprise, self.cybersource)
+        self._old_database_name = None
+        self._settings_override = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        for fake in self.fakes:
+            fake.start()
+
+        setup_test_environment()
+        connection_created.connect(_start_immediate_transactions)
+        self._create_database()
+
+        self._settings_override = override_settings(
+            ENTERPRISE_API_URL=self.enterprise.url + 'enterprise/api/v1/',
+            ENTERPRISE_CATALOG_API_URL=self.enterprise.url + 'enterprise-catalog/api/v1/',
+            PAYMENT_PROCESSOR_CONFIG=self._get_payment_processor_config(),
+            # Errors are reported with the exceptions raised by the views, rather than with server error pages.
+            DEBUG_PROPAGATE_EXCEPTIONS=True,
+        )
+        self._settings_override.enable()
+        # The CyberSource SDK trusts the certificate of the fake, rather than those of the public authorities.
+        Configuration().ssl_ca_cert = self.cybersource.certificate_path
+
+    def stop(self):
+        Configuration().ssl_ca_cert = None
+        if self._settings_override:
+            self._settings_override.disable()
+        if self._old_database_name:
+            connection.creation.destroy_test_db(self._old_database_name, verbosity=0)
+        connection_created.disconnect(_start_immediate_transactions)
+        teardown_test_environment()
+
+        for fake in self.fakes:
+            fake.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _create_database(self):
+        is_sqlite = connection.vendor == 'sqlite'
+        is_migrated = False
+        if is_sqlite:
+            database_path = os.path.join(self.directory, 'ecommerce.sqlite3')
+            connection.settings_dict['TEST']['NAME'] = database_path
+            # Concurrent transactions wait for each other to commit, rather than failing.
+            connection.settings_dict['OPTIONS'].setdefault('timeout', 30)
+            if self.keepdb and os.path.exists(SQLITE_MIGRATED_DATABASE_PATH):
+                shutil.copyfile(SQLITE_MIGRATED_DATABASE_PATH, database_path)
+                is_migrated = True
+
+        self._old_database_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=is_migrated
+        )
+
+        if is_sqlite:
+            if self.keepdb and not is_migrated:
+                shutil.copyfile(database_path, SQLITE_MIGRATED_DATABASE_PATH)
+            # Readers do not block the writer, and the writer does not block readers.
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=WAL')
+
+    def _get_payment_processor_config(self):
+        config = deepcopy(settings.PAYMENT_PROCESSOR_CONFIG)
+        for partner_config in config.values():
+            if 'cybersource-rest' in partner_config:
+                # The SDK calls the host it is given as run environment, if it is not a CyberSource environment.
+                partner_config['cybersource-rest']['flex_run_environment'] = self.cybersource.host
+        return config
+
+
+def _start_immediate_transactions(sender, connection, **kwargs):  # pylint: disable=redefined-outer-name,unused-argument
+    """
+    Starts the transactions of the given SQLite connection by taking the write lock.
+
+    SQLite fails a transaction that writes after reading, if another transaction wrote in the meantime, rather than
+    waiting for it. Taking the write lock upfront, every request made in a transaction, as requests are with
+    ``ATOMIC_REQUESTS``, waits for the requests made before it instead.
+    """
+    if connection.vendor == 'sqlite':
+        # pylint: disable=protected-access
+        connection._start_transaction_under_autocommit = lambda: connection.cursor().execute('BEGIN IMMEDIATE')
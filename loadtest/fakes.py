@@ -0,0 +1,345 @@
+"""
+Fakes of the upstream services called while checking out.
+
+Every fake is an HTTP server answering on a local port from threads of its own, so the service under load makes
+real HTTP calls, concurrently, as it does in production. The fakes answer with the smallest responses that let a
+checkout complete, after a configurable latency. They count the requests they receive, including the requests
+they cannot answer, which point to calls the harness does not expect.
+"""
+
+
+import datetime
+import ipaddress
+import json
+import os
+import re
+import ssl
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from jwt.algorithms import RSAAlgorithm
+
+HOST = '127.0.0.1'
+
+
+class Route:
+    """ Answers the requests with the given method whose path matches the given pattern. """
+
+    def __init__(self, name, method, pattern, handler):
+        self.name = name
+        self.method = method
+        self.pattern = re.compile(pattern)
+        self.handler = handler
+
+
+class FakeService:
+    """
+    Base class of the fakes.
+
+    Subclasses list their ``routes``. Handlers take the match of the path, the query parameters and the JSON body of
+    the request, and return a status code and a JSON-serializable body.
+    """
+
+    name = None
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = Counter()
+        self.server = None
+        self._lock = threading.Lock()
+
+    @property
+    def routes(self):
+        raise NotImplementedError
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(HOST, self.server.server_port)
+
+    def create_server(self):
+        server = ThreadingHTTPServer((HOST, 0), _make_handler(self))
+        server.daemon_threads = True
+        return server
+
+    def start(self):
+        self.server = self.create_server()
+        threading.Thread(target=self.server.serve_forever, name=self.name, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def dispatch(self, method, path, body):
+        url = urlparse(path)
+        for route in self.routes:
+            match = route.pattern.match(url.path)
+            if route.method == method and match:
+                self.record(route.name)
+                time.sleep(self.latency)
+                return route.handler(match, parse_qs(url.query), body)
+
+        self.record('unhandled {} {}'.format(method, url.path))
+        return 404, {'detail': 'Not found.'}
+
+    def record(self, route_name):
+        with self._lock:
+            self.requests[route_name] += 1
+
+
+def _make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        # Connections are kept alive, as they are by the connection pools of the clients.
+        protocol_version = 'HTTP/1.1'
+
+        def handle_request(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw_body = self.rfile.read(length) if length else b''
+            try:
+                body = json.loads(raw_body.decode('utf-8')) if raw_body else {}
+            except ValueError:
+                # OAuth requests are form encoded, and their bodies are not needed.
+                body = {}
+
+            status, data = service.dispatch(self.command, self.path, body)
+            content = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = handle_request
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+class FakeLMS(FakeService):
+    """ Fake of the LMS, which also serves the OAuth 2.0 provider of the service. """
+
+    name = 'lms'
+
+    @property
+    def routes(self):
+        return [
+            Route('access_token', 'POST', r'^/oauth2/access_token/?$', self.access_token),
+            Route('account', 'GET', r'^/api/user/v1/accounts/(?P<username>[^/]+)/?$', self.account),
+            Route('enrollments', 'GET', r'^/api/enrollment/v1/enrollment', self.enrollments),
+            Route('enroll', 'POST', r'^/api/enrollment/v1/enrollment/?$', self.enroll),
+            Route('entitlements', 'GET', r'^/api/entitlements/v1/entitlements/', self.entitlements),
+        ]
+
+    def access_token(self, match, query, body):  # pylint: disable=unused-argument
+        return 200, {'access_token': 'loadtest-access-token', 'expires_in': 3600, 'token_type': 'JWT'}
+
+    def account(self, match, query, body):  # pylint: disable=unused-argument
+        username = match.group('username')
+        return 200, {'username': username, 'email': '{}@example.com'.format(username), 'is_active': True}
+
+    def enrollments(self, match, query, body):  # pylint: disable=unused-argument
+        # Learners are not enrolled in anything yet.
+        return 200, []
+
+    def enroll(self, match, query, body):  # pylint: disable=unused-argument
+        return 200, {'is_active': True, 'mode': body.get('mode'), 'course_details': body.get('course_details')}
+
+    def entitlements(self, match, query, body):  # pylint: disable=unused-argument
+        return 200, {'count': 0, 'next': None, 'previous': None, 'results': []}
+
+
+class FakeDiscovery(FakeService):
+    """ Fake of the Discovery Service, which describes any course run it is asked about. """
+
+    name = 'discovery'
+
+    @property
+    def routes(self):
+        return [
+            Route('course_run', 'GET', r'^/api/v1/course_runs/(?P<key>[^/]+)/$', self.course_run),
+            Route('course', 'GET', r'^/api/v1/courses/(?P<key>[^/]+)/$', self.course),
+        ]
+
+    def course_run(self, match, query, body):  # pylint: disable=unused-argument
+        key = match.group('key')
+        return 200, {
+            'key': key,
+            'course': key,
+            'title': 'Load test course {}'.format(key),
+            'short_description': 'A course run sold while load testing.',
+            'start': '2020-01-01T00:00:00Z',
+            'enrollment_end': None,
+            'image': {'src': '/path/to/image.jpg'},
+        }
+
+    def course(self, match, query, body):  # pylint: disable=unused-argument
+        key = match.group('key')
+        return 200, {
+            'key': key,
+            'title': 'Load test course {}'.format(key),
+            'short_description': 'A course sold while load testing.',
+            'image': {'src': '/path/to/image.jpg'},
+            'course_runs': [],
+        }
+
+
+class FakeEnterprise(FakeService):
+    """ Fake of the Enterprise and Enterprise Catalog services, which link no learner to an enterprise. """
+
+    name = 'enterprise'
+
+    @property
+    def routes(self):
+        return [
+            Route('enterprise_learner', 'GET', r'^/enterprise/api/v1/enterprise-learner/$', self.enterprise_learner),
+            Route(
+                'contains_content_items',
+                'GET',
+                r'^/.*/(enterprise-catalogs|enterprise-customer)/[\w-]+/contains_content_items/$',
+                self.contains_content_items
+            ),
+        ]
+
+    def enterprise_learner(self, match, query, body):  # pylint: disable=unused-argument
+        return 200, {'count': 0, 'num_pages': 1, 'current_page': 1, 'results': [], 'next': None, 'previous': None}
+
+    def contains_content_items(self, match, query, body):  # pylint: disable=unused-argument
+        return 200, {'contains_content_items': False}
+
+
+class FakeCyberSource(FakeService):
+    """
+    Fake of the CyberSource REST API, which authorizes every payment.
+
+    The CyberSource SDK only calls the API over HTTPS, so the fake serves a certificate of its own, written to
+    ``certificate_path`` for the SDK to trust. Flex Microform, which tokenizes the card details entered on the payment
+    page, is played by ``tokenize``: it signs payment tokens with the key of the capture contexts of the fake.
+    """
+
+    name = 'cybersource'
+
+    def __init__(self, directory, latency=0.0):
+        super(FakeCyberSource, self).__init__(latency)
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+        self.certificate_path = os.path.join(directory, 'cybersource.crt')
+        self.key_path = os.path.join(directory, 'cybersource.key')
+        self._write_certificate()
+
+    @property
+    def routes(self):
+        return [
+            Route('capture_context', 'POST', r'^/flex/v1/keys$', self.capture_context),
+            Route('authorize', 'POST', r'^/pts/v2/payments$', self.authorize),
+        ]
+
+    @property
+    def host(self):
+        """ The host of the fake, used as the run environment of the SDK. """
+        return '{}:{}'.format(HOST, self.server.server_port)
+
+    def create_server(self):
+        server = super(FakeCyberSource, self).create_server()
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.certificate_path, self.key_path)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        return server
+
+    def capture_context(self, match, query, body):  # pylint: disable=unused-argument
+        now = int(time.time())
+        public_key = json.loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        claims = {
+            'flx': {'path': '/flex/v2/tokens', 'data': 'loadtest', 'origin': 'https://' + self.host, 'jwk': public_key},
+            'ctx': [{'data': {}, 'type': 'mf-0.11.0'}],
+            'iss': 'Flex API',
+            'iat': now,
+            'exp': now + 15 * 60,
+            'jti': uuid.uuid4().hex,
+        }
+        return 200, {'keyId': self._sign(claims)}
+
+    def tokenize(self):
+        """ Returns a payment token for a test card, as Flex Microform does when a learner submits the payment page. """
+        now = int(time.time())
+        claims = {
+            'data': {'number': '411111XXXXXX1111', 'type': '001', 'expirationMonth': '01', 'expirationYear': '2030'},
+            'iss': 'Flex/08',
+            'iat': now,
+            'exp': now + 15 * 60,
+            'jti': uuid.uuid4().hex,
+        }
+        return self._sign(claims)
+
+    def authorize(self, match, query, body):  # pylint: disable=unused-argument
+        body = _normalize_keys(body)
+        amount_details = body['orderinformation']['amountdetails']
+        transaction_id = str(uuid.uuid4().int)[:22]
+        return 201, {
+            'id': transaction_id,
+            'status': 'AUTHORIZED',
+            'submitTimeUtc': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'clientReferenceInformation': {'code': body['clientreferenceinformation']['code']},
+            'processorInformation': {
+                'approvalCode': '888888',
+                'transactionId': transaction_id,
+                'networkTransactionId': transaction_id,
+                'responseCode': '100',
+            },
+            'paymentInformation': {'tokenizedCard': {'type': '001'}, 'accountFeatures': {'category': 'A'}},
+            'orderInformation': {
+                'amountDetails': {
+                    'totalAmount': amount_details['totalamount'],
+                    'authorizedAmount': amount_details['totalamount'],
+                    'currency': amount_details['currency'],
+                },
+            },
+        }
+
+    def _sign(self, claims):
+        return jwt.encode(claims, self.private_key, algorithm='RS256').decode('utf-8')
+
+    def _write_certificate(self):
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, HOST)])
+        now = datetime.datetime.utcnow()
+        certificate = x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(
+            self.private_key.public_key()
+        ).serial_number(x509.random_serial_number()).not_valid_before(now).not_valid_after(
+            now + datetime.timedelta(days=1)
+        ).add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(HOST))]), critical=False
+        ).add_extension(
+            x509.BasicConstraints(ca=True, path_length=None), critical=True
+        ).sign(self.private_key, hashes.SHA256(), default_backend())
+
+        with open(self.certificate_path, 'wb') as f:
+            f.write(certificate.public_bytes(serialization.Encoding.PEM))
+        with open(self.key_path, 'wb') as f:
+            f.write(self.private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption(),
+            ))
+
+
+def _normalize_keys(data):
+    """
+    Returns the given request body, with its keys lowercased and stripped of underscores.
+
+    The SDK sends the attributes of its models under their names in the API, e.g. ``totalAmount``, or under the
+    names of their Python attributes, e.g. ``_total_amount``, depending on how the models are serialized.
+    """
+    if isinstance(data, dict):
+        return {key.replace('_', '').lower(): _normalize_keys(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_normalize_keys(value) for value in data]
+    return data
@@ -0,0 +1,113 @@
+"""
+Summarizes the results of a run as throughput, latency percentiles, and database and HTTP counts per phase.
+"""
+
+
+import math
+from collections import Counter
+
+from loadtest.scenarios import PAYMENT_SUBMIT, PHASES
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, percent):
+    """ Returns the given percentile of the given sorted values, with the nearest-rank method. """
+    if not values:
+        return None
+    rank = max(int(math.ceil(percent / 100.0 * len(values))), 1)
+    return values[rank - 1]
+
+
+def summarize(results, fakes):
+    """
+    Returns a JSON-serializable summary of the given results, and of the requests received by the given fakes.
+
+    Latencies are in milliseconds. Database and HTTP counts are averages per request.
+    """
+    requests = sum(len(phase_results) for phase_results in results.phases.values())
+    payments = [result for result in results.phases.get(PAYMENT_SUBMIT, []) if not result.error]
+    summary = {
+        'duration': round(results.duration, 3),
+        'requests': requests,
+        'requests_per_second': _rate(requests, results.duration),
+        'checkouts': len(payments),
+        'checkouts_per_second': _rate(len(payments), results.duration),
+        'scenarios': {scenario: dict(counts) for scenario, counts in sorted(results.scenarios.items())},
+        'phases': {},
+        'upstream_requests': {fake.name: dict(fake.requests) for fake in fakes},
+    }
+
+    for phase in PHASES:
+        phase_results = results.phases.get(phase)
+        if not phase_results:
+            continue
+
+        latencies = sorted(result.duration * 1000 for result in phase_results)
+        count = len(phase_results)
+        http_hosts = Counter()
+        for result in phase_results:
+            http_hosts.update(result.profile.http_hosts)
+        summary['phases'][phase] = {
+            'count': count,
+            'errors': dict(Counter(result.error for result in phase_results if result.error)),
+            'latency': dict(
+                [('p{}'.format(percent), round(percentile(latencies, percent), 1)) for percent in PERCENTILES] +
+                [('mean', round(sum(latencies) / count, 1)), ('max', round(latencies[-1], 1))]
+            ),
+            'queries': _mean(result.profile.queries for result in phase_results),
+            'duplicate_queries': _mean(result.profile.duplicate_queries for result in phase_results),
+            'db_time': _mean(result.profile.db_time * 1000 for result in phase_results),
+            'http_calls': _mean(result.profile.http_calls for result in phase_results),
+            'http_time': _mean(result.profile.http_time * 1000 for result in phase_results),
+            'http_hosts': {host: round(calls / count, 2) for host, calls in sorted(http_hosts.items())},
+        }
+    return summary
+
+
+def format_summary(summary):
+    """ Returns the given summary as a table of phases, followed by the totals of the run. """
+    header = ['phase', 'count', 'errors'] + ['p{}'.format(percent) for percent in PERCENTILES] + [
+        'max', 'queries', 'dup', 'db ms', 'http', 'http ms'
+    ]
+    rows = [header]
+    for phase, data in summary['phases'].items():
+        latency = data['latency']
+        rows.append(
+            [phase, data['count'], sum(data['errors'].values())] +
+            [latency['p{}'.format(percent)] for percent in PERCENTILES] +
+            [latency['max'], data['queries'], data['duplicate_queries'], data['db_time'], data['http_calls'],
+             data['http_time']]
+        )
+
+    widths = [max(len(str(row[index])) for row in rows) for index in range(len(header))]
+    lines = [
+        '  '.join(str(value).ljust(width) if index == 0 else str(value).rjust(width)
+                  for index, (value, width) in enumerate(zip(row, widths)))
+        for row in rows
+    ]
+    lines.append('')
+    lines.append('Latencies are in milliseconds. Queries and HTTP calls are averages per request.')
+    lines.append('')
+    lines.append('{requests} requests in {duration}s: {requests_per_second} requests/s, '
+                 '{checkouts} checkouts, {checkouts_per_second} checkouts/s'.format(**summary))
+
+    for scenario, counts in summary['scenarios'].items():
+        lines.append('Scenario {}: {} completed, {} failed'.format(scenario, counts['completed'], counts['failed']))
+    for phase, data in summary['phases'].items():
+        for error, count in sorted(data['errors'].items()):
+            lines.append('Error in {}, {} times: {}'.format(phase, count, error))
+    for name, requests in summary['upstream_requests'].items():
+        lines.append('Upstream {}: {}'.format(
+            name, ', '.join('{} {}'.format(route, count) for route, count in sorted(requests.items())) or 'none'
+        ))
+    return '\n'.join(lines)
+
+
+def _mean(values):
+    values = list(values)
+    return round(sum(values) / len(values), 2)
+
+
+def _rate(count, duration):
+    return round(count / duration, 2) if duration else 0.0
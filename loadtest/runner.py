@@ -0,0 +1,99 @@
+"""
+Replays scenarios concurrently, timing and profiling every phase.
+"""
+
+
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+from ecommerce.core.instrumentation import profile
+from loadtest.scenarios import SCENARIOS
+
+
+class PhaseResult:
+    """ Timing and profile of a phase of a scenario, and the error the phase failed with, if any. """
+
+    def __init__(self, phase, duration, request_profile, error=None):
+        self.phase = phase
+        self.duration = duration
+        self.profile = request_profile
+        self.error = error
+
+
+class Results:
+    """ Results of the phases and scenarios replayed during a run. """
+
+    def __init__(self):
+        self.phases = defaultdict(list)
+        self.scenarios = defaultdict(lambda: {'completed': 0, 'failed': 0})
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def record_phase(self, result):
+        with self._lock:
+            self.phases[result.phase].append(result)
+
+    def record_scenario(self, scenario, completed):
+        with self._lock:
+            self.scenarios[scenario]['completed' if completed else 'failed'] += 1
+
+
+def pick_scenarios(mix, count, seed=None):
+    """ Returns the given number of scenario names, drawn at random with the relative weights of the given mix. """
+    names = sorted(mix)
+    return random.Random(seed).choices(names, weights=[mix[name] for name in names], k=count)
+
+
+def run_scenario(scenario, checkout, results=None):
+    """
+    Runs the phases of the given scenario for the given checkout, one after another, until one of them fails.
+
+    Results are recorded to the given results, if any, so that scenarios can be run to warm the service up.
+    """
+    try:
+        for phase in SCENARIOS[scenario]:
+            error = None
+            with profile(phase) as request_profile:
+                started = time.perf_counter()
+                try:
+                    getattr(checkout, phase)()
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Unexpected answers, as well as the exceptions of the views, which the service would answer
+                    # with a server error.
+                    error = '{}: {}'.format(exc.__class__.__name__, exc)
+                duration = time.perf_counter() - started
+
+            if results is not None:
+                results.record_phase(PhaseResult(phase, duration, request_profile, error))
+            if error:
+                break
+        if results is not None:
+            results.record_scenario(scenario, completed=error is None)
+    finally:
+        # Every thread has connections of its own, which are closed as they would be at the end of a request.
+        connections.close_all()
+
+
+def run(scenarios, checkouts, concurrency):
+    """
+    Runs the given scenarios, each for a checkout of its own, with the given number of scenarios in flight at once.
+
+    Returns:
+        Results
+    """
+    results = Results()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest') as executor:
+        started = time.perf_counter()
+        futures = [
+            executor.submit(run_scenario, scenario, checkout, results)
+            for scenario, checkout in zip(scenarios, checkouts)
+        ]
+        for future in futures:
+            future.result()
+        results.duration = time.perf_counter() - started
+    return results
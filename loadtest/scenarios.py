@@ -0,0 +1,148 @@
+"""
+The phases of a checkout, and the scenarios that string them together.
+
+Phases make the requests the payment microfrontend, and the pages linking to it, make on behalf of a learner.
+Scenarios are the journeys of learners through the phases, from looking up the price of a seat to reading the
+receipt of their order. Most learners look up prices, or add seats to their baskets, without checking out.
+"""
+
+
+import threading
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from django.test import Client
+from django.urls import reverse
+
+from loadtest.data import DOMAIN
+
+CALCULATE = 'calculate'
+BASKET_ADD = 'basket_add'
+BASKET_SUMMARY = 'basket_summary'
+VOUCHER_APPLY = 'voucher_apply'
+CAPTURE_CONTEXT = 'capture_context'
+PAYMENT_SUBMIT = 'payment_submit'
+ORDER_COMPLETION = 'order_completion'
+
+PHASES = (CALCULATE, BASKET_ADD, BASKET_SUMMARY, VOUCHER_APPLY, CAPTURE_CONTEXT, PAYMENT_SUBMIT, ORDER_COMPLETION)
+
+SCENARIOS = {
+    'browse': (CALCULATE,),
+    'abandon': (CALCULATE, BASKET_ADD, BASKET_SUMMARY),
+    'checkout': (CALCULATE, BASKET_ADD, BASKET_SUMMARY, CAPTURE_CONTEXT, PAYMENT_SUBMIT, ORDER_COMPLETION),
+    'voucher_checkout': (
+        CALCULATE, BASKET_ADD, BASKET_SUMMARY, VOUCHER_APPLY, CAPTURE_CONTEXT, PAYMENT_SUBMIT, ORDER_COMPLETION
+    ),
+}
+
+# Relative weights of the scenarios, in the mix replayed by default.
+DEFAULT_MIX = {
+    'browse': 40,
+    'abandon': 30,
+    'checkout': 20,
+    'voucher_checkout': 10,
+}
+
+BILLING_ADDRESS = {
+    'first_name': 'Load',
+    'last_name': 'Test',
+    'address_line1': '141 Portland Ave.',
+    'address_line2': 'Floor 9',
+    'city': 'Cambridge',
+    'state': 'MA',
+    'postal_code': '02139',
+    'country': 'US',
+}
+
+
+class PhaseError(Exception):
+    """ Raised when the service does not answer a phase as it would answer a successful checkout. """
+
+    def __init__(self, phase, response):
+        super(PhaseError, self).__init__('{} answered {}'.format(phase, response.status_code))
+        self.status_code = response.status_code
+
+
+class CheckoutClient(Client):
+    """
+    Test client of a checkout.
+
+    Test clients store the exceptions of every view that fails while they make a request, so they would raise the
+    exceptions of the requests made on other threads. This one only stores the exceptions raised on its own thread.
+    """
+
+    _thread_id = None
+
+    def request(self, **request):
+        self._thread_id = threading.get_ident()
+        return super(CheckoutClient, self).request(**request)
+
+    def store_exc_info(self, **kwargs):
+        if threading.get_ident() == self._thread_id:
+            super(CheckoutClient, self).store_exc_info(**kwargs)
+
+
+class Checkout:
+    """
+    The session of a learner, who buys a seat.
+
+    Every phase is a method, named after the phase, which raises ``PhaseError`` if the service answers it with an
+    unexpected status.
+    """
+
+    def __init__(self, learner, sku, voucher_code, cybersource):
+        self.learner = learner
+        self.sku = sku
+        self.voucher_code = voucher_code
+        self.cybersource = cybersource
+        self.client = CheckoutClient(SERVER_NAME=DOMAIN)
+        self.basket_id = None
+        self.order_number = None
+
+    def log_in(self):
+        self.client.force_login(self.learner)
+
+    def calculate(self):
+        self._request(CALCULATE, 200, 'get', reverse('api:v2:baskets:calculate'), {'sku': self.sku})
+
+    def basket_add(self):
+        # The learner is redirected to the payment microfrontend.
+        self._request(BASKET_ADD, 303, 'get', reverse('basket:basket-add'), {'sku': self.sku})
+
+    def basket_summary(self):
+        response = self._request(BASKET_SUMMARY, 200, 'get', reverse('bff:payment:v0:payment'))
+        self.basket_id = response.json()['basket_id']
+
+    def voucher_apply(self):
+        response = self._request(
+            VOUCHER_APPLY, 200, 'post', reverse('bff:payment:v0:addvoucher'), {'code': self.voucher_code}
+        )
+        if not response.json()['coupons']:
+            raise PhaseError(VOUCHER_APPLY, response)
+
+    def capture_context(self):
+        response = self._request(CAPTURE_CONTEXT, 200, 'get', reverse('bff:payment:v0:capture_context'))
+        if 'capture_context' not in response.json():
+            raise PhaseError(CAPTURE_CONTEXT, response)
+
+    def payment_submit(self):
+        data = dict(BILLING_ADDRESS, basket=self.basket_id, payment_token=self.cybersource.tokenize())
+        response = self._request(PAYMENT_SUBMIT, 201, 'post', reverse('cybersource:authorize'), data)
+        receipt_page_url = urlparse(response.json()['receipt_page_url'])
+        self.order_number = parse_qs(receipt_page_url.query)['order_number'][0]
+
+    def order_completion(self):
+        # The receipt page polls the order until it is fulfilled.
+        response = self._request(
+            ORDER_COMPLETION, 200, 'get', reverse('api:v2:order-detail', kwargs={'number': self.order_number})
+        )
+        if response.json()['status'] != 'Complete':
+            raise PhaseError(ORDER_COMPLETION, response)
+
+    def _request(self, phase, expected_status, method, path, data=None):
+        if method == 'get' and data:
+            path = '{}?{}'.format(path, urlencode(data))
+            data = None
+        response = getattr(self.client, method)(path, data)
+        if response.status_code != expected_status:
+            raise PhaseError(phase, response)
+        return response